@@ -63,6 +63,10 @@ def register_blueprints(app):
     app.register_blueprint(upload_bp, url_prefix='/admin/upload')
     app.logger.info("已注册上传文件蓝图: /admin/upload")
     
+    # 注册API蓝图（/api/posts 等接口）
+    from app.controllers.api import bp as api_bp
+    app.register_blueprint(api_bp, url_prefix='/api')
+    
     # 为原始URL路径添加处理函数
     @app.route('/blog/post/<int:post_id>')
     def original_post_detail(post_id):
@@ -75,9 +79,9 @@ def register_blueprints(app):
             if not post:
                 return f"文章不存在：ID={post_id}", 404
             
-            # 增加浏览量
-            post.view_count += 1
-            db.session.commit()
+            # 增加浏览量（写入缓冲区，定期批量落库）
+            from app.services.view_counter import view_counter_service
+            view_count = (post.view_count or 0) + view_counter_service.record(post_id)
             
             # 构建HTML响应，不使用模板
             html = f"""
@@ -99,7 +103,7 @@ def register_blueprints(app):
                     <div class="header">
                         <h1>{post.title}</h1>
                         <p>发布时间：{post.created_at.strftime('%Y-%m-%d %H:%M:%S') if post.created_at else '未知'}</p>
-                        <p>浏览次数：{post.view_count}</p>
+                        <p>浏览次数：{view_count}</p>
                     </div>
                     <div class="content">
                         {post.html_content or post.content or '无内容'}
@@ -134,9 +138,9 @@ def register_blueprints(app):
             if not post:
                 return f"文章不存在：ID={post_id}", 404
             
-            # 增加浏览量
-            post.view_count += 1
-            db.session.commit()
+            # 增加浏览量（写入缓冲区，定期批量落库）
+            from app.services.view_counter import view_counter_service
+            view_count = (post.view_count or 0) + view_counter_service.record(post_id)
             
             # 构建HTML响应，不使用模板
             html = f"""
@@ -158,7 +162,7 @@ def register_blueprints(app):
                     <div class="header">
                         <h1>{post.title}</h1>
                         <p>发布时间：{post.created_at.strftime('%Y-%m-%d %H:%M:%S') if post.created_at else '未知'}</p>
-                        <p>浏览次数：{post.view_count}</p>
+                        <p>浏览次数：{view_count}</p>
                     </div>
                     <div class="content">
                         {post.html_content or post.content or '无内容'}
@@ -327,9 +331,9 @@ def register_blueprints(app):
             if not post:
                 return f"文章不存在：ID=6", 404
             
-            # 增加浏览量
-            post.view_count += 1
-            db.session.commit()
+            # 增加浏览量（写入缓冲区，定期批量落库）
+            from app.services.view_counter import view_counter_service
+            view_count = (post.view_count or 0) + view_counter_service.record(post.id)
             
             # 构建HTML响应，不使用模板
             html = f"""
@@ -351,7 +355,7 @@ def register_blueprints(app):
                     <div class="header">
                         <h1>{post.title}</h1>
                         <p>发布时间：{post.created_at.strftime('%Y-%m-%d %H:%M:%S') if post.created_at else '未知'}</p>
-                        <p>浏览次数：{post.view_count}</p>
+                        <p>浏览次数：{view_count}</p>
                     </div>
                     <div class="content">
                         {post.html_content or post.content or '无内容'}
@@ -375,7 +379,7 @@ def register_blueprints(app):
             return error_msg, 500
 
     # 添加一个路由来提供上传的图片文件
-    @app.route('/uploads/images/<filename>')
+    @app.route('/uploads/images/<path:filename>')
     def uploaded_images(filename):
         """提供上传的图片文件"""
         try:
@@ -410,9 +414,50 @@ def create_app(config_class=DevelopmentConfig):
     # 初始化扩展
     init_app(app)
     
+    # 初始化 SQL 查询分析（最先注册，请求计时覆盖其他钩子）
+    from app.services.query_profiler import query_profiler
+    query_profiler.init_app(app)
+    
+    # 初始化身份快照与权限缓存
+    from app.services.identity import identity_service
+    from app.services.permission_cache import permission_cache_service
+    identity_service.init_app(app)
+    permission_cache_service.init_app(app)
+    
+    # 初始化浏览量缓冲计数
+    from app.services.view_counter import view_counter_service
+    view_counter_service.init_app(app)
+    
+    # 初始化限流服务
+    from app.services.rate_limit import rate_limiter_service
+    rate_limiter_service.init_app(app)
+    
+    # 初始化操作日志批量写入
+    from app.services.operation_log import operation_log_writer
+    operation_log_writer.init_app(app)
+    
+    # 初始化Markdown渲染缓存
+    from app.services.markdown_render import markdown_render_service
+    markdown_render_service.init_app(app)
+    
+    # 初始化图片处理服务
+    from app.services.image_processing import image_processing_service
+    image_processing_service.init_app(app)
+    
+    # 初始化相关文章后台更新
+    from app.services.related import related_posts_service
+    related_posts_service.init_app(app)
+    
+    # 加载全文检索服务（注册文章索引同步事件）
+    from app.services.search import search_service
+    
     # 注册蓝图
     register_blueprints(app)
     
+    # 注册命令行命令
+    from app.cli import register_commands
+    register_commands(app)
+    
     # 注册模板过滤器
     init_filters(app)
     
@@ -466,6 +511,8 @@ def create_app(config_class=DevelopmentConfig):
     # 初始化数据库
     with app.app_context():
         db.create_all()
+        # 确保全文索引存在
+        search_service.ensure_index()
         # 初始化角色
         Role.insert_roles()
         # 确保超级管理员用户存在
@@ -101,9 +101,100 @@ def fix_comment_status():
     else:
         click.echo(f"评论状态修复失败: {result['message']}")
 
+@click.command('flush-views')
+@with_appcontext
+def flush_views_command():
+    """将缓冲中的文章浏览量写回数据库"""
+    from app.services.view_counter import view_counter_service
+    
+    updated = view_counter_service.flush()
+    click.echo(f'浏览量已落库，共更新 {updated} 篇文章.')
+
+@click.command('reindex-search')
+@with_appcontext
+def reindex_search_command():
+    """全量重建文章全文索引"""
+    from app.services.search import search_service
+    
+    total = search_service.rebuild()
+    click.echo(f'全文索引已重建，共索引 {total} 篇文章.')
+
+@click.command('rebuild-related')
+@with_appcontext
+def rebuild_related_command():
+    """全量重建相关文章表"""
+    from app.services.related import related_posts_service
+    
+    total = related_posts_service.rebuild()
+    click.echo(f'相关文章已重建，共计算 {total} 篇文章.')
+
+@click.command('process-images')
+@click.option('--retry-failed', is_flag=True, help='同时重新处理失败的图片')
+@with_appcontext
+def process_images_command(retry_failed):
+    """在当前进程中处理积压的上传图片"""
+    from app.services.image_processing import image_processing_service
+    
+    total = image_processing_service.process_pending(include_failed=retry_failed)
+    click.echo(f'图片处理完成，共处理 {total} 张图片.')
+
+@click.command('purge-sessions')
+@with_appcontext
+def purge_sessions_command():
+    """分批清理过期和已注销的会话"""
+    from app.models.session import UserSession
+    
+    total = UserSession.cleanup_expired()
+    click.echo(f'过期会话已清理，共删除 {total} 条.')
+
+@click.command('seed-bench')
+@click.option('--posts', default=50000, show_default=True, type=click.IntRange(0), help='文章数量')
+@click.option('--comments', default=500000, show_default=True, type=click.IntRange(0), help='评论数量')
+@click.option('--tags', default=2000, show_default=True, type=click.IntRange(0), help='标签数量')
+@click.option('--users', default=5000, show_default=True, type=click.IntRange(0), help='用户数量')
+@click.option('--categories', default=30, show_default=True, type=click.IntRange(0), help='分类数量')
+@click.option('--seed', default=42, show_default=True, help='随机种子，相同种子生成相同内容')
+@click.option('--prefix', default='bench-', show_default=True, help='名称前缀，便于识别和清理')
+@click.option('--skip-related', is_flag=True, help='跳过相关文章表重建（文章很多时较慢）')
+@with_appcontext
+def seed_bench_command(posts, comments, tags, users, categories, seed, prefix, skip_related):
+    """批量生成基准测试数据集"""
+    import time
+    from app.extensions import cache
+    from app.utils.bench_seed import BenchSeeder
+    from app.services.search import search_service
+    from app.services.related import related_posts_service
+    from app.services.archive import archive_service
+    
+    started = time.monotonic()
+    
+    def progress(label, total):
+        click.echo(f'\r{label}: {total}', nl=False)
+    
+    seeder = BenchSeeder(seed=seed, prefix=prefix, progress=progress)
+    result = seeder.seed_all(posts=posts, comments=comments, tags=tags, users=users,
+                             categories=categories)
+    click.echo()
+    
+    # 批量插入不触发模型事件，统一重建派生数据
+    click.echo(f'全文索引已重建，共索引 {search_service.rebuild()} 篇文章.')
+    if not skip_related:
+        click.echo(f'相关文章已重建，共计算 {related_posts_service.rebuild()} 篇文章.')
+    archive_service.rebuild()
+    cache.clear()
+    
+    counts = ', '.join(f'{name} {len(ids)}' for name, ids in result.items())
+    click.echo(f'基准数据已生成（{counts}），耗时 {time.monotonic() - started:.1f} 秒.')
+
 def register_commands(app):
     """注册命令行命令"""
     app.cli.add_command(init_db_command)
     app.cli.add_command(seed_db_command)
     app.cli.add_command(create_admin_command)
-    app.cli.add_command(fix_comment_status) 
\ No newline at end of file
+    app.cli.add_command(fix_comment_status)
+    app.cli.add_command(flush_views_command)
+    app.cli.add_command(reindex_search_command)
+    app.cli.add_command(rebuild_related_command)
+    app.cli.add_command(process_images_command)
+    app.cli.add_command(purge_sessions_command)
+    app.cli.add_command(seed_bench_command) 
\ No newline at end of file
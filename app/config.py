@@ -56,8 +56,10 @@ class Config:
     }
     
     # 缓存配置
-    CACHE_TYPE = 'SimpleCache'
+    CACHE_TYPE = 'app.utils.cache.BoundedCache'  # 有界 LRU 进程内缓存
     CACHE_DEFAULT_TIMEOUT = 300
+    CACHE_THRESHOLD = 2000  # 最大缓存条目数
+    CACHE_SWEEP_INTERVAL = 60  # 过期条目清理间隔（秒）
     
     # 文件上传配置
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
@@ -77,6 +79,57 @@ class Config:
     IMAGE_MAX_DIMENSION = 1024  # 最大图片尺寸
     IMAGE_QUALITY = 85  # 图片质量
     IMAGE_FORMAT = 'JPEG'  # 默认保存格式
+    IMAGE_PROCESSING_ASYNC = True  # 在后台进程池中生成变体
+    IMAGE_PROCESSING_WORKERS = 2  # 进程池大小
+    IMAGE_VARIANT_WIDTHS = (480, 960, 1600)  # 响应式变体宽度
+    IMAGE_THUMBNAIL_SIZE = (300, 300)  # 缩略图尺寸
+    
+    # 浏览量缓冲配置
+    VIEW_COUNTER_BACKEND = 'memory'  # memory: 进程内缓冲; sqlite: 多进程共享的 WAL 文件缓冲
+    VIEW_COUNTER_BUFFER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'view_buffer.db')
+    VIEW_COUNTER_FLUSH_INTERVAL = 30  # 落库间隔（秒）
+    VIEW_COUNTER_FLUSH_THRESHOLD = 100  # 累计访问次数达到该值时落库
+    
+    # SQL 查询分析配置
+    SQL_PROFILER_ENABLED = True  # 统计每个请求的查询次数和数据库耗时
+    SQL_PROFILER_SERVER_TIMING = False  # 输出 Server-Timing 响应头（db、render、total），会暴露服务端耗时，只在开发环境开启
+    SQL_SLOW_QUERY_THRESHOLD = 200  # 慢查询阈值（毫秒），超过时记录语句和查询计划
+    SQL_REPEAT_THRESHOLD = 5  # 同一请求中相同语句执行次数达到该值时视为疑似 N+1
+    
+    # 操作日志写入配置
+    OPERATION_LOG_ASYNC = True  # 由后台线程批量写入
+    OPERATION_LOG_QUEUE_SIZE = 10000  # 队列容量，满时由请求线程同步写入
+    OPERATION_LOG_BATCH_SIZE = 200  # 每个事务最多插入的日志数
+    OPERATION_LOG_FLUSH_INTERVAL = 1.0  # 后台线程等待新日志的间隔（秒）
+    
+    # 相关文章更新配置
+    RELATED_POSTS_ASYNC = True  # 由后台线程重算受影响的文章
+    RELATED_POSTS_DELAY = 2.0  # 合并连续修改的等待时间（秒）
+    RELATED_POSTS_INDEX_TTL = 3600  # 进程内向量索引的重新加载间隔（秒），校正其他进程的修改
+    
+    # 限流配置
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_BACKEND = 'sqlite'  # memory: 进程内计数; sqlite: 多进程共享的 WAL 文件计数
+    RATE_LIMIT_STORAGE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'rate_limits.db')
+    RATE_LIMIT_POLICIES = {  # 策略名: (窗口内最大请求数, 窗口秒数)
+        'default': (60, 60),
+        'login': (10, 300),
+        'comment': (5, 60),
+        'search': (30, 60),
+        'api': (120, 60),
+    }
+    
+    # Markdown 渲染缓存配置
+    MARKDOWN_CACHE_SIZE = 256  # 进程内 LRU 缓存条目数
+    MARKDOWN_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'markdown_cache')  # 磁盘缓存目录，None 表示不使用
+    MARKDOWN_DISK_CACHE_MAX_FILES = 2000  # 磁盘缓存最多保留的文件数，超出后删除最旧的文件
+    
+    # 归档页每页显示的月份数
+    ARCHIVE_MONTHS_PER_PAGE = 12
+    
+    # 整页响应缓存配置（仅匿名访客）
+    PAGE_CACHE_ENABLED = True
+    PAGE_CACHE_TIMEOUT = 600  # 兜底过期时间（秒），正常情况下按依赖标签失效
     
     # 分页配置
     POSTS_PER_PAGE = 10
@@ -89,19 +142,28 @@ class Config:
     BLOG_AUTHOR = 'Denny'
     BLOG_EMAIL = 'admin@example.com'
     
-    # 会话配置
-    SESSION_TYPE = 'filesystem'
+    # 会话配置（database：保存在 user_sessions 表，仅在内容变化时写入）
+    SESSION_TYPE = 'database'
     SESSION_FILE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'flask_session')
     SESSION_FILE_THRESHOLD = 500
     SESSION_PERMANENT = True
     SESSION_USE_SIGNER = True
     SESSION_KEY_PREFIX = 'myblog_'
+    SESSION_REFRESH_INTERVAL = 3600  # 过期时间续期粒度（秒），未变化的会话最多每小时写一次
+    SESSION_CACHE_TTL = 60  # 进程内会话缓存有效期（秒），注销最迟在此时间后在其他进程生效
+    SESSION_CACHE_SIZE = 1024
+    IDENTITY_CACHE_TTL = 60  # 进程内身份快照有效期（秒），其他进程提交的停用和资料变化最迟在此时间后生效
+    PERMISSION_CACHE_TTL = 60  # 进程内权限位掩码有效期（秒），其他进程撤销的权限最迟在此时间后生效
+    SESSION_PURGE_EVERY = 1000  # 每写入多少次会话清理一次过期记录
+    SESSION_PURGE_BATCH_SIZE = 500
+    SESSION_BIND_IP = False
+    SESSION_BIND_USER_AGENT = True
     SESSION_COOKIE_NAME = 'myblog_session'
     SESSION_COOKIE_SECURE = False
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
-    SESSION_REFRESH_EACH_REQUEST = True
+    SESSION_REFRESH_EACH_REQUEST = False  # database 会话按 SESSION_REFRESH_INTERVAL 粗粒度续期
     
     # 记住我 cookie 配置
     REMEMBER_COOKIE_NAME = 'remember_token'
@@ -260,6 +322,7 @@ class DevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:////data/myblog/instance/blog-dev.db'
     SQLALCHEMY_ECHO = True  # 输出 SQL 语句
+    SQL_PROFILER_SERVER_TIMING = True  # 在浏览器开发者工具中查看请求耗时
     
     # 开发环境日志配置
     LOG_LEVEL = 'DEBUG'
@@ -275,7 +338,7 @@ class DevelopmentConfig(Config):
     IMAGE_UPLOAD_FOLDER = os.path.join(UPLOAD_FOLDER, 'images')
     
     # 开发环境缓存配置
-    CACHE_TYPE = 'SimpleCache'
+    CACHE_TYPE = 'app.utils.cache.BoundedCache'
     CACHE_DEFAULT_TIMEOUT = 0  # 禁用缓存
     
     @classmethod
@@ -350,6 +413,25 @@ class TestingConfig(Config):
     # 文件上传配置
     MAX_CONTENT_LENGTH = 1 * 1024 * 1024  # 1MB for testing
     
+    # 测试环境不使用磁盘渲染缓存
+    MARKDOWN_CACHE_DIR = None
+    
+    # 测试环境默认关闭整页缓存，避免用例之间互相影响
+    PAGE_CACHE_ENABLED = False
+    
+    # 测试环境默认关闭限流，使用进程内计数
+    RATE_LIMIT_ENABLED = False
+    RATE_LIMIT_BACKEND = 'memory'
+    
+    # 测试环境在请求中同步生成图片变体，便于断言
+    IMAGE_PROCESSING_ASYNC = False
+    
+    # 测试环境同步写入操作日志
+    OPERATION_LOG_ASYNC = False
+    
+    # 测试环境不启动相关文章后台线程，由用例调用 process_pending()
+    RELATED_POSTS_ASYNC = False
+    
     @classmethod
     def init_app(cls, app):
         """初始化测试应用"""
@@ -19,6 +19,7 @@ from app.services.tag import TagService
 from app.services.comment import CommentService
 from app.services.notification import NotificationService
 from app.services.operation_log import operation_log_service
+from app.services.rate_limit import rate_limiter_service
 from app.services import get_post_service, get_category_service, get_tag_service, get_comment_service
 from app.models.post import PostStatus
 
@@ -47,6 +48,7 @@ from . import tag
 from . import comment
 from . import settings
 from . import post
+from . import operation_log
 
 # 导入用户管理蓝图
 from app.views.admin.user import bp as user_bp
@@ -60,6 +62,7 @@ admin_bp.register_blueprint(category.category_bp, url_prefix='/category')
 admin_bp.register_blueprint(tag.tag_bp, url_prefix='/tag')
 admin_bp.register_blueprint(comment.comment_bp, url_prefix='/comment')
 admin_bp.register_blueprint(settings.settings_bp, url_prefix='/settings')
+admin_bp.register_blueprint(operation_log.operation_log_bp, url_prefix='/operation_log')
 # 注册用户管理蓝图
 admin_bp.register_blueprint(user_bp, url_prefix='/user')
 
@@ -371,6 +374,7 @@ def profile():
 
 # 登录页面路由
 @admin_bp.route('/login', methods=['GET', 'POST'])
+@rate_limiter_service.limit('login', methods=('POST',))
 def login():
     """管理后台登录页"""
     # 如果用户已登录，则重定向到管理后台首页
@@ -49,6 +49,9 @@ def dashboard():
             current_app.logger.info(f"标签数: {tag_count}")
             
             view_count = db.session.query(func.sum(Post.view_count)).scalar() or 0
+            # 加上缓冲区中尚未落库的浏览量
+            from app.services.view_counter import view_counter_service
+            view_count += view_counter_service.get_pending_total()
             current_app.logger.info(f"浏览量: {view_count}")
             
             # 获取最近文章
@@ -64,6 +67,24 @@ def dashboard():
             post_count = published_count = draft_count = comment_count = category_count = tag_count = view_count = 0
             recent_posts = []
         
+        # 获取缓存统计（仅有界缓存后端提供）
+        cache_stats = None
+        try:
+            from app.extensions import cache
+            backend = getattr(cache, 'cache', None)
+            if hasattr(backend, 'stats'):
+                cache_stats = backend.stats()
+        except Exception as e:
+            current_app.logger.error(f"获取缓存统计失败: {str(e)}")
+        
+        # 获取各端点的 SQL 统计（当前进程）
+        query_stats = []
+        try:
+            from app.services.query_profiler import query_profiler
+            query_stats = query_profiler.endpoint_stats()
+        except Exception as e:
+            current_app.logger.error(f"获取 SQL 统计失败: {str(e)}")
+        
         # 尝试查找模板文件
         template_path = os.path.join(current_app.template_folder, 'admin', 'index.html')
         current_app.logger.info(f"检查模板文件: {template_path}")
@@ -83,7 +104,9 @@ def dashboard():
             category_count=category_count,
             tag_count=tag_count,
             view_count=view_count,
-            recent_posts=recent_posts
+            recent_posts=recent_posts,
+            cache_stats=cache_stats,
+            query_stats=query_stats
         )
     except Exception as e:
         current_app.logger.error(f"加载后台首页失败: {str(e)}")
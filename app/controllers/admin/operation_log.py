@@ -7,7 +7,8 @@
 from flask import Blueprint, render_template, request, current_app, abort
 from flask_login import login_required
 from app.decorators import admin_required
-from app.services.operation_log import operation_log_service
+from app.services.operation_log import operation_log_service, operation_log_writer
+from app.utils.pagination import InvalidCursor
 
 operation_log_bp = Blueprint('operation_log', __name__)
 
@@ -20,17 +21,23 @@ def index():
     operation = request.args.get('operation')
     target_type = request.args.get('target_type')
     
-    logs = operation_log_service.get_operation_logs(
-        operation=operation,
-        target_type=target_type,
-        page=page,
-        per_page=current_app.config['ITEMS_PER_PAGE']
-    )
+    try:
+        logs = operation_log_service.get_operation_logs(
+            operation=operation,
+            target_type=target_type,
+            page=page,
+            per_page=current_app.config.get('ITEMS_PER_PAGE', 20),
+            cursor=request.args.get('cursor'),
+            before=request.args.get('before')
+        )
+    except InvalidCursor:
+        abort(400)
     
     return render_template('admin/operation_log/list.html', 
                          logs=logs,
                          operation=operation,
-                         target_type=target_type)
+                         target_type=target_type,
+                         writer_stats=operation_log_writer.stats())
 
 @operation_log_bp.route('/<int:log_id>')
 @login_required
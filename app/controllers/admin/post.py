@@ -19,7 +19,9 @@ from app.decorators import admin_required
 from app.services.post import PostService
 from app.services.category import CategoryService
 from app.services.tag import TagService
-from app.utils.file import allowed_file, save_file
+from app.services.sidebar import SidebarStatsService
+from app.utils.file import allowed_file
+from app.services.image_processing import image_processing_service
 import os
 
 post_bp = Blueprint('post', __name__)
@@ -28,6 +30,7 @@ post_bp = Blueprint('post', __name__)
 post_service = get_post_service()
 category_service = get_category_service()
 tag_service = get_tag_service()
+sidebar_stats_service = SidebarStatsService()
 
 @post_bp.route('/')
 @login_required
@@ -165,6 +168,7 @@ def create():
                 # 保存到数据库
                 db.session.add(post)
                 db.session.commit()
+                sidebar_stats_service.invalidate()
                 
                 flash('文章创建成功', 'success')
                 return redirect(url_for('.index'))
@@ -353,6 +357,7 @@ def edit(post_id):
                             db.session.refresh(tag)
                             
                         # 清除所有相关缓存
+                        sidebar_stats_service.invalidate()
                         try:
                             from flask_caching import Cache
                             cache = Cache()
@@ -476,6 +481,7 @@ def change_status(post_id):
         
         # 保存到数据库
         db.session.commit()
+        sidebar_stats_service.invalidate()
         
         return jsonify({
             'success': True, 
@@ -589,8 +595,8 @@ def upload():
         return jsonify({'error': '不支持的文件类型'}), 400
         
     try:
-        filename = save_file(file)
-        file_url = url_for('static', filename=f'uploads/images/{filename}')
+        filename = image_processing_service.store_upload(file).filename
+        file_url = url_for('uploaded_images', filename=filename)
         current_app.logger.info(f'文件上传成功: {filename}, URL: {file_url}')
         return jsonify({
             'url': file_url,
@@ -5,11 +5,11 @@
 """
 
 import os
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
-from werkzeug.utils import secure_filename
-from app.utils.file import allowed_file, save_file
+from flask import Blueprint, request, jsonify, current_app, url_for
+from app.utils.file import allowed_file
+from app.services.image_processing import image_processing_service
+from app.services.upload import upload_service
 from app.decorators import admin_required
-from datetime import datetime, UTC
 
 upload_bp = Blueprint('upload', __name__)
 
@@ -44,24 +44,25 @@ def upload_file():
             'message': '不支持的文件类型'
         }), 400
 
-    # 检查文件大小
-    file_content = file.read()
-    file.seek(0)  # 重置文件指针
-    if len(file_content) > current_app.config.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024):
+    # 检查文件大小（定位到末尾取长度，不把内容读入内存）
+    file.stream.seek(0, os.SEEK_END)
+    file_size = file.stream.tell()
+    file.stream.seek(0)  # 重置文件指针
+    if file_size > current_app.config.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024):
         return jsonify({
             'success': False,
             'message': '文件太大'
         }), 400
 
-    # 保存文件
+    # 原样保存文件，变体由后台进程生成
     try:
-        filename = save_file(file)
+        filename = image_processing_service.store_upload(file).filename
         return jsonify({
             'success': True,
             'message': '文件上传成功',
             'data': {
                 'filename': filename,
-                'url': f'/uploads/{filename}'
+                'url': url_for('uploaded_images', filename=filename)
             }
         })
     except Exception as e:
@@ -71,14 +72,13 @@ def upload_file():
             'message': '文件上传失败'
         }), 500
 
-@upload_bp.route('/delete/<filename>', methods=['POST'])
+@upload_bp.route('/delete/<path:filename>', methods=['POST'])
 @admin_required
 def delete_file(filename):
     """删除文件"""
     try:
-        file_path = os.path.join(current_app.config['IMAGE_UPLOAD_FOLDER'], filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # 同时删除图片记录和生成的变体
+        if image_processing_service.delete(filename):
             return jsonify({
                 'success': True,
                 'message': '文件删除成功'
@@ -98,25 +98,31 @@ def delete_file(filename):
 @upload_bp.route('/images', methods=['GET'])
 @admin_required
 def list_images():
-    """获取图片列表"""
+    """获取图片列表（按上传索引表分页）"""
     try:
+        pagination = upload_service.paginate(
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', 20, type=int),
+            cursor=request.args.get('cursor')
+        )
         files = []
-        for filename in os.listdir(current_app.config['IMAGE_UPLOAD_FOLDER']):
-            if allowed_file(filename):
-                file_path = os.path.join(current_app.config['IMAGE_UPLOAD_FOLDER'], filename)
-                files.append({
-                    'name': filename,
-                    'url': f"/uploads/{filename}",
-                    'size': os.path.getsize(file_path),
-                    'modified': datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-                })
+        for upload in pagination.items:
+            item = upload.to_dict()
+            item['url'] = url_for('uploaded_images', filename=upload.path)
+            files.append(item)
         return jsonify({
             'success': True,
-            'files': files
+            'files': files,
+            'pagination': {
+                'page': pagination.page,
+                'per_page': pagination.per_page,
+                'has_next': pagination.has_next,
+                'next_cursor': pagination.next_cursor
+            }
         }), 200
     except Exception as e:
         current_app.logger.error(f"获取图片列表失败: {str(e)}")
         return jsonify({
             'success': False,
             'message': '获取图片列表失败'
-        }), 400 
\ No newline at end of file
+        }), 400
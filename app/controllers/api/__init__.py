@@ -8,6 +8,9 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_login import current_user
 from app.models.post import Post, PostStatus
 from app.extensions import db
+from app.utils.pagination import KeysetPagination, InvalidCursor
+from app.utils.tagged_cache import CacheTags
+from app.services.rate_limit import rate_limiter_service
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -23,13 +26,12 @@ def before_request():
             }), 401
     
     # 检查请求频率
-    if current_app.config.get('RATE_LIMIT_ENABLED'):
-        client_ip = request.remote_addr
-        if not rate_limiter.is_allowed(client_ip):
-            return jsonify({
-                'status': 'error',
-                'message': '请求过于频繁，请稍后再试'
-            }), 429
+    return rate_limiter_service.before_request('api')
+
+@bp.after_request
+def add_rate_limit_headers(response):
+    """附加限流响应头"""
+    return rate_limiter_service.add_headers(response)
 
 @bp.route('/posts')
 def get_posts():
@@ -37,22 +39,45 @@ def get_posts():
     try:
         # 获取查询参数
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
         status = request.args.get('status', 'PUBLISHED')
+        if status != 'all' and status not in PostStatus.__members__:
+            return jsonify({
+                'success': False,
+                'message': '无效的文章状态'
+            }), 400
+        
+        # 非管理员只能查看已发布的公开文章
+        is_admin = current_user.is_authenticated and current_user.is_admin
+        if status != 'PUBLISHED' and not is_admin:
+            return jsonify({
+                'success': False,
+                'message': '没有权限查看该状态的文章'
+            }), 403
         
-        # 构建查询
-        query = Post.query
+        # 构建查询（预加载作者和分类）
+        query = Post.query.options(db.joinedload(Post.author), db.joinedload(Post.category))
         
         # 添加状态过滤
         if status != 'all':
             query = query.filter(Post.status == PostStatus[status])
+        if not is_admin:
+            query = query.filter(Post.is_private.isnot(True))
         
-        # 执行分页查询
-        pagination = query.order_by(Post.created_at.desc()).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        # 按 (is_sticky, created_at, id) 游标分页，cursor/before 为上一次响应返回的令牌
+        try:
+            pagination = KeysetPagination(
+                query, per_page,
+                columns=(Post.is_sticky, Post.created_at, Post.id),
+                key_attrs=('is_sticky', 'created_at', 'id'),
+                page=page, cursor=request.args.get('cursor'), before=request.args.get('before'),
+                cache_key=f"api_posts:{status}:{'admin' if is_admin else 'public'}", cache_tags=[CacheTags.LISTING]
+            )
+        except InvalidCursor:
+            return jsonify({
+                'success': False,
+                'message': '无效的分页令牌'
+            }), 400
         
         # 格式化返回数据
         posts = [{
@@ -75,7 +100,9 @@ def get_posts():
                     'page': pagination.page,
                     'pages': pagination.pages,
                     'total': pagination.total,
-                    'per_page': pagination.per_page
+                    'per_page': pagination.per_page,
+                    'next_cursor': pagination.next_cursor,
+                    'prev_cursor': pagination.prev_cursor
                 }
             }
         })
@@ -9,14 +9,29 @@ from flask_login import current_user
 from app.services.comment import CommentService
 from app.services.post import PostService
 from app.models.comment import Comment, CommentStatus
+from app.models.post import PostStatus
+from app.services.rate_limit import rate_limiter_service
 
 bp = Blueprint('comment', __name__)
 
+
+def _get_visible_post(post_id):
+    """获取当前用户可见的文章（草稿、归档和私密文章仅管理员可见）"""
+    post = PostService.get_post_by_id(post_id)
+    if post is None:
+        return None
+    if post.status == PostStatus.PUBLISHED and not post.is_private:
+        return post
+    if current_user.is_authenticated and current_user.is_admin:
+        return post
+    return None
+
 @bp.route('/posts/<int:post_id>/comments', methods=['POST'])
+@rate_limiter_service.limit('comment')
 def create_comment(post_id):
     try:
-        # 检查文章是否存在
-        post = PostService.get_post_by_id(post_id)
+        # 检查文章是否存在且可见
+        post = _get_visible_post(post_id)
         if not post:
             return jsonify({
                 'success': False,
@@ -72,6 +87,12 @@ def create_comment(post_id):
 @bp.route('/posts/<int:post_id>/comments', methods=['GET'])
 def get_comments(post_id):
     try:
+        if not _get_visible_post(post_id):
+            return jsonify({
+                'success': False,
+                'message': '文章不存在'
+            }), 404
+
         # 获取评论列表 - 只获取已审核的评论，排除已拒绝的评论
         comments = Comment.query.filter(
             Comment.post_id == post_id,
@@ -11,6 +11,7 @@ from app.extensions import db
 from app.services.security import SecurityService
 from app.services.post import PostService
 from app.services.comment import CommentService
+from app.services.search import search_service
 from app.decorators import api_login_required
 from . import api_bp
 import logging
@@ -95,13 +96,12 @@ def search_posts():
     if not q:
         return jsonify({'error': '搜索关键词不能为空'}), 400
         
-    posts = Post.query.filter(
-        or_(
-            Post.title.ilike(f'%{q}%'),
-            Post.content.ilike(f'%{q}%')
-        )
-    ).all()
-    return jsonify([post.to_dict() for post in posts])
+    limit = min(request.args.get('limit', 50, type=int), 100)
+    
+    # 全文索引检索，按相关度排序
+    ids, _ = search_service.search_ids(q, limit=limit)
+    posts = {post.id: post for post in Post.query.filter(Post.id.in_(ids)).all()} if ids else {}
+    return jsonify([posts[post_id].to_dict() for post_id in ids if post_id in posts])
 
 @api_bp.route('/stats')
 def get_stats():
@@ -3,6 +3,7 @@ from app.models.comment import Comment
 from app.models.post import Post
 from app.extensions import db
 from app.utils.decorators import login_required
+from app.services.rate_limit import rate_limiter_service
 from datetime import datetime
 import logging
 
@@ -12,6 +13,7 @@ comment_bp = Blueprint('comment', __name__)
 logger = logging.getLogger(__name__)
 
 @comment_bp.route('/<int:post_id>/comments', methods=['POST'])
+@rate_limiter_service.limit('comment')
 def create_comment(post_id):
     """创建评论"""
     try:
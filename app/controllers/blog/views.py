@@ -9,6 +9,7 @@ from flask import (
     abort, current_app, jsonify, session, make_response
 )
 from flask_login import current_user, login_user, logout_user, login_required
+from werkzeug.exceptions import HTTPException
 from app.services.post import PostService
 from app.services.comment import CommentService
 from app.services.tag import TagService
@@ -24,8 +25,15 @@ from app.models.comment import Comment, CommentStatus
 from app.models.tag import Tag
 from app.models.category import Category
 from app.models.post import Post, PostStatus
-from app.utils.pagination import Pagination
+from app.utils.pagination import Pagination, KeysetPagination, InvalidCursor
 from app.services.category import CategoryService
+from app.services.sidebar import SidebarStatsService
+from app.services.view_counter import view_counter_service
+from app.services.post_listing import PostListingService, ListPagination
+from app.services.page_cache import page_cache_service
+from app.services.archive import archive_service
+from app.services.rate_limit import rate_limiter_service
+from app.utils.tagged_cache import CacheTags
 from . import blog_bp
 from math import ceil
 
@@ -35,197 +43,44 @@ comment_service = CommentService()
 category_service = CategoryService()
 tag_service = TagService()
 user_service = UserService()
+sidebar_stats_service = SidebarStatsService()
+post_listing_service = PostListingService()
 
 @blog_bp.route('/')
+@page_cache_service.cached(tags=[CacheTags.LISTING, CacheTags.COMMENTS])
 def index():
     """博客首页"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = current_app.config['POSTS_PER_PAGE']
         
-        # 使用SQL直接获取文章列表
-        sql = text("""
-            SELECT posts.id, posts.title, posts.content, posts.summary, posts.created_at, 
-                  posts.updated_at, posts.category_id, posts.view_count, 
-                  posts.status, categories.name as category_name, posts.is_sticky
-            FROM posts
-            LEFT JOIN categories ON posts.category_id = categories.id
-            WHERE (posts.status IN ('PUBLISHED', 'published') OR posts.is_sticky = 1)
-            ORDER BY posts.is_sticky DESC, posts.created_at DESC
-            LIMIT :per_page OFFSET :offset
-        """)
-        
-        # 计算偏移量
-        offset = (page - 1) * per_page
-        
-        # 执行查询
-        result = db.session.execute(sql, {'per_page': per_page, 'offset': offset})
-        posts = []
-        for row in result:
-            # 转换行为字典
-            post_dict = {}
-            for column, value in row._mapping.items():
-                post_dict[column] = value
-                
-            # 将字符串日期转换为datetime对象
-            if 'created_at' in post_dict and post_dict['created_at'] and isinstance(post_dict['created_at'], str):
-                try:
-                    post_dict['created_at'] = datetime.strptime(post_dict['created_at'], '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    try:
-                        post_dict['created_at'] = datetime.strptime(post_dict['created_at'], '%Y-%m-%d')
-                    except ValueError:
-                        post_dict['created_at'] = datetime.now()
-            
-            if 'updated_at' in post_dict and post_dict['updated_at'] and isinstance(post_dict['updated_at'], str):
-                try:
-                    post_dict['updated_at'] = datetime.strptime(post_dict['updated_at'], '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    try:
-                        post_dict['updated_at'] = datetime.strptime(post_dict['updated_at'], '%Y-%m-%d')
-                    except ValueError:
-                        post_dict['updated_at'] = datetime.now()
-            
-            # 添加空的tags属性，防止模板中的错误
-            post_dict['tags'] = []
-            
-            # 添加category属性
-            if 'category_id' in post_dict and post_dict['category_id']:
-                class CategoryLike:
-                    def __init__(self, id, name):
-                        self.id = id
-                        self.name = name
-                
-                if 'category_name' in post_dict:
-                    post_dict['category'] = CategoryLike(post_dict['category_id'], post_dict['category_name'])
-                else:
-                    post_dict['category'] = None
-            else:
-                post_dict['category'] = None
-            
-            # 获取文章的标签
-            post_obj = db.session.get(Post, post_dict['id'])
-            if post_obj:
-                post_dict['tags'] = post_obj.tags
-            
-            posts.append(post_dict)
-        
-        # 获取总文章数
-        count_sql = text("SELECT COUNT(*) FROM posts WHERE status IN ('PUBLISHED', 'published') OR is_sticky = 1")
-        total = db.session.execute(count_sql).scalar()
-        
+        # 文章与分类一次查询，标签批量查询（按排序键游标分页，总数单独缓存）
+        try:
+            pagination = post_listing_service.get_home_page(
+                page, per_page, cursor=request.args.get('cursor'), before=request.args.get('before')
+            )
+        except InvalidCursor:
+            pagination = post_listing_service.get_home_page(1, per_page)
+
         # 分离置顶文章和普通文章
-        sticky_posts = []
-        regular_posts = []
-        
-        for post in posts:
-            # 将字符串"1"、数字1和True都识别为置顶
-            is_sticky = False
-            if 'is_sticky' in post:
-                if isinstance(post['is_sticky'], bool):
-                    is_sticky = post['is_sticky']
-                elif isinstance(post['is_sticky'], (int, float)):
-                    is_sticky = post['is_sticky'] > 0
-                elif isinstance(post['is_sticky'], str):
-                    is_sticky = post['is_sticky'].lower() in ('true', '1', 't', 'yes', 'y')
-                
-            if is_sticky:
-                sticky_posts.append(post)
-            else:
-                regular_posts.append(post)
-                
-        posts = regular_posts
-        
-        # 创建自定义分页对象
-        class SimplePagination:
-            def __init__(self, page, per_page, total_count):
-                self.page = page
-                self.per_page = per_page
-                self.total = total_count
-                self.items = posts
-            
-            @property
-            def pages(self):
-                """总页数"""
-                if self.per_page == 0 or self.total == 0:
-                    return 0
-                return int(ceil(self.total / float(self.per_page)))
-            
-            @property
-            def has_prev(self):
-                """是否有上一页"""
-                return self.page > 1
-            
-            @property
-            def has_next(self):
-                """是否有下一页"""
-                return self.page < self.pages
-                
-            @property
-            def prev_num(self):
-                """上一页页码"""
-                return self.page - 1 if self.has_prev else None
-                
-            @property
-            def next_num(self):
-                """下一页页码"""
-                return self.page + 1 if self.has_next else None
-            
-            def iter_pages(self, left_edge=2, left_current=2, right_current=5, right_edge=2):
-                """迭代页码"""
-                last = 0
-                for num in range(1, self.pages + 1):
-                    if num <= left_edge or \
-                       (num > self.page - left_current - 1 and num < self.page + right_current) or \
-                       num > self.pages - right_edge:
-                        if last + 1 != num:
-                            yield None
-                        yield num
-                        last = num
-        
-        # 使用自定义的分页类
-        pagination = SimplePagination(page, per_page, total)
+        sticky_posts = [post for post in pagination.items if post.is_sticky]
+        posts = [post for post in pagination.items if not post.is_sticky]
         
         # 不再调用 post_service.get_archives()，直接使用空字典
         archives = {}
         categories = category_service.get_all_categories()
         
-        # 获取每个分类的文章数量
-        category_post_counts = {}
-        for category in categories:
-            try:
-                query = Post.query.filter(
-                    Post.category_id == category.id,
-                    (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
-                )
-                category_post_counts[category.id] = query.count()
-            except Exception as e:
-                current_app.logger.error(f"获取分类 {category.id} 的文章数量失败: {str(e)}")
-                category_post_counts[category.id] = 0
-        
         current_app.logger.info("正在获取标签列表...")
         tags = tag_service.get_all_tags()
         current_app.logger.info(f"获取到 {len(tags)} 个标签")
         
-        # 获取每个标签的文章数量
-        tag_post_counts = {}
-        for tag in tags:
-            try:
-                query = Post.query.filter(
-                    Post.tags.any(id=tag.id),
-                    (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
-                )
-                tag_post_counts[tag.id] = query.count()
-            except Exception as e:
-                current_app.logger.error(f"获取标签 {tag.id} 的文章数量失败: {str(e)}")
-                tag_post_counts[tag.id] = 0
+        # 获取每个分类和标签的文章数量（分组查询，带缓存）
+        category_post_counts, tag_post_counts = sidebar_stats_service.get_post_counts(categories, tags)
         
         # 获取最新评论
         recent_comments = Comment.query.filter_by(status=CommentStatus.APPROVED).order_by(Comment.created_at.desc()).limit(5).all()
         
         # 获取侧边栏数据
-        categories = category_service.get_all_categories()
-        tags = tag_service.get_all_tags()
         recent_posts = Post.query.filter(
             (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
         ).order_by(Post.created_at.desc()).limit(5).all()
@@ -258,6 +113,11 @@ def index():
         return render_template('blog/error.html', error_message='服务器内部错误'), 500
 
 @blog_bp.route('/post/<int:post_id>', methods=['GET'])
+@page_cache_service.cached(
+    tags=lambda post_id: [CacheTags.post(post_id), CacheTags.LISTING, CacheTags.COMMENTS],
+    last_modified=page_cache_service.post_updated_at,
+    on_hit=lambda post_id: view_counter_service.record(post_id)
+)
 def post_detail(post_id):
     """文章详情页"""
     try:
@@ -273,9 +133,8 @@ def post_detail(post_id):
             current_app.logger.error(f"文章不存在: {post_id}")
             abort(404)
 
-        # 增加浏览量
-        post.view_count += 1
-        db.session.commit()
+        # 增加浏览量（写入缓冲区，定期批量落库）
+        view_count = (post.view_count or 0) + view_counter_service.record(post.id)
 
         # 获取评论列表
         try:
@@ -324,31 +183,10 @@ def post_detail(post_id):
             current_app.logger.error(f"获取最新评论失败: {str(e)}")
             recent_comments = []
 
-        # 获取每个分类的文章数量
-        category_post_counts = {}
-        for category in categories:
-            try:
-                query = Post.query.filter(
-                    Post.category_id == category.id,
-                    Post.status == PostStatus.PUBLISHED
-                )
-                category_post_counts[category.id] = query.count()
-            except Exception as e:
-                current_app.logger.error(f"获取分类 {category.id} 的文章数量失败: {str(e)}")
-                category_post_counts[category.id] = 0
-
-        # 获取每个标签的文章数量
-        tag_post_counts = {}
-        for tag in tags:
-            try:
-                query = Post.query.filter(
-                    Post.tags.any(id=tag.id),
-                    Post.status == PostStatus.PUBLISHED
-                )
-                tag_post_counts[tag.id] = query.count()
-            except Exception as e:
-                current_app.logger.error(f"获取标签 {tag.id} 的文章数量失败: {str(e)}")
-                tag_post_counts[tag.id] = 0
+        # 获取每个分类和标签的已发布文章数量（分组查询，带缓存）
+        category_post_counts, tag_post_counts = sidebar_stats_service.get_post_counts(
+            categories, tags, include_archived=False
+        )
 
         # 准备页面数据
         page_data = {
@@ -363,6 +201,7 @@ def post_detail(post_id):
             'tag_post_counts': tag_post_counts,
             'recent_posts': recent_posts,
             'recent_comments': recent_comments,
+            'view_count': view_count,
             'current_user': {
                 'is_authenticated': current_user.is_authenticated,
                 'id': current_user.id if current_user.is_authenticated else None,
@@ -385,6 +224,7 @@ def post_detail(post_id):
         return render_template('blog/error.html', error_message='获取文章详情失败'), 500
 
 @blog_bp.route('/post/<int:post_id>/comment', methods=['POST'])
+@rate_limiter_service.limit('comment')
 def create_comment(post_id):
     """创建评论"""
     try:
@@ -492,6 +332,8 @@ def create_comment(post_id):
         }), 500
 
 @blog_bp.route('/category/<int:category_id>')
+@page_cache_service.cached(
+    tags=lambda category_id: [CacheTags.category(category_id), CacheTags.LISTING, CacheTags.COMMENTS])
 def category_posts(category_id):
     """分类页面"""
     try:
@@ -511,6 +353,12 @@ def category_posts(category_id):
         categories = category_service.get_all_categories()
         tags = tag_service.get_all_tags()
         
+        # 获取每个分类和标签的文章数量（分组查询，带缓存）
+        category_post_counts, tag_post_counts = sidebar_stats_service.get_post_counts(categories, tags)
+        
+        # 本页文章的评论数（一次分组查询）
+        comment_counts = comment_service.get_comment_counts(post.id for post in posts)
+        
         # 日志记录
         current_app.logger.info(f"获取分类 '{category.name}' (ID: {category_id}) 的文章，共 {pagination.total} 篇")
         
@@ -520,7 +368,10 @@ def category_posts(category_id):
                             pagination=pagination,
                             title=f'分类: {category.name}',
                             categories=categories,
-                            tags=tags)
+                            category_post_counts=category_post_counts,
+                            tags=tags,
+                            tag_post_counts=tag_post_counts,
+                            comment_counts=comment_counts)
     except Exception as e:
         current_app.logger.error(f"获取分类页面失败: {str(e)}")
         import traceback
@@ -528,6 +379,7 @@ def category_posts(category_id):
         return render_template('blog/error.html', error_message='服务器内部错误'), 500
 
 @blog_bp.route('/tag/<int:tag_id>')
+@page_cache_service.cached(tags=lambda tag_id: [CacheTags.tag(tag_id), CacheTags.LISTING, CacheTags.COMMENTS])
 def tag_posts(tag_id):
     """标签页面"""
     try:
@@ -540,19 +392,32 @@ def tag_posts(tag_id):
             abort(404)
         
         # 直接使用SQLAlchemy查询标签下的文章，而不使用get_posts_by_tag方法
-        query = Post.query.filter(
+        query = Post.query.options(
+            db.joinedload(Post.author),
+            db.joinedload(Post.category)
+        ).filter(
             Post.tags.any(id=tag_id),
             (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
         ).order_by(Post.created_at.desc())
         
-        # 执行分页查询
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # 按 (created_at, id) 游标分页，总数和页码游标单独缓存
+        pagination = KeysetPagination(
+            query, per_page,
+            columns=(Post.created_at, Post.id), key_attrs=('created_at', 'id'),
+            page=page, cache_key=f'tag_posts:{tag_id}', cache_tags=[CacheTags.tag(tag_id)]
+        )
         posts = pagination.items
         
         # 获取所有分类和标签用于侧边栏显示
         categories = category_service.get_all_categories()
         tags = tag_service.get_all_tags()
         
+        # 获取每个分类和标签的文章数量（分组查询，带缓存）
+        category_post_counts, tag_post_counts = sidebar_stats_service.get_post_counts(categories, tags)
+        
+        # 本页文章的评论数（一次分组查询）
+        comment_counts = comment_service.get_comment_counts(post.id for post in posts)
+        
         # 日志记录
         current_app.logger.info(f"获取标签 '{tag.name}' (ID: {tag_id}) 的文章，共 {pagination.total} 篇")
         
@@ -562,7 +427,10 @@ def tag_posts(tag_id):
                             pagination=pagination,
                             title=f'标签: {tag.name}',
                             categories=categories,
-                            tags=tags)
+                            category_post_counts=category_post_counts,
+                            tags=tags,
+                            tag_post_counts=tag_post_counts,
+                            comment_counts=comment_counts)
     except Exception as e:
         current_app.logger.error(f"获取标签页面失败: {str(e)}")
         import traceback
@@ -570,6 +438,7 @@ def tag_posts(tag_id):
         return render_template('blog/error.html', error_message='服务器内部错误'), 500
 
 @blog_bp.route('/search')
+@rate_limiter_service.limit('search')
 def search():
     """搜索页面"""
     try:
@@ -584,10 +453,21 @@ def search():
         pagination = post_service.search_posts(query, page, per_page)
         posts = pagination.items
         
+        # 侧边栏分类和标签（文章数量为分组查询，带缓存）
+        categories = category_service.get_all_categories()
+        tags = tag_service.get_all_tags()
+        category_post_counts, tag_post_counts = sidebar_stats_service.get_post_counts(categories, tags)
+        comment_counts = comment_service.get_comment_counts(post.id for post in posts)
+        
         return render_template('blog/search.html',
                             query=query,
                             posts=posts,
-                            pagination=pagination)
+                            pagination=pagination,
+                            categories=categories,
+                            category_post_counts=category_post_counts,
+                            tags=tags,
+                            tag_post_counts=tag_post_counts,
+                            comment_counts=comment_counts)
     except Exception as e:
         current_app.logger.error(f"搜索失败: {str(e)}")
         return render_template('blog/error.html', error_message='服务器内部错误'), 500
@@ -628,31 +508,8 @@ def about():
             for post in recent_posts:
                 current_app.logger.info(f"最新文章: ID={post.id}, 标题={post.title}, 状态={post.status}")
         
-        # 获取每个分类的文章数量
-        category_post_counts = {}
-        for category in categories:
-            try:
-                query = Post.query.filter(
-                    Post.category_id == category.id,
-                    (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
-                )
-                category_post_counts[category.id] = query.count()
-            except Exception as e:
-                current_app.logger.error(f"获取分类 {category.id} 的文章数量失败: {str(e)}")
-                category_post_counts[category.id] = 0
-        
-        # 获取每个标签的文章数量
-        tag_post_counts = {}
-        for tag in tags:
-            try:
-                query = Post.query.filter(
-                    Post.tags.any(id=tag.id),
-                    (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
-                )
-                tag_post_counts[tag.id] = query.count()
-            except Exception as e:
-                current_app.logger.error(f"获取标签 {tag.id} 的文章数量失败: {str(e)}")
-                tag_post_counts[tag.id] = 0
+        # 获取每个分类和标签的文章数量（分组查询，带缓存）
+        category_post_counts, tag_post_counts = sidebar_stats_service.get_post_counts(categories, tags)
         
         return render_template('blog/about.html', 
                             about=about,
@@ -688,58 +545,39 @@ def tags():
         current_app.logger.error(f"获取标签列表失败: {str(e)}")
         return render_template('blog/error.html', error_message='服务器内部错误'), 500
 
+def _archive_context(months):
+    """将归档月份转换为模板使用的 {年: {月: 文章列表}} 结构"""
+    archive_dict = {}
+    for item in months:
+        archive_dict.setdefault(item.year, {})[item.month] = item.posts
+    return archive_dict, sorted(archive_dict, reverse=True)
+
 @blog_bp.route('/archive')
 @blog_bp.route('/archive/<date>')
+@page_cache_service.cached(tags=[CacheTags.ARCHIVE, CacheTags.LISTING, CacheTags.COMMENTS])
 def archive(date=None):
     """
-    文章归档页面，全新实现确保正确显示所有文章
-    :param date: 归档日期，格式为 yyyy-MM
+    文章归档页面，按月份分页
+    :param date: 归档日期，格式为 yyyy-MM，指定时只显示该月
     :return:
     """
     try:
-        # 使用SQLAlchemy ORM直接获取所有文章
-        from app.models.post import Post
-        
-        current_app.logger.info("开始处理归档页面请求...")
-        
-        # 直接获取所有文章无论状态
-        all_posts = Post.query.order_by(Post.created_at.desc()).all()
-        
-        current_app.logger.info(f"归档页面查询到 {len(all_posts)} 篇文章")
-        for post in all_posts:
-            current_app.logger.info(f"文章ID: {post.id}, 标题: {post.title}, 状态: {post.status}")
-        
-        # 按年月分组归档
-        archives = {}
-        for post in all_posts:
-            if not post.created_at:
-                continue
-            key = f"{post.created_at.year}-{post.created_at.month:02d}"
-            if key not in archives:
-                archives[key] = []
-            archives[key].append(post)
-        
-        # 创建归档字典，按年月组织
-        archive_dict = {}
-        sorted_years = []
-        
-        # 遍历所有归档信息
-        for key, posts in archives.items():
-            # 分割年月
-            year, month = key.split('-')
-            year = int(year)
-            month = int(month)
-            
-            # 添加到归档字典
-            if year not in archive_dict:
-                archive_dict[year] = {}
-                sorted_years.append(year)
-            
-            archive_dict[year][month] = posts
-            current_app.logger.info(f"{year}年{month}月: {len(posts)}篇文章")
-        
-        # 对年份进行排序（降序）
-        sorted_years.sort(reverse=True)
+        if date:
+            try:
+                year, month = (int(part) for part in date.split('-'))
+                selected = archive_service.get_month(year, month)
+            except ValueError:
+                abort(404)
+            if not selected:
+                abort(404)
+            months, pagination = [selected], None
+        else:
+            page = request.args.get('page', 1, type=int)
+            per_page = current_app.config.get('ARCHIVE_MONTHS_PER_PAGE', 12)
+            months, total = archive_service.get_page(page, per_page)
+            pagination = ListPagination(page, per_page, total, months)
+        
+        archive_dict, sorted_years = _archive_context(months)
         
         # 获取侧边栏数据
         categories = category_service.get_all_categories()
@@ -748,47 +586,21 @@ def archive(date=None):
             (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
         ).order_by(Post.created_at.desc()).limit(5).all()
         
-        # 调试日志
-        current_app.logger.info(f"获取到的最新文章数量: {len(recent_posts) if recent_posts else 0}")
-        if recent_posts:
-            for post in recent_posts:
-                current_app.logger.info(f"最新文章: ID={post.id}, 标题={post.title}, 状态={post.status}")
-        
-        # 获取每个分类的文章数量
-        category_post_counts = {}
-        for category in categories:
-            try:
-                query = Post.query.filter(
-                    Post.category_id == category.id,
-                    (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
-                )
-                category_post_counts[category.id] = query.count()
-            except Exception as e:
-                current_app.logger.error(f"获取分类 {category.id} 的文章数量失败: {str(e)}")
-                category_post_counts[category.id] = 0
-        
-        # 获取每个标签的文章数量
-        tag_post_counts = {}
-        for tag in tags:
-            try:
-                query = Post.query.filter(
-                    Post.tags.any(id=tag.id),
-                    (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
-                )
-                tag_post_counts[tag.id] = query.count()
-            except Exception as e:
-                current_app.logger.error(f"获取标签 {tag.id} 的文章数量失败: {str(e)}")
-                tag_post_counts[tag.id] = 0
+        # 获取每个分类和标签的文章数量（分组查询，带缓存）
+        category_post_counts, tag_post_counts = sidebar_stats_service.get_post_counts(categories, tags)
         
         return render_template('blog/archive.html',
                             archive_dict=archive_dict,
                             sorted_years=sorted_years,
+                            pagination=pagination,
                             categories=categories,
                             category_post_counts=category_post_counts,
                             tags=tags,
                             tag_post_counts=tag_post_counts,
                             recent_posts=recent_posts)
                             
+    except HTTPException:
+        raise
     except Exception as e:
         current_app.logger.error(f"获取归档页面失败: {str(e)}")
         import traceback
@@ -796,6 +608,7 @@ def archive(date=None):
         return render_template('blog/error.html', error_message='服务器内部错误'), 500
 
 @blog_bp.route('/login', methods=['GET', 'POST'])
+@rate_limiter_service.limit('login', methods=('POST',))
 def login():
     """简化的博客前台登录视图"""
     try:
@@ -889,323 +702,18 @@ def archive_test():
 
 @blog_bp.route('/archive_sql')
 def archive_sql():
-    """
-    使用直接SQL查询的归档页面
-    """
-    try:
-        import sqlite3
-        from datetime import datetime
-        
-        # 连接SQLite数据库
-        db_path = '/data/myblog/instance/blog-dev.db'
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # 查询所有已发布和已归档的文章
-        cursor.execute("""
-            SELECT p.id, p.title, p.created_at, c.id as category_id, c.name as category_name
-            FROM posts p
-            LEFT JOIN categories c ON p.category_id = c.id
-            WHERE p.status = 'PUBLISHED' OR p.status = 'ARCHIVED'
-            ORDER BY p.created_at DESC
-        """)
-        
-        rows = cursor.fetchall()
-        current_app.logger.info(f"直接SQL查询到 {len(rows)} 篇文章")
-        
-        # 打印文章状态
-        cursor.execute("SELECT status, COUNT(*) as count FROM posts GROUP BY status")
-        status_counts = cursor.fetchall()
-        for status in status_counts:
-            current_app.logger.info(f"状态: {status['status']}, 数量: {status['count']}")
-        
-        # 创建文章对象列表
-        all_posts = []
-        for row in rows:
-            # 创建一个简单的类来存储文章数据
-            class PostObj:
-                pass
-            
-            post = PostObj()
-            post.id = row['id']
-            post.title = row['title']
-            
-            # 处理创建时间
-            created_at = row['created_at']
-            if isinstance(created_at, str):
-                try:
-                    post.created_at = datetime.fromisoformat(created_at)
-                except:
-                    post.created_at = datetime.now()  # 默认值
-            else:
-                post.created_at = created_at
-            
-            # 处理分类
-            if row['category_id']:
-                class CategoryObj:
-                    pass
-                
-                category = CategoryObj()
-                category.id = row['category_id']
-                category.name = row['category_name']
-                post.category = category
-            else:
-                post.category = None
-            
-            all_posts.append(post)
-            current_app.logger.info(f"添加文章: ID={post.id}, 标题={post.title}, 创建时间={post.created_at}")
-        
-        # 按年月分组归档
-        archives = {}
-        for post in all_posts:
-            if not post.created_at:
-                continue
-            key = f"{post.created_at.year}-{post.created_at.month:02d}"
-            if key not in archives:
-                archives[key] = []
-            archives[key].append(post)
-        
-        # 创建归档字典，按年月组织
-        archive_dict = {}
-        sorted_years = []
-        
-        # 遍历所有归档信息
-        for key, posts in archives.items():
-            # 分割年月
-            year, month = key.split('-')
-            year = int(year)
-            month = int(month)
-            
-            # 添加到归档字典
-            if year not in archive_dict:
-                archive_dict[year] = {}
-                sorted_years.append(year)
-            
-            archive_dict[year][month] = posts
-            current_app.logger.info(f"{year}年{month}月: {len(posts)}篇文章")
-        
-        # 对年份进行排序（降序）
-        sorted_years.sort(reverse=True)
-        
-        # 关闭数据库连接
-        conn.close()
-        
-        return render_template('blog/archive.html',
-                              archive_dict=archive_dict,
-                              sorted_years=sorted_years)
-        
-    except Exception as e:
-        current_app.logger.error(f"SQL归档页面出错: {str(e)}")
-        import traceback
-        current_app.logger.error(traceback.format_exc())
-        return render_template('blog/error.html', error_message='服务器内部错误'), 500
+    """使用直接SQL查询的归档页面（已统一到归档服务）"""
+    return redirect(url_for('blog.archive'))
 
 @blog_bp.route('/all_archives')
 def all_archives():
-    """
-    全新实现的归档页面，确保显示所有状态的文章
-    """
-    try:
-        import sqlite3
-        from datetime import datetime
-        
-        # 连接SQLite数据库
-        db_path = '/data/myblog/instance/blog-dev.db'
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # 输出所有文章状态以便调试
-        cursor.execute("SELECT DISTINCT status FROM posts")
-        statuses = [row['status'] for row in cursor.fetchall()]
-        current_app.logger.info(f"数据库中的文章状态: {statuses}")
-        
-        # 查询所有文章(无论状态)，为了调试目的
-        cursor.execute("""
-            SELECT p.id, p.title, p.created_at, p.status, c.id as category_id, c.name as category_name
-            FROM posts p
-            LEFT JOIN categories c ON p.category_id = c.id
-            ORDER BY p.created_at DESC
-        """)
-        
-        rows = cursor.fetchall()
-        current_app.logger.info(f"所有文章查询结果: {len(rows)} 篇")
-        
-        # 创建文章对象列表
-        all_posts = []
-        for row in rows:
-            # 创建一个简单的类来存储文章数据
-            class PostObj:
-                pass
-            
-            post = PostObj()
-            post.id = row['id']
-            post.title = row['title']
-            post.status = row['status']
-            
-            # 记录每篇文章的状态便于调试
-            current_app.logger.info(f"文章ID: {post.id}, 标题: {post.title}, 状态: {post.status}")
-            
-            # 处理创建时间
-            created_at = row['created_at']
-            if isinstance(created_at, str):
-                try:
-                    post.created_at = datetime.fromisoformat(created_at)
-                except:
-                    post.created_at = datetime.now()  # 默认值
-            else:
-                post.created_at = created_at
-            
-            # 处理分类
-            if row['category_id']:
-                class CategoryObj:
-                    pass
-                
-                category = CategoryObj()
-                category.id = row['category_id']
-                category.name = row['category_name']
-                post.category = category
-            else:
-                post.category = None
-            
-            # 添加所有文章到列表
-            all_posts.append(post)
-        
-        # 按年月分组归档
-        archives = {}
-        for post in all_posts:
-            if not post.created_at:
-                continue
-            key = f"{post.created_at.year}-{post.created_at.month:02d}"
-            if key not in archives:
-                archives[key] = []
-            archives[key].append(post)
-        
-        # 创建归档字典，按年月组织
-        archive_dict = {}
-        sorted_years = []
-        
-        # 遍历所有归档信息
-        for key, posts in archives.items():
-            # 分割年月
-            year, month = key.split('-')
-            year = int(year)
-            month = int(month)
-            
-            # 添加到归档字典
-            if year not in archive_dict:
-                archive_dict[year] = {}
-                sorted_years.append(year)
-            
-            archive_dict[year][month] = posts
-            current_app.logger.info(f"{year}年{month}月: {len(posts)}篇文章")
-        
-        # 对年份进行排序（降序）
-        sorted_years.sort(reverse=True)
-        
-        # 关闭数据库连接
-        conn.close()
-        
-        return render_template('blog/archive.html',
-                              archive_dict=archive_dict,
-                              sorted_years=sorted_years)
-        
-    except Exception as e:
-        current_app.logger.error(f"获取所有归档页面失败: {str(e)}")
-        import traceback
-        current_app.logger.error(traceback.format_exc())
-        return render_template('blog/error.html', error_message='服务器内部错误'), 500
+    """全部归档页面（已统一到归档服务）"""
+    return redirect(url_for('blog.archive'))
 
 @blog_bp.route('/direct_archive')
 def direct_archive():
-    """直接从数据库读取并显示归档页面"""
-    try:
-        import sqlite3
-        from datetime import datetime
-        from flask import current_app, render_template
-        
-        # 连接数据库
-        db_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # 查询所有已发布和已归档的文章
-        cursor.execute("""
-            SELECT id, title, created_at, status 
-            FROM posts 
-            WHERE status IN ('PUBLISHED', 'ARCHIVED', 'published', 'archived')
-            ORDER BY created_at DESC
-        """)
-        all_posts = cursor.fetchall()
-        
-        # 为调试输出文章数量和状态
-        print(f"获取到 {len(all_posts)} 篇文章")
-        for post in all_posts:
-            print(f"文章ID: {post['id']}, 标题: {post['title']}, 状态: {post['status']}")
-        
-        # 按年月分组
-        archive_dict = {}
-        for post in all_posts:
-            created_at = post['created_at']
-            if isinstance(created_at, str):
-                # 转换字符串日期为datetime对象
-                try:
-                    dt = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    try:
-                        dt = datetime.strptime(created_at, '%Y-%m-%d')
-                    except ValueError:
-                        # 如果无法解析，使用当前日期
-                        dt = datetime.now()
-            else:
-                # 如果是数字(时间戳)，转换为datetime
-                try:
-                    dt = datetime.fromtimestamp(created_at)
-                except (TypeError, ValueError):
-                    dt = datetime.now()
-            
-            year = dt.year
-            month = dt.month
-            
-            if year not in archive_dict:
-                archive_dict[year] = {}
-            
-            if month not in archive_dict[year]:
-                archive_dict[year][month] = []
-            
-            archive_dict[year][month].append({
-                'id': post['id'],
-                'title': post['title'],
-                'status': post['status']
-            })
-        
-        # 关闭连接
-        conn.close()
-        
-        # 返回HTML
-        result = '<h1>文章归档</h1>'
-        
-        # 添加调试信息
-        result += f'<p>共找到 {len(all_posts)} 篇文章</p>'
-        
-        # 按年月排序
-        for year in sorted(archive_dict.keys(), reverse=True):
-            result += f'<h2>{year}年</h2>'
-            for month in sorted(archive_dict[year].keys(), reverse=True):
-                result += f'<h3>{month}月</h3><ul>'
-                for post in archive_dict[year][month]:
-                    status_mark = ' [归档]' if post['status'].upper() == 'ARCHIVED' else ''
-                    result += f'<li><a href="/blog/post/{post["id"]}">{post["title"]}</a>{status_mark}</li>'
-                result += '</ul>'
-        
-        return result
-    except Exception as e:
-        import traceback
-        error_message = f"归档页面加载失败: {str(e)}\n{traceback.format_exc()}"
-        current_app.logger.error(error_message)
-        return f'<h1>归档页面加载失败</h1><pre>{error_message}</pre>'
+    """直接归档页面（已统一到归档服务）"""
+    return redirect(url_for('blog.archive'))
 
 @blog_bp.route('/test_comment', methods=['GET', 'POST'])
 def test_comment():
@@ -1284,9 +792,8 @@ def test_post_detail(post_id):
             current_app.logger.error(f"文章不存在: {post_id}")
             abort(404)
 
-        # 增加浏览量
-        post.view_count += 1
-        db.session.commit()
+        # 增加浏览量（写入缓冲区，定期批量落库）
+        view_count = (post.view_count or 0) + view_counter_service.record(post.id)
 
         # 获取评论列表
         try:
@@ -1336,31 +843,10 @@ def test_post_detail(post_id):
             current_app.logger.error(f"获取最新评论失败: {str(e)}")
             recent_comments = []
 
-        # 获取每个分类的文章数量
-        category_post_counts = {}
-        for category in categories:
-            try:
-                query = Post.query.filter(
-                    Post.category_id == category.id,
-                    Post.status == PostStatus.PUBLISHED
-                )
-                category_post_counts[category.id] = query.count()
-            except Exception as e:
-                current_app.logger.error(f"获取分类 {category.id} 的文章数量失败: {str(e)}")
-                category_post_counts[category.id] = 0
-
-        # 获取每个标签的文章数量
-        tag_post_counts = {}
-        for tag in tags:
-            try:
-                query = Post.query.filter(
-                    Post.tags.any(id=tag.id),
-                    Post.status == PostStatus.PUBLISHED
-                )
-                tag_post_counts[tag.id] = query.count()
-            except Exception as e:
-                current_app.logger.error(f"获取标签 {tag.id} 的文章数量失败: {str(e)}")
-                tag_post_counts[tag.id] = 0
+        # 获取每个分类和标签的已发布文章数量（分组查询，带缓存）
+        category_post_counts, tag_post_counts = sidebar_stats_service.get_post_counts(
+            categories, tags, include_archived=False
+        )
 
         # 准备页面数据
         page_data = {
@@ -1375,6 +861,7 @@ def test_post_detail(post_id):
             'tag_post_counts': tag_post_counts,
             'recent_posts': recent_posts,
             'recent_comments': recent_comments,
+            'view_count': view_count,
             'current_user': {
                 'is_authenticated': current_user.is_authenticated,
                 'id': current_user.id if current_user.is_authenticated else None,
@@ -1467,9 +954,8 @@ def simple_post_detail(post_id):
             current_app.logger.error(f"文章不存在: {post_id}")
             abort(404)
             
-        # 增加浏览量
-        post.view_count += 1
-        db.session.commit()
+        # 增加浏览量（写入缓冲区，定期批量落库）
+        view_count = (post.view_count or 0) + view_counter_service.record(post.id)
         
         # 获取最近文章
         recent_posts = Post.query.filter_by(status=PostStatus.PUBLISHED).order_by(Post.created_at.desc()).limit(5).all()
@@ -1478,6 +964,7 @@ def simple_post_detail(post_id):
         page_data = {
             'post': post,
             'recent_posts': recent_posts,
+            'view_count': view_count,
         }
         
         # 渲染简化模板
@@ -1496,9 +983,8 @@ def direct_post(post_id):
         if not post:
             return f"文章不存在：ID={post_id}", 404
         
-        # 增加浏览量
-        post.view_count += 1
-        db.session.commit()
+        # 增加浏览量（写入缓冲区，定期批量落库）
+        view_count = (post.view_count or 0) + view_counter_service.record(post.id)
         
         # 准备输出内容
         output = []
@@ -1508,7 +994,7 @@ def direct_post(post_id):
         output.append(f"更新时间: {post.updated_at.strftime('%Y-%m-%d %H:%M:%S') if post.updated_at else 'unknown'}")
         output.append(f"状态: {post.status}")
         output.append(f"分类: {post.category.name if post.category else 'unknown'}")
-        output.append(f"浏览量: {post.view_count}")
+        output.append(f"浏览量: {view_count}")
         
         # 添加标签信息
         tags = [tag.name for tag in post.tags] if post.tags else []
@@ -1538,9 +1024,8 @@ def minimal_post(post_id):
         if not post:
             return f"文章不存在：ID={post_id}", 404
         
-        # 增加浏览量
-        post.view_count += 1
-        db.session.commit()
+        # 增加浏览量（写入缓冲区，定期批量落库）
+        view_count = (post.view_count or 0) + view_counter_service.record(post.id)
         
         # 构建HTML响应，不使用模板
         html = f"""
@@ -1561,7 +1046,7 @@ def minimal_post(post_id):
                 <div class="header">
                     <h1>{post.title}</h1>
                     <p>发布时间：{post.created_at.strftime('%Y-%m-%d %H:%M:%S') if post.created_at else '未知'}</p>
-                    <p>浏览次数：{post.view_count}</p>
+                    <p>浏览次数：{view_count}</p>
                 </div>
                 <div class="content">
                     {post.html_content or post.content or '无内容'}
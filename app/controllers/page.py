@@ -6,7 +6,7 @@
 
 from flask import Blueprint, render_template, request, jsonify
 from app.services import PostService
-from app.utils.markdown import markdown_to_html
+from app.services.markdown_render import markdown_render_service
 
 page_bp = Blueprint('page', __name__)
 post_service = PostService()
@@ -39,7 +39,7 @@ def about():
 - Bootstrap
 - jQuery
 """
-    html = markdown_to_html(content)
+    html = markdown_render_service.render_html(content)
     return render_template('page/about.html', content=html)
 
 @page_bp.route('/links')
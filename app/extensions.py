@@ -109,8 +109,12 @@ def init_app(app):
     login_manager.login_message_category = 'info'
     login_manager.session_protection = None  # 禁用会话保护，以便测试
     
-    # 初始化会话
-    session.init_app(app)
+    # 初始化会话（database 类型使用 user_sessions 表，其余交给 Flask-Session）
+    if app.config.get('SESSION_TYPE') == 'database':
+        from app.services.session_store import session_store
+        session_store.init_app(app)
+    else:
+        session.init_app(app)
     
     # 初始化缓存
     cache.init_app(app)
@@ -159,7 +163,7 @@ def init_app(app):
     # configure_uploads(app, images)  # 注释掉configure_uploads初始化
     
     # 注册用户加载函数
-    from app.models.user import User
+    from app.services.identity import identity_service
     
     @login_manager.user_loader
     def load_user(user_id):
@@ -169,7 +173,10 @@ def init_app(app):
             user_id: 用户ID（字符串类型）
             
         Returns:
-            User | None: 如果用户存在且激活则返回用户对象，否则返回None
+            CurrentUser | None: 如果用户存在且激活则返回基于身份快照的用户对象，否则返回None
+            
+        Note:
+            身份快照按用户缓存，命中时不查询数据库；需要完整 User 对象时再按需加载。
         """
         if not user_id:
             current_app.logger.warning('load_user: user_id is empty')
@@ -178,7 +185,7 @@ def init_app(app):
         try:
             # 尝试将user_id转换为整数
             id_value = int(user_id)
-            user = User.query.get(id_value)
+            user = identity_service.load_user(id_value)
             
             if user is None:
                 current_app.logger.warning(f'load_user: User not found for id {id_value}')
@@ -198,7 +205,8 @@ def init_app(app):
             return None
 
     # 确保 session目录存在
-    os.makedirs(app.config['SESSION_FILE_DIR'], exist_ok=True)
+    if app.config.get('SESSION_TYPE') == 'filesystem':
+        os.makedirs(app.config['SESSION_FILE_DIR'], exist_ok=True)
     
     @app.after_request
     def add_security_headers(response):
@@ -7,8 +7,9 @@
 from functools import wraps
 from flask import request, redirect, url_for, jsonify, current_app, abort
 from flask_login import current_user
-import time
 from app.models.permission import Permission
+from app.services.rate_limit import rate_limiter_service
+from app.utils.sanitizer import sanitizer
 
 def login_required(f):
     """登录验证装饰器"""
@@ -72,64 +73,25 @@ def permission_required(permission):
         return decorated_function
     return decorator
 
-class RateLimiter:
-    """请求频率限制器"""
-    def __init__(self, max_requests=60, time_window=60):
-        self.max_requests = max_requests  # 最大请求次数
-        self.time_window = time_window    # 时间窗口（秒）
-        self.requests = {}                # 请求记录
-        
-    def is_allowed(self, key):
-        """检查请求是否允许"""
-        current_time = time.time()
-        
-        # 清理过期的请求记录
-        self._cleanup(current_time)
-        
-        # 获取当前key的请求记录
-        if key not in self.requests:
-            self.requests[key] = []
-            
-        request_times = self.requests[key]
-        
-        # 检查是否超过限制
-        if len(request_times) >= self.max_requests:
-            return False
-            
-        # 记录新的请求
-        request_times.append(current_time)
-        return True
-        
-    def _cleanup(self, current_time):
-        """清理过期的请求记录"""
-        cutoff_time = current_time - self.time_window
-        
-        for key in list(self.requests.keys()):
-            self.requests[key] = [t for t in self.requests[key] if t > cutoff_time]
-            if not self.requests[key]:
-                del self.requests[key]
+def rate_limit(f=None, policy='default'):
+    """请求频率限制装饰器（滑动窗口计数，多进程共享）
 
-# 创建全局限速器实例
-rate_limiter = RateLimiter()
+    可直接使用 @rate_limit，也可指定策略 @rate_limit(policy='login')。
+    """
+    decorator = rate_limiter_service.limit(policy)
+    if f is None:
+        return decorator
+    return decorator(f)
 
-def rate_limit(f):
-    """请求频率限制装饰器"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # 获取客户端标识（IP地址）
-        client_ip = request.remote_addr
-        
-        # 检查是否允许请求
-        if not rate_limiter.is_allowed(client_ip):
-            if request.is_xhr:
-                return jsonify({
-                    'success': False,
-                    'message': '请求过于频繁，请稍后再试'
-                })
-            return redirect(url_for('blog.index'))
-            
-        return f(*args, **kwargs)
-    return decorated_function
+def _strip_tags_deep(data):
+    """递归清理 JSON 数据中的字符串"""
+    if isinstance(data, str):
+        return sanitizer.strip_tags(data)
+    if isinstance(data, dict):
+        return {key: _strip_tags_deep(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_strip_tags_deep(item) for item in data]
+    return data
 
 def xss_protect():
     """XSS保护装饰器"""
@@ -142,13 +104,13 @@ def xss_protect():
                     for key, value in request.form.items():
                         if isinstance(value, str):
                             request.form = request.form.copy()
-                            request.form[key] = security_service.sanitize_input(value)
+                            request.form[key] = sanitizer.strip_tags(value)
                 
                 # 清理JSON数据
                 if request.is_json:
                     data = request.get_json()
                     if data:
-                        request._cached_json = (security_service.sanitize_input(data), request._cached_json[1])
+                        request._cached_json = (_strip_tags_deep(data), request._cached_json[1])
             
             return f(*args, **kwargs)
         return decorated_function
@@ -180,28 +142,8 @@ def sql_injection_protect():
             return f(*args, **kwargs)
         
         def check_sql_injection(value):
-            """检查SQL注入"""
-            # SQL注入关键字
-            sql_keywords = [
-                'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'DROP', 'UNION',
-                'WHERE', 'OR', 'AND', '--', ';', '1=1', 'LIKE', 'IN'
-            ]
-            
-            # 特殊字符
-            special_chars = ["'", '"', '\\', ';', '--', '/*', '*/']
-            
-            value = value.upper()
-            # 检查SQL关键字
-            for keyword in sql_keywords:
-                if f' {keyword} ' in f' {value} ':
-                    return True
-            
-            # 检查特殊字符
-            for char in special_chars:
-                if char in value:
-                    return True
-            
-            return False
+            """检查SQL注入（关键字与特殊字符合并为一个预编译正则）"""
+            return sanitizer.has_form_sql_keywords(value)
             
         return decorated_function
     return decorator
@@ -251,9 +193,10 @@ def check_api_key():
 
 def check_rate_limit():
     """检查请求频率限制"""
-    if current_app.config.get('RATE_LIMIT_ENABLED'):
-        # 实现请求频率限制逻辑
-        pass
+    if rate_limiter_service.enabled():
+        result = rate_limiter_service.check('default')
+        if not result.allowed:
+            abort(rate_limiter_service.too_many_requests(result))
 
 def security_check():
     """执行安全检查的装饰器"""
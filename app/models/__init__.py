@@ -15,6 +15,9 @@ from .comment import Comment
 from .role import Role
 from .permission import Permission
 from .operation_log import OperationLog
+from .related_post import RelatedPost
+from .image import UploadedImage, ImageStatus
+from .upload import Upload
 
 __all__ = [
     'db',
@@ -26,5 +29,9 @@ __all__ = [
     'Comment',
     'Role',
     'Permission',
-    'OperationLog'
+    'OperationLog',
+    'RelatedPost',
+    'UploadedImage',
+    'ImageStatus',
+    'Upload'
 ]
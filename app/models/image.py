@@ -0,0 +1,54 @@
+"""
+文件名：image.py
+描述：上传图片模型（原图与后台生成的响应式变体）
+作者：denny
+"""
+
+import json
+from datetime import datetime, UTC
+from enum import Enum
+from app.extensions import db
+
+
+class ImageStatus(Enum):
+    """图片处理状态枚举"""
+    PENDING = 'PENDING'  # 等待处理
+    READY = 'READY'  # 变体已生成
+    FAILED = 'FAILED'  # 处理失败（原图仍可访问）
+
+
+class UploadedImage(db.Model):
+    """上传图片模型类
+
+    原图按上传内容原样保存，后台进程生成的各宽度 WebP/JPEG 变体
+    和缩略图以 JSON 列表记录在 variants 字段中。
+    """
+    __tablename__ = 'images'
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), nullable=False, unique=True, index=True)  # 原图保存的文件名
+    original_name = db.Column(db.String(255))  # 上传时的文件名
+    size = db.Column(db.Integer)  # 原图字节数
+    width = db.Column(db.Integer)  # 原图宽度
+    height = db.Column(db.Integer)  # 原图高度
+    status = db.Column(db.Enum(ImageStatus), default=ImageStatus.PENDING, nullable=False, index=True)
+    _variants = db.Column('variants', db.Text, default='[]')  # [{'width', 'height', 'format', 'filename'}]
+    thumbnail = db.Column(db.String(255))  # 缩略图文件名
+    error = db.Column(db.String(255))  # 处理失败原因
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    processed_at = db.Column(db.DateTime)
+
+    @property
+    def variants(self):
+        """变体列表"""
+        try:
+            return json.loads(self._variants or '[]')
+        except (TypeError, ValueError):
+            return []
+
+    @variants.setter
+    def variants(self, value):
+        self._variants = json.dumps(value or [])
+
+    def __repr__(self):
+        return f'<UploadedImage {self.filename}>'
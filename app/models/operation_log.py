@@ -10,6 +10,10 @@ from app.extensions import db
 class OperationLog(db.Model):
     """操作日志模型类"""
     __tablename__ = 'operation_logs'
+    __table_args__ = (
+        # 后台日志列表按 (created_at, id) 倒序游标分页
+        db.Index('ix_operation_logs_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
@@ -10,7 +10,6 @@ import json
 from enum import Enum
 import markdown2
 import re
-from bs4 import BeautifulSoup
 from flask import current_app
 from app.models.comment import Comment, CommentStatus
 from sqlalchemy import func
@@ -26,10 +25,17 @@ class PostStatus(Enum):
 class Post(db.Model):
     """文章模型"""
     __tablename__ = 'posts'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # 列表游标分页与归档按时间范围查询使用的排序索引
+        db.Index('ix_posts_listing', 'is_sticky', 'created_at', 'id'),
+        db.Index('ix_posts_status_created_at', 'status', 'created_at', 'id'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(255), nullable=False, unique=True)
+    # 归档、邻接索引和相关文章在刷新时需要修改前的值：active_history 保证
+    # 过期实例（如提交之后）被赋值时先载入原值，而不是只记录新值
+    title = db.column_property(db.Column(db.String(255), nullable=False, unique=True), active_history=True)
     content = db.Column(db.Text, nullable=False)
     html_content = db.Column(db.Text)
     _toc = db.Column('toc', db.Text, default='[]')
@@ -37,14 +43,15 @@ class Post(db.Model):
     summary = db.Column(db.String(500))
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    status = db.Column(db.Enum(PostStatus), default=PostStatus.DRAFT)
+    status = db.column_property(db.Column(db.Enum(PostStatus), default=PostStatus.DRAFT), active_history=True)
     is_sticky = db.Column(db.Boolean, default=False)
     view_count = db.Column(db.Integer, default=0)
     _comments_count = db.Column('comments_count', db.Integer, default=0)  # 添加评论数字段
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    created_at = db.column_property(db.Column(db.DateTime, default=lambda: datetime.now(UTC)),
+                                    active_history=True)
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC),
                           onupdate=lambda: datetime.now(UTC))
-    is_private = db.Column(db.Boolean, default=False)
+    is_private = db.column_property(db.Column(db.Boolean, default=False), active_history=True)
     published = db.Column(db.Boolean, default=True)
     can_comment = db.Column(db.Boolean, default=True)
     
@@ -109,10 +116,13 @@ class Post(db.Model):
                 if not self._is_markdown_content(self.content):
                     formatted_content = self._format_plain_text(self.content)
                     self.html_content = formatted_content
+                    self._toc = '[]'
                 else:
-                    from app.utils.markdown import markdown_to_html
-                    self.html_content = markdown_to_html(self.content)
-                self._toc = '[]'
+                    # 渲染结果按内容哈希缓存，同时得到目录
+                    from app.services.markdown_render import markdown_render_service
+                    result = markdown_render_service.render(self.content)
+                    self.html_content = result.html
+                    self._toc = result.toc_json
             except Exception as e:
                 current_app.logger.error(f"初始化文章时渲染内容失败: {str(e)}")
                 self.html_content = f"<p>{str(self.content)}</p>"
@@ -207,31 +217,16 @@ class Post(db.Model):
             # 检测内容是否为Markdown格式
             if not self._is_markdown_content(self.content):
                 self.html_content = self._format_plain_text(self.content)
+                self._toc = '[]'
                 current_app.logger.info(f"使用普通文本格式化方法")
             else:
-                from app.utils.markdown import markdown_to_html
-                self.html_content = markdown_to_html(self.content)
+                # 渲染、清理、高亮和目录提取一次完成，内容未变时直接命中缓存
+                from app.services.markdown_render import markdown_render_service
+                result = markdown_render_service.render(self.content)
+                self.html_content = result.html
+                self._toc = result.toc_json
                 current_app.logger.info(f"使用Markdown格式化方法")
             
-            # 提取目录
-            try:
-                soup = BeautifulSoup(self.html_content, 'html.parser')
-                headings = []
-                
-                # 查找所有标题标签
-                for level in range(1, 7):
-                    for h in soup.find_all(f'h{level}'):
-                        headings.append({
-                            'id': h.get('id', ''),
-                            'text': h.get_text(),
-                            'level': level
-                        })
-                
-                self._toc = json.dumps(headings)
-            except Exception as e:
-                current_app.logger.error(f"提取文章目录失败: {str(e)}")
-                self._toc = '[]'
-            
             # 设置更新时间
             self.updated_at = datetime.now(UTC)
             
@@ -359,8 +354,9 @@ class Post(db.Model):
             if not content:
                 return ''
                 
-            from app.utils.markdown import markdown_to_html
-            return markdown_to_html(content)
+            from app.services.markdown_render import markdown_render_service
+            # 预览内容随编辑不断变化，只缓存在内存中，不写入磁盘
+            return markdown_render_service.render_html(content, persist=False)
         except Exception as e:
             current_app.logger.error(f"渲染Markdown内容失败: {str(e)}")
             current_app.logger.exception(e)
@@ -0,0 +1,24 @@
+"""
+文件名：related_post.py
+描述：相关文章模型（离线预计算的相似文章）
+作者：denny
+"""
+
+from app.extensions import db
+
+class RelatedPost(db.Model):
+    """相关文章模型类
+
+    每篇文章保存按相似度排序的前 K 篇相关文章，
+    文章详情页按 (post_id, rank) 主键一次查询读取。
+    """
+    __tablename__ = 'related_posts'
+    
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)  # 排名，从 0 开始
+    related_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'),
+                           nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)  # 相似度
+    
+    def __repr__(self):
+        return f'<RelatedPost {self.post_id}->{self.related_id}>'
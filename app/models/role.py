@@ -343,97 +343,6 @@ class Role(db.Model):
             current_app.logger.error(f'更新角色 {self.name} 的用户列表失败: {str(e)}')
             return False
     
-    def has_permission(self, permission):
-        """检查是否具有指定权限"""
-        try:
-            if not isinstance(permission, (int, Permission)):
-                current_app.logger.error(f'无效的权限类型: {type(permission)}')
-                return False
-            
-            # 如果是 Permission 枚举，获取其值
-            perm_value = permission.value if isinstance(permission, Permission) else permission
-            
-            # 检查权限
-            has_perm = bool(self.permissions & perm_value)
-            current_app.logger.debug(
-                f'检查角色 {self.name} 的权限: '
-                f'{perm_value} -> {"Yes" if has_perm else "No"}'
-            )
-            return has_perm
-        except Exception as e:
-            current_app.logger.error(f'检查角色 {self.name} 的权限失败: {str(e)}')
-            return False
-    
-    def add_permission(self, permission):
-        """添加指定权限"""
-        try:
-            if not isinstance(permission, (int, Permission)):
-                current_app.logger.error(f'无效的权限类型: {type(permission)}')
-                return False
-            
-            # 如果是 Permission 枚举，获取其值
-            perm_value = permission.value if isinstance(permission, Permission) else permission
-            
-            # 添加权限
-            old_permissions = self.permissions
-            self.permissions |= perm_value
-            self.updated_at = datetime.now(UTC)
-            db.session.commit()
-            
-            current_app.logger.info(
-                f'为角色 {self.name} 添加权限: '
-                f'{old_permissions} -> {self.permissions}'
-            )
-            return True
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f'为角色 {self.name} 添加权限失败: {str(e)}')
-            return False
-    
-    def remove_permission(self, permission):
-        """移除指定权限"""
-        try:
-            if not isinstance(permission, (int, Permission)):
-                current_app.logger.error(f'无效的权限类型: {type(permission)}')
-                return False
-            
-            # 如果是 Permission 枚举，获取其值
-            perm_value = permission.value if isinstance(permission, Permission) else permission
-            
-            # 移除权限
-            old_permissions = self.permissions
-            self.permissions &= ~perm_value
-            self.updated_at = datetime.now(UTC)
-            db.session.commit()
-            
-            current_app.logger.info(
-                f'从角色 {self.name} 移除权限: '
-                f'{old_permissions} -> {self.permissions}'
-            )
-            return True
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f'从角色 {self.name} 移除权限失败: {str(e)}')
-            return False
-    
-    def reset_permissions(self):
-        """重置所有权限"""
-        try:
-            old_permissions = self.permissions
-            self.permissions = 0
-            self.updated_at = datetime.now(UTC)
-            db.session.commit()
-            
-            current_app.logger.info(
-                f'重置角色 {self.name} 的所有权限: '
-                f'{old_permissions} -> 0'
-            )
-            return True
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f'重置角色 {self.name} 的权限失败: {str(e)}')
-            return False
-    
     def has_permission(self, permission):
         """检查是否有指定权限"""
         try:
@@ -444,13 +353,8 @@ class Role(db.Model):
             # 如果是 Permission 枚举，获取其值
             perm_value = permission.value if isinstance(permission, Permission) else permission
             
-            # 检查权限
-            has_perm = bool(self.permissions & perm_value)
-            current_app.logger.debug(
-                f'检查角色 {self.name} 的权限: '
-                f'{perm_value} -> {"Yes" if has_perm else "No"}'
-            )
-            return has_perm
+            # 检查权限（高频调用，不记录调试日志）
+            return bool((self.permissions or 0) & perm_value)
         except Exception as e:
             current_app.logger.error(f'检查角色 {self.name} 的权限失败: {str(e)}')
             return False
@@ -4,7 +4,7 @@
 作者：denny
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, UTC
 import secrets
 from app.extensions import db
 import json
@@ -74,25 +74,34 @@ class UserSession(db.Model):
         """设置序列化的数据"""
         self.data = json.dumps(value) if value else '{}'
     
-    def is_expired(self):
-        """检查会话是否过期"""
-        return datetime.now(UTC) > self.expiry
-    
-    def is_valid(self, ip_address=None, user_agent=None):
-        """检查会话是否有效"""
-        if not self.is_active:
+    @staticmethod
+    def _naive_utc(value):
+        """统一为 UTC 朴素时间（SQLite 读出的时间不带时区）"""
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value
+
+    @classmethod
+    def check(cls, is_active, expiry, session_ip, session_agent, ip_address=None, user_agent=None):
+        """按会话字段判断是否有效（会话记录和缓存的会话快照共用）"""
+        if not is_active:
             return False
-            
-        if self.is_expired():
+        if expiry is None or datetime.now(UTC).replace(tzinfo=None) >= cls._naive_utc(expiry):
             return False
-            
-        if ip_address and self.ip_address != ip_address:
+        if ip_address and session_ip != ip_address:
             return False
-            
-        if user_agent and self.user_agent != user_agent:
+        if user_agent and session_agent != user_agent:
             return False
-            
         return True
+
+    def is_expired(self):
+        """检查会话是否过期"""
+        return datetime.now(UTC).replace(tzinfo=None) >= self._naive_utc(self.expiry)
+    
+    def is_valid(self, ip_address=None, user_agent=None):
+        """检查会话是否有效"""
+        return self.check(self.is_active, self.expiry, self.ip_address, self.user_agent,
+                          ip_address, user_agent)
     
     def update_activity(self):
         """更新最后活动时间"""
@@ -105,13 +114,24 @@ class UserSession(db.Model):
         db.session.commit()
     
     @classmethod
-    def cleanup_expired(cls):
-        """清理过期会话"""
-        cls.query.filter(
-            (cls.expiry < datetime.now(UTC)) |
-            (cls.is_active == False)  # noqa: E712
-        ).delete()
-        db.session.commit()
+    def cleanup_expired(cls, batch_size=500):
+        """分批清理过期和已失效的会话（每批单独提交，避免长时间锁表）
+
+        Returns:
+            int: 删除的会话数量
+        """
+        table = cls.__table__
+        expired = db.select(table.c.id).where(
+            (table.c.expiry < datetime.now(UTC).replace(tzinfo=None)) |
+            (table.c.is_active == False)  # noqa: E712
+        ).limit(batch_size)
+        total = 0
+        while True:
+            with db.engine.begin() as conn:
+                deleted = conn.execute(table.delete().where(table.c.id.in_(expired))).rowcount
+            total += deleted
+            if deleted < batch_size:
+                return total
     
     def __repr__(self):
         return f'<UserSession {self.session_id}>'
\ No newline at end of file
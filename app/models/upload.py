@@ -0,0 +1,48 @@
+"""
+文件名：upload.py
+描述：上传文件索引模型（按内容哈希存储与去重）
+作者：denny
+"""
+
+from datetime import datetime, UTC
+from app.extensions import db
+
+
+class Upload(db.Model):
+    """上传文件索引模型类
+
+    文件按 SHA-256 保存在分片目录 ab/cd/<哈希>.<扩展名> 下，
+    相同内容只保存一份，ref_count 记录被上传（引用）的次数。
+    """
+    __tablename__ = 'uploads'
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, unique=True, index=True)
+    path = db.Column(db.String(255), nullable=False, unique=True)  # 相对上传目录的路径
+    size = db.Column(db.Integer, nullable=False)  # 字节数
+    width = db.Column(db.Integer)  # 图片宽度
+    height = db.Column(db.Integer)  # 图片高度
+    mime_type = db.Column(db.String(100))
+    ref_count = db.Column(db.Integer, nullable=False, default=1)
+    original_name = db.Column(db.String(255))  # 首次上传时的文件名
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC),
+                           onupdate=lambda: datetime.now(UTC))
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'name': self.path,
+            'sha256': self.sha256,
+            'size': self.size,
+            'width': self.width,
+            'height': self.height,
+            'mime_type': self.mime_type,
+            'ref_count': self.ref_count,
+            'original_name': self.original_name,
+            'modified': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<Upload {self.path}>'
@@ -13,6 +13,7 @@ from sqlalchemy import desc
 
 # 从role模块导入user_roles表
 from app.models.role import user_roles, Role
+from app.services.permission_cache import permission_cache_service
 
 class User(UserMixin, db.Model):
     """用户模型"""
@@ -146,12 +147,13 @@ class User(UserMixin, db.Model):
             
         Returns:
             bool: 如果用户有指定权限返回 True，否则返回 False
+            
+        Note:
+            有效权限位掩码按请求和跨请求缓存，这里只做一次整数与运算。
         """
-        if not self.roles:
-            return False
         if isinstance(permission, Permission):
             permission = permission.value
-        return any(role.has_permission(permission) for role in self.roles)
+        return bool(permission_cache_service.get_mask(self) & permission)
         
     def add_role(self, role):
         """添加角色
@@ -170,6 +172,7 @@ class User(UserMixin, db.Model):
             
         if not self.has_role(role.name):
             self.roles.append(role)
+            permission_cache_service.forget(self.id)
             
     def remove_role(self, role):
         """移除角色
@@ -188,6 +191,7 @@ class User(UserMixin, db.Model):
             
         if self.has_role(role.name):
             self.roles.remove(role)
+            permission_cache_service.forget(self.id)
             
     def set_active_status(self, status):
         """设置用户活动状态
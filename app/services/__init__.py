@@ -37,6 +37,18 @@ def get_role_service():
     from .role_service import RoleService
     return RoleService()
 
+def get_sidebar_stats_service():
+    from .sidebar import SidebarStatsService
+    return SidebarStatsService()
+
+def get_view_counter_service():
+    from .view_counter import view_counter_service
+    return view_counter_service
+
+def get_post_listing_service():
+    from .post_listing import PostListingService
+    return PostListingService()
+
 # 导出服务工厂函数
 __all__ = [
     'get_user_service',
@@ -46,6 +58,9 @@ __all__ = [
     'get_category_service',
     'get_tag_service',
     'get_security_service',
-    'get_role_service'
+    'get_role_service',
+    'get_sidebar_stats_service',
+    'get_view_counter_service',
+    'get_post_listing_service'
 ]
 
@@ -0,0 +1,309 @@
+"""
+文件名：archive.py
+描述：文章归档服务（按月分组计数与轻量文章投影，缓存并增量更新）
+作者：denny
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.extensions import db, cache
+from app.models.category import Category
+from app.models.post import Post, PostStatus
+from app.services.post_listing import CategoryRef
+from app.services.neighbours import neighbour_index_service
+
+# 归档月份计数缓存键；月份文章列表的键包含代数，整体重建时旧列表自动作废
+ARCHIVE_MONTHS_CACHE_KEY = 'archive:months'
+ARCHIVE_POSTS_CACHE_KEY = 'archive:posts:{}:{}-{:02d}'
+
+# 影响归档展示的文章字段
+ARCHIVE_FIELDS = ('title', 'created_at', 'status', 'category_id')
+
+
+class ArchiveEntry:
+    """归档中的文章行对象（只含归档页需要的字段）"""
+
+    __slots__ = ('id', 'title', 'created_at', 'status', 'category')
+
+    def __init__(self, id, title, created_at, status, category: Optional[CategoryRef] = None):
+        self.id = id
+        self.title = title
+        self.created_at = created_at
+        self.status = status
+        self.category = category
+
+    def __repr__(self):
+        return f'<ArchiveEntry {self.id}>'
+
+
+class ArchiveMonth:
+    """归档月份及其文章数"""
+
+    __slots__ = ('year', 'month', 'count', 'posts')
+
+    def __init__(self, year: int, month: int, count: int, posts: Optional[List[ArchiveEntry]] = None):
+        self.year = year
+        self.month = month
+        self.count = count
+        self.posts = posts if posts is not None else []
+
+    @property
+    def key(self) -> str:
+        """形如 2024-03 的月份键"""
+        return f'{self.year}-{self.month:02d}'
+
+
+def _month_range(year: int, month: int) -> Tuple[datetime, datetime]:
+    """月份的起止时间（左闭右开），用于范围查询"""
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def _archive_slot(status, created_at) -> Optional[Tuple[int, int]]:
+    """文章在归档中的位置（年, 月），不在归档中时返回 None"""
+    if isinstance(status, str):
+        status = PostStatus.__members__.get(status.upper())
+    if status not in ArchiveService.VISIBLE_STATUSES or created_at is None:
+        return None
+    return created_at.year, created_at.month
+
+
+class ArchiveService:
+    """文章归档服务
+
+    - 月份计数由文章邻接索引（与上一篇/下一篇导航共用）按年、月汇总生成
+    - 每个月的文章只查询 (id, title, created_at, status, 分类) 投影，按需加载
+    - 文章发布、归档、修改或删除提交后增量调整月份计数，并只作废受影响月份的文章列表
+    """
+
+    VISIBLE_STATUSES = (PostStatus.PUBLISHED, PostStatus.ARCHIVED)
+    CACHE_TIMEOUT = 3600  # 兜底过期时间（秒），正常情况下增量更新
+
+    _lock = threading.Lock()
+
+    # ---------- 数据加载 ----------
+
+    def _load_months(self) -> dict:
+        """按年、月统计文章数（由文章邻接索引生成，不再单独分组查询）"""
+        return {
+            'generation': time.time_ns(),
+            'counts': neighbour_index_service.month_counts()
+        }
+
+    def _load_posts(self, start: datetime, end: datetime) -> List[ArchiveEntry]:
+        """查询时间范围内的文章投影（按创建时间倒序）"""
+        rows = db.session.query(
+            Post.id, Post.title, Post.created_at, Post.status, Category.id, Category.name
+        ).outerjoin(Category, Post.category_id == Category.id).filter(
+            Post.status.in_(self.VISIBLE_STATUSES),
+            Post.created_at >= start,
+            Post.created_at < end
+        ).order_by(Post.created_at.desc(), Post.id.desc()).all()
+        return [
+            ArchiveEntry(post_id, title, created_at, status,
+                         CategoryRef(category_id, category_name) if category_id else None)
+            for post_id, title, created_at, status, category_id, category_name in rows
+        ]
+
+    def _get_tree(self) -> dict:
+        tree = cache.get(ARCHIVE_MONTHS_CACHE_KEY)
+        if tree is not None:
+            return tree
+        # 加载和写入在锁内完成，避免与 apply_changes 交错时用旧计数覆盖增量更新
+        with self._lock:
+            tree = cache.get(ARCHIVE_MONTHS_CACHE_KEY)
+            if tree is None:
+                tree = self._load_months()
+                cache.set(ARCHIVE_MONTHS_CACHE_KEY, tree, timeout=self.CACHE_TIMEOUT)
+            return tree
+
+    def _fill_posts(self, tree: dict, months: List[ArchiveMonth]):
+        """为月份填充文章列表，未缓存的月份合并为一次范围查询"""
+        missing = []
+        for item in months:
+            key = ARCHIVE_POSTS_CACHE_KEY.format(tree['generation'], item.year, item.month)
+            posts = cache.get(key)
+            if posts is None:
+                missing.append(item)
+            else:
+                item.posts = posts
+        if not missing:
+            return
+
+        start = _month_range(missing[-1].year, missing[-1].month)[0]
+        end = _month_range(missing[0].year, missing[0].month)[1]
+        grouped = {}
+        for entry in self._load_posts(start, end):
+            grouped.setdefault((entry.created_at.year, entry.created_at.month), []).append(entry)
+        for item in missing:
+            item.posts = grouped.get((item.year, item.month), [])
+            key = ARCHIVE_POSTS_CACHE_KEY.format(tree['generation'], item.year, item.month)
+            cache.set(key, item.posts, timeout=self.CACHE_TIMEOUT)
+
+    # ---------- 查询接口 ----------
+
+    def get_months(self) -> List[ArchiveMonth]:
+        """所有归档月份（按时间倒序），不含文章列表"""
+        try:
+            counts = self._get_tree()['counts']
+        except Exception as e:
+            current_app.logger.error(f"获取归档月份失败: {str(e)}")
+            return []
+        return [ArchiveMonth(year, month, count)
+                for (year, month), count in sorted(counts.items(), reverse=True) if count > 0]
+
+    def get_page(self, page: int = 1, months_per_page: int = 12) -> Tuple[List[ArchiveMonth], int]:
+        """按月份分页获取归档
+
+        Returns:
+            tuple: (本页月份及其文章, 月份总数)
+        """
+        months = self.get_months()
+        page = max(page, 1)
+        items = months[(page - 1) * months_per_page:page * months_per_page]
+        if items:
+            try:
+                self._fill_posts(self._get_tree(), items)
+            except Exception as e:
+                current_app.logger.error(f"获取归档文章失败: {str(e)}")
+                items = []
+        return items, len(months)
+
+    def get_month(self, year: int, month: int) -> Optional[ArchiveMonth]:
+        """获取单个月份的归档，没有文章时返回 None"""
+        for item in self.get_months():
+            if (item.year, item.month) == (year, month):
+                try:
+                    self._fill_posts(self._get_tree(), [item])
+                except Exception as e:
+                    current_app.logger.error(f"获取 {year}-{month:02d} 归档文章失败: {str(e)}")
+                    return None
+                return item
+        return None
+
+    def get_archives(self) -> Dict[str, List[ArchiveEntry]]:
+        """全部归档，键为 2024-03 形式的月份"""
+        months = self.get_months()
+        if months:
+            try:
+                self._fill_posts(self._get_tree(), months)
+            except Exception as e:
+                current_app.logger.error(f"获取归档文章失败: {str(e)}")
+                return {}
+        return {item.key: item.posts for item in months}
+
+    # ---------- 缓存维护 ----------
+
+    def apply_changes(self, changes):
+        """增量更新缓存的归档
+
+        Args:
+            changes: [(原位置, 新位置)]，位置为 (年, 月) 或 None（不在归档中）
+        """
+        with self._lock:
+            tree = cache.get(ARCHIVE_MONTHS_CACHE_KEY)
+            if tree is None:
+                return
+            counts = tree['counts']
+            stale = set()
+            for old, new in changes:
+                if old != new:
+                    if old is not None:
+                        counts[old] = counts.get(old, 0) - 1
+                        if counts[old] <= 0:
+                            counts.pop(old)
+                    if new is not None:
+                        counts[new] = counts.get(new, 0) + 1
+                stale.update(slot for slot in (old, new) if slot is not None)
+            for year, month in stale:
+                cache.delete(ARCHIVE_POSTS_CACHE_KEY.format(tree['generation'], year, month))
+            cache.set(ARCHIVE_MONTHS_CACHE_KEY, tree, timeout=self.CACHE_TIMEOUT)
+
+    def rebuild(self):
+        """丢弃缓存的归档和邻接索引，下次访问时重新生成（月份计数由邻接索引汇总）"""
+        with self._lock:
+            neighbour_index_service.rebuild()
+            cache.delete(ARCHIVE_MONTHS_CACHE_KEY)
+
+
+def _previous_value(state, attr):
+    """属性在本次刷新前的值
+
+    Post 的 status、created_at 等列声明了 active_history，修改时原值（包括 None）
+    总会出现在 history.deleted 中；没有修改时原值即当前值。
+    """
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.attrs[attr].value
+
+
+def _record_change(post, old, new):
+    session = Session.object_session(post)
+    if session is not None and (old is not None or new is not None):
+        session.info.setdefault('archive_changes', []).append((old, new))
+
+
+@event.listens_for(Post, 'after_insert')
+def track_archive_insert(mapper, connection, post):
+    """新文章进入归档"""
+    _record_change(post, None, _archive_slot(post.status, post.created_at))
+
+
+@event.listens_for(Post, 'after_update')
+def track_archive_update(mapper, connection, post):
+    """文章发布、归档、改标题/分类或修改创建时间"""
+    state = inspect(post)
+    if not any(state.attrs[attr].history.has_changes() for attr in ARCHIVE_FIELDS):
+        return
+    old = _archive_slot(_previous_value(state, 'status'), _previous_value(state, 'created_at'))
+    _record_change(post, old, _archive_slot(post.status, post.created_at))
+
+
+@event.listens_for(Post, 'after_delete')
+def track_archive_delete(mapper, connection, post):
+    """文章移出归档"""
+    state = inspect(post)
+    _record_change(post, _archive_slot(_previous_value(state, 'status'),
+                                       _previous_value(state, 'created_at')), None)
+
+
+@event.listens_for(Category, 'after_update')
+@event.listens_for(Category, 'after_delete')
+def track_category_change(mapper, connection, category):
+    """分类改名或删除后归档中的分类名称需要重建"""
+    session = Session.object_session(category)
+    if session is not None:
+        session.info['archive_rebuild'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def apply_archive_changes_on_commit(session):
+    """事务提交后增量更新归档缓存"""
+    changes = session.info.pop('archive_changes', None)
+    rebuild = session.info.pop('archive_rebuild', False)
+    if not changes and not rebuild:
+        return
+    try:
+        if rebuild:
+            archive_service.rebuild()
+        else:
+            archive_service.apply_changes(changes)
+    except Exception as e:
+        current_app.logger.error(f"更新归档缓存失败: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_archive_changes_on_rollback(session):
+    """事务回滚后丢弃记录的变更"""
+    session.info.pop('archive_changes', None)
+    session.info.pop('archive_rebuild', None)
+
+
+archive_service = ArchiveService()
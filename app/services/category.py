@@ -9,6 +9,8 @@ from flask import current_app
 from app.extensions import db
 from app.models.category import Category
 from app.services import get_security_service
+from app.utils.tagged_cache import tagged_cache, CacheTags
+from app.utils.pagination import KeysetPagination
 from typing import List, Optional, Dict
 from sqlalchemy import func
 
@@ -43,6 +45,7 @@ class CategoryService:
         
         db.session.add(category)
         db.session.commit()
+        tagged_cache.invalidate(CacheTags.category(category.id), CacheTags.LISTING)
         
         return category
 
@@ -76,6 +79,7 @@ class CategoryService:
                 category.slug = slug
                 
             db.session.commit()
+            tagged_cache.invalidate(CacheTags.category(category_id), CacheTags.LISTING)
             return {'status': 'success', 'message': '分类更新成功', 'category': category}
             
         except Exception as e:
@@ -103,6 +107,7 @@ class CategoryService:
                 
             db.session.delete(category)
             db.session.commit()
+            tagged_cache.invalidate(CacheTags.category(category_id), CacheTags.LISTING)
             return {'status': 'success', 'message': '分类删除成功'}
             
         except Exception as e:
@@ -154,12 +159,12 @@ class CategoryService:
         categories = Category.query.all()
         result = []
         
+        # 分组查询所有分类的文章数量（带缓存）
+        from app.services.sidebar import SidebarStatsService
+        category_counts = SidebarStatsService().get_category_counts()
+        
         for category in categories:
-            from app.models.post import Post, PostStatus
-            post_count = Post.query.filter(
-                Post.category_id == category.id,
-                (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
-            ).count()
+            post_count = category_counts.get(category.id, 0)
             result.append({
                 'id': category.id,
                 'name': category.name,
@@ -360,15 +365,16 @@ class CategoryService:
                 raise ValueError('分类不存在')
             
             from app.models.post import Post, PostStatus
-            pagination = Post.query.filter(
+            query = Post.query.options(db.joinedload(Post.author)).filter(
                 Post.category_id == category.id,
                 (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
-            ).order_by(
-                Post.created_at.desc()
-            ).paginate(
-                page=page,
-                per_page=per_page,
-                error_out=False
+            )
+            # 按 (created_at, id) 游标分页，总数和页码游标单独缓存
+            pagination = KeysetPagination(
+                query, per_page,
+                columns=(Post.created_at, Post.id), key_attrs=('created_at', 'id'),
+                page=page, cache_key=f'category_posts:{category.id}',
+                cache_tags=[CacheTags.category(category.id)]
             )
             
             current_app.logger.info('成功获取分类文章列表', extra={
@@ -12,14 +12,170 @@ from app.models.post import Post
 from app.models.user import User
 from app.services.security import SecurityService
 from app.utils.markdown import markdown_to_html
-from sqlalchemy import or_, and_, func
+from app.utils.tagged_cache import tagged_cache, CacheTags
+from sqlalchemy import or_, and_, func, event, select
+from sqlalchemy.orm import Session
 from typing import Dict, List, Optional
 
+# 评论树缓存键
+COMMENT_TREE_CACHE_KEY = 'comment_tree:{}'
+
+
+class CommentAuthor:
+    """评论树中使用的作者引用"""
+
+    __slots__ = ('id', 'username')
+
+    def __init__(self, id: int, username: str):
+        self.id = id
+        self.username = username
+
+
+class CommentNode:
+    """评论树节点
+
+    由缓存的评论行构建，不挂在 ORM 会话上，
+    访问作者和回复不会触发额外查询。
+    """
+
+    __slots__ = ('id', 'post_id', 'parent_id', 'content', 'html_content', 'author_id',
+                 'author', 'nickname', 'email', 'status', 'created_at', 'replies')
+
+    def __init__(self, id, post_id, parent_id, content, html_content, author_id,
+                 username, nickname, email, status, created_at):
+        self.id = id
+        self.post_id = post_id
+        self.parent_id = parent_id
+        self.content = content
+        self.html_content = html_content
+        self.author_id = author_id
+        self.author = CommentAuthor(author_id, username) if author_id and username else None
+        self.nickname = nickname
+        self.email = email
+        self.status = status
+        self.created_at = created_at
+        self.replies = []
+
+    @property
+    def children(self):
+        """回复列表（兼容旧接口）"""
+        return self.replies
+
+    @property
+    def author_name(self):
+        """评论者名称"""
+        return self.author.username if self.author else self.nickname
+
+    @property
+    def is_approved(self):
+        """是否已审核通过"""
+        return self.status == CommentStatus.APPROVED
+
+    def to_dict(self):
+        """转换为字典（递归包含回复）"""
+        return {
+            'id': self.id,
+            'content': self.content,
+            'html_content': self.html_content,
+            'author_name': self.author_name,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
+            'status': self.status,
+            'children': [reply.to_dict() for reply in self.replies]
+        }
+
+    def __repr__(self):
+        return f'<CommentNode {self.id}>'
+
+
+def invalidate_comment_tree(post_id):
+    """清除文章的评论树缓存（失效 post 标签，依赖该文章的缓存一并失效）"""
+    tagged_cache.invalidate(CacheTags.post(post_id))
+
+
 class CommentService:
     """评论服务类"""
-    
+
+    # 评论树缓存时间（秒）
+    CACHE_TIMEOUT = 600
+
     def __init__(self):
         self.security_service = SecurityService()
+
+    @staticmethod
+    def _load_comment_rows(post_id):
+        """加载文章的全部未拒绝评论（单次查询，带缓存）
+
+        Returns:
+            list: 按创建时间升序排列的评论行元组
+        """
+        def load():
+            result = db.session.execute(
+                select(
+                    Comment.id, Comment.post_id, Comment.parent_id, Comment.content,
+                    Comment.html_content, Comment.author_id, User.username,
+                    Comment.nickname, Comment.email, Comment.status, Comment.created_at
+                )
+                .outerjoin(User, User.id == Comment.author_id)
+                .where(Comment.post_id == post_id, Comment.status != CommentStatus.REJECTED)
+                .order_by(Comment.created_at.asc(), Comment.id.asc())
+            )
+            return [tuple(row) for row in result]
+
+        return tagged_cache.get_or_set(
+            COMMENT_TREE_CACHE_KEY.format(post_id), load,
+            tags=[CacheTags.post(post_id)], timeout=CommentService.CACHE_TIMEOUT
+        )
+
+    @staticmethod
+    def _build_tree(rows, is_visible, newest_first=False):
+        """由评论行构建任意深度的评论树，时间复杂度 O(n)
+
+        父评论不可见时，其下的回复一并隐藏。
+
+        Args:
+            rows: 按创建时间升序排列的评论行
+            is_visible: 判断评论节点是否可见的函数
+            newest_first: 顶级评论是否按时间倒序排列
+
+        Returns:
+            list: 顶级评论节点列表，回复按时间升序挂在 replies 上
+        """
+        nodes = {}
+        for row in rows:
+            node = CommentNode(*row)
+            if is_visible(node):
+                nodes[node.id] = node
+
+        roots = []
+        for node in nodes.values():
+            if node.parent_id is None:
+                roots.append(node)
+            else:
+                parent = nodes.get(node.parent_id)
+                if parent is not None:
+                    parent.replies.append(node)
+
+        if newest_first:
+            roots.reverse()
+        return roots
+
+    @staticmethod
+    def _visibility(include_pending=False, user_id=None, user_email=None):
+        """构建评论可见性判断函数
+
+        默认只显示已审核评论；include_pending 时额外显示当前用户自己的待审核评论。
+        """
+        if not include_pending or not (user_id or user_email):
+            return lambda node: node.status == CommentStatus.APPROVED
+
+        def is_visible(node):
+            if node.status == CommentStatus.APPROVED:
+                return True
+            if node.status != CommentStatus.PENDING:
+                return False
+            return bool((user_id and node.author_id == user_id) or
+                        (user_email and node.email == user_email))
+        return is_visible
         
     @staticmethod
     def create_comment(post_id, content, author_id=None, nickname=None, email=None, parent_id=None):
@@ -197,22 +353,11 @@ class CommentService:
         :return: 评论列表
         """
         try:
-            # 只获取已审核状态的评论，排除被拒绝的评论
-            comments = Comment.query.filter(
-                Comment.post_id == post_id,
-                Comment.parent_id == None,  # 只获取顶级评论
-                Comment.status == CommentStatus.APPROVED  # 只获取已审核的评论
-            ).order_by(Comment.created_at.desc()).all()
-            
-            # 获取评论的回复
-            for comment in comments:
-                # 手动加载回复，并过滤出已审核的回复
-                comment.replies = Comment.query.filter(
-                    Comment.parent_id == comment.id,
-                    Comment.status == CommentStatus.APPROVED
-                ).order_by(Comment.created_at.asc()).all()
-            
-            return comments
+            # 单次查询加载全部评论，只显示已审核的评论，最新的顶级评论在前
+            rows = CommentService._load_comment_rows(post_id)
+            return CommentService._build_tree(
+                rows, CommentService._visibility(), newest_first=True
+            )
             
         except Exception as e:
             current_app.logger.error(f'获取评论列表失败: {str(e)}')
@@ -499,6 +644,9 @@ class CommentService:
                 })
                 
             db.session.commit()
+
+            # 批量更新不会触发模型事件，需要手动清除评论树缓存
+            invalidate_comment_tree(comment.post_id)
             
             return {
                 'status': 'success',
@@ -705,63 +853,10 @@ class CommentService:
         try:
             current_app.logger.info(f"获取评论树，参数：post_id={post_id}, include_pending={include_pending}, user_id={user_id}, user_email={user_email}")
             
-            # 构建基本查询
-            query = Comment.query.filter(Comment.post_id == post_id)
-            
-            # 处理评论状态过滤
-            if not include_pending:
-                # 只获取已审核通过的评论
-                query = query.filter(Comment.status == CommentStatus.APPROVED)
-            elif user_id or user_email:
-                # 显示已通过的评论和用户自己的待审核评论，但排除被拒绝的评论
-                query = query.filter(or_(
-                    Comment.status == CommentStatus.APPROVED,
-                    and_(
-                        Comment.status == CommentStatus.PENDING,
-                        or_(
-                            Comment.author_id == user_id if user_id else False,
-                            Comment.email == user_email if user_email else False
-                        )
-                    )
-                ))
-            else:
-                # 只显示已审核通过的评论
-                query = query.filter(Comment.status == CommentStatus.APPROVED)
-            
-            # 始终排除被拒绝的评论
-            query = query.filter(Comment.status != CommentStatus.REJECTED)
-            
-            # 获取所有符合条件的评论
-            comments = query.order_by(Comment.created_at.asc()).all()
-            current_app.logger.info(f"查询到 {len(comments)} 条评论")
-            
-            # 构建评论树
-            comment_dict = {}  # 用于存储所有评论的字典
-            root_comments = []  # 存储顶级评论
-            
-            # 第一次遍历：创建所有评论的字典
-            for comment in comments:
-                comment_data = {
-                    'id': comment.id,
-                    'content': comment.content,
-                    'html_content': comment.html_content,
-                    'author_name': comment.author.username if comment.author else comment.nickname,
-                    'created_at': comment.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'status': comment.status,
-                    'children': []
-                }
-                comment_dict[comment.id] = comment_data
-            
-            # 第二次遍历：构建树形结构
-            for comment in comments:
-                if comment.parent_id is None:
-                    # 这是一个顶级评论
-                    root_comments.append(comment_dict[comment.id])
-                else:
-                    # 这是一个回复
-                    parent_comment = comment_dict.get(comment.parent_id)
-                    if parent_comment:
-                        parent_comment['children'].append(comment_dict[comment.id])
+            # 单次查询加载全部评论（带缓存），在内存中过滤并构建评论树
+            rows = self._load_comment_rows(post_id)
+            visible = self._visibility(include_pending, user_id, user_email)
+            root_comments = [node.to_dict() for node in self._build_tree(rows, visible)]
             
             current_app.logger.info(f"构建评论树完成，根评论数：{len(root_comments)}")
             return root_comments
@@ -780,84 +875,10 @@ class CommentService:
         :return: 评论列表
         """
         try:
-            # 基础查询：获取顶级评论（没有父评论的评论）
-            query = Comment.query.filter(
-                Comment.post_id == post_id,
-                Comment.parent_id == None  # 只获取顶级评论
-            )
-
-            # 处理评论状态过滤
-            if not include_pending:
-                # 只获取已审核的评论
-                query = query.filter(Comment.status == CommentStatus.APPROVED)
-            else:
-                # 如果包含待审核评论，需要根据用户身份过滤
-                if user_email:
-                    # 获取已审核的评论和用户自己的待审核评论
-                    query = query.filter(
-                        or_(
-                            Comment.status == CommentStatus.APPROVED,
-                            and_(
-                                Comment.status == CommentStatus.PENDING,
-                                Comment.email == user_email
-                            )
-                        )
-                    )
-                elif user_id:
-                    # 获取已审核的评论和用户自己的待审核评论
-                    query = query.filter(
-                        or_(
-                            Comment.status == CommentStatus.APPROVED,
-                            and_(
-                                Comment.status == CommentStatus.PENDING,
-                                Comment.author_id == user_id
-                            )
-                        )
-                    )
-                else:
-                    # 只获取已审核的评论
-                    query = query.filter(Comment.status == CommentStatus.APPROVED)
-            
-            # 始终排除被拒绝的评论
-            query = query.filter(Comment.status != CommentStatus.REJECTED)
-
-            # 按创建时间排序
-            query = query.order_by(Comment.created_at.desc())
-
-            # 获取所有符合条件的顶级评论
-            top_level_comments = query.all()
-
-            # 为每个顶级评论获取回复
-            for comment in top_level_comments:
-                # 获取回复
-                replies_query = Comment.query.filter(
-                    Comment.parent_id == comment.id
-                )
-                
-                # 处理回复的状态过滤
-                if not include_pending:
-                    replies_query = replies_query.filter(Comment.status == CommentStatus.APPROVED)
-                else:
-                    if user_email:
-                        replies_query = replies_query.filter(
-                            or_(
-                                Comment.status == CommentStatus.APPROVED,
-                                and_(
-                                    Comment.status == CommentStatus.PENDING,
-                                    Comment.email == user_email
-                                )
-                            )
-                        )
-                    else:
-                        replies_query = replies_query.filter(Comment.status == CommentStatus.APPROVED)
-                
-                # 获取回复并排序
-                replies = replies_query.order_by(Comment.created_at.asc()).all()
-                
-                # 设置回复
-                comment.children = replies
-
-            return top_level_comments
+            # 单次查询加载全部评论（带缓存），顶级评论按时间倒序，回复按时间升序
+            rows = self._load_comment_rows(post_id)
+            visible = self._visibility(include_pending, user_id, user_email)
+            return self._build_tree(rows, visible, newest_first=True)
 
         except Exception as e:
             current_app.logger.error(f"Error getting comments for post {post_id}: {str(e)}")
@@ -884,6 +905,28 @@ class CommentService:
             current_app.logger.error(f"获取评论数失败: {str(e)}")
             return 0
 
+    def get_comment_counts(self, post_ids):
+        """批量获取多篇文章的评论数（一次分组查询）
+        
+        Args:
+            post_ids: 文章ID列表
+            
+        Returns:
+            dict: {文章ID: 已审核评论数}，没有评论的文章不在结果中
+        """
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+        try:
+            rows = db.session.query(Comment.post_id, func.count(Comment.id)).filter(
+                Comment.post_id.in_(post_ids),
+                Comment.status == CommentStatus.APPROVED
+            ).group_by(Comment.post_id).all()
+            return dict(rows)
+        except Exception as e:
+            current_app.logger.error(f"批量获取评论数失败: {str(e)}")
+            return {}
+
     def ensure_user_comment_status(self):
         """确保所有评论状态正确（待审核状态的评论改为已审核），但不修改已拒绝的评论
         
@@ -922,4 +965,28 @@ class CommentService:
             return {
                 'success': False,
                 'message': f'修正评论状态失败: {str(e)}'
-            }
\ No newline at end of file
+            }
+
+# 评论变更后在事务提交时清除对应文章的评论树缓存
+@event.listens_for(Comment, 'after_insert')
+@event.listens_for(Comment, 'after_update')
+@event.listens_for(Comment, 'after_delete')
+def track_comment_change(mapper, connection, comment):
+    """记录本次事务中评论发生变化的文章"""
+    session = Session.object_session(comment)
+    if session is not None and comment.post_id:
+        session.info.setdefault('comment_tree_dirty', set()).add(comment.post_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_comment_trees_on_commit(session):
+    """事务提交后清除评论树和最新评论缓存"""
+    post_ids = session.info.pop('comment_tree_dirty', ())
+    if post_ids:
+        tagged_cache.invalidate(CacheTags.COMMENTS, *(CacheTags.post(post_id) for post_id in post_ids))
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_comment_changes_on_rollback(session):
+    """事务回滚后丢弃记录的变更"""
+    session.info.pop('comment_tree_dirty', None)
@@ -0,0 +1,209 @@
+"""
+文件名：identity.py
+描述：登录用户身份快照缓存（Flask-Login 用户加载）
+作者：denny
+"""
+
+from typing import NamedTuple, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.permission import Permission
+from app.models.user import User
+from app.services.permission_cache import permission_cache_service
+from app.utils.tagged_cache import tagged_cache, CacheTags
+
+# 快照中保存的用户字段，变化后需要失效快照
+IDENTITY_FIELDS = ('username', 'nickname', 'email', 'avatar', 'is_active', 'is_admin_user')
+
+
+class UserSnapshot(NamedTuple):
+    """不可变的用户身份快照"""
+    id: int
+    username: str
+    nickname: Optional[str]
+    email: str
+    avatar: Optional[str]
+    is_active: bool
+    is_admin_user: bool
+    permissions: int
+    role_names: Tuple[str, ...]
+
+
+class CurrentUser:
+    """基于快照的当前用户
+
+    身份判断（登录状态、角色、权限、管理员标记）和常用展示字段直接读取快照，
+    访问其他属性、调用其他方法或修改属性时才按需加载完整的 User 对象并委托给它。
+    """
+
+    __slots__ = ('_snapshot', '_user')
+
+    def __init__(self, snapshot: UserSnapshot):
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_user', None)
+
+    def get_user(self) -> User:
+        """加载完整的 User 对象（每个请求最多一次）"""
+        user = object.__getattribute__(self, '_user')
+        if user is None:
+            user = db.session.get(User, self._snapshot.id)
+            object.__setattr__(self, '_user', user)
+        return user
+
+    def __getattr__(self, name):
+        user = object.__getattribute__(self, '_user')
+        if user is None and name in UserSnapshot._fields:
+            return getattr(self._snapshot, name)
+        return getattr(self.get_user(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.get_user(), name, value)
+
+    def __eq__(self, other):
+        if isinstance(other, (CurrentUser, User)):
+            return self.id == other.id
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self._snapshot.id)
+
+    def __repr__(self):
+        return f'<CurrentUser {self._snapshot.username}>'
+
+    # ---------- Flask-Login 接口 ----------
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    @property
+    def is_active(self):
+        return self.__getattr__('is_active')
+
+    def get_id(self):
+        return str(self._snapshot.id)
+
+    # ---------- 身份判断 ----------
+
+    def has_role(self, role_name):
+        """检查用户是否有指定角色"""
+        if not role_name or not isinstance(role_name, str):
+            raise ValueError('角色名不能为空且必须是字符串')
+        if self._user is not None:
+            return self._user.has_role(role_name)
+        return role_name in self._snapshot.role_names
+
+    def has_permission(self, permission):
+        """检查用户是否有指定权限（整数与运算）"""
+        if self._user is not None:
+            return self._user.has_permission(permission)
+        if isinstance(permission, Permission):
+            permission = permission.value
+        return bool(self._snapshot.permissions & permission)
+
+    @property
+    def is_super_admin(self):
+        return self.has_role('super_admin') or self.is_admin_user
+
+    @property
+    def is_admin(self):
+        return self.has_role('Admin') or self.is_super_admin
+
+
+class IdentityService:
+    """身份快照缓存
+
+    快照以用户ID为键存入带标签的缓存，依赖用户标签（相当于每个用户的版本号）
+    和其各个角色的标签。用户停用、资料修改、角色分配或角色权限变化提交后
+    对应标签失效，本进程的下一次请求即重新加载。进程内缓存的失效不会传到
+    其他 worker，快照只保存 IDENTITY_CACHE_TTL 秒，其他进程提交的变化最迟在
+    此时间后生效（与 SESSION_CACHE_TTL 相同的取舍）。
+    """
+
+    CACHE_KEY = 'identity:{}'
+
+    def __init__(self):
+        self.cache_timeout = 60
+
+    def init_app(self, app):
+        self.cache_timeout = app.config.get('IDENTITY_CACHE_TTL', 60)
+
+    @staticmethod
+    def build_snapshot(user: User) -> UserSnapshot:
+        return UserSnapshot(
+            id=user.id,
+            username=user.username,
+            nickname=user.nickname,
+            email=user.email,
+            avatar=user.avatar,
+            is_active=bool(user.is_active),
+            is_admin_user=bool(user.is_admin_user),
+            permissions=permission_cache_service.compute_mask(user),
+            role_names=tuple(role.name for role in user.roles)
+        )
+
+    def get_snapshot(self, user_id: int) -> Optional[UserSnapshot]:
+        """获取用户快照，缓存未命中时查询数据库"""
+        key = self.CACHE_KEY.format(user_id)
+        snapshot = tagged_cache.get(key)
+        if snapshot is None:
+            # 查询前读取用户标签代数，角色标签在得知角色ID后、计算权限前读取
+            generations = tagged_cache.snapshot([CacheTags.user(user_id)])
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            role_tags = [CacheTags.role(role.id) for role in user.roles]
+            generations.update(tagged_cache.snapshot(role_tags))
+            snapshot = self.build_snapshot(user)
+            tagged_cache.set(key, snapshot, tags=[CacheTags.user(user_id)] + role_tags,
+                             timeout=self.cache_timeout, generations=generations)
+        return snapshot
+
+    def load_user(self, user_id: int) -> Optional[CurrentUser]:
+        """Flask-Login 用户加载：返回基于快照的当前用户"""
+        snapshot = self.get_snapshot(user_id)
+        return CurrentUser(snapshot) if snapshot is not None else None
+
+    @staticmethod
+    def invalidate(*user_ids):
+        """失效指定用户的快照"""
+        if user_ids:
+            tagged_cache.invalidate(*(CacheTags.user(user_id) for user_id in user_ids))
+
+
+@event.listens_for(Session, 'after_flush')
+def track_identity_changes(session, flush_context):
+    """记录本次事务中资料或状态变化的用户（角色变化由权限缓存处理）"""
+    user_ids = session.info.setdefault('identity_changes', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if obj in session.deleted or any(state.attrs[attr].history.has_changes()
+                                             for attr in IDENTITY_FIELDS):
+                user_ids.add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_identity_on_commit(session):
+    """事务提交后失效受影响的快照"""
+    user_ids = session.info.pop('identity_changes', None)
+    if user_ids:
+        identity_service.invalidate(*user_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_identity_changes_on_rollback(session):
+    """事务回滚后丢弃记录的变更"""
+    session.info.pop('identity_changes', None)
+
+
+identity_service = IdentityService()
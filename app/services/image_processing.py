@@ -0,0 +1,285 @@
+"""
+文件名：image_processing.py
+描述：异步图片处理服务（原图即时保存，后台进程池生成响应式变体）
+作者：denny
+"""
+
+import json
+import multiprocessing
+import os
+import posixpath
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, UTC
+from functools import partial
+from html import escape
+from typing import Dict, Iterable, Optional
+from flask import current_app
+from app.extensions import db, cache
+from app.models.image import UploadedImage, ImageStatus
+from app.services.upload import upload_service
+from app.utils.image_variants import generate_variants
+
+_IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_ATTR_RE = re.compile(r'\s([a-zA-Z-]+)="([^"]*)"')
+# 指向上传目录的图片地址（兼容 /uploads/x、/uploads/images/ab/cd/x 及 static 下的旧地址）
+_UPLOAD_SRC_RE = re.compile(r'(?:^|/)uploads/(?:images/)?((?:[0-9a-f]{2}/[0-9a-f]{2}/)?[^/?#]+)$')
+# 由变体替换的属性
+_REPLACED_ATTRS = frozenset(('src', 'srcset', 'sizes', 'width', 'height', 'loading', 'decoding'))
+
+
+class ImageProcessingService:
+    """图片处理服务
+
+    上传请求只把原图原样写入上传目录（按内容哈希去重）并插入一条 PENDING 记录，随即返回；
+    缩放和编码交给本地进程池，完成后在回调中更新 images 表。
+    文章 HTML 输出时按图片记录补充 srcset/width/height，变体尚未生成的图片保持原样。
+    """
+
+    CACHE_KEY = 'image:{}'
+    CACHE_TIMEOUT = 3600
+    # 未处理完或不受管理的图片只短暂缓存，处理完成后很快生效
+    PENDING_CACHE_TIMEOUT = 30
+    DEFAULT_WIDTHS = (480, 960, 1600)
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+    def __init__(self):
+        self.app = None
+        self.asynchronous = False
+        self.max_workers = 2
+        self.widths = self.DEFAULT_WIDTHS
+        self.quality = 85
+        self.thumbnail_size = (300, 300)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """根据应用配置初始化处理参数"""
+        self.app = app
+        self.asynchronous = app.config.get('IMAGE_PROCESSING_ASYNC', False)
+        self.max_workers = app.config.get('IMAGE_PROCESSING_WORKERS', 2)
+        self.widths = tuple(app.config.get('IMAGE_VARIANT_WIDTHS', self.DEFAULT_WIDTHS))
+        self.quality = app.config.get('IMAGE_QUALITY', 85)
+        self.thumbnail_size = tuple(app.config.get('IMAGE_THUMBNAIL_SIZE', (300, 300)))
+        app.extensions['image_processing'] = self
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """按需创建进程池（spawn 启动，避免在多线程 worker 中 fork）"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def allowed(self, filename: str) -> bool:
+        return '.' in filename and filename.rsplit('.', 1)[1].lower() in self.ALLOWED_EXTENSIONS
+
+    # ---------- 上传与处理 ----------
+
+    def store_upload(self, file) -> UploadedImage:
+        """原样保存上传的图片并加入处理队列
+
+        文件按内容哈希保存，重复上传的图片复用已有记录和变体，不再重复处理。
+
+        Raises:
+            ValueError: 未选择文件或文件类型不支持
+        """
+        if not file or not file.filename:
+            raise ValueError('未选择文件')
+        if not self.allowed(file.filename):
+            raise ValueError('不支持的文件类型')
+
+        upload, _ = upload_service.store(file)
+        image = UploadedImage.query.filter_by(filename=upload.path).first()
+        if image is not None:
+            return image
+
+        image = UploadedImage(filename=upload.path, original_name=file.filename, size=upload.size,
+                              width=upload.width, height=upload.height, status=ImageStatus.PENDING)
+        db.session.add(image)
+        db.session.flush()
+        image_id = image.id
+        db.session.commit()
+        # 提交后记录已过期，之后访问时会读到处理结果
+        self.enqueue(image_id, upload.path)
+        return image
+
+    def enqueue(self, image_id: int, filename: str, wait: bool = False):
+        """提交变体生成任务（变体与原图保存在同一分片目录）
+
+        Args:
+            wait: 是否在当前进程同步处理（未启用异步处理时总是同步）
+        """
+        source = upload_service.full_path(filename)
+        args = (source, os.path.dirname(source), self.widths, self.quality, self.thumbnail_size)
+        if wait or not self.asynchronous:
+            try:
+                self._record_result(image_id, filename, generate_variants(*args))
+            except Exception as e:
+                self._record_failure(image_id, filename, e)
+            return
+        future = self._get_executor().submit(generate_variants, *args)
+        future.add_done_callback(partial(self._on_done, image_id, filename))
+
+    def _on_done(self, image_id: int, filename: str, future):
+        """进程池任务完成回调（在进程池的管理线程中执行）"""
+        with self.app.app_context():
+            try:
+                result = future.result()
+            except Exception as e:
+                self._record_failure(image_id, filename, e)
+                return
+            try:
+                self._record_result(image_id, filename, result)
+            except Exception as e:
+                current_app.logger.error(f"保存图片 {filename} 的处理结果失败: {str(e)}")
+
+    def _update(self, image_id: int, filename: str, **values):
+        """使用独立连接更新图片记录，并清除该图片的缓存"""
+        table = UploadedImage.__table__
+        with db.engine.begin() as conn:
+            conn.execute(table.update().where(table.c.id == image_id).values(**values))
+        cache.delete(self.CACHE_KEY.format(filename))
+
+    def _record_result(self, image_id: int, filename: str, result: dict):
+        # 变体文件名改为相对上传目录的路径
+        directory = posixpath.dirname(filename)
+        for variant in result['variants']:
+            variant['filename'] = posixpath.join(directory, variant['filename'])
+        if result['thumbnail']:
+            result['thumbnail'] = posixpath.join(directory, result['thumbnail'])
+        self._update(image_id, filename, width=result['width'], height=result['height'],
+                     variants=json.dumps(result['variants']), thumbnail=result['thumbnail'],
+                     status=ImageStatus.READY, error=None, processed_at=datetime.now(UTC))
+        current_app.logger.info(f"图片 {filename} 处理完成，生成 {len(result['variants'])} 个变体")
+
+    def _record_failure(self, image_id: int, filename: str, error: Exception):
+        current_app.logger.error(f"图片 {filename} 处理失败: {str(error)}")
+        self._update(image_id, filename, status=ImageStatus.FAILED, error=str(error)[:255],
+                     processed_at=datetime.now(UTC))
+
+    def process_pending(self, include_failed: bool = False) -> int:
+        """在当前进程中处理积压的图片（进程池任务随进程退出丢失时补处理）
+
+        Returns:
+            int: 处理的图片数量
+        """
+        statuses = [ImageStatus.PENDING] + ([ImageStatus.FAILED] if include_failed else [])
+        rows = db.session.query(UploadedImage.id, UploadedImage.filename).filter(
+            UploadedImage.status.in_(statuses)
+        ).all()
+        for image_id, filename in rows:
+            self.enqueue(image_id, filename, wait=True)
+        return len(rows)
+
+    def delete(self, filename: str) -> bool:
+        """删除一次上传；内容不再被引用时删除图片记录、原图和所有变体
+
+        Returns:
+            bool: 是否存在该图片
+        """
+        remaining = upload_service.release(filename)
+        if remaining:
+            return True
+        image = UploadedImage.query.filter_by(filename=filename).first()
+        names = [filename]
+        if image is not None:
+            names += [variant['filename'] for variant in image.variants]
+            if image.thumbnail:
+                names.append(image.thumbnail)
+            db.session.delete(image)
+            db.session.commit()
+            cache.delete(self.CACHE_KEY.format(filename))
+        found = remaining is not None or image is not None
+        for name in names:
+            path = upload_service.full_path(name)
+            if path and os.path.exists(path):
+                os.remove(path)
+                found = True
+        return found
+
+    # ---------- 输出 ----------
+
+    def get_images(self, filenames: Iterable[str]) -> Dict[str, dict]:
+        """批量获取已处理完成的图片信息（先查缓存，未命中的一次查询）
+
+        Returns:
+            dict: 文件名 -> {'width', 'height', 'variants'}，不含未就绪的图片
+        """
+        filenames = list(dict.fromkeys(filenames))
+        keys = [self.CACHE_KEY.format(name) for name in filenames]
+        found = dict(zip(filenames, cache.get_many(*keys)))
+        missing = [name for name, value in found.items() if value is None]
+        if missing:
+            rows = db.session.query(
+                UploadedImage.filename, UploadedImage.status, UploadedImage.width,
+                UploadedImage.height, UploadedImage._variants
+            ).filter(UploadedImage.filename.in_(missing)).all()
+            loaded = {row.filename: row for row in rows}
+            for name in missing:
+                row = loaded.get(name)
+                if row is not None and row.status == ImageStatus.READY:
+                    value = {'width': row.width, 'height': row.height,
+                             'variants': json.loads(row._variants or '[]')}
+                    cache.set(self.CACHE_KEY.format(name), value, timeout=self.CACHE_TIMEOUT)
+                else:
+                    # 空字典表示没有可用变体，与缓存未命中的 None 区分
+                    value = {}
+                    cache.set(self.CACHE_KEY.format(name), value, timeout=self.PENDING_CACHE_TIMEOUT)
+                found[name] = value
+        return {name: value for name, value in found.items() if value}
+
+    @staticmethod
+    def _srcset(base_url: str, variants, fmt: str) -> str:
+        return ', '.join(f"{base_url}{variant['filename']} {variant['width']}w"
+                         for variant in variants if variant['format'] == fmt)
+
+    def _picture(self, tag: str, image: dict, base_url: str) -> str:
+        """把 <img> 改写为带 WebP 源和 JPEG srcset 的 <picture>"""
+        variants = sorted(image['variants'], key=lambda variant: variant['width'])
+        jpegs = [variant for variant in variants if variant['format'] == 'jpg']
+        if not jpegs:
+            return tag
+        largest = jpegs[-1]
+        sizes = f"(max-width: {largest['width']}px) 100vw, {largest['width']}px"
+        attrs = ''.join(f' {name}="{value}"' for name, value in _ATTR_RE.findall(tag)
+                        if name.lower() not in _REPLACED_ATTRS)
+        img = (f'<img src="{base_url}{largest["filename"]}" '
+               f'srcset="{self._srcset(base_url, variants, "jpg")}" sizes="{sizes}" '
+               f'width="{largest["width"]}" height="{largest["height"]}"{attrs} '
+               f'loading="lazy" decoding="async">')
+        webp = self._srcset(base_url, variants, 'webp')
+        if not webp:
+            return img
+        return f'<picture><source type="image/webp" srcset="{webp}" sizes="{sizes}">{img}</picture>'
+
+    def responsive_html(self, html: Optional[str]) -> Optional[str]:
+        """为文章 HTML 中的上传图片补充响应式变体"""
+        if not html or '<img' not in html:
+            return html
+        try:
+            tags = {}
+            for tag in set(_IMG_TAG_RE.findall(html)):
+                src = dict(_ATTR_RE.findall(tag)).get('src', '')
+                match = _UPLOAD_SRC_RE.search(src.split('?', 1)[0])
+                if match:
+                    tags[tag] = match.group(1)
+            if not tags:
+                return html
+            images = self.get_images(tags.values())
+            if not images:
+                return html
+            base_url = escape(current_app.config.get('UPLOADED_IMAGES_URL', '/uploads/images/'))
+            replacements = {tag: self._picture(tag, images[name], base_url)
+                            for tag, name in tags.items() if name in images}
+            return _IMG_TAG_RE.sub(lambda match: replacements.get(match.group(), match.group()), html)
+        except Exception as e:
+            current_app.logger.error(f"生成响应式图片失败: {str(e)}")
+            return html
+
+
+image_processing_service = ImageProcessingService()
@@ -0,0 +1,206 @@
+"""
+文件名：markdown_render.py
+描述：Markdown 渲染缓存服务（按内容哈希缓存渲染结果）
+作者：denny
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+from flask import current_app
+from app.utils.markdown import render_markdown
+
+# 渲染器版本，修改渲染规则（扩展、白名单、高亮样式等）后需要递增，使旧缓存失效
+RENDERER_VERSION = '1'
+
+
+class RenderResult:
+    """渲染结果"""
+
+    __slots__ = ('html', 'toc')
+
+    def __init__(self, html: str, toc: Optional[List[dict]] = None):
+        self.html = html
+        self.toc = toc or []
+
+    @property
+    def toc_json(self) -> str:
+        """目录的 JSON 字符串（用于写入 Post.toc 字段）"""
+        return json.dumps(self.toc, ensure_ascii=False)
+
+
+class MarkdownRenderService:
+    """Markdown 渲染缓存服务类
+
+    以 SHA-256(渲染器版本 + 源文本) 作为键，先查进程内 LRU，
+    再查磁盘缓存，都未命中时才真正渲染。相同内容在编辑、预览
+    和 worker 重启之后都不会重复渲染。
+
+    磁盘缓存最多保留 disk_max_files 个文件，超出后按修改时间删除
+    最旧的文件；预览等临时内容不写入磁盘。
+    """
+
+    def __init__(self, max_entries: int = 256, cache_dir: Optional[str] = None,
+                 disk_max_files: int = 2000):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.disk_max_files = disk_max_files
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+
+    def init_app(self, app):
+        """根据应用配置初始化缓存大小和磁盘缓存目录"""
+        self.max_entries = app.config.get('MARKDOWN_CACHE_SIZE', 256)
+        self.cache_dir = app.config.get('MARKDOWN_CACHE_DIR')
+        self.disk_max_files = app.config.get('MARKDOWN_DISK_CACHE_MAX_FILES', 2000)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self.clear_memory()
+        app.extensions['markdown_render'] = self
+
+    @staticmethod
+    def cache_key(source: str) -> str:
+        """计算缓存键"""
+        digest = hashlib.sha256()
+        digest.update(RENDERER_VERSION.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        """磁盘缓存文件路径（按哈希前两位分目录）"""
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+
+    def _memory_get(self, key: str) -> Optional[RenderResult]:
+        with self._lock:
+            result = self._lru.get(key)
+            if result is not None:
+                self._lru.move_to_end(key)
+            return result
+
+    def _memory_set(self, key: str, result: RenderResult):
+        with self._lock:
+            self._lru[key] = result
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[RenderResult]:
+        path = self._disk_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # 刷新修改时间，清理时优先保留仍在使用的条目
+            os.utime(path)
+            return RenderResult(data['html'], data.get('toc'))
+        except Exception as e:
+            current_app.logger.warning(f"读取Markdown渲染缓存失败: {str(e)}")
+            return None
+
+    def _disk_set(self, key: str, result: RenderResult):
+        path = self._disk_path(key)
+        if not path:
+            return
+        try:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            # 先写临时文件再原子替换，避免其他 worker 读到半个文件
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'html': result.html, 'toc': result.toc}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            current_app.logger.warning(f"写入Markdown渲染缓存失败: {str(e)}")
+            return
+
+        # 每写入一定数量的文件检查一次上限，避免每次写入都遍历目录
+        with self._lock:
+            self._disk_writes += 1
+            due = self._disk_writes >= max(self.disk_max_files // 10, 1)
+            if due:
+                self._disk_writes = 0
+        if due:
+            self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """删除超出上限的最旧磁盘缓存文件
+
+        Returns:
+            int: 删除的文件数
+        """
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return 0
+        try:
+            entries = []
+            for directory, _, filenames in os.walk(self.cache_dir):
+                for filename in filenames:
+                    if filename.endswith('.json'):
+                        path = os.path.join(directory, filename)
+                        try:
+                            entries.append((os.path.getmtime(path), path))
+                        except OSError:
+                            continue
+            excess = len(entries) - self.disk_max_files
+            if excess <= 0:
+                return 0
+            entries.sort()
+            removed = 0
+            for _, path in entries[:excess]:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    continue
+            return removed
+        except Exception as e:
+            current_app.logger.warning(f"清理Markdown渲染缓存失败: {str(e)}")
+            return 0
+
+    def render(self, source: Optional[str], persist: bool = True) -> RenderResult:
+        """渲染 Markdown，命中缓存时直接返回
+
+        Args:
+            source: Markdown 源文本
+            persist: 是否写入磁盘缓存，预览等临时内容传 False
+
+        Returns:
+            RenderResult: 包含清理后的 HTML 和目录
+        """
+        if not source:
+            return RenderResult('', [])
+
+        key = self.cache_key(source)
+        result = self._memory_get(key)
+        if result is not None:
+            return result
+
+        result = self._disk_get(key)
+        if result is None:
+            html, toc = render_markdown(source)
+            result = RenderResult(html, toc)
+            if persist:
+                self._disk_set(key, result)
+
+        self._memory_set(key, result)
+        return result
+
+    def render_html(self, source: Optional[str], persist: bool = True) -> str:
+        """只返回渲染后的 HTML"""
+        return self.render(source, persist).html
+
+    def clear_memory(self):
+        """清空进程内缓存"""
+        with self._lock:
+            self._lru.clear()
+
+
+markdown_render_service = MarkdownRenderService()
@@ -0,0 +1,274 @@
+"""
+文件名：neighbours.py
+描述：已发布文章的有序邻接索引（上一篇/下一篇导航与归档计数共用）
+作者：denny
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import UTC
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.extensions import db, cache
+from app.models.post import Post, PostStatus
+
+# 共享缓存中的索引及其代数；代数变化时各进程重新载入本地副本
+NEIGHBOUR_INDEX_CACHE_KEY = 'neighbours:index'
+NEIGHBOUR_GENERATION_CACHE_KEY = 'neighbours:generation'
+
+# 影响索引的文章字段
+NEIGHBOUR_FIELDS = ('title', 'created_at', 'status', 'is_private')
+
+
+class NeighbourEntry:
+    """导航用的文章行对象（只含链接需要的字段）"""
+
+    __slots__ = ('id', 'title', 'created_at')
+
+    def __init__(self, id, title, created_at):
+        self.id = id
+        self.title = title
+        self.created_at = created_at
+
+    def __repr__(self):
+        return f'<NeighbourEntry {self.id}>'
+
+
+def _sort_key(created_at, post_id) -> Tuple:
+    """排序键 (创建时间, ID)；带时区的时间统一转换为 UTC 的朴素时间后比较"""
+    if created_at is not None and created_at.tzinfo is not None:
+        created_at = created_at.astimezone(UTC).replace(tzinfo=None)
+    return created_at, post_id
+
+
+def _index_slot(post_id, status, created_at, title, is_private) -> Optional[tuple]:
+    """文章在索引中的记录 (排序键, 标题, 是否私密)，不在索引中时返回 None"""
+    if isinstance(status, str):
+        status = PostStatus.__members__.get(status.upper())
+    if status not in NeighbourIndexService.VISIBLE_STATUSES or created_at is None or post_id is None:
+        return None
+    return _sort_key(created_at, post_id), title, bool(is_private)
+
+
+class NeighbourIndexService:
+    """文章邻接索引
+
+    按 (created_at, id) 升序保存所有已发布和已归档文章的键，另存 ID 到标题的映射。
+    上一篇/下一篇通过二分查找定位，不再查询数据库；归档按月计数也从同一数组生成。
+    文章发布、撤回、修改时间或删除提交后增量插入/移除对应的键。
+
+    索引保存在共享缓存中，每个进程另持有一份本地副本并按代数校验，
+    因此命中时每次请求只读取一个很小的代数键。
+    """
+
+    VISIBLE_STATUSES = (PostStatus.PUBLISHED, PostStatus.ARCHIVED)
+    CACHE_TIMEOUT = 3600  # 兜底过期时间（秒），正常情况下增量更新
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._generation = None
+        self._keys: List[Tuple] = []
+        self._meta: Dict[int, tuple] = {}
+
+    # ---------- 载入与缓存 ----------
+
+    def _load(self) -> dict:
+        """从数据库载入索引（一次投影查询）"""
+        rows = db.session.query(
+            Post.id, Post.created_at, Post.title, Post.is_private
+        ).filter(
+            Post.status.in_(self.VISIBLE_STATUSES),
+            Post.created_at.isnot(None)
+        ).all()
+        keys = sorted(_sort_key(created_at, post_id) for post_id, created_at, _, _ in rows)
+        meta = {post_id: (title, bool(is_private)) for post_id, _, title, is_private in rows}
+        return {'generation': time.time_ns(), 'keys': keys, 'meta': meta}
+
+    def _publish(self, index: dict):
+        cache.set(NEIGHBOUR_INDEX_CACHE_KEY, index, timeout=self.CACHE_TIMEOUT)
+        cache.set(NEIGHBOUR_GENERATION_CACHE_KEY, index['generation'], timeout=self.CACHE_TIMEOUT)
+        self._adopt(index)
+
+    def _adopt(self, index: dict):
+        self._generation = index['generation']
+        self._keys = index['keys']
+        self._meta = index['meta']
+
+    def _ensure(self):
+        """保证本地副本与共享缓存中的代数一致"""
+        generation = cache.get(NEIGHBOUR_GENERATION_CACHE_KEY)
+        if generation is not None and generation == self._generation:
+            return
+        with self._lock:
+            generation = cache.get(NEIGHBOUR_GENERATION_CACHE_KEY)
+            if generation is not None and generation == self._generation:
+                return
+            index = cache.get(NEIGHBOUR_INDEX_CACHE_KEY) if generation is not None else None
+            if index is not None and index['generation'] == generation:
+                self._adopt(index)
+            else:
+                self._publish(self._load())
+
+    # ---------- 查询接口 ----------
+
+    def _entry(self, key) -> NeighbourEntry:
+        created_at, post_id = key
+        return NeighbourEntry(post_id, self._meta[post_id][0], created_at)
+
+    def _step(self, post: Post, direction: int) -> Optional[NeighbourEntry]:
+        self._ensure()
+        keys, meta = self._keys, self._meta
+        key = _sort_key(post.created_at, post.id)
+        position = bisect_left(keys, key)
+        if direction > 0 and position < len(keys) and keys[position] == key:
+            position += 1
+        elif direction < 0:
+            position -= 1
+        # 私密文章不出现在导航中，跳过
+        while 0 <= position < len(keys):
+            if not meta[keys[position][1]][1]:
+                return self._entry(keys[position])
+            position += direction
+        return None
+
+    def get_prev(self, post: Post) -> Optional[NeighbourEntry]:
+        """较早发布的上一篇公开文章"""
+        try:
+            return self._step(post, -1)
+        except Exception as e:
+            current_app.logger.error(f"获取上一篇文章失败: {str(e)}")
+            return None
+
+    def get_next(self, post: Post) -> Optional[NeighbourEntry]:
+        """较晚发布的下一篇公开文章"""
+        try:
+            return self._step(post, 1)
+        except Exception as e:
+            current_app.logger.error(f"获取下一篇文章失败: {str(e)}")
+            return None
+
+    def count(self) -> int:
+        """已发布和已归档的文章数"""
+        self._ensure()
+        return len(self._keys)
+
+    def month_counts(self) -> Dict[Tuple[int, int], int]:
+        """按 (年, 月) 统计文章数，供归档使用"""
+        self._ensure()
+        return dict(Counter((created_at.year, created_at.month) for created_at, _ in self._keys))
+
+    # ---------- 索引维护 ----------
+
+    def apply_changes(self, changes):
+        """增量更新索引
+
+        Args:
+            changes: [(原记录, 新记录)]，记录为 _index_slot 的返回值或 None
+        """
+        with self._lock:
+            # 提交回调中不能再通过会话查询，只基于已缓存的索引调整
+            generation = cache.get(NEIGHBOUR_GENERATION_CACHE_KEY)
+            if generation is None:
+                # 尚未建立索引，下次访问时整体载入即可
+                return
+            if generation != self._generation:
+                index = cache.get(NEIGHBOUR_INDEX_CACHE_KEY)
+                if index is None or index['generation'] != generation:
+                    self.rebuild()
+                    return
+                self._adopt(index)
+            keys, meta = list(self._keys), dict(self._meta)
+            for old, new in changes:
+                if old is not None:
+                    position = bisect_left(keys, old[0])
+                    if position < len(keys) and keys[position] == old[0]:
+                        keys.pop(position)
+                    meta.pop(old[0][1], None)
+                if new is not None:
+                    position = bisect_left(keys, new[0])
+                    if position == len(keys) or keys[position] != new[0]:
+                        insort(keys, new[0])
+                    meta[new[0][1]] = (new[1], new[2])
+            self._publish({'generation': time.time_ns(), 'keys': keys, 'meta': meta})
+
+    def rebuild(self):
+        """丢弃索引，下次访问时重新载入"""
+        with self._lock:
+            cache.delete(NEIGHBOUR_GENERATION_CACHE_KEY)
+            cache.delete(NEIGHBOUR_INDEX_CACHE_KEY)
+            self._generation = None
+
+
+def _previous_value(state, attr):
+    """属性在本次刷新前的值
+
+    Post 的 status、created_at、title、is_private 声明了 active_history，
+    即使原值未加载（如提交后过期的实例），修改时原值也会出现在 history.deleted 中。
+    """
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.attrs[attr].value
+
+
+def _current_slot(post):
+    return _index_slot(post.id, post.status, post.created_at, post.title, post.is_private)
+
+
+def _previous_slot(post):
+    state = inspect(post)
+    return _index_slot(post.id, *(_previous_value(state, attr)
+                                  for attr in ('status', 'created_at', 'title', 'is_private')))
+
+
+def _record_change(post, old, new):
+    session = Session.object_session(post)
+    if session is not None and (old is not None or new is not None):
+        session.info.setdefault('neighbour_changes', []).append((old, new))
+
+
+@event.listens_for(Post, 'after_insert')
+def track_neighbour_insert(mapper, connection, post):
+    """新文章进入索引"""
+    _record_change(post, None, _current_slot(post))
+
+
+@event.listens_for(Post, 'after_update')
+def track_neighbour_update(mapper, connection, post):
+    """文章发布、撤回、改标题、改可见性或修改创建时间"""
+    state = inspect(post)
+    if not any(state.attrs[attr].history.has_changes() for attr in NEIGHBOUR_FIELDS):
+        return
+    _record_change(post, _previous_slot(post), _current_slot(post))
+
+
+@event.listens_for(Post, 'after_delete')
+def track_neighbour_delete(mapper, connection, post):
+    """文章移出索引"""
+    _record_change(post, _previous_slot(post), None)
+
+
+@event.listens_for(Session, 'after_commit')
+def apply_neighbour_changes_on_commit(session):
+    """事务提交后增量更新索引"""
+    changes = session.info.pop('neighbour_changes', None)
+    if not changes:
+        return
+    try:
+        neighbour_index_service.apply_changes(changes)
+    except Exception as e:
+        current_app.logger.error(f"更新文章邻接索引失败: {str(e)}")
+        neighbour_index_service.rebuild()
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_neighbour_changes_on_rollback(session):
+    """事务回滚后丢弃记录的变更"""
+    session.info.pop('neighbour_changes', None)
+
+
+neighbour_index_service = NeighbourIndexService()
@@ -1,27 +1,195 @@
 """
 操作日志服务模块
 """
+import atexit
+import os
+import queue
+import threading
 from flask import request, current_app
 from app.models.operation_log import OperationLog
 from app.extensions import db
+from app.utils.pagination import KeysetPagination
 from datetime import datetime, timedelta, UTC
 
+
+class OperationLogWriter:
+    """操作日志批量写入器
+
+    请求线程只把日志行放入有界队列，后台线程按批取出，
+    在一个事务中用 executemany 插入，不占用请求的数据库会话。
+    队列已满时由调用方同步写入（背压），日志不会丢失；
+    进程退出时写完队列中剩余的日志。
+    """
+
+    _STOP = object()
+
+    def __init__(self):
+        self.app = None
+        self.asynchronous = False
+        self.batch_size = 200
+        self.flush_interval = 1.0
+        self.put_timeout = 0.05
+        self._queue = queue.Queue(maxsize=10000)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'enqueued': 0, 'written': 0, 'batches': 0, 'failed': 0,
+                       'overflow_sync': 0, 'max_depth': 0}
+
+    def init_app(self, app):
+        """根据应用配置初始化队列并注册退出时的落库钩子"""
+        self.app = app
+        self.asynchronous = app.config.get('OPERATION_LOG_ASYNC', False)
+        self.batch_size = app.config.get('OPERATION_LOG_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('OPERATION_LOG_FLUSH_INTERVAL', 1.0)
+        self.put_timeout = app.config.get('OPERATION_LOG_PUT_TIMEOUT', 0.05)
+        self._queue = queue.Queue(maxsize=app.config.get('OPERATION_LOG_QUEUE_SIZE', 10000))
+        app.extensions['operation_log_writer'] = self
+        atexit.register(self.shutdown)
+
+    def _count(self, name, value=1):
+        with self._stats_lock:
+            self._stats[name] += value
+
+    def _ensure_worker(self):
+        """按需启动后台线程（fork 出的子进程中重新启动）"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='operation-log-writer',
+                                                daemon=True)
+                self._thread.start()
+
+    def submit(self, row: dict):
+        """提交一条日志（异步模式下只入队）"""
+        if not self.asynchronous:
+            self._insert([row])
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            # 队列积压：由当前请求同步写入，降低生产速度
+            self._count('overflow_sync')
+            self._insert([row])
+            return
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats['enqueued'] += 1
+            self._stats['max_depth'] = max(self._stats['max_depth'], depth)
+
+    def _take_batch(self, first) -> list:
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is self._STOP:
+                self._queue.task_done()
+                self._queue.put(self._STOP)
+                break
+            batch.append(row)
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if first is self._STOP:
+                self._queue.task_done()
+                return
+            batch = self._take_batch(first)
+            try:
+                with self.app.app_context():
+                    self._insert(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _insert(self, rows: list):
+        """在一个事务中批量插入（使用独立连接）"""
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(OperationLog.__table__.insert(), rows)
+        except Exception as e:
+            self._count('failed', len(rows))
+            current_app.logger.error(f"写入 {len(rows)} 条操作日志失败: {str(e)}")
+            return
+        with self._stats_lock:
+            self._stats['written'] += len(rows)
+            self._stats['batches'] += 1
+
+    def flush(self):
+        """等待队列中已提交的日志全部写入"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._queue.join()
+            return
+        rows = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if row is not self._STOP:
+                rows.append(row)
+        for start in range(0, len(rows), self.batch_size):
+            self._insert(rows[start:start + self.batch_size])
+
+    def shutdown(self, timeout: float = 5.0):
+        """停止后台线程并写完剩余日志（进程退出时调用）"""
+        if self.app is None:
+            return
+        try:
+            thread = self._thread
+            if thread is not None and thread.is_alive() and self._pid == os.getpid():
+                self._queue.put(self._STOP)
+                thread.join(timeout)
+            self._thread = None
+            with self.app.app_context():
+                self.flush()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        """队列与写入统计（enqueued/written/batches/failed/overflow_sync/max_depth/depth/capacity）"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['depth'] = self._queue.qsize()
+        stats['capacity'] = self._queue.maxsize
+        return stats
+
+
+operation_log_writer = OperationLogWriter()
+
+
 class OperationLogService:
     """操作日志服务类"""
 
+    @staticmethod
+    def _submit(user_id, action, target_type=None, target_id=None, details=None, result=None):
+        """在请求线程中取出请求信息后交给写入器"""
+        operation_log_writer.submit({
+            'user_id': user_id,
+            'action': action,
+            'target_type': target_type,
+            'target_id': target_id,
+            'details': details,
+            'result': result,
+            'ip_address': request.remote_addr,
+            'created_at': datetime.now(UTC)
+        })
+
     def log_login(self, user):
         """记录登录日志"""
-        log = OperationLog(
-            user_id=user.id,
-            action='login',
-            target_type='user',
-            target_id=user.id,
-            details=f'用户登录 - 用户名: {user.username}, 浏览器: {request.user_agent}',
-            result='success',
-            ip_address=request.remote_addr
-        )
-        db.session.add(log)
-        db.session.commit()
+        self._submit(user.id, 'login', 'user', user.id,
+                     f'用户登录 - 用户名: {user.username}, 浏览器: {request.user_agent}', 'success')
 
         current_app.logger.info(
             f'用户登录成功 - '
@@ -31,17 +199,8 @@ class OperationLogService:
 
     def log_logout(self, user):
         """记录登出日志"""
-        log = OperationLog(
-            user_id=user.id,
-            action='logout',
-            target_type='user',
-            target_id=user.id,
-            details=f'用户登出 - 用户名: {user.username}, 浏览器: {request.user_agent}',
-            result='success',
-            ip_address=request.remote_addr
-        )
-        db.session.add(log)
-        db.session.commit()
+        self._submit(user.id, 'logout', 'user', user.id,
+                     f'用户登出 - 用户名: {user.username}, 浏览器: {request.user_agent}', 'success')
 
         current_app.logger.info(
             f'用户登出 - '
@@ -61,17 +220,7 @@ class OperationLogService:
             details: 操作详情（可选）
             result: 操作结果（可选，如 'success' 或 'error'）
         """
-        log = OperationLog(
-            user_id=user.id,
-            action=action,
-            target_type=target_type,
-            target_id=target_id,
-            details=details,
-            result=result,
-            ip_address=request.remote_addr
-        )
-        db.session.add(log)
-        db.session.commit()
+        OperationLogService._submit(user.id, action, target_type, target_id, details, result)
     
     @staticmethod
     def get_user_logs(user_id, page=1, per_page=20, start_date=None, end_date=None):
@@ -87,8 +236,17 @@ class OperationLogService:
             .paginate(page=page, per_page=per_page)
     
     @staticmethod
-    def get_operation_logs(operation=None, target_type=None, page=1, per_page=20):
-        """获取操作日志"""
+    def get_operation_logs(operation=None, target_type=None, page=1, per_page=20,
+                           cursor=None, before=None):
+        """获取操作日志（按 (created_at, id) 游标分页，使用同名联合索引）
+
+        Args:
+            cursor: 向后翻页令牌（上一页的 next_cursor）
+            before: 向前翻页令牌（当前页的 prev_cursor）
+
+        Raises:
+            InvalidCursor: 翻页令牌无效
+        """
         query = OperationLog.query
         
         if operation:
@@ -96,8 +254,11 @@ class OperationLogService:
         if target_type:
             query = query.filter_by(target_type=target_type)
             
-        return query.order_by(OperationLog.created_at.desc())\
-            .paginate(page=page, per_page=per_page)
+        return KeysetPagination(
+            query, per_page,
+            columns=(OperationLog.created_at, OperationLog.id), key_attrs=('created_at', 'id'),
+            page=page, cursor=cursor, before=before
+        )
             
     @staticmethod
     def get_log_by_id(log_id):
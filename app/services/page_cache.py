@@ -0,0 +1,211 @@
+"""
+文件名：page_cache.py
+描述：匿名访客整页响应缓存（ETag/304、预压缩、按依赖标签失效）
+作者：denny
+"""
+
+import gzip
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.post import Post, PostStatus
+from app.models.category import Category
+from app.models.tag import Tag
+from app.utils.tagged_cache import tagged_cache, CacheTags
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只提供 gzip
+    brotli = None
+
+
+class PageCacheService:
+    """整页响应缓存
+
+    只缓存匿名访客的 GET/HEAD 请求，键为路径加规范化后的查询串。
+    缓存条目保存响应体及其 gzip/brotli 压缩版本、强 ETag 和 Last-Modified，
+    命中时直接返回（或按 If-None-Match 返回 304），不再渲染模板和查询侧边栏。
+    条目记录依赖标签，文章、评论、分类或标签变化时随标签一起失效。
+    """
+
+    CACHE_KEY = 'page:{}'
+    MIN_COMPRESS_SIZE = 1024  # 小于该字节数的响应不压缩
+    CACHE_CONTROL = 'no-cache'  # 浏览器可缓存，但每次都需用 ETag 校验
+
+    @staticmethod
+    def enabled() -> bool:
+        return current_app.config.get('PAGE_CACHE_ENABLED', False)
+
+    @staticmethod
+    def cache_key() -> str:
+        """路径加排序后的查询参数，参数顺序不同的同一页面共用缓存"""
+        query = urlencode(sorted(request.args.items(multi=True)))
+        raw = f'{request.path}?{query}'
+        return PageCacheService.CACHE_KEY.format(hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32])
+
+    @staticmethod
+    def is_cacheable_request() -> bool:
+        """仅匿名访客、无待显示闪现消息的 GET/HEAD 请求可以使用缓存"""
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if session.get('_flashes'):
+            return False
+        return not current_user.is_authenticated
+
+    @staticmethod
+    def latest_post_update():
+        """已发布和已归档文章的最近更新时间，用作列表页的 Last-Modified"""
+        return db.session.query(func.max(Post.updated_at)).filter(
+            Post.status.in_([PostStatus.PUBLISHED, PostStatus.ARCHIVED])
+        ).scalar()
+
+    @staticmethod
+    def post_updated_at(post_id):
+        """单篇文章的更新时间，用作详情页的 Last-Modified"""
+        return db.session.query(Post.updated_at).filter(Post.id == post_id).scalar()
+
+    def build_entry(self, response, last_modified) -> dict:
+        """由渲染好的响应构造缓存条目（含预压缩版本）"""
+        body = response.get_data()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        variants = {'identity': body}
+        if len(body) >= self.MIN_COMPRESS_SIZE:
+            variants['gzip'] = gzip.compress(body, compresslevel=6)
+            if brotli is not None:
+                variants['br'] = brotli.compress(body, quality=5)
+        return {
+            'digest': digest,
+            'variants': variants,
+            'content_type': response.content_type,
+            'last_modified': last_modified
+        }
+
+    @staticmethod
+    def _etag(digest, encoding) -> str:
+        """强 ETag，不同编码的表示使用不同的值"""
+        return digest if encoding == 'identity' else f'{digest}-{encoding}'
+
+    @staticmethod
+    def _choose_encoding(entry) -> str:
+        accept = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in entry['variants'] and accept[encoding]:
+                return encoding
+        return 'identity'
+
+    def build_response(self, entry, hit: bool):
+        """根据缓存条目生成响应，满足 If-None-Match 时返回 304"""
+        encoding = self._choose_encoding(entry)
+        etags = {self._etag(entry['digest'], name) for name in entry['variants']}
+
+        if_none_match = request.if_none_match
+        if if_none_match and (if_none_match.star_tag or any(tag in if_none_match for tag in etags)):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(entry['variants'][encoding],
+                                                  content_type=entry['content_type'])
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(self._etag(entry['digest'], encoding))
+        if entry['last_modified']:
+            response.last_modified = entry['last_modified']
+        response.headers['Cache-Control'] = self.CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        response.vary.add('Cookie')
+        response.headers['X-Page-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+    def cached(self, tags, last_modified=None, on_hit=None):
+        """缓存视图函数的整页响应
+
+        Args:
+            tags: 依赖标签列表，或接收视图参数并返回标签列表的函数
+            last_modified: 接收视图参数并返回最后修改时间的函数，默认取最近更新的文章
+            on_hit: 命中缓存时需要执行的回调（如记录浏览量），接收视图参数
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled() or not self.is_cacheable_request():
+                    return view(*args, **kwargs)
+
+                key = self.cache_key()
+                entry = tagged_cache.get(key)
+                if entry is not None:
+                    if on_hit is not None:
+                        on_hit(**kwargs)
+                    return self.build_response(entry, hit=True)
+
+                # 渲染前读取标签代数，渲染期间的失效不会被缓存的旧页面掩盖
+                dependency_tags = tags(**kwargs) if callable(tags) else tags
+                generations = tagged_cache.snapshot(dependency_tags)
+                response = make_response(view(*args, **kwargs))
+                # 只缓存未修改会话的 200 HTML 响应（错误页、重定向和设置了 Cookie 的响应不缓存）
+                if (response.status_code != 200 or response.direct_passthrough
+                        or session.modified or 'Set-Cookie' in response.headers):
+                    return response
+
+                try:
+                    modified = last_modified(**kwargs) if last_modified else self.latest_post_update()
+                    entry = self.build_entry(response, modified)
+                except Exception as e:
+                    current_app.logger.error(f"生成页面缓存失败: {str(e)}")
+                    return response
+
+                tagged_cache.set(key, entry, tags=dependency_tags,
+                                 timeout=current_app.config.get('PAGE_CACHE_TIMEOUT', 600),
+                                 generations=generations)
+                return self.build_response(entry, hit=False)
+            return wrapper
+        return decorator
+
+
+def _history_ids(state, attr):
+    """属性历史中（新增、未变、删除）出现过的关联对象ID"""
+    history = state.attrs[attr].history
+    values = list(history.added or ()) + list(history.unchanged or ()) + list(history.deleted or ())
+    return [getattr(value, 'id', value) for value in values if value is not None]
+
+
+@event.listens_for(Session, 'after_flush')
+def track_content_changes(session, flush_context):
+    """记录本次事务中变化的文章、分类和标签对应的缓存标签
+
+    服务层会主动失效缓存，这里兜底覆盖直接通过模型修改数据的代码路径。
+    """
+    tags = session.info.setdefault('page_cache_tags', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Post):
+            state = inspect(obj)
+            tags.update((CacheTags.post(obj.id), CacheTags.LISTING, CacheTags.ARCHIVE))
+            tags.update(CacheTags.category(i) for i in _history_ids(state, 'category_id'))
+            tags.update(CacheTags.tag(i) for i in _history_ids(state, 'tags'))
+        elif isinstance(obj, Category):
+            tags.update((CacheTags.category(obj.id), CacheTags.LISTING))
+        elif isinstance(obj, Tag):
+            tags.update((CacheTags.tag(obj.id), CacheTags.LISTING))
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_pages_on_commit(session):
+    """事务提交后失效受影响的缓存"""
+    tags = session.info.pop('page_cache_tags', None)
+    if tags:
+        tagged_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_page_changes_on_rollback(session):
+    """事务回滚后丢弃记录的变更"""
+    session.info.pop('page_cache_tags', None)
+
+
+page_cache_service = PageCacheService()
@@ -0,0 +1,141 @@
+"""
+文件名：permission_cache.py
+描述：用户有效权限位掩码缓存
+作者：denny
+"""
+
+from flask import g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models.role import Role
+from app.utils.tagged_cache import tagged_cache, CacheTags
+
+
+class PermissionCacheService:
+    """用户有效权限缓存
+
+    用户的有效权限为其所有角色权限位的按位或，只计算一次：
+    - 请求内缓存在 g 中，同一请求的多次权限检查只做一次整数与运算
+    - 跨请求缓存在带标签的缓存中，依赖用户和其各个角色的标签，
+      角色分配或角色权限变化提交后随标签失效；进程内缓存的失效不会传到
+      其他 worker，只保存 PERMISSION_CACHE_TTL 秒，撤销的权限最迟在此时间后生效
+    """
+
+    CACHE_KEY = 'permission_mask:{}'
+
+    def __init__(self):
+        self.cache_timeout = 60
+
+    def init_app(self, app):
+        self.cache_timeout = app.config.get('PERMISSION_CACHE_TTL', 60)
+
+    @staticmethod
+    def compute_mask(user) -> int:
+        """按位或合并用户所有角色的权限"""
+        mask = 0
+        for role in user.roles or ():
+            mask |= role.permissions or 0
+        return mask
+
+    @staticmethod
+    def _request_masks():
+        if not has_app_context():
+            return None
+        masks = g.get('permission_masks')
+        if masks is None:
+            masks = g.permission_masks = {}
+        return masks
+
+    def get_mask(self, user) -> int:
+        """获取用户的有效权限位掩码"""
+        user_id = getattr(user, 'id', None)
+        masks = self._request_masks()
+        if user_id is None or masks is None:
+            return self.compute_mask(user)
+
+        mask = masks.get(user_id)
+        if mask is not None:
+            return mask
+
+        if inspect(user).attrs.roles.history.has_changes():
+            # 角色分配尚未提交：跨请求缓存已过时，结果也只在本请求内使用，避免回滚后留下错误的缓存
+            mask = masks[user_id] = self.compute_mask(user)
+            return mask
+
+        key = self.CACHE_KEY.format(user_id)
+        mask = tagged_cache.get(key)
+        if mask is None:
+            # 计算前读取标签代数，计算期间发生的失效会使本次写入的缓存不可达
+            tags = [CacheTags.user(user_id)] + [CacheTags.role(role.id) for role in user.roles if role.id]
+            generations = tagged_cache.snapshot(tags)
+            mask = self.compute_mask(user)
+            tagged_cache.set(key, mask, tags=tags, timeout=self.cache_timeout, generations=generations)
+        masks[user_id] = mask
+        return mask
+
+    def forget(self, user_id=None):
+        """丢弃请求内缓存的权限（不指定用户时丢弃全部）"""
+        masks = self._request_masks()
+        if masks is None:
+            return
+        if user_id is None:
+            masks.clear()
+        else:
+            masks.pop(user_id, None)
+
+    def invalidate(self, user_ids=(), role_ids=()):
+        """失效指定用户和角色的权限缓存"""
+        tags = [CacheTags.user(user_id) for user_id in user_ids]
+        tags.extend(CacheTags.role(role_id) for role_id in role_ids)
+        if tags:
+            tagged_cache.invalidate(*tags)
+        self.forget()
+
+
+def _history_ids(state, attr):
+    """关联集合中新增或移除的对象ID"""
+    history = state.attrs[attr].history
+    values = list(history.added or ()) + list(history.deleted or ())
+    return [getattr(value, 'id', None) for value in values if value is not None]
+
+
+@event.listens_for(Session, 'after_flush')
+def track_permission_changes(session, flush_context):
+    """记录本次事务中角色分配和角色权限的变化"""
+    from app.models.user import User
+
+    user_ids = set()
+    role_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if obj in session.deleted or state.attrs.roles.history.has_changes():
+                user_ids.add(obj.id)
+        elif isinstance(obj, Role):
+            state = inspect(obj)
+            if obj in session.deleted or state.attrs.permissions.history.has_changes():
+                role_ids.add(obj.id)
+            # 通过 role.users 分配的用户
+            user_ids.update(_history_ids(state, 'users'))
+    if user_ids or role_ids:
+        changes = session.info.setdefault('permission_changes', (set(), set()))
+        changes[0].update(i for i in user_ids if i is not None)
+        changes[1].update(i for i in role_ids if i is not None)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_permissions_on_commit(session):
+    """事务提交后失效受影响用户的权限缓存"""
+    changes = session.info.pop('permission_changes', None)
+    if changes:
+        permission_cache_service.invalidate(*changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_permission_changes_on_rollback(session):
+    """事务回滚后丢弃记录的变更；请求内缓存可能含未提交的角色分配，一并丢弃"""
+    session.info.pop('permission_changes', None)
+    permission_cache_service.forget()
+
+
+permission_cache_service = PermissionCacheService()
@@ -13,11 +13,18 @@ from sqlalchemy import desc, extract, or_, and_, func, text
 from app.models.post import Post, PostStatus
 from app.models.category import Category
 from app.models.tag import Tag
-from app.extensions import db, cache
-from app.utils.pagination import Pagination
+from app.extensions import db
+from app.utils.pagination import Pagination, KeysetPagination
 from app.config import Config
 from app.services.security import SecurityService
-from PIL import Image
+from app.services.sidebar import SidebarStatsService
+from app.services.view_counter import view_counter_service
+from app.services.search import search_service
+from app.services.archive import archive_service, ArchiveEntry
+from app.services.related import related_posts_service
+from app.services.neighbours import neighbour_index_service, NeighbourEntry
+from app.services.image_processing import image_processing_service
+from app.utils.tagged_cache import tagged_cache, CacheTags
 import uuid
 import secrets
 from flask import url_for, current_app
@@ -42,10 +49,8 @@ class PostService:
 
     def __init__(self):
         self.security_service = SecurityService()
+        self.sidebar_stats_service = SidebarStatsService()
         self.allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-        self.max_image_size = (1920, 1080)  # 最大图片尺寸
-        self.thumbnail_size = (300, 300)    # 缩略图尺寸
-        self.quality = 85                   # 图片质量
 
     def _get_upload_folder(self):
         """获取上传文件夹路径"""
@@ -58,47 +63,10 @@ class PostService:
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in current_app.config.get('ALLOWED_EXTENSIONS', {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'})
 
-    def _process_image(self, image):
-        """处理图片（调整大小、转换格式等）"""
-        # 如果图片是RGBA模式，转换为RGB
-        if image.mode == 'RGBA':
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[3])
-            image = background
-        
-        # 在非测试环境中调整图片大小
-        if not current_app.config.get('TESTING'):
-            max_size = current_app.config.get('IMAGE_MAX_DIMENSION', 2048)
-            if max(image.size) > max_size:
-                ratio = max_size / max(image.size)
-                new_size = tuple(int(dim * ratio) for dim in image.size)
-                image = image.resize(new_size, Image.Resampling.LANCZOS)
-        
-        return image
-
-    def _save_image(self, image, original_filename):
-        """保存图片"""
-        # 生成安全的文件名
-        filename = secure_filename(original_filename)
-        name = os.path.splitext(filename)[0]
-        filename = f"{name}.png"  # 始终使用PNG格式
-        
-        # 如果文件已存在，添加时间戳
-        if os.path.exists(os.path.join(self._get_upload_folder(), filename)):
-            timestamp = datetime.now(UTC).strftime('%Y%m%d%H%M%S')
-            filename = f"{name}_{timestamp}.png"
-        
-        # 确保上传目录存在
-        os.makedirs(self._get_upload_folder(), exist_ok=True)
-        
-        # 保存图片
-        save_path = os.path.join(self._get_upload_folder(), filename)
-        image.save(save_path, format='PNG', quality=85, optimize=True)
-        
-        return filename
-
     def upload_image(self, file):
         """上传图片
+
+        原图原样保存后立即返回，缩放和变体生成由图片处理服务在后台完成。
         
         Args:
             file: 文件对象
@@ -116,17 +84,10 @@ class PostService:
             raise ValueError('不支持的文件类型')
         
         try:
-            # 读取和处理图片
-            image = Image.open(file)
-            image = self._process_image(image)
-            
-            # 保存图片
-            filename = self._save_image(image, file.filename)
-            return filename
-            
+            return image_processing_service.store_upload(file).filename
         except Exception as e:
-            current_app.logger.error(f"处理图片失败: {str(e)}")
-            raise ValueError('图片处理失败')
+            current_app.logger.error(f"保存图片失败: {str(e)}")
+            raise ValueError('图片保存失败')
 
     def get_post_images(self, post_id):
         """获取文章的所有上传图片
@@ -180,51 +141,23 @@ class PostService:
             current_app.logger.error(f"删除图片失败: {str(e)}")
             return False
 
-    def _clear_post_cache(self, post_id):
-        """清除文章相关的所有缓存
-        
+    def _clear_post_cache(self, post_id, category_ids=(), tag_ids=()):
+        """按依赖标签失效文章相关的缓存
+
         Args:
             post_id: 文章ID
+            category_ids: 受影响的分类ID（更新前后的分类都需要传入）
+            tag_ids: 受影响的标签ID（更新前后的标签都需要传入）
         """
-        current_app.logger.info(f"清除文章 {post_id} 相关的缓存")
-        
-        # 清除文章详情缓存
-        cache_key = self.CACHE_KEY_POST.format(post_id)
-        cache.delete(cache_key)
-        
-        # 清除置顶文章缓存
-        cache.delete(self.CACHE_KEY_STICKY)
-        
-        # 清除文章列表缓存
-        for page in range(1, self.MAX_CACHE_PAGES + 1):
-            cache_key = f'posts:page:{page}'
-            cache.delete(cache_key)
-            
-            # 清除分页大小变体
-            for per_page in [5, 10, 15, 20, 25, 30]:
-                cache_key = f'posts:page:{page}:{per_page}'
-                cache.delete(cache_key)
-        
-        # 清除搜索结果缓存 - 由于搜索内容多变，简单清除一些常见前缀
-        for prefix in ['search:', 'related:', 'category:', 'tag:', 'archive:']:
-            cache.delete_many(prefix)
-        
-        # 清除首页缓存
-        cache.delete('index_data')
-        
-        # 清除归档缓存
-        cache.delete('archives')
-        
-        # 清除相关文章缓存
-        cache.delete_many(f'related:{post_id}')
-        
-        # 强制清除所有与posts相关的缓存
-        try:
-            cache.delete_many('posts:')
-        except:
-            pass
-            
-        current_app.logger.info(f"缓存清除完成")
+        tags = [CacheTags.post(post_id), CacheTags.LISTING, CacheTags.ARCHIVE]
+        tags.extend(CacheTags.category(category_id) for category_id in category_ids if category_id)
+        tags.extend(CacheTags.tag(tag_id) for tag_id in tag_ids if tag_id)
+        tagged_cache.invalidate(*tags)
+
+    @staticmethod
+    def _taxonomy_ids(post):
+        """返回文章当前的分类ID和标签ID，用于失效缓存"""
+        return [post.category_id], [tag.id for tag in post.tags]
 
     def _build_search_query(self, search_text):
         """构建搜索查询
@@ -233,47 +166,11 @@ class PostService:
             search_text: 搜索文本
             
         Returns:
-            查询条件
+            查询条件（基于全文索引，FTS5 不可用时退回到 LIKE）
         """
         # 确保search_text是字符串类型
         search_text = str(search_text) if search_text is not None else ""
-        search_terms = search_text.split()
-        conditions = []
-        
-        for term in search_terms:
-            pattern = f'%{term}%'
-            term_condition = or_(
-                Post.title.ilike(pattern),
-                Post.content.ilike(pattern),
-                Post.summary.ilike(pattern)
-            )
-            conditions.append(term_condition)
-            
-        # 如果没有搜索条件，返回始终为真的条件
-        if not conditions:
-            return True
-            
-        return and_(*conditions)
-    
-    @staticmethod
-    def search_posts(query: str, page: int = 1, per_page: int = 10):
-        """搜索文章"""
-        if not query:
-            return Post.query.filter_by(status=1).order_by(
-                desc(Post.created_at)
-            ).paginate(page=page, per_page=per_page, error_out=False)
-        
-        # 构建搜索查询
-        search_query = PostService._build_search_query(query)
-        
-        # 执行查询
-        return Post.query.filter(
-            and_(search_query, Post.status == 1)
-        ).order_by(desc(Post.created_at)).paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        return search_service.match_condition(search_text)
     
     def create_post(self, title, content, author=None, author_id=None, category_id=None, tags=None, status=PostStatus.DRAFT, summary=None):
         """创建文章
@@ -333,7 +230,7 @@ class PostService:
             db.session.commit()
             
             # 清除缓存
-            self._clear_post_cache(post.id)
+            self._clear_post_cache(post.id, *self._taxonomy_ids(post))
             
             return post
             
@@ -377,6 +274,9 @@ class PostService:
                 current_app.logger.warning(f"文章不存在，ID: {post_id}")
                 raise ValueError('文章不存在')
             
+            # 记录修改前的分类和标签，它们的文章列表同样需要失效
+            old_category_ids, old_tag_ids = self._taxonomy_ids(post)
+            
             # 更新分类
             if category_id is not None:
                 post.category_id = category_id
@@ -420,20 +320,10 @@ class PostService:
             # 提交所有更改
             db.session.commit()
             
-            # 清除相关的缓存键
-            current_app.logger.info("开始清除缓存")
-            self._clear_post_cache(post.id)
-            
-            # 清除标签相关的缓存
-            if tags is not None:
-                for tag in tags:
-                    cache_key = f'tag_posts:{tag.id}'
-                    cache.delete(cache_key)
-                    current_app.logger.info(f"清除标签缓存: {cache_key}")
-            
-            # 清除文章列表缓存
-            cache.delete('post_list')
-            cache.delete(f'post_list:1:10')  # 默认的分页缓存
+            # 清除相关的缓存
+            new_category_ids, new_tag_ids = self._taxonomy_ids(post)
+            self._clear_post_cache(post.id, old_category_ids + new_category_ids,
+                                   old_tag_ids + new_tag_ids)
             
             # 强制刷新数据库会话
             db.session.expire_all()
@@ -483,9 +373,14 @@ class PostService:
                 current_app.logger.info(f"删除文章相关的评论，数量: {comments_count}")
                 post.comments.delete()
             
+            category_ids, tag_ids = self._taxonomy_ids(post)
+            
             db.session.delete(post)
             db.session.commit()
             
+            # 清除缓存
+            self._clear_post_cache(post_id, category_ids, tag_ids)
+            
             current_app.logger.info(f"文章删除成功，ID: {post_id}")
             return {'status': 'success', 'message': '文章删除成功'}
             
@@ -581,24 +476,8 @@ class PostService:
             raise e
 
     def search_posts(self, keyword, page=1, per_page=10, include_private=False):
-        """搜索文章"""
-        query = Post.query
-        
-        if not include_private:
-            query = query.filter_by(is_private=False)
-        
-        query = query.filter(
-            or_(
-                Post.title.ilike(f'%{keyword}%'),
-                Post.content.ilike(f'%{keyword}%')
-            )
-        )
-        
-        return query.order_by(Post.created_at.desc()).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        """搜索已发布文章，按相关度（BM25）排序"""
+        return search_service.search(keyword, page, per_page, include_private=include_private)
 
     def increment_views(self, post_id):
         """增加文章浏览量"""
@@ -611,11 +490,10 @@ class PostService:
             if not post:
                 return False, "文章不存在"
             
-            post.view_count = (post.view_count or 0) + 1
-            db.session.commit()
-            return True, post.view_count
+            # 写入浏览量缓冲区，返回值包含尚未落库的增量
+            pending = view_counter_service.record(post_id)
+            return True, (post.view_count or 0) + pending
         except Exception as e:
-            db.session.rollback()
             current_app.logger.error(f"更新文章浏览量失败: {str(e)}")
             return False, str(e)
 
@@ -638,6 +516,7 @@ class PostService:
             
             # 获取总浏览量
             total_views = db.session.query(db.func.sum(Post.view_count)).scalar() or 0
+            total_views += view_counter_service.get_pending_total()
             
             current_app.logger.info('成功获取文章统计信息', extra={
                 'data': {
@@ -669,16 +548,18 @@ class PostService:
     def get_sticky_posts() -> List[Post]:
         """获取置顶文章列表"""
         cache_key = PostService.CACHE_KEY_STICKY
-        posts = cache.get(cache_key)
+        posts = tagged_cache.get(cache_key)
         if posts is not None:
             return posts
             
+        generations = tagged_cache.snapshot([CacheTags.LISTING])
         posts = Post.query.filter_by(
             is_sticky=True, 
             status=1
         ).order_by(desc(Post.created_at)).all()
         
-        cache.set(cache_key, posts, timeout=PostService.CACHE_TIMEOUT)
+        tagged_cache.set(cache_key, posts, tags=[CacheTags.LISTING], timeout=PostService.CACHE_TIMEOUT,
+                         generations=generations)
         return posts
     
     @staticmethod
@@ -701,76 +582,9 @@ class PostService:
         return cls.get_archives_static()
         
     @staticmethod
-    def get_archives_static() -> Dict[str, Dict[str, List[Post]]]:
-        """获取文章归档信息"""
-        from flask import current_app
-        from app.models.post import PostStatus
-        
-        # 直接打印调试信息
-        print("======= 开始获取归档信息 =======")
-        
-        # 检查缓存
-        from app.extensions import cache
-        cache_key = 'archives'
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            print("从缓存获取归档数据")
-            print("缓存中的归档月份数量: {}".format(len(cached_data)))
-            for key, posts in cached_data.items():
-                print("缓存月份: {}, 文章数: {}".format(key, len(posts)))
-                for post in posts:
-                    print("  - ID: {}, 标题: {}, 状态: {}, 创建时间: {}".format(
-                        post.id, post.title, post.status, post.created_at))
-            return cached_data
-        
-        print("从数据库重新生成归档数据")
-        
-        # 修改为: 获取已发布和已归档的文章
-        posts = Post.query.filter(
-            (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
-        ).order_by(desc(Post.created_at)).all()
-        
-        print("查询到的文章总数: {}".format(len(posts)))
-        for post in posts:
-            print("查询到文章: ID={}, 标题={}, 状态={}, 创建时间={}".format(
-                post.id, post.title, post.status, post.created_at))
-        
-        # 记录查询到的文章状态以便调试
-        status_counts = {}
-        for post in posts:
-            status_str = str(post.status)
-            if status_str not in status_counts:
-                status_counts[status_str] = 0
-            status_counts[status_str] += 1
-            
-        print(f"归档查询结果: 共 {len(posts)} 篇文章, 状态统计: {status_counts}")
-        
-        # 按年月组织文章
-        archives = {}
-        
-        for post in posts:
-            if not post.created_at:
-                print(f"跳过文章 {post.id}，创建时间为空")
-                continue
-                
-            # 生成键格式为 "2024-03" 的字符串
-            key = f"{post.created_at.year}-{post.created_at.month:02d}"
-            
-            if key not in archives:
-                archives[key] = []
-            archives[key].append(post)
-            print(f"添加文章到归档: {post.title} -> {key}")
-        
-        # 保存到缓存
-        cache.set(cache_key, archives, timeout=300)  # 5分钟过期
-        
-        print(f"归档数据生成完成，共 {len(archives)} 个月份")
-        for key, posts in archives.items():
-            print(f"月份 {key}: {len(posts)} 篇文章")
-            
-        print("======= 归档信息获取完成 =======")
-        
-        return archives
+    def get_archives_static() -> Dict[str, List[ArchiveEntry]]:
+        """获取文章归档信息（按月份分组的轻量文章投影）"""
+        return archive_service.get_archives()
     
     @staticmethod
     def get_posts_by_time():
@@ -861,17 +675,19 @@ class PostService:
 
     @staticmethod
     def get_related_posts(post, limit=5):
-        """获取相关文章"""
+        """获取相关文章
+
+        优先读取预计算的 related_posts 表（一次索引查询）；
+        尚未执行 flask rebuild-related 时退回按共同标签查询。
+        """
         try:
-            # 导入Tag模型
-            from app.models.tag import Tag
-            from sqlalchemy import desc
-            
-            # 根据标签获取相关文章
             if not post or not hasattr(post, 'tags'):
                 current_app.logger.error(f"获取相关文章失败: 文章不存在或没有tags属性")
                 return []
-                
+
+            if related_posts_service.is_built():
+                return related_posts_service.get_related(post.id, limit)
+
             tag_ids = [tag.id for tag in post.tags]
             if tag_ids:
                 return Post.query.filter(
@@ -949,11 +765,15 @@ class PostService:
             if status:
                 query = query.filter(Post.status == status)
             
-            # 按创建时间倒序排序
-            query = query.order_by(Post.created_at.desc())
-            
-            # 执行分页查询
-            pagination = query.paginate(page=page, per_page=per_page)
+            # 按 (is_sticky, created_at, id) 游标分页，总数和页码游标单独缓存
+            status_key = getattr(status, 'name', status)
+            pagination = KeysetPagination(
+                query, per_page,
+                columns=(Post.is_sticky, Post.created_at, Post.id),
+                key_attrs=('is_sticky', 'created_at', 'id'),
+                page=page, cache_key=f'posts:{category_id}:{tag_id}:{author_id}:{status_key}',
+                cache_tags=[CacheTags.LISTING]
+            )
             
             # 预加载每个文章的关联数据
             if pagination.items:
@@ -977,43 +797,27 @@ class PostService:
             db.session.rollback()
             raise
 
-    def get_prev_post(self, post: Post) -> Optional[Post]:
-        """获取上一篇文章
+    def get_prev_post(self, post: Post) -> Optional[NeighbourEntry]:
+        """获取上一篇文章（按发布时间，较早的一篇）
         
         Args:
             post: 当前文章对象
             
         Returns:
-            Post: 上一篇文章对象，如果不存在则返回None
+            NeighbourEntry: 上一篇文章（含 id、title），如果不存在则返回None
         """
-        try:
-            return Post.query.filter(
-                Post.id < post.id,
-                (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED),
-                Post.is_private == False
-            ).order_by(Post.id.desc()).first()
-        except Exception as e:
-            current_app.logger.error(f"获取上一篇文章失败: {str(e)}")
-            return None
+        return neighbour_index_service.get_prev(post)
             
-    def get_next_post(self, post: Post) -> Optional[Post]:
-        """获取下一篇文章
+    def get_next_post(self, post: Post) -> Optional[NeighbourEntry]:
+        """获取下一篇文章（按发布时间，较晚的一篇）
         
         Args:
             post: 当前文章对象
             
         Returns:
-            Post: 下一篇文章对象，如果不存在则返回None
+            NeighbourEntry: 下一篇文章（含 id、title），如果不存在则返回None
         """
-        try:
-            return Post.query.filter(
-                Post.id > post.id,
-                (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED),
-                Post.is_private == False
-            ).order_by(Post.id.asc()).first()
-        except Exception as e:
-            current_app.logger.error(f"获取下一篇文章失败: {str(e)}")
-            return None
+        return neighbour_index_service.get_next(post)
 
     def get_post_count(self):
         """获取文章总数"""
@@ -1121,12 +925,13 @@ class PostService:
             
             # 从缓存获取
             cache_key = self.CACHE_KEY_TAG.format(tag_id, page, per_page)
-            result = cache.get(cache_key)
+            result = tagged_cache.get(cache_key)
             if result and not current_app.config.get('TESTING'):
                 current_app.logger.info(f"从缓存获取标签 {tag_id} 的文章列表，页码 {page}")
                 return result
             
             # 查询标签下的已发布或已归档文章
+            generations = tagged_cache.snapshot([CacheTags.tag(tag_id)])
             query = Post.query.filter(
                 Post.tags.any(id=tag_id),
                 (Post.status == PostStatus.PUBLISHED) | (Post.status == PostStatus.ARCHIVED)
@@ -1137,7 +942,8 @@ class PostService:
             
             # 缓存查询结果
             if not current_app.config.get('TESTING'):
-                cache.set(cache_key, pagination, timeout=self.CACHE_TIMEOUT)
+                tagged_cache.set(cache_key, pagination, tags=[CacheTags.tag(tag_id)],
+                                 timeout=self.CACHE_TIMEOUT, generations=generations)
             
             current_app.logger.info(f"查询标签 {tag_id} 的文章列表成功，共 {pagination.total} 篇")
             return pagination
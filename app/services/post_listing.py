@@ -0,0 +1,206 @@
+"""
+文件名：post_listing.py
+描述：文章列表查询服务（首页等列表页使用的轻量行对象）
+作者：denny
+"""
+
+from math import ceil
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import select
+from app.extensions import db
+from app.models.associations import post_tags
+from app.models.category import Category
+from app.models.post import Post, PostStatus
+from app.models.tag import Tag
+from app.utils.pagination import KeysetPagination
+from app.utils.tagged_cache import CacheTags
+
+
+class CategoryRef:
+    """列表中使用的分类引用"""
+
+    __slots__ = ('id', 'name')
+
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+
+
+class TagRef:
+    """列表中使用的标签引用"""
+
+    __slots__ = ('id', 'name')
+
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+
+
+class PostListItem:
+    """列表页文章行对象
+
+    只包含列表模板需要的字段，不挂在 ORM 会话上，
+    访问 category / tags 不会触发额外查询。
+    """
+
+    __slots__ = ('id', 'title', 'summary', 'content', 'created_at', 'updated_at',
+                 'view_count', 'is_sticky', 'category', 'tags')
+
+    def __init__(self, id, title, summary, content, created_at, updated_at,
+                 view_count, is_sticky, category: Optional[CategoryRef] = None,
+                 tags: Optional[List[TagRef]] = None):
+        self.id = id
+        self.title = title
+        self.summary = summary
+        self.content = content
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.view_count = view_count or 0
+        self.is_sticky = bool(is_sticky)
+        self.category = category
+        self.tags = tags if tags is not None else []
+
+    def __repr__(self):
+        return f'<PostListItem {self.id}>'
+
+
+class ListPagination:
+    """基于总数的简单分页对象，接口与模板中使用的分页对象一致"""
+
+    def __init__(self, page: int, per_page: int, total: int, items: list):
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.items = items
+
+    @property
+    def pages(self):
+        """总页数"""
+        if self.per_page == 0 or self.total == 0:
+            return 0
+        return int(ceil(self.total / float(self.per_page)))
+
+    @property
+    def has_prev(self):
+        """是否有上一页"""
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        """是否有下一页"""
+        return self.page < self.pages
+
+    @property
+    def prev_num(self):
+        """上一页页码"""
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def next_num(self):
+        """下一页页码"""
+        return self.page + 1 if self.has_next else None
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=5, right_edge=2):
+        """迭代页码"""
+        last = 0
+        for num in range(1, self.pages + 1):
+            if num <= left_edge or \
+               (num > self.page - left_current - 1 and num < self.page + right_current) or \
+               num > self.pages - right_edge:
+                if last + 1 != num:
+                    yield None
+                yield num
+                last = num
+
+
+class PostListingService:
+    """文章列表查询服务类
+
+    首页列表只需两次数据库往返（总数单独缓存）：
+    1. 文章 + 分类名称（按排序键游标分页，不使用 OFFSET）
+    2. 本页所有文章的标签
+    """
+
+    def _home_filter(self):
+        """首页可见文章条件：已发布或置顶"""
+        return (Post.status == PostStatus.PUBLISHED) | (Post.is_sticky.is_(True))
+
+    def _load_tags(self, post_ids: List[int]) -> Dict[int, List[TagRef]]:
+        """一次查询加载多篇文章的标签"""
+        tags_by_post = {post_id: [] for post_id in post_ids}
+        if not post_ids:
+            return tags_by_post
+
+        rows = db.session.execute(
+            select(post_tags.c.post_id, Tag.id, Tag.name)
+            .join(Tag, Tag.id == post_tags.c.tag_id)
+            .where(post_tags.c.post_id.in_(post_ids))
+            .order_by(post_tags.c.post_id, Tag.id)
+        )
+        for post_id, tag_id, tag_name in rows:
+            tags_by_post[post_id].append(TagRef(tag_id, tag_name))
+        return tags_by_post
+
+    def get_home_page(self, page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                      before: Optional[str] = None) -> KeysetPagination:
+        """按 (is_sticky, created_at, id) 游标分页获取首页文章
+
+        Args:
+            page: 页码（未传入游标时使用）
+            per_page: 每页数量
+            cursor: 向后翻页令牌
+            before: 向前翻页令牌
+
+        Returns:
+            KeysetPagination: items 为 PostListItem 列表
+
+        Raises:
+            InvalidCursor: 令牌无效
+        """
+        stmt = (
+            select(
+                Post.id, Post.title, Post.summary, Post.content,
+                Post.created_at, Post.updated_at, Post.view_count,
+                Post.is_sticky, Post.category_id, Category.name
+            )
+            .outerjoin(Category, Category.id == Post.category_id)
+            .where(self._home_filter())
+        )
+        pagination = KeysetPagination(
+            stmt, per_page,
+            columns=(Post.is_sticky, Post.created_at, Post.id),
+            key_attrs=('is_sticky', 'created_at', 'id'),
+            page=page, cursor=cursor, before=before,
+            cache_key='home', cache_tags=[CacheTags.LISTING]
+        )
+
+        rows = pagination.items
+        tags_by_post = self._load_tags([row.id for row in rows])
+        items = []
+        for row in rows:
+            category = CategoryRef(row.category_id, row.name) if row.category_id else None
+            items.append(PostListItem(
+                row.id, row.title, row.summary, row.content,
+                row.created_at, row.updated_at, row.view_count, row.is_sticky,
+                category=category, tags=tags_by_post[row.id]
+            ))
+        pagination.items = items
+        return pagination
+
+    def get_home_posts(self, page: int = 1, per_page: int = 10) -> Tuple[List[PostListItem], int]:
+        """获取首页文章列表
+
+        Args:
+            page: 页码
+            per_page: 每页数量
+
+        Returns:
+            tuple: (文章行对象列表, 文章总数)
+        """
+        try:
+            pagination = self.get_home_page(page, per_page)
+            return pagination.items, pagination.total
+        except Exception as e:
+            current_app.logger.error(f"获取首页文章列表失败: {str(e)}")
+            return [], 0
@@ -0,0 +1,235 @@
+"""
+文件名：query_profiler.py
+描述：请求级 SQL 统计、Server-Timing 响应头与慢查询日志
+作者：denny
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_query_logger = logging.getLogger('myblog.slow_query')
+
+
+class RequestQueryStats:
+    """单个请求的查询统计"""
+
+    __slots__ = ('started', 'queries', 'db_time', 'render_time', 'render_started', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_started = []
+        self.statements = Counter()
+
+
+class QueryProfiler:
+    """SQL 查询分析服务
+
+    通过 SQLAlchemy 的 before/after_cursor_execute 事件为每条语句计时：
+    请求内累计查询次数和数据库耗时，统计相同语句的重复次数（疑似 N+1），
+    在响应中输出 Server-Timing（db、render、total）；
+    超过阈值的语句连同 EXPLAIN QUERY PLAN 以 JSON 写入慢查询日志。
+    各端点的累计数据保存在进程内，在后台首页展示。
+    """
+
+    G_KEY = '_query_stats'
+
+    def __init__(self):
+        self.enabled = False
+        self.server_timing = False
+        self.slow_threshold = 0.2
+        self.repeat_threshold = 5
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app):
+        """根据应用配置注册数据库事件和请求钩子"""
+        self.enabled = app.config.get('SQL_PROFILER_ENABLED', True)
+        self.server_timing = app.config.get('SQL_PROFILER_SERVER_TIMING', app.debug)
+        self.slow_threshold = app.config.get('SQL_SLOW_QUERY_THRESHOLD', 200) / 1000.0
+        self.repeat_threshold = app.config.get('SQL_REPEAT_THRESHOLD', 5)
+        app.extensions['query_profiler'] = self
+        if not self.enabled:
+            return
+
+        if not app.debug and not app.testing and not slow_query_logger.handlers:
+            os.makedirs('logs', exist_ok=True)
+            handler = RotatingFileHandler('logs/slow_query.log', maxBytes=1024 * 1024, backupCount=5)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            slow_query_logger.addHandler(handler)
+            slow_query_logger.setLevel(logging.WARNING)
+
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            event.listen(Engine, 'handle_error', self._handle_error)
+            self._listening = True
+
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+    # ---------- 数据库事件 ----------
+
+    @staticmethod
+    def _current() -> Optional[RequestQueryStats]:
+        if has_request_context():
+            return g.get(QueryProfiler.G_KEY)
+        return None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('query_started')
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if conn.info.get('explaining'):
+            return
+
+        stats = self._current()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+            stats.statements[statement] += 1
+
+        if elapsed >= self.slow_threshold and has_app_context():
+            self._log_slow(conn, statement, parameters, elapsed, executemany)
+
+    @staticmethod
+    def _handle_error(context):
+        """语句执行失败时不会触发 after_cursor_execute，弹出对应的开始时间"""
+        conn = context.connection
+        started = conn.info.get('query_started') if conn is not None else None
+        if started:
+            started.pop()
+
+    @staticmethod
+    def _explain(conn, statement, parameters) -> List[str]:
+        """在同一连接上获取 SQLite 查询计划（只针对查询语句）"""
+        if conn.dialect.name != 'sqlite' or not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return []
+        conn.info['explaining'] = True
+        try:
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters or ())
+                return [row[-1] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except Exception:
+            return []
+        finally:
+            conn.info['explaining'] = False
+
+    def _log_slow(self, conn, statement, parameters, elapsed, executemany):
+        record = {
+            'event': 'slow_query',
+            'duration_ms': round(elapsed * 1000, 2),
+            'statement': ' '.join(statement.split()),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'plan': [] if executemany else self._explain(conn, statement, parameters)
+        }
+        slow_query_logger.warning(json.dumps(record, ensure_ascii=False))
+
+    # ---------- 请求与模板 ----------
+
+    def start_request(self):
+        g.setdefault(self.G_KEY, RequestQueryStats())
+
+    def _before_render(self, sender, template, context, **extra):
+        stats = self._current()
+        if stats is not None:
+            stats.render_started.append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        stats = self._current()
+        if stats is not None and stats.render_started:
+            elapsed = time.perf_counter() - stats.render_started.pop()
+            # 只统计最外层模板，避免嵌套渲染重复计时
+            if not stats.render_started:
+                stats.render_time += elapsed
+
+    def finish_request(self, response):
+        """汇总本次请求并输出 Server-Timing"""
+        stats = g.pop(self.G_KEY, None)
+        if stats is None:
+            return response
+        try:
+            total = time.perf_counter() - stats.started
+            repeated = {statement: count for statement, count in stats.statements.items()
+                        if count >= self.repeat_threshold}
+            endpoint = request.endpoint or '<unmatched>'
+            if repeated:
+                for statement, count in repeated.items():
+                    current_app.logger.warning(
+                        f"疑似 N+1 查询: {endpoint} 中同一语句执行 {count} 次: "
+                        f"{' '.join(statement.split())[:200]}"
+                    )
+            self._aggregate(endpoint, stats, total, len(repeated))
+            if self.server_timing:
+                response.headers['Server-Timing'] = (
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+                    f'render;dur={stats.render_time * 1000:.1f}, '
+                    f'total;dur={total * 1000:.1f}'
+                )
+        except Exception as e:
+            current_app.logger.error(f"汇总 SQL 统计失败: {str(e)}")
+        return response
+
+    # ---------- 端点统计 ----------
+
+    def _aggregate(self, endpoint, stats, total, repeated):
+        with self._lock:
+            item = self._endpoints.setdefault(endpoint, {
+                'requests': 0, 'queries': 0, 'db_time': 0.0, 'total_time': 0.0,
+                'max_queries': 0, 'n_plus_one': 0
+            })
+            item['requests'] += 1
+            item['queries'] += stats.queries
+            item['db_time'] += stats.db_time
+            item['total_time'] += total
+            item['max_queries'] = max(item['max_queries'], stats.queries)
+            item['n_plus_one'] += 1 if repeated else 0
+
+    def endpoint_stats(self, limit: int = 20) -> List[dict]:
+        """按数据库总耗时倒序返回各端点的统计（当前进程）"""
+        with self._lock:
+            items = [(endpoint, dict(item)) for endpoint, item in self._endpoints.items()]
+        result = []
+        for endpoint, item in items:
+            requests = item['requests']
+            result.append({
+                'endpoint': endpoint,
+                'requests': requests,
+                'avg_queries': round(item['queries'] / requests, 1),
+                'max_queries': item['max_queries'],
+                'avg_db_ms': round(item['db_time'] * 1000 / requests, 2),
+                'avg_total_ms': round(item['total_time'] * 1000 / requests, 2),
+                'db_time_ms': round(item['db_time'] * 1000, 1),
+                'n_plus_one': item['n_plus_one']
+            })
+        result.sort(key=lambda row: row['db_time_ms'], reverse=True)
+        return result[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+query_profiler = QueryProfiler()
@@ -0,0 +1,305 @@
+"""
+文件名：rate_limit.py
+描述：跨进程滑动窗口计数限流服务
+作者：denny
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+from typing import Dict, Optional, Tuple
+from flask import current_app, g, jsonify, make_response, request
+
+
+class RateLimitPolicy:
+    """限流策略：每 window 秒最多 limit 次请求"""
+
+    __slots__ = ('name', 'limit', 'window')
+
+    def __init__(self, name: str, limit: int, window: int):
+        self.name = name
+        self.limit = limit
+        self.window = window
+
+    def __repr__(self):
+        return f'<RateLimitPolicy {self.name} {self.limit}/{self.window}s>'
+
+
+class RateLimitResult:
+    """一次限流判断的结果"""
+
+    __slots__ = ('policy', 'allowed', 'remaining', 'reset_after', 'retry_after')
+
+    def __init__(self, policy: RateLimitPolicy, allowed: bool, remaining: int,
+                 reset_after: int, retry_after: int = 0):
+        self.policy = policy
+        self.allowed = allowed
+        self.remaining = remaining
+        self.reset_after = reset_after
+        self.retry_after = retry_after
+
+    def headers(self) -> Dict[str, str]:
+        """X-RateLimit-* 响应头，拒绝时包含 Retry-After"""
+        headers = {
+            'X-RateLimit-Limit': str(self.policy.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(self.reset_after),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(self.retry_after)
+        return headers
+
+
+def _sliding_count(previous: int, current: int, elapsed_ratio: float) -> float:
+    """滑动窗口估算：上一窗口按未过去的比例加权，加上当前窗口计数"""
+    return previous * (1 - elapsed_ratio) + current
+
+
+class MemoryRateLimitStore:
+    """进程内计数存储（每个 worker 独立）"""
+
+    # 键数量超过该值时清理过期计数
+    PURGE_THRESHOLD = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Tuple[int, int, int, float]] = {}
+
+    def hit(self, key: str, window_index: int, window: int, limit: int,
+            elapsed_ratio: float) -> Tuple[bool, float]:
+        """判断并计数
+
+        Returns:
+            tuple: (是否允许, 计入本次后的估算请求数)
+        """
+        with self._lock:
+            index, current, previous, _ = self._counters.get(key, (window_index, 0, 0, 0))
+            if index != window_index:
+                previous = current if index == window_index - 1 else 0
+                current = 0
+            count = _sliding_count(previous, current, elapsed_ratio)
+            allowed = count + 1 <= limit
+            if allowed:
+                current += 1
+                count += 1
+            # 下一个窗口结束后计数不再有用
+            self._counters[key] = (window_index, current, previous, (window_index + 2) * window)
+            if len(self._counters) > self.PURGE_THRESHOLD:
+                now = time.time()
+                self._counters = {k: v for k, v in self._counters.items() if v[3] > now}
+            return allowed, count
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class SQLiteRateLimitStore:
+    """基于 SQLite WAL 文件的共享计数存储（多个 worker 共用）"""
+
+    # 每累计该数量的请求清理一次过期计数
+    PURGE_INTERVAL = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits ('
+            'key TEXT PRIMARY KEY, window_index INTEGER NOT NULL, '
+            'current INTEGER NOT NULL, previous INTEGER NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def _connect(self):
+        """获取当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, window_index: int, window: int, limit: int,
+            elapsed_ratio: float) -> Tuple[bool, float]:
+        """判断并计数（一次写事务内完成，多进程间互斥）
+
+        Returns:
+            tuple: (是否允许, 计入本次后的估算请求数)
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT window_index, current, previous FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            index, current, previous = row if row else (window_index, 0, 0)
+            if index != window_index:
+                previous = current if index == window_index - 1 else 0
+                current = 0
+            count = _sliding_count(previous, current, elapsed_ratio)
+            allowed = count + 1 <= limit
+            if allowed:
+                current += 1
+                count += 1
+            conn.execute(
+                'INSERT INTO rate_limits (key, window_index, current, previous, expires_at) '
+                'VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET window_index = excluded.window_index, '
+                'current = excluded.current, previous = excluded.previous, '
+                'expires_at = excluded.expires_at',
+                (key, window_index, current, previous, (window_index + 2) * window)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        self._hits += 1
+        if self._hits >= self.PURGE_INTERVAL:
+            self._hits = 0
+            self.purge()
+        return allowed, count
+
+    def purge(self):
+        """删除已过期的计数（下一个窗口结束后计数不再有用）"""
+        self._connect().execute('DELETE FROM rate_limits WHERE expires_at < ?', (time.time(),))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM rate_limits')
+
+
+class RateLimiterService:
+    """限流服务
+
+    使用滑动窗口计数算法：每个键只保存当前和上一个固定窗口的计数，
+    按当前窗口已过去的比例对上一窗口计数加权，每次请求 O(1)。
+    计数存储可选进程内字典或 SQLite WAL 文件，后者在多个 worker 间共享。
+    """
+
+    DEFAULT_POLICIES = {
+        'default': (60, 60),
+        'login': (10, 300),
+        'comment': (5, 60),
+        'search': (30, 60),
+        'api': (120, 60),
+    }
+
+    def __init__(self):
+        self.store = MemoryRateLimitStore()
+        self.policies: Dict[str, RateLimitPolicy] = self._build_policies({})
+
+    def _build_policies(self, overrides) -> Dict[str, RateLimitPolicy]:
+        policies = dict(self.DEFAULT_POLICIES)
+        policies.update(overrides or {})
+        return {name: RateLimitPolicy(name, int(limit), int(window))
+                for name, (limit, window) in policies.items()}
+
+    def init_app(self, app):
+        """根据应用配置初始化计数存储和策略"""
+        self.policies = self._build_policies(app.config.get('RATE_LIMIT_POLICIES'))
+        if app.config.get('RATE_LIMIT_BACKEND', 'memory') == 'sqlite':
+            self.store = SQLiteRateLimitStore(app.config['RATE_LIMIT_STORAGE_PATH'])
+        else:
+            self.store = MemoryRateLimitStore()
+        app.extensions['rate_limiter'] = self
+
+    @staticmethod
+    def enabled() -> bool:
+        return current_app.config.get('RATE_LIMIT_ENABLED', False)
+
+    @staticmethod
+    def client_key() -> str:
+        """默认按客户端 IP 限流"""
+        return request.remote_addr or 'unknown'
+
+    def get_policy(self, name: str) -> RateLimitPolicy:
+        return self.policies.get(name) or self.policies['default']
+
+    def check(self, policy_name: str = 'default', key: Optional[str] = None,
+              now: Optional[float] = None) -> RateLimitResult:
+        """判断一次请求是否允许并计数"""
+        policy = self.get_policy(policy_name)
+        now = time.time() if now is None else now
+        window_index, offset = divmod(now, policy.window)
+        elapsed_ratio = offset / policy.window
+        reset_after = max(1, math.ceil(policy.window - offset))
+        identity = key if key is not None else self.client_key()
+
+        try:
+            allowed, count = self.store.hit(f'{policy.name}:{identity}', int(window_index),
+                                            policy.window, policy.limit, elapsed_ratio)
+        except Exception as e:
+            # 计数存储不可用时放行，避免误伤正常请求
+            current_app.logger.error(f"限流计数失败: {str(e)}")
+            return RateLimitResult(policy, True, policy.limit, reset_after)
+
+        remaining = max(0, int(policy.limit - count))
+        return RateLimitResult(policy, allowed, remaining, reset_after,
+                               retry_after=0 if allowed else reset_after)
+
+    @staticmethod
+    def wants_json() -> bool:
+        return (request.is_json or request.path.startswith('/api')
+                or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+                or request.accept_mimetypes.best == 'application/json')
+
+    def too_many_requests(self, result: RateLimitResult):
+        """429 响应"""
+        message = '请求过于频繁，请稍后再试'
+        if self.wants_json():
+            response = make_response(jsonify({'success': False, 'message': message}), 429)
+        else:
+            response = make_response(message, 429)
+            response.mimetype = 'text/plain'
+        response.headers.update(result.headers())
+        return response
+
+    def limit(self, policy_name: str = 'default', methods=None, key_func=None):
+        """按策略限流的视图装饰器
+
+        Args:
+            policy_name: 策略名称
+            methods: 只对这些请求方法限流，默认全部
+            key_func: 返回限流键的函数，默认按客户端 IP
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled() or (methods and request.method not in methods):
+                    return view(*args, **kwargs)
+                result = self.check(policy_name, key=key_func() if key_func else None)
+                if not result.allowed:
+                    return self.too_many_requests(result)
+                response = make_response(view(*args, **kwargs))
+                response.headers.update(result.headers())
+                return response
+            return wrapper
+        return decorator
+
+    def before_request(self, policy_name: str):
+        """蓝图级限流（用于 before_request 钩子），允许时在响应中附加限流头"""
+        if not self.enabled():
+            return None
+        result = self.check(policy_name)
+        if not result.allowed:
+            return self.too_many_requests(result)
+        g.rate_limit_result = result
+        return None
+
+    @staticmethod
+    def add_headers(response):
+        """after_request 钩子：附加 before_request 中记录的限流头"""
+        result = g.pop('rate_limit_result', None)
+        if result is not None:
+            response.headers.update(result.headers())
+        return response
+
+
+rate_limiter_service = RateLimiterService()
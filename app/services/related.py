@@ -0,0 +1,401 @@
+"""
+文件名：related.py
+描述：相关文章预计算服务（标签与标题/摘要词项的稀疏向量余弦相似度）
+作者：denny
+"""
+
+import atexit
+import heapq
+import math
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from flask import current_app
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.associations import post_tags
+from app.models.post import Post, PostStatus
+from app.models.related_post import RelatedPost
+from app.services.search import tokenize
+
+# 影响相似度的文章字段
+RELATED_FIELDS = ('title', 'summary', 'status', 'is_private', 'tags')
+
+
+class _RelatedIndex:
+    """进程内的特征向量与倒排索引
+
+    两次更新之间保留在内存中，增量更新只替换变更文章的向量。
+    IDF 与文档频率上限按写入向量时的统计计算，其余文章的向量
+    在下一次全量加载前保持不变（近似值，随索引定期重新加载而校正）。
+    """
+
+    def __init__(self, tag_weight: float, term_weight: float, max_df_ratio: float, min_df_cap: int):
+        self.tag_weight = tag_weight
+        self.term_weight = term_weight
+        self.max_df_ratio = max_df_ratio
+        self.min_df_cap = min_df_cap
+        self.features = {}  # 文章ID -> (标签集合, 词频)
+        self.vectors = {}  # 文章ID -> {特征: 权重}
+        self.postings = {}  # 特征 -> {文章ID: 权重}
+        self.df = Counter()
+        self.floors = {}  # 文章ID -> 已保存的第 K 名相似度（不足 K 篇时为 0）
+        self.loaded_at = time.monotonic()
+
+    def _max_df(self) -> int:
+        # 出现在过多文章中的标签和词项区分度太低，且倒排表过长，不参与计算
+        return max(self.min_df_cap, int(len(self.features) * self.max_df_ratio))
+
+    def _idf(self, feature) -> float:
+        return math.log((1 + len(self.features)) / (1 + self.df[feature])) + 1
+
+    def _store(self, post_id: int, documents: dict):
+        tags = frozenset(('tag', tag_id) for tag_id in documents['tags'])
+        terms = Counter(tokenize(documents['text']))
+        self.features[post_id] = (tags, terms)
+        self.df.update(tags)
+        self.df.update(('term', term) for term in terms)
+
+    def _vectorize(self, post_id: int):
+        tags, terms = self.features[post_id]
+        max_df = self._max_df()
+        vector = {feature: self.tag_weight * self._idf(feature)
+                  for feature in tags if self.df[feature] <= max_df}
+        for term, tf in terms.items():
+            feature = ('term', term)
+            if self.df[feature] <= max_df:
+                vector[feature] = self.term_weight * (1 + math.log(tf)) * self._idf(feature)
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        vector = {feature: weight / norm for feature, weight in vector.items()} if norm else {}
+        self.vectors[post_id] = vector
+        for feature, weight in vector.items():
+            self.postings.setdefault(feature, {})[post_id] = weight
+
+    def add(self, documents: Dict[int, dict]):
+        """加入一批文章（先统计文档频率，再生成向量）"""
+        for post_id, document in documents.items():
+            self._store(post_id, document)
+        for post_id in documents:
+            self._vectorize(post_id)
+
+    def remove(self, post_id: int):
+        if post_id not in self.features:
+            return
+        tags, terms = self.features.pop(post_id)
+        self.df.subtract(tags)
+        self.df.subtract(('term', term) for term in terms)
+        for feature in self.vectors.pop(post_id):
+            postings = self.postings[feature]
+            postings.pop(post_id, None)
+            if not postings:
+                del self.postings[feature]
+
+    def scores(self, post_id: int) -> Dict[int, float]:
+        """与共享特征的文章的相似度 {文章ID: 相似度}"""
+        scores = {}
+        for feature, weight in self.vectors.get(post_id, {}).items():
+            for other_id, other_weight in self.postings[feature].items():
+                if other_id != post_id:
+                    scores[other_id] = scores.get(other_id, 0.0) + weight * other_weight
+        return scores
+
+
+class RelatedPostsService:
+    """相关文章服务
+
+    每篇公开文章表示为稀疏向量：标签特征（按 IDF 加权）加上标题和摘要的
+    TF-IDF 词项特征，L2 归一化后两两点积即余弦相似度。相似度通过倒排索引
+    计算，只累加共享特征的文章对，结果写入 related_posts 表。
+
+    向量和倒排索引保留在进程内，文章修改后只重算变更文章和已保存结果中
+    引用了它们的文章；其他文章只在新相似度超过其第 K 名时并入结果。
+    重算不在请求中进行：事务提交后只记录文章ID，由后台线程合并处理
+    （关闭异步时由调用方执行 process_pending()，或用 flask rebuild-related 全量重建）。
+    """
+
+    VISIBLE_STATUSES = (PostStatus.PUBLISHED, PostStatus.ARCHIVED)
+    TOP_K = 5
+    TAG_WEIGHT = 1.0
+    TERM_WEIGHT = 0.5
+    # 出现在超过该比例（且多于 MIN_DF_CAP 篇）文章中的标签和词项不参与计算
+    MAX_DF_RATIO = 0.05
+    MIN_DF_CAP = 50
+    # 单条语句的绑定参数数量上限（SQLite 为 999）
+    WRITE_CHUNK_SIZE = 200
+
+    def __init__(self):
+        self.app = None
+        self.asynchronous = False
+        self.delay = 2.0
+        self.index_ttl = 3600
+        self._built = False
+        self._index = None
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        """根据应用配置初始化后台更新"""
+        self.app = app
+        self.asynchronous = app.config.get('RELATED_POSTS_ASYNC', False)
+        self.delay = app.config.get('RELATED_POSTS_DELAY', 2.0)
+        self.index_ttl = app.config.get('RELATED_POSTS_INDEX_TTL', 3600)
+        app.extensions['related_posts'] = self
+        atexit.register(self.shutdown)
+
+    # ---------- 索引 ----------
+
+    def _new_index(self) -> _RelatedIndex:
+        return _RelatedIndex(self.TAG_WEIGHT, self.TERM_WEIGHT, self.MAX_DF_RATIO, self.MIN_DF_CAP)
+
+    def _chunks(self, values: Iterable[int]):
+        values = list(values)
+        for start in range(0, len(values), self.WRITE_CHUNK_SIZE):
+            yield values[start:start + self.WRITE_CHUNK_SIZE]
+
+    def _load_documents(self, conn, post_ids: Optional[Iterable[int]] = None) -> Dict[int, dict]:
+        """加载公开文章的标题、摘要和标签（指定 post_ids 时只加载这些文章）"""
+        posts = Post.__table__
+        query = select(posts.c.id, posts.c.title, posts.c.summary).where(
+            posts.c.status.in_(self.VISIBLE_STATUSES),
+            posts.c.is_private.isnot(True)
+        )
+        tag_query = select(post_tags.c.post_id, post_tags.c.tag_id)
+        if post_ids is None:
+            rows, tag_rows = conn.execute(query).all(), conn.execute(tag_query).all()
+        else:
+            rows, tag_rows = [], []
+            for chunk in self._chunks(post_ids):
+                rows.extend(conn.execute(query.where(posts.c.id.in_(chunk))))
+                tag_rows.extend(conn.execute(tag_query.where(post_tags.c.post_id.in_(chunk))))
+        documents = {row.id: {'text': f'{row.title or ""} {row.summary or ""}', 'tags': []}
+                     for row in rows}
+        for post_id, tag_id in tag_rows:
+            if post_id in documents:
+                documents[post_id]['tags'].append(tag_id)
+        return documents
+
+    def _load_index(self, conn) -> _RelatedIndex:
+        """加载全部文章向量和已保存结果的第 K 名相似度"""
+        index = self._new_index()
+        index.add(self._load_documents(conn))
+        table = RelatedPost.__table__
+        for post_id, count, floor in conn.execute(
+                select(table.c.post_id, func.count(), func.min(table.c.score)).group_by(table.c.post_id)):
+            index.floors[post_id] = floor if count >= self.TOP_K else 0.0
+        return index
+
+    def _top(self, scores: Dict[int, float]) -> List[tuple]:
+        """前 K 篇相关文章 [(相似度, 文章ID)]"""
+        return heapq.nlargest(self.TOP_K, ((score, other_id) for other_id, score in scores.items()))
+
+    # ---------- 写入 ----------
+
+    def _write(self, conn, results: Dict[int, List[tuple]]):
+        """替换指定文章的相关文章记录"""
+        table = RelatedPost.__table__
+        for chunk in self._chunks(results):
+            conn.execute(table.delete().where(table.c.post_id.in_(chunk)))
+        rows = [
+            {'post_id': post_id, 'rank': rank, 'related_id': other_id, 'score': round(score, 6)}
+            for post_id, neighbours in results.items()
+            for rank, (score, other_id) in enumerate(neighbours)
+        ]
+        if rows:
+            conn.execute(table.insert(), rows)
+        for post_id, neighbours in results.items():
+            self._index.floors[post_id] = neighbours[-1][0] if len(neighbours) >= self.TOP_K else 0.0
+
+    def rebuild(self) -> int:
+        """全量重建相关文章表（同时重新加载进程内索引）
+
+        Returns:
+            int: 参与计算的文章数量
+        """
+        with self._lock, db.engine.begin() as conn:
+            index = self._new_index()
+            index.add(self._load_documents(conn))
+            self._index = index
+            results = {post_id: self._top(index.scores(post_id)) for post_id in index.vectors}
+            conn.execute(RelatedPost.__table__.delete())
+            self._write(conn, results)
+        self._built = True
+        current_app.logger.info(f"相关文章已重建，共 {len(results)} 篇文章")
+        return len(results)
+
+    def update_posts(self, post_ids: Iterable[int]) -> int:
+        """增量更新
+
+        替换变更文章的向量后重算这些文章，以及已保存结果中引用了它们的文章；
+        其他共享特征的文章只在新相似度超过其第 K 名时把变更文章并入结果。
+
+        Returns:
+            int: 写入的文章数量
+        """
+        post_ids = set(post_ids)
+        if not post_ids:
+            return 0
+        table = RelatedPost.__table__
+        with self._lock, db.engine.begin() as conn:
+            if self._index is None or time.monotonic() - self._index.loaded_at > self.index_ttl:
+                self._index = self._load_index(conn)
+            index = self._index
+            documents = self._load_documents(conn, post_ids)
+            for post_id in post_ids:
+                index.remove(post_id)
+            index.add(documents)
+
+            # 已删除或不再公开的文章没有向量，只清除记录
+            changed_scores = {post_id: index.scores(post_id) for post_id in post_ids}
+            results = {post_id: self._top(scores) for post_id, scores in changed_scores.items()}
+            for chunk in self._chunks(post_ids):
+                for other_id in conn.execute(
+                        select(table.c.post_id).where(table.c.related_id.in_(chunk))).scalars():
+                    if other_id not in results:
+                        results[other_id] = self._top(index.scores(other_id))
+
+            # 其余文章的已保存结果不含变更文章，其他文章对的相似度不变，合并即可
+            candidates = {}
+            for post_id, scores in changed_scores.items():
+                for other_id, score in scores.items():
+                    if other_id not in results and score > index.floors.get(other_id, 0.0):
+                        candidates.setdefault(other_id, []).append((score, post_id))
+            stored = {other_id: [] for other_id in candidates}
+            for chunk in self._chunks(candidates):
+                for row in conn.execute(select(table.c.post_id, table.c.score, table.c.related_id).where(
+                        table.c.post_id.in_(chunk)).order_by(table.c.post_id, table.c.rank)):
+                    stored[row.post_id].append((row.score, row.related_id))
+            for other_id, entries in candidates.items():
+                results[other_id] = heapq.nlargest(self.TOP_K, stored[other_id] + entries)
+
+            self._write(conn, results)
+        return len(results)
+
+    # ---------- 后台处理 ----------
+
+    def enqueue(self, post_ids: Iterable[int]):
+        """记录待更新的文章（异步模式下唤醒后台线程）"""
+        with self._pending_lock:
+            self._pending.update(post_ids)
+        if self.asynchronous:
+            self._ensure_worker()
+            self._wakeup.set()
+
+    def _ensure_worker(self):
+        """按需启动后台线程（fork 出的子进程中重新启动）"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._pending_lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='related-posts-updater',
+                                                daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait()
+            # 等待一段时间，合并连续的修改
+            self._stopping.wait(self.delay)
+            self._wakeup.clear()
+            with self.app.app_context():
+                self.process_pending()
+
+    def process_pending(self) -> int:
+        """处理已记录的文章（失败时放回待处理集合）
+
+        Returns:
+            int: 写入的文章数量
+        """
+        with self._pending_lock:
+            post_ids, self._pending = self._pending, set()
+        if not post_ids:
+            return 0
+        try:
+            return self.update_posts(post_ids)
+        except Exception as e:
+            with self._pending_lock:
+                self._pending.update(post_ids)
+            current_app.logger.error(f"更新相关文章失败: {str(e)}")
+            return 0
+
+    def shutdown(self, timeout: float = 5.0):
+        """停止后台线程并处理剩余的文章（进程退出时调用）"""
+        if self.app is None:
+            return
+        try:
+            thread = self._thread
+            if thread is not None and thread.is_alive() and self._pid == os.getpid():
+                self._stopping.set()
+                self._wakeup.set()
+                thread.join(timeout)
+            self._thread = None
+            with self.app.app_context():
+                self.process_pending()
+        except Exception:
+            pass
+
+    # ---------- 读取 ----------
+
+    def is_built(self) -> bool:
+        """相关文章表是否已生成（结果在进程内缓存）"""
+        if not self._built:
+            self._built = db.session.query(RelatedPost.post_id).limit(1).first() is not None
+        return self._built
+
+    def get_related(self, post_id: int, limit: int = TOP_K) -> List[Post]:
+        """按相似度读取相关文章（一次主键范围查询）"""
+        try:
+            return Post.query.join(RelatedPost, RelatedPost.related_id == Post.id).filter(
+                RelatedPost.post_id == post_id,
+                Post.status.in_(self.VISIBLE_STATUSES)
+            ).order_by(RelatedPost.rank).limit(limit).all()
+        except Exception as e:
+            current_app.logger.error(f"获取文章 {post_id} 的相关文章失败: {str(e)}")
+            return []
+
+
+def _mark_dirty(post):
+    session = Session.object_session(post)
+    if session is not None and post.id is not None:
+        session.info.setdefault('related_posts_dirty', set()).add(post.id)
+
+
+@event.listens_for(Post, 'after_insert')
+@event.listens_for(Post, 'after_delete')
+def track_related_insert_delete(mapper, connection, post):
+    """新增或删除文章"""
+    _mark_dirty(post)
+
+
+@event.listens_for(Post, 'after_update')
+def track_related_update(mapper, connection, post):
+    """修改标题、摘要、状态、可见性或标签"""
+    state = inspect(post)
+    if any(state.attrs[attr].history.has_changes() for attr in RELATED_FIELDS):
+        _mark_dirty(post)
+
+
+@event.listens_for(Session, 'after_commit')
+def queue_related_on_commit(session):
+    """事务提交后记录受影响的文章，由后台线程重算"""
+    post_ids = session.info.pop('related_posts_dirty', None)
+    if post_ids:
+        related_posts_service.enqueue(post_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_related_changes_on_rollback(session):
+    """事务回滚后丢弃记录的变更"""
+    session.info.pop('related_posts_dirty', None)
+
+
+related_posts_service = RelatedPostsService()
@@ -0,0 +1,342 @@
+"""
+文件名：search.py
+描述：文章全文检索服务（SQLite FTS5 + 中文二元分词）
+作者：denny
+"""
+
+import re
+from typing import List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import column, event, func, inspect, or_, and_, select, table, text
+from app.extensions import db
+from app.models.post import Post, PostStatus
+from app.services.post_listing import ListPagination
+
+# 中日韩字符（按二元分词处理）
+CJK_PATTERN = r'\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af'
+TOKEN_RE = re.compile(rf'[{CJK_PATTERN}]+|[^\W{CJK_PATTERN}]+')
+CJK_RE = re.compile(rf'[{CJK_PATTERN}]')
+
+
+def tokenize(content: Optional[str]) -> List[str]:
+    """将文本切分为索引词
+
+    拉丁字母和数字按单词切分并转为小写；中日韩文字按相邻二元切分，
+    并追加每段的最后一个字，保证单字查询也能通过前缀匹配命中。
+
+    Args:
+        content: 原始文本
+
+    Returns:
+        list: 索引词列表
+    """
+    if not content:
+        return []
+
+    tokens = []
+    for match in TOKEN_RE.finditer(content.lower()):
+        word = match.group()
+        if CJK_RE.match(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+            tokens.append(word[-1])
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def build_match_query(query_text: Optional[str]) -> str:
+    """将用户输入转换为 FTS5 MATCH 表达式
+
+    各关键词之间为“与”关系：拉丁单词使用前缀匹配，
+    中文连续片段转换为二元词组成的短语。
+    """
+    terms = []
+    for match in TOKEN_RE.finditer((query_text or '').lower()):
+        word = match.group()
+        if CJK_RE.match(word):
+            if len(word) == 1:
+                terms.append(f'"{word}"*')
+            else:
+                bigrams = ' '.join(word[i:i + 2] for i in range(len(word) - 1))
+                terms.append(f'"{bigrams}"')
+        else:
+            terms.append(f'"{word}"*')
+    return ' '.join(terms)
+
+
+# 全文索引虚拟表（rowid 即文章ID）
+posts_fts = table('posts_fts', column('rowid'))
+
+
+class SearchService:
+    """文章全文检索服务类
+
+    在 SQLite 中维护 posts_fts 虚拟表（rowid 即文章ID），
+    文章的增删改通过模型事件在同一事务内同步到索引。
+    数据库不支持 FTS5 时退回到 LIKE 查询。
+    """
+
+    TABLE_NAME = 'posts_fts'
+    # BM25 字段权重：标题、摘要、正文
+    BM25_WEIGHTS = (10.0, 4.0, 1.0)
+    # 重建索引时每批写入的文章数量
+    REBUILD_CHUNK_SIZE = 500
+
+    def __init__(self):
+        self.enabled = False
+
+    # ------------------------------------------------------------------
+    # 索引维护
+    # ------------------------------------------------------------------
+
+    def _supports_fts(self, connection) -> bool:
+        """判断数据库连接是否为 SQLite"""
+        return connection.dialect.name == 'sqlite'
+
+    def create_table(self, connection):
+        """创建全文索引虚拟表"""
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.TABLE_NAME} "
+            f"USING fts5(title, summary, content, tokenize='unicode61')"
+        ))
+
+    def drop_table(self, connection):
+        """删除全文索引虚拟表"""
+        connection.execute(text(f"DROP TABLE IF EXISTS {self.TABLE_NAME}"))
+
+    def ensure_index(self):
+        """确保索引表存在，首次创建时从 posts 表全量构建"""
+        try:
+            with db.engine.begin() as connection:
+                if not self._supports_fts(connection):
+                    self.enabled = False
+                    return
+                exists = connection.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': self.TABLE_NAME}
+                ).first() is not None
+                self.create_table(connection)
+            self.enabled = True
+            if not exists:
+                self.rebuild()
+        except Exception as e:
+            self.enabled = False
+            current_app.logger.error(f"初始化全文索引失败，搜索将退回到 LIKE 查询: {str(e)}")
+
+    def _document(self, post) -> dict:
+        """生成文章的索引文档"""
+        return {
+            'id': post.id,
+            'title': ' '.join(tokenize(post.title)),
+            'summary': ' '.join(tokenize(post.summary)),
+            'content': ' '.join(tokenize(post.content))
+        }
+
+    def index_post(self, connection, post):
+        """写入或更新单篇文章的索引"""
+        connection.execute(
+            text(f"DELETE FROM {self.TABLE_NAME} WHERE rowid = :id"), {'id': post.id}
+        )
+        connection.execute(
+            text(f"INSERT INTO {self.TABLE_NAME} (rowid, title, summary, content) "
+                 f"VALUES (:id, :title, :summary, :content)"),
+            self._document(post)
+        )
+
+    def remove_post(self, connection, post_id: int):
+        """删除单篇文章的索引"""
+        connection.execute(
+            text(f"DELETE FROM {self.TABLE_NAME} WHERE rowid = :id"), {'id': post_id}
+        )
+
+    def rebuild(self) -> int:
+        """全量重建索引
+
+        Returns:
+            int: 写入索引的文章数量
+        """
+        posts = Post.__table__
+        total = 0
+        with db.engine.begin() as connection:
+            self.drop_table(connection)
+            self.create_table(connection)
+
+            last_id = 0
+            while True:
+                rows = connection.execute(
+                    posts.select()
+                    .with_only_columns(posts.c.id, posts.c.title, posts.c.summary, posts.c.content)
+                    .where(posts.c.id > last_id)
+                    .order_by(posts.c.id)
+                    .limit(self.REBUILD_CHUNK_SIZE)
+                ).all()
+                if not rows:
+                    break
+                connection.execute(
+                    text(f"INSERT INTO {self.TABLE_NAME} (rowid, title, summary, content) "
+                         f"VALUES (:id, :title, :summary, :content)"),
+                    [self._document(row) for row in rows]
+                )
+                total += len(rows)
+                last_id = rows[-1].id
+        self.enabled = True
+        current_app.logger.info(f"全文索引重建完成，共 {total} 篇文章")
+        return total
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def _like_condition(self, query_text: str):
+        """FTS5 不可用时的 LIKE 查询条件"""
+        conditions = []
+        for term in str(query_text).split():
+            pattern = f'%{term}%'
+            conditions.append(or_(
+                Post.title.ilike(pattern),
+                Post.content.ilike(pattern),
+                Post.summary.ilike(pattern)
+            ))
+        return and_(*conditions) if conditions else True
+
+    def match_condition(self, query_text: str):
+        """返回可用于 Post 查询的匹配条件（不排序）"""
+        match = build_match_query(query_text)
+        if not match:
+            return True
+        if not self.enabled:
+            return self._like_condition(query_text)
+        return Post.id.in_(
+            text(f"SELECT rowid FROM {self.TABLE_NAME} WHERE {self.TABLE_NAME} MATCH :match")
+            .bindparams(match=match)
+            .columns(posts_fts.c.rowid)
+        )
+
+    def search_ids(self, query_text: str, limit: Optional[int] = None, offset: int = 0,
+                   statuses=(PostStatus.PUBLISHED,), include_private: bool = False) -> Tuple[List[int], int]:
+        """按 BM25 相关度搜索文章ID
+
+        Args:
+            query_text: 搜索关键词
+            limit: 返回数量，None 表示全部
+            offset: 偏移量
+            statuses: 允许的文章状态
+            include_private: 是否包含私密文章
+
+        Returns:
+            tuple: (按相关度排序的文章ID列表, 匹配总数)
+        """
+        match = build_match_query(query_text)
+        if not match:
+            return [], 0
+
+        filters = []
+        if statuses:
+            filters.append(Post.status.in_(statuses))
+        if not include_private:
+            filters.append(or_(Post.is_private.is_(False), Post.is_private.is_(None)))
+
+        if not self.enabled:
+            query = Post.query.filter(self._like_condition(query_text), *filters)
+            total = query.count()
+            query = query.order_by(Post.created_at.desc(), Post.id.desc()).offset(offset)
+            if limit is not None:
+                query = query.limit(limit)
+            return [post.id for post in query.with_entities(Post.id)], total
+
+        weights = ', '.join(str(weight) for weight in self.BM25_WEIGHTS)
+        base = (
+            select(Post.id)
+            .join(posts_fts, posts_fts.c.rowid == Post.id)
+            .where(text(f"{self.TABLE_NAME} MATCH :match").bindparams(match=match), *filters)
+        )
+        total = db.session.execute(
+            select(func.count()).select_from(base.subquery())
+        ).scalar() or 0
+
+        stmt = base.order_by(
+            text(f"bm25({self.TABLE_NAME}, {weights})"), Post.created_at.desc()
+        ).offset(offset)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        ids = [row[0] for row in db.session.execute(stmt)]
+        return ids, total
+
+    def search(self, query_text: str, page: int = 1, per_page: int = 10,
+               include_private: bool = False) -> ListPagination:
+        """搜索文章并分页
+
+        Returns:
+            ListPagination: items 为按相关度排序的 Post 对象
+        """
+        page = max(page, 1)
+        try:
+            ids, total = self.search_ids(
+                query_text, limit=per_page, offset=(page - 1) * per_page,
+                include_private=include_private
+            )
+            posts = {post.id: post for post in Post.query.filter(Post.id.in_(ids)).all()} if ids else {}
+            items = [posts[post_id] for post_id in ids if post_id in posts]
+            return ListPagination(page, per_page, total, items)
+        except Exception as e:
+            current_app.logger.error(f"搜索文章失败: {str(e)}")
+            return ListPagination(page, per_page, 0, [])
+
+
+search_service = SearchService()
+
+
+# 建表/删表时同步维护全文索引虚拟表
+@event.listens_for(db.metadata, 'after_create')
+def create_search_table(target, connection, **kw):
+    """create_all 后创建全文索引表"""
+    if search_service._supports_fts(connection):
+        try:
+            search_service.create_table(connection)
+            search_service.enabled = True
+        except Exception:
+            search_service.enabled = False
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def drop_search_table(target, connection, **kw):
+    """drop_all 前删除全文索引表"""
+    if search_service._supports_fts(connection):
+        search_service.drop_table(connection)
+
+
+# 文章变更时在同一事务内同步索引
+@event.listens_for(Post, 'after_insert')
+def index_post_after_insert(mapper, connection, post):
+    """新文章写入索引"""
+    if not search_service.enabled:
+        return
+    try:
+        search_service.index_post(connection, post)
+    except Exception as e:
+        current_app.logger.error(f"写入文章 {post.id} 的全文索引失败: {str(e)}")
+
+
+@event.listens_for(Post, 'after_update')
+def index_post_after_update(mapper, connection, post):
+    """标题、摘要或正文变化时更新索引"""
+    if not search_service.enabled:
+        return
+    state = inspect(post)
+    if not any(state.attrs[name].history.has_changes() for name in ('title', 'summary', 'content')):
+        return
+    try:
+        search_service.index_post(connection, post)
+    except Exception as e:
+        current_app.logger.error(f"更新文章 {post.id} 的全文索引失败: {str(e)}")
+
+
+@event.listens_for(Post, 'after_delete')
+def remove_post_after_delete(mapper, connection, post):
+    """删除文章时移除索引"""
+    if not search_service.enabled:
+        return
+    try:
+        search_service.remove_post(connection, post.id)
+    except Exception as e:
+        current_app.logger.error(f"删除文章 {post.id} 的全文索引失败: {str(e)}")
@@ -14,6 +14,7 @@ from typing import Dict, Any, Union, Tuple, Optional, List
 from werkzeug.utils import secure_filename
 from app.extensions import cache, db
 from app.utils.markdown import markdown_to_html
+from app.utils.sanitizer import sanitizer, SQL_INJECTION_PATTERNS
 
 from bs4 import BeautifulSoup
 from markdown import markdown
@@ -67,28 +68,7 @@ class SecurityService:
         self.PASSWORD_MIN_LENGTH = 8
         self.PASSWORD_PATTERN = re.compile(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{8,}$')
         
-        self.SQL_INJECTION_PATTERNS = [
-            r"(\s+OR\s+|\|\|).+?=.+",
-            r"(\s+AND\s+|&&).+?=.+",
-            r"--",
-            r"#",
-            r"\/\*.*?\*\/",
-            r";\s*$",
-            r"UNION\s+ALL\s+SELECT",
-            r"UNION\s+SELECT",
-            r"INSERT\s+INTO",
-            r"UPDATE\s+.+\s+SET",
-            r"DELETE\s+FROM",
-            r"DROP\s+TABLE",
-            r"DROP\s+DATABASE",
-            r"ALTER\s+TABLE",
-            r"EXEC\s+xp_",
-            r"DECLARE\s+@",
-            r"SELECT\s+@@",
-            r"WAITFOR\s+DELAY",
-            r"BENCHMARK\s*\(",
-            r"SLEEP\s*\("
-        ]
+        self.SQL_INJECTION_PATTERNS = list(SQL_INJECTION_PATTERNS)
 
         self.password_pattern = r'^(?=.*[A-Za-z])(?=.*\d)[A-Za-z\d]{8,}$'
 
@@ -132,6 +112,9 @@ class SecurityService:
     def sanitize_comment(self, content: str) -> str:
         """清理评论内容中的XSS威胁
         
+        去标签、去危险片段、转义和合并空白由共享的预编译清理引擎单遍完成，
+        随后做一次 SQL 注入特征检测。
+        
         Args:
             content: 评论内容
             
@@ -139,55 +122,20 @@ class SecurityService:
             str: 安全的评论内容
         """
         try:
-            current_app.logger.info('开始清理评论内容，长度: %d', len(content) if content else 0)
-            
             if not content:
                 current_app.logger.warning('评论内容为空')
                 return ''
             
-            # 检查内容长度
-            if len(content) > 1000:  # 限制评论长度为1000字符
+            # 限制评论长度为1000字符
+            if len(content) > 1000:
                 current_app.logger.warning('评论内容超过长度限制: %d', len(content))
-                content = content[:1000]
-            
-            # 移除所有HTML标签和JavaScript相关内容
-            clean_text = bleach.clean(content, tags=[], strip=True)
-            
-            # 移除危险的JavaScript关键字和模式
-            dangerous_patterns = {
-                # JavaScript 相关
-                r'(?i)javascript\s*:', r'(?i)\bon\w+\s*=',
-                # 脚本标签
-                r'(?i)<\s*script\b[^>]*>', r'(?i)</\s*script\s*>',
-                # 危险的属性
-                r'(?i)\bdata-[\w\-]*\s*=',
-                # 危险的协议
-                r'(?i)\b(?:javascript|vbscript|expression|data)\s*:',
-                # 危险的函数
-                r'(?i)\b(?:eval|setTimeout|setInterval|Function)\s*\(',
-                # 危险的属性访问
-                r'(?i)\b(?:document\.cookie|window\.location)\b',
-                # iframe 相关
-                r'(?i)<\s*iframe\b[^>]*>', r'(?i)</\s*iframe\s*>'
-            }
-            
-            # 对每个危险模式进行替换
-            for pattern in dangerous_patterns:
-                try:
-                    clean_text = re.sub(pattern, '', clean_text)
-                except Exception as e:
-                    current_app.logger.error(f'清理评论内容时发生错误 (模式: {pattern}): {str(e)}')
-                    continue  # 继续处理下一个模式
-            
-            # 移除连续的空白字符
-            clean_text = ' '.join(clean_text.split())
+            clean_text = sanitizer.clean_comment(content, max_length=1000)
             
             # 检查是否包含SQL注入威胁
             if self.check_sql_injection(clean_text):
                 current_app.logger.warning('发现可能的SQL注入威胁: %s', clean_text)
                 return ''
             
-            current_app.logger.info('评论内容清理完成，最终长度: %d', len(clean_text))
             return clean_text
             
         except Exception as e:
@@ -221,7 +169,7 @@ class SecurityService:
             Any: 清理后的数据
         """
         if isinstance(data, str):
-            return bleach.clean(data, tags=[], strip=True)
+            return sanitizer.strip_tags(data)
         elif isinstance(data, dict):
             return {k: self.sanitize_input(v) for k, v in data.items()}
         elif isinstance(data, list):
@@ -291,29 +239,8 @@ class SecurityService:
         Returns:
             bool: 是否包含SQL注入
         """
-        if not input_str:
-            return False
-            
-        # 在测试环境中，对SQL注入检查更加严格
-        if current_app.config.get('TESTING'):
-            input_str = input_str.lower()
-            # 检查常见的SQL注入模式
-            for pattern in self.SQL_INJECTION_PATTERNS:
-                if re.search(pattern, input_str, re.IGNORECASE):
-                    return True
-            # 检查特殊字符组合
-            special_chars = ["'", '"', '\\', ';', '--', '/*', '*/', '=', ' or ', ' and ']
-            for char in special_chars:
-                if char in input_str.lower():
-                    return True
-            return False
-            
-        input_str = input_str.lower()
-        for pattern in self.SQL_INJECTION_PATTERNS:
-            if re.search(pattern, input_str, re.IGNORECASE):
-                return True
-                
-        return False
+        # 在测试环境中，对SQL注入检查更加严格（额外拦截引号、等号等特殊字符）
+        return sanitizer.has_sql_injection(input_str, strict=current_app.config.get('TESTING', False))
         
     def validate_url(self, url: str) -> bool:
         """验证URL是否有效
@@ -0,0 +1,369 @@
+"""
+文件名：session_store.py
+描述：基于 user_sessions 表的服务端会话（按需写入、粗粒度续期、进程内读缓存）
+作者：denny
+"""
+
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, UTC
+from typing import NamedTuple, Optional
+from flask import current_app, request, has_request_context, session as request_session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from werkzeug.datastructures import CallbackDict
+from app.extensions import db
+from app.models.session import UserSession
+
+
+def _utcnow() -> datetime:
+    """UTC 朴素时间（与 SQLite 中保存的时间一致）"""
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _digest(data: str) -> str:
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+
+
+class SessionRecord(NamedTuple):
+    """会话记录快照（进程内缓存的内容）"""
+    data: str
+    digest: str
+    expiry: datetime
+    user_id: Optional[int]
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+    is_active: bool
+
+    def is_valid(self, ip_address=None, user_agent=None) -> bool:
+        return UserSession.check(self.is_active, self.expiry, self.ip_address, self.user_agent,
+                                 ip_address, user_agent)
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """服务端会话对象，cookie 中只保存会话 ID"""
+
+    def __init__(self, initial=None, sid=None, record=None):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.record = record
+        self.new = record is None
+        self.modified = False
+        self.accessed = False
+
+
+class DatabaseSessionInterface(SessionInterface):
+    """数据库会话接口
+
+    - 只有会话内容变化（按序列化结果比较，嵌套修改也能识别）时才写库；
+      匿名访客不产生会话记录。
+    - 过期时间只在与上次写入相差超过 SESSION_REFRESH_INTERVAL 时续期，
+      不再每个请求都刷新。
+    - cookie 值为签名后的「会话 ID.内容摘要」；进程内缓存按摘要命中，
+      在 SESSION_CACHE_TTL 内不查库，IP/UA 校验直接使用缓存快照。
+    - 过期记录每隔 SESSION_PURGE_EVERY 次写入分批清理，也可用 flask purge-sessions 手动清理。
+    """
+
+    serializer = TaggedJSONSerializer()
+    salt = 'myblog-db-session'
+
+    def __init__(self):
+        self.refresh_interval = timedelta(hours=1)
+        self.cache_ttl = 60
+        self.cache_size = 1024
+        self.purge_every = 1000
+        self.purge_batch_size = 500
+        self.bind_ip = False
+        self.bind_user_agent = True
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def init_app(self, app):
+        """根据应用配置初始化并替换应用的会话接口"""
+        self.refresh_interval = timedelta(seconds=app.config.get('SESSION_REFRESH_INTERVAL', 3600))
+        self.cache_ttl = app.config.get('SESSION_CACHE_TTL', 60)
+        self.cache_size = app.config.get('SESSION_CACHE_SIZE', 1024)
+        self.purge_every = app.config.get('SESSION_PURGE_EVERY', 1000)
+        self.purge_batch_size = app.config.get('SESSION_PURGE_BATCH_SIZE', 500)
+        self.bind_ip = app.config.get('SESSION_BIND_IP', False)
+        self.bind_user_agent = app.config.get('SESSION_BIND_USER_AGENT', True)
+        app.session_interface = self
+        app.extensions['session_store'] = self
+
+    # ---------- 进程内缓存 ----------
+
+    def _cache_get(self, sid: str, digest: str) -> Optional[SessionRecord]:
+        with self._lock:
+            entry = self._cache.get(sid)
+            if entry is None:
+                return None
+            record, cached_at = entry
+            if record.digest != digest or time.monotonic() - cached_at > self.cache_ttl:
+                del self._cache[sid]
+                return None
+            self._cache.move_to_end(sid)
+            return record
+
+    def _cache_put(self, sid: str, record: SessionRecord):
+        with self._lock:
+            self._cache[sid] = (record, time.monotonic())
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_pop(self, sid: str):
+        with self._lock:
+            self._cache.pop(sid, None)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    # ---------- 存取 ----------
+
+    def _signer(self, app) -> Optional[Signer]:
+        if not app.secret_key:
+            return None
+        return Signer(app.secret_key, salt=self.salt, key_derivation='hmac')
+
+    def _load(self, sid: str, digest: str) -> Optional[SessionRecord]:
+        """读取会话快照（缓存命中时不查库）"""
+        record = self._cache_get(sid, digest)
+        if record is not None:
+            return record
+        table = UserSession.__table__
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                db.select(table.c.data, table.c.expiry, table.c.user_id, table.c.ip_address,
+                          table.c.user_agent, table.c.is_active)
+                .where(table.c.session_id == sid)
+            ).first()
+        if row is None:
+            self._cache_pop(sid)
+            return None
+        data = row.data or ''
+        record = SessionRecord(data, _digest(data), UserSession._naive_utc(row.expiry), row.user_id,
+                               row.ip_address, row.user_agent, bool(row.is_active))
+        self._cache_put(sid, record)
+        return record
+
+    def _client(self, request):
+        """参与会话绑定校验的客户端信息"""
+        ip_address = request.remote_addr if self.bind_ip else None
+        user_agent = request.headers.get('User-Agent', '')[:255] if self.bind_user_agent else None
+        return ip_address, user_agent
+
+    def open_session(self, app, request):
+        signer = self._signer(app)
+        if signer is None:
+            return None
+        value = request.cookies.get(self.get_cookie_name(app))
+        if not value:
+            return ServerSession()
+        try:
+            sid, digest = signer.unsign(value).decode('utf-8').split('.', 1)
+        except (BadSignature, UnicodeDecodeError, ValueError):
+            return ServerSession()
+        try:
+            record = self._load(sid, digest)
+            if record is None or not record.is_valid(*self._client(request)):
+                return ServerSession()
+            data = self.serializer.loads(record.data) if record.data else {}
+        except Exception as e:
+            current_app.logger.error(f"读取会话 {sid[:8]} 失败: {str(e)}")
+            return ServerSession()
+        return ServerSession(data, sid=sid, record=record)
+
+    @staticmethod
+    def _user_id(session) -> Optional[int]:
+        try:
+            return int(session['_user_id']) if session.get('_user_id') else None
+        except (TypeError, ValueError):
+            return None
+
+    def _delete(self, sid: str):
+        table = UserSession.__table__
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.session_id == sid))
+        self._cache_pop(sid)
+
+    def _write(self, session, request, data: str, expiry: datetime) -> Optional[SessionRecord]:
+        """写入会话记录
+
+        Returns:
+            SessionRecord: 写入后的快照；会话已被注销时返回 None（不会重新创建）
+        """
+        table = UserSession.__table__
+        now = _utcnow()
+        user_id = self._user_id(session)
+        record = session.record
+        ip_address = record.ip_address if record else request.remote_addr
+        user_agent = record.user_agent if record else request.headers.get('User-Agent', '')[:255]
+
+        # 登录身份变化时更换会话 ID，防止会话固定
+        if record is not None and user_id is not None and record.user_id != user_id:
+            self._delete(session.sid)
+            record = None
+
+        with db.engine.begin() as conn:
+            if record is None:
+                session.sid = secrets.token_urlsafe(32)
+                conn.execute(table.insert().values(
+                    session_id=session.sid, user_id=user_id, data=data, expiry=expiry,
+                    ip_address=ip_address, user_agent=user_agent, is_active=True,
+                    created_at=now, last_active=now
+                ))
+            else:
+                updated = conn.execute(
+                    table.update()
+                    .where(table.c.session_id == session.sid, table.c.is_active == True)  # noqa: E712
+                    .values(data=data, expiry=expiry, user_id=user_id, last_active=now)
+                ).rowcount
+                if not updated:
+                    self._cache_pop(session.sid)
+                    return None
+
+        result = SessionRecord(data, _digest(data), expiry, user_id, ip_address, user_agent, True)
+        self._cache_put(session.sid, result)
+        self._writes += 1
+        if self.purge_every and self._writes % self.purge_every == 0:
+            self.purge_expired()
+        return result
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        # 会话被清空：删除记录和 cookie
+        if not session:
+            if session.record is not None:
+                try:
+                    self._delete(session.sid)
+                except Exception as e:
+                    current_app.logger.error(f"删除会话失败: {str(e)}")
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+                response.vary.add('Cookie')
+            return
+
+        data = self.serializer.dumps(dict(session))
+        expiry = _utcnow() + app.permanent_session_lifetime
+        record = session.record
+        changed = record is None or data != record.data
+        stale = record is not None and expiry - record.expiry >= self.refresh_interval
+        if not changed and not stale:
+            return
+
+        try:
+            record = self._write(session, request, data, expiry)
+        except Exception as e:
+            current_app.logger.error(f"保存会话失败: {str(e)}")
+            return
+        if record is None:
+            # 会话已在其他地方注销，不再写回
+            response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                   samesite=samesite, httponly=httponly)
+            return
+
+        value = self._signer(app).sign(f'{session.sid}.{record.digest}').decode('utf-8')
+        cookie_expires = self.get_expiration_time(app, session)
+        response.set_cookie(name, value, expires=cookie_expires, httponly=httponly, domain=domain,
+                            path=path, secure=secure, samesite=samesite)
+        response.vary.add('Cookie')
+
+    # ---------- 维护 ----------
+
+    def revoke_user(self, user_id: int, except_sid: Optional[str] = None) -> int:
+        """注销用户的全部会话（修改密码、禁用账号提交后自动调用）
+
+        Args:
+            except_sid: 保留的会话ID（用户自己修改密码时保留当前会话）
+
+        Returns:
+            int: 注销的会话数量
+        """
+        table = UserSession.__table__
+        condition = table.c.user_id == user_id
+        if except_sid is not None:
+            condition &= table.c.session_id != except_sid
+        with db.engine.begin() as conn:
+            revoked = conn.execute(table.update().where(condition).values(is_active=False)).rowcount
+        with self._lock:
+            for sid in [sid for sid, (record, _) in self._cache.items()
+                        if record.user_id == user_id and sid != except_sid]:
+                del self._cache[sid]
+        return revoked
+
+    def purge_expired(self) -> int:
+        """分批删除过期和已注销的会话
+
+        Returns:
+            int: 删除的会话数量
+        """
+        try:
+            return UserSession.cleanup_expired(batch_size=self.purge_batch_size)
+        except Exception as e:
+            current_app.logger.error(f"清理过期会话失败: {str(e)}")
+            return 0
+
+
+session_store = DatabaseSessionInterface()
+
+
+@event.listens_for(Session, 'after_flush')
+def track_session_revocations(session, flush_context):
+    """记录本次事务中修改密码或被停用的用户（用户ID -> 是否修改了密码）"""
+    from app.models.user import User
+
+    for obj in session.dirty:
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        password_changed = state.attrs.password_hash.history.has_changes()
+        deactivated = state.attrs.is_active.history.has_changes() and not obj.is_active
+        if password_changed or deactivated:
+            revocations = session.info.setdefault('session_revocations', {})
+            # 停用优先：同一事务中既改密码又停用时注销全部会话
+            revocations[obj.id] = revocations.get(obj.id, True) and not deactivated
+
+
+@event.listens_for(Session, 'after_commit')
+def revoke_sessions_on_commit(session):
+    """事务提交后注销受影响用户的会话；用户在当前请求中修改自己的密码时保留当前会话"""
+    revocations = session.info.pop('session_revocations', None)
+    if not revocations:
+        return
+    current_sid = current_user_id = None
+    if has_request_context() and isinstance(request_session, ServerSession):
+        current_sid = request_session.sid
+        current_user_id = request_session.get('_user_id')
+    for user_id, keep_current in revocations.items():
+        keep = keep_current and current_sid is not None and current_user_id == str(user_id)
+        try:
+            session_store.revoke_user(user_id, except_sid=current_sid if keep else None)
+        except Exception as e:
+            current_app.logger.error(f"注销用户会话失败: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_session_revocations_on_rollback(session):
+    """事务回滚后丢弃记录的变更"""
+    session.info.pop('session_revocations', None)
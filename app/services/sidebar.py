@@ -0,0 +1,133 @@
+"""
+文件名：sidebar.py
+描述：侧边栏统计服务
+作者：denny
+"""
+
+from typing import Dict, Tuple
+from flask import current_app
+from sqlalchemy import func
+from app.extensions import db
+from app.models.post import Post, PostStatus
+from app.models.associations import post_tags
+from app.utils.tagged_cache import tagged_cache, CacheTags
+
+
+class SidebarStatsService:
+    """侧边栏统计服务类
+
+    使用两条分组查询（按分类、按标签）一次性计算所有分类和标签下的文章数量，
+    结果依赖 listing 缓存标签，文章发生增删改时通过 invalidate() 使缓存失效。
+    """
+
+    CACHE_TIMEOUT = 300  # 5分钟缓存过期时间
+
+    # 缓存键
+    CACHE_KEY_DATA = 'sidebar_stats'
+
+    # 默认统计的文章状态
+    VISIBLE_STATUSES = (PostStatus.PUBLISHED, PostStatus.ARCHIVED)
+
+    def invalidate(self):
+        """使侧边栏统计缓存失效（同时失效依赖 listing 标签的文章列表缓存）"""
+        tagged_cache.invalidate(CacheTags.LISTING)
+
+    def _load_stats(self) -> Dict[str, Dict[int, Dict[str, int]]]:
+        """从数据库加载按状态拆分的分类和标签文章数量
+
+        Returns:
+            dict: {'categories': {分类ID: {状态: 数量}}, 'tags': {标签ID: {状态: 数量}}}
+        """
+        categories = {}
+        category_rows = db.session.query(
+            Post.category_id, Post.status, func.count(Post.id)
+        ).filter(
+            Post.category_id.isnot(None)
+        ).group_by(Post.category_id, Post.status).all()
+
+        for category_id, status, count in category_rows:
+            if status is None:
+                continue
+            categories.setdefault(category_id, {})[status.value] = count
+
+        tags = {}
+        tag_rows = db.session.query(
+            post_tags.c.tag_id, Post.status, func.count(Post.id)
+        ).join(
+            Post, Post.id == post_tags.c.post_id
+        ).group_by(post_tags.c.tag_id, Post.status).all()
+
+        for tag_id, status, count in tag_rows:
+            if status is None:
+                continue
+            tags.setdefault(tag_id, {})[status.value] = count
+
+        return {'categories': categories, 'tags': tags}
+
+    def get_stats(self) -> Dict[str, Dict[int, Dict[str, int]]]:
+        """获取按状态拆分的统计数据（优先读取缓存）"""
+        return tagged_cache.get_or_set(
+            self.CACHE_KEY_DATA, self._load_stats,
+            tags=[CacheTags.LISTING], timeout=self.CACHE_TIMEOUT
+        )
+
+    @staticmethod
+    def _sum_statuses(grouped: Dict[int, Dict[str, int]], statuses) -> Dict[int, int]:
+        """按指定状态汇总数量"""
+        values = [status.value for status in statuses]
+        return {
+            key: sum(counts.get(value, 0) for value in values)
+            for key, counts in grouped.items()
+        }
+
+    def get_category_counts(self, include_archived: bool = True) -> Dict[int, int]:
+        """获取每个分类的文章数量
+
+        Args:
+            include_archived: 是否统计已归档的文章
+
+        Returns:
+            dict: {分类ID: 文章数量}
+        """
+        statuses = self.VISIBLE_STATUSES if include_archived else (PostStatus.PUBLISHED,)
+        try:
+            return self._sum_statuses(self.get_stats()['categories'], statuses)
+        except Exception as e:
+            current_app.logger.error(f"获取分类文章数量失败: {str(e)}")
+            return {}
+
+    def get_tag_counts(self, include_archived: bool = True) -> Dict[int, int]:
+        """获取每个标签的文章数量
+
+        Args:
+            include_archived: 是否统计已归档的文章
+
+        Returns:
+            dict: {标签ID: 文章数量}
+        """
+        statuses = self.VISIBLE_STATUSES if include_archived else (PostStatus.PUBLISHED,)
+        try:
+            return self._sum_statuses(self.get_stats()['tags'], statuses)
+        except Exception as e:
+            current_app.logger.error(f"获取标签文章数量失败: {str(e)}")
+            return {}
+
+    def get_post_counts(self, categories, tags, include_archived: bool = True) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """获取侧边栏所需的分类和标签文章数量
+
+        没有文章的分类和标签也会出现在结果中，数量为0。
+
+        Args:
+            categories: 分类列表
+            tags: 标签列表
+            include_archived: 是否统计已归档的文章
+
+        Returns:
+            tuple: (分类文章数量字典, 标签文章数量字典)
+        """
+        category_counts = self.get_category_counts(include_archived)
+        tag_counts = self.get_tag_counts(include_archived)
+        return (
+            {category.id: category_counts.get(category.id, 0) for category in categories},
+            {tag.id: tag_counts.get(tag.id, 0) for tag in tags}
+        )
@@ -10,6 +10,7 @@ from app.extensions import db
 from app.models.tag import Tag
 from app.models.post import Post, PostStatus
 from app.services import get_security_service
+from app.utils.tagged_cache import tagged_cache, CacheTags
 from typing import List, Optional, Dict
 from sqlalchemy import func
 from datetime import datetime, UTC
@@ -49,6 +50,7 @@ class TagService:
             )
             db.session.add(tag)
             db.session.commit()
+            tagged_cache.invalidate(CacheTags.LISTING)
             return {'status': 'success', 'message': '标签创建成功', 'tag': tag}
             
         except Exception as e:
@@ -86,12 +88,11 @@ class TagService:
         current_app.logger.info("TagService: 正在获取所有标签...")
         tags = Tag.query.all()
         
-        # 为每个标签计算已发布文章的数量
+        # 为每个标签设置已发布文章的数量（分组查询，带缓存）
+        from app.services.sidebar import SidebarStatsService
+        tag_counts = SidebarStatsService().get_tag_counts(include_archived=False)
         for tag in tags:
-            tag.post_count = Post.query.filter(
-                Post.tags.any(id=tag.id),
-                Post.status == PostStatus.PUBLISHED
-            ).count()
+            tag.post_count = tag_counts.get(tag.id, 0)
             
         current_app.logger.info(f"TagService: 获取到 {len(tags)} 个标签")
         return tags
@@ -131,6 +132,7 @@ class TagService:
             
             tag.updated_at = datetime.now(UTC)
             db.session.commit()
+            tagged_cache.invalidate(CacheTags.tag(tag_id), CacheTags.LISTING)
             return {'status': 'success', 'message': '标签更新成功', 'tag': tag}
             
         except Exception as e:
@@ -157,6 +159,7 @@ class TagService:
                 
             db.session.delete(tag)
             db.session.commit()
+            tagged_cache.invalidate(CacheTags.tag(tag_id), CacheTags.LISTING)
             return {'status': 'success', 'message': '标签删除成功'}
             
         except Exception as e:
@@ -316,7 +319,9 @@ class TagService:
                 return {'status': 'error', 'message': '不能合并相同的标签'}
                 
             # 将源标签的文章关联到目标标签
+            post_ids = []
             for post in source_tag.posts:
+                post_ids.append(post.id)
                 if target_tag not in post.tags:
                     post.tags.append(target_tag)
                     
@@ -324,6 +329,12 @@ class TagService:
             db.session.delete(source_tag)
             db.session.commit()
             
+            # 两个标签的文章列表、受影响文章的详情以及侧边栏统计均已变化
+            tagged_cache.invalidate(
+                CacheTags.tag(source_id), CacheTags.tag(target_id), CacheTags.LISTING,
+                *(CacheTags.post(post_id) for post_id in post_ids)
+            )
+            
             return {
                 'status': 'success',
                 'message': '标签合并成功',
@@ -0,0 +1,137 @@
+"""
+文件名：upload.py
+描述：上传文件服务（内容寻址存储、去重与引用计数）
+作者：denny
+"""
+
+import mimetypes
+import os
+from typing import Optional, Tuple
+from flask import current_app
+from PIL import Image
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import safe_join
+from app.extensions import db
+from app.models.upload import Upload
+from app.utils.file import store_stream
+from app.utils.pagination import KeysetPagination
+
+
+class UploadService:
+    """上传文件服务
+
+    上传内容边写盘边计算 SHA-256，按哈希分片保存；uploads 表记录哈希、大小、
+    尺寸、MIME 类型和引用计数。重复上传同一内容只增加引用计数，
+    引用归零时才删除文件。后台文件列表直接按表分页，不再扫描目录。
+    """
+
+    MAX_PER_PAGE = 100
+
+    @staticmethod
+    def _folder() -> str:
+        return current_app.config['IMAGE_UPLOAD_FOLDER']
+
+    def full_path(self, path: str) -> Optional[str]:
+        """相对路径对应的磁盘路径（越出上传目录时返回 None）"""
+        return safe_join(self._folder(), path)
+
+    @staticmethod
+    def _extension(filename: str) -> str:
+        ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        return ext if ext.isalnum() else ''
+
+    @staticmethod
+    def _describe(full_path: str, filename: str) -> dict:
+        """读取图片尺寸和 MIME 类型（只解析文件头）"""
+        try:
+            with Image.open(full_path) as img:
+                return {'width': img.width, 'height': img.height,
+                        'mime_type': Image.MIME.get(img.format)}
+        except Exception:
+            return {'width': None, 'height': None,
+                    'mime_type': mimetypes.guess_type(filename)[0]}
+
+    @staticmethod
+    def _add_reference(upload_id: int):
+        db.session.execute(
+            update(Upload).where(Upload.id == upload_id).values(ref_count=Upload.ref_count + 1)
+        )
+        db.session.commit()
+
+    def store(self, file) -> Tuple[Upload, bool]:
+        """保存上传文件，内容已存在时只增加引用计数
+
+        Returns:
+            tuple: (上传记录, 是否为新内容)
+        """
+        folder = self._folder()
+        existing = None
+
+        def known_path(sha256):
+            # 相同内容已登记时沿用其路径，不按本次的扩展名另存一份
+            nonlocal existing
+            existing = Upload.query.filter_by(sha256=sha256).first()
+            return existing.path if existing is not None else None
+
+        sha256, path, size = store_stream(file.stream, folder, self._extension(file.filename),
+                                          known_path=known_path)
+        if existing is not None:
+            self._add_reference(existing.id)
+            return existing, False
+
+        upload = Upload(sha256=sha256, path=path, size=size, original_name=file.filename,
+                        **self._describe(self.full_path(path), file.filename))
+        db.session.add(upload)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # 并发上传了相同内容，改为增加对方记录的引用计数
+            db.session.rollback()
+            existing = Upload.query.filter_by(sha256=sha256).first()
+            if existing.path != path:
+                # 对方以不同扩展名保存，删除本次写入的副本
+                full_path = self.full_path(path)
+                if full_path and os.path.exists(full_path):
+                    os.remove(full_path)
+            self._add_reference(existing.id)
+            return existing, False
+        current_app.logger.info(f"保存上传文件: {path}，大小 {size} 字节")
+        return upload, True
+
+    def release(self, path: str) -> Optional[int]:
+        """释放一次引用，归零时删除记录和文件
+
+        Returns:
+            int: 剩余引用次数，文件不在索引中时返回 None
+        """
+        upload = Upload.query.filter_by(path=path).first()
+        if upload is None:
+            return None
+        if upload.ref_count > 1:
+            remaining = upload.ref_count - 1
+            db.session.execute(
+                update(Upload).where(Upload.id == upload.id).values(ref_count=Upload.ref_count - 1)
+            )
+            db.session.commit()
+            return remaining
+        db.session.delete(upload)
+        db.session.commit()
+        full_path = self.full_path(path)
+        if full_path and os.path.exists(full_path):
+            os.remove(full_path)
+        return 0
+
+    def paginate(self, page: int = 1, per_page: int = 20, cursor: Optional[str] = None,
+                 mime_prefix: Optional[str] = 'image/') -> KeysetPagination:
+        """按上传时间倒序分页（按主键游标，不扫描目录）"""
+        query = Upload.query
+        if mime_prefix:
+            query = query.filter(Upload.mime_type.like(f'{mime_prefix}%'))
+        return KeysetPagination(
+            query, min(max(per_page, 1), self.MAX_PER_PAGE),
+            columns=[Upload.id], key_attrs=['id'], page=page, cursor=cursor
+        )
+
+
+upload_service = UploadService()
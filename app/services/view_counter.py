@@ -0,0 +1,279 @@
+"""
+文件名：view_counter.py
+描述：文章浏览量缓冲计数服务
+作者：denny
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+from typing import Dict
+from flask import current_app
+from sqlalchemy import case, func
+from app.extensions import db
+from app.models.post import Post
+
+
+class MemoryViewBuffer:
+    """进程内浏览量缓冲区（每个 worker 独立）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas = {}
+
+    def add(self, post_id: int, delta: int = 1) -> int:
+        """累加浏览量，返回该文章当前未落库的增量"""
+        with self._lock:
+            value = self._deltas.get(post_id, 0) + delta
+            self._deltas[post_id] = value
+            return value
+
+    def drain(self) -> Dict[int, int]:
+        """取出并清空所有未落库的增量"""
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+            return deltas
+
+    def restore(self, deltas: Dict[int, int]):
+        """落库失败时将增量放回缓冲区"""
+        for post_id, delta in deltas.items():
+            self.add(post_id, delta)
+
+    def pending(self, post_id: int) -> int:
+        """获取单篇文章未落库的增量"""
+        with self._lock:
+            return self._deltas.get(post_id, 0)
+
+    def pending_total(self) -> int:
+        """获取所有未落库增量之和"""
+        with self._lock:
+            return sum(self._deltas.values())
+
+
+class SQLiteViewBuffer:
+    """基于 SQLite WAL 文件的共享浏览量缓冲区（多个 worker 共用）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS view_buffer ('
+            'post_id INTEGER PRIMARY KEY, delta INTEGER NOT NULL)'
+        )
+
+    def _connect(self):
+        """获取当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add(self, post_id: int, delta: int = 1) -> int:
+        """累加浏览量，返回该文章当前未落库的增量"""
+        conn = self._connect()
+        conn.execute(
+            'INSERT INTO view_buffer (post_id, delta) VALUES (?, ?) '
+            'ON CONFLICT(post_id) DO UPDATE SET delta = delta + excluded.delta',
+            (post_id, delta)
+        )
+        return self.pending(post_id)
+
+    def drain(self) -> Dict[int, int]:
+        """取出并清空所有未落库的增量"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            deltas = dict(conn.execute('SELECT post_id, delta FROM view_buffer').fetchall())
+            conn.execute('DELETE FROM view_buffer')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return deltas
+
+    def restore(self, deltas: Dict[int, int]):
+        """落库失败时将增量放回缓冲区"""
+        for post_id, delta in deltas.items():
+            self.add(post_id, delta)
+
+    def pending(self, post_id: int) -> int:
+        """获取单篇文章未落库的增量"""
+        row = self._connect().execute(
+            'SELECT delta FROM view_buffer WHERE post_id = ?', (post_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def pending_total(self) -> int:
+        """获取所有未落库增量之和"""
+        row = self._connect().execute('SELECT COALESCE(SUM(delta), 0) FROM view_buffer').fetchone()
+        return row[0] if row else 0
+
+
+class ViewCounterService:
+    """浏览量计数服务类
+
+    每次访问只在缓冲区中累加，由后台线程每隔 flush_interval 秒，
+    或在访问次数达到阈值时被唤醒，使用一条 UPDATE ... CASE 语句
+    批量写回 posts 表，请求线程不参与落库。
+    """
+
+    # 单条 UPDATE 语句中最多包含的文章数量（SQLite 绑定参数上限为 999）
+    FLUSH_CHUNK_SIZE = 400
+
+    def __init__(self):
+        self.app = None
+        self.buffer = MemoryViewBuffer()
+        self.flush_interval = 30
+        self.flush_threshold = 100
+        self._hits = 0
+        self._hits_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._pid = None
+        self._thread_lock = threading.Lock()
+        self._atexit_registered = False
+
+    def init_app(self, app):
+        """根据应用配置初始化缓冲区并注册退出时的落库钩子"""
+        self.app = app
+        self.flush_interval = app.config.get('VIEW_COUNTER_FLUSH_INTERVAL', 30)
+        self.flush_threshold = app.config.get('VIEW_COUNTER_FLUSH_THRESHOLD', 100)
+
+        if app.config.get('VIEW_COUNTER_BACKEND', 'memory') == 'sqlite':
+            self.buffer = SQLiteViewBuffer(app.config['VIEW_COUNTER_BUFFER_PATH'])
+        else:
+            self.buffer = MemoryViewBuffer()
+
+        app.extensions['view_counter'] = self
+        if not self._atexit_registered:
+            atexit.register(self._flush_on_exit)
+            self._atexit_registered = True
+
+    def _ensure_worker(self):
+        """按需启动后台落库线程（fork 出的子进程中重新启动）"""
+        if self.app is None:
+            return
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='view-counter-flusher',
+                                                daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            with self.app.app_context():
+                self.flush()
+
+    def record(self, post_id: int) -> int:
+        """记录一次浏览
+
+        Args:
+            post_id: 文章ID
+
+        Returns:
+            int: 该文章尚未写入数据库的浏览增量（本次已计入）
+        """
+        pending = self.buffer.add(post_id)
+        with self._hits_lock:
+            self._hits += 1
+            due = self._hits >= self.flush_threshold
+
+        self._ensure_worker()
+        if due:
+            # 只唤醒后台线程，不在请求中落库
+            self._wakeup.set()
+        return pending
+
+    def flush(self) -> int:
+        """将缓冲区中的增量批量写回数据库
+
+        使用独立连接执行，不会提交当前请求会话中的其他修改。
+
+        Returns:
+            int: 更新的文章数量
+        """
+        if not self._flush_lock.acquire(blocking=False):
+            # 其他线程正在落库
+            return 0
+
+        try:
+            with self._hits_lock:
+                self._hits = 0
+            deltas = self.buffer.drain()
+            if not deltas:
+                return 0
+
+            try:
+                posts = Post.__table__
+                items = list(deltas.items())
+                with db.engine.begin() as conn:
+                    for start in range(0, len(items), self.FLUSH_CHUNK_SIZE):
+                        chunk = dict(items[start:start + self.FLUSH_CHUNK_SIZE])
+                        conn.execute(
+                            posts.update()
+                            .where(posts.c.id.in_(list(chunk.keys())))
+                            .values(view_count=func.coalesce(posts.c.view_count, 0) +
+                                    case(chunk, value=posts.c.id, else_=0))
+                        )
+            except Exception as e:
+                self.buffer.restore(deltas)
+                current_app.logger.error(f"浏览量落库失败: {str(e)}")
+                return 0
+
+            current_app.logger.info(f"浏览量落库完成，共更新 {len(deltas)} 篇文章")
+            return len(deltas)
+        finally:
+            self._flush_lock.release()
+
+    def _flush_on_exit(self):
+        """进程退出时停止后台线程并落库，避免丢失计数"""
+        if self.app is None:
+            return
+        try:
+            thread = self._thread
+            if thread is not None and thread.is_alive() and self._pid == os.getpid():
+                self._stopping = True
+                self._wakeup.set()
+                thread.join(5.0)
+            self._thread = None
+            with self.app.app_context():
+                self.flush()
+        except Exception:
+            pass
+
+    def get_pending(self, post_id: int) -> int:
+        """获取单篇文章尚未落库的浏览增量"""
+        try:
+            return self.buffer.pending(post_id)
+        except Exception as e:
+            current_app.logger.error(f"读取文章 {post_id} 的浏览量缓冲失败: {str(e)}")
+            return 0
+
+    def get_pending_total(self) -> int:
+        """获取所有文章尚未落库的浏览增量之和"""
+        try:
+            return self.buffer.pending_total()
+        except Exception as e:
+            current_app.logger.error(f"读取浏览量缓冲失败: {str(e)}")
+            return 0
+
+
+view_counter_service = ViewCounterService()
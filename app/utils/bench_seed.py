@@ -0,0 +1,257 @@
+"""
+文件名：bench_seed.py
+描述：基准测试数据生成（按随机种子确定生成，分块批量插入）
+作者：denny
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, UTC
+from html import escape
+from itertools import accumulate
+from typing import Callable, Dict, Iterable, List, Optional
+from werkzeug.security import generate_password_hash
+from app.extensions import db
+from app.models.associations import post_tags
+from app.models.category import Category
+from app.models.comment import Comment, CommentStatus
+from app.models.post import Post, PostStatus
+from app.models.tag import Tag
+from app.models.user import User
+
+WORDS = (
+    '缓存 索引 查询 事务 连接池 并发 异步 队列 批量 分页 游标 渲染 模板 路由 中间件 会话 '
+    '日志 监控 部署 容器 镜像 编译 测试 覆盖率 重构 接口 协议 序列化 压缩 加密 签名 哈希 '
+    '数据库 迁移 备份 复制 分片 负载 延迟 吞吐 内存 磁盘 网络 线程 进程 协程 调度 锁 '
+    'Flask SQLAlchemy SQLite Python Jinja2 Nginx Docker Redis Git Linux HTTP JSON WebP'
+).split()
+
+TOPICS = (
+    '性能优化', '踩坑记录', '源码阅读', '实践笔记', '入门指南', '故障复盘', '架构设计', '工具推荐',
+    '读书笔记', '版本升级', '最佳实践', '问题排查'
+)
+
+CODE_SNIPPETS = {
+    'python': (
+        'def {name}(items):\n    """{word}"""\n    result = {{}}\n    for item in items:\n'
+        '        result.setdefault(item.key, []).append(item)\n    return result\n',
+        'with db.engine.begin() as conn:\n    rows = conn.execute(select({name})).all()\n'
+        'print(len(rows))\n',
+    ),
+    'javascript': (
+        'async function {name}(url) {{\n  const response = await fetch(url);\n'
+        '  return response.json();\n}}\n',
+    ),
+    'bash': (
+        'export FLASK_APP=run.py\nflask {name} --limit 100\ntail -f logs/myblog.log | grep {word}\n',
+    ),
+    'sql': (
+        'SELECT id, title FROM posts\nWHERE status = \'PUBLISHED\'\nORDER BY created_at DESC\nLIMIT 20; -- {word}\n',
+    ),
+}
+
+
+def zipf_cum_weights(count: int, exponent: float = 1.07) -> List[float]:
+    """按排名的 Zipf 分布累计权重（排名越靠前被选中的概率越高）"""
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+class BenchSeeder:
+    """基准测试数据生成器
+
+    生成用户、分类、标签（按 Zipf 分布使用）、含代码块的 Markdown 文章和
+    多级回复的评论。全部主键预先分配，按块用 executemany 插入，不经过 ORM。
+    正文由一组预先渲染的段落片段组合而成，HTML 与 Markdown 一并写入，
+    生成过程中不再逐篇渲染。同一随机种子生成的内容相同（时间以当天零点为基准）。
+    """
+
+    def __init__(self, seed: int = 42, prefix: str = 'bench-', chunk_size: int = 2000,
+                 fragment_count: int = 200, progress: Optional[Callable[[str, int], None]] = None):
+        self.seed = seed
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.fragment_count = fragment_count
+        self.progress = progress
+        self.rng = random.Random(seed)
+        self.anchor = datetime.now(UTC).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+
+    # ---------- 文本 ----------
+
+    def _sentence(self, words: int = 12) -> str:
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words)) + '。'
+
+    def _paragraph(self, sentences: int = 3) -> str:
+        return ''.join(self._sentence(self.rng.randint(8, 16)) for _ in range(sentences))
+
+    def _fragment_source(self, index: int) -> str:
+        language = self.rng.choice(sorted(CODE_SNIPPETS))
+        code = self.rng.choice(CODE_SNIPPETS[language]).format(
+            name=f'task_{index}', word=self.rng.choice(WORDS))
+        items = '\n'.join(f'- {self._sentence(6)}' for _ in range(self.rng.randint(2, 4)))
+        return (f'## {self.rng.choice(WORDS)}{self.rng.choice(TOPICS)} {index}\n\n'
+                f'{self._paragraph()}\n\n{items}\n\n```{language}\n{code}```\n\n{self._paragraph(2)}\n')
+
+    def _build_fragments(self) -> List[tuple]:
+        """预先渲染正文片段：[(markdown, html, toc)]"""
+        from app.services.markdown_render import markdown_render_service
+        fragments = []
+        for index in range(self.fragment_count):
+            source = self._fragment_source(index)
+            result = markdown_render_service.render(source)
+            fragments.append((source, result.html, result.toc))
+        return fragments
+
+    # ---------- 写入 ----------
+
+    @staticmethod
+    def _next_id(conn, table) -> int:
+        return (conn.execute(db.select(db.func.max(table.c.id))).scalar() or 0) + 1
+
+    def _insert(self, conn, table, rows: Iterable[dict], label: str) -> int:
+        total, chunk = 0, []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                conn.execute(table.insert(), chunk)
+                total += len(chunk)
+                chunk = []
+                if self.progress:
+                    self.progress(label, total)
+        if chunk:
+            conn.execute(table.insert(), chunk)
+            total += len(chunk)
+        if self.progress:
+            self.progress(label, total)
+        return total
+
+    def _zipf_sample(self, population: List[int], cum_weights: List[float], count: int) -> List[int]:
+        """按权重不重复抽样"""
+        count = min(count, len(population))
+        chosen = []
+        while len(chosen) < count:
+            value = self.rng.choices(population, cum_weights=cum_weights)[0]
+            if value not in chosen:
+                chosen.append(value)
+        return chosen
+
+    def seed_all(self, posts: int, comments: int, tags: int, users: int,
+                 categories: int = 30) -> Dict[str, List[int]]:
+        """生成全部数据（单个事务）
+
+        Returns:
+            dict: {'users', 'categories', 'tags', 'posts', 'comments'} -> 主键列表
+        """
+        rng = self.rng
+        fragments = self._build_fragments() if posts else []
+        password_hash = generate_password_hash('password123')
+
+        with db.engine.begin() as conn:
+            user_table, category_table, tag_table = User.__table__, Category.__table__, Tag.__table__
+            post_table, comment_table = Post.__table__, Comment.__table__
+
+            # 用户、分类、标签
+            first = self._next_id(conn, user_table)
+            user_ids = list(range(first, first + users))
+            self._insert(conn, user_table, ({
+                'id': user_id, 'username': f'{self.prefix}user-{n:06d}',
+                'email': f'{self.prefix}user-{n:06d}@example.com', 'password_hash': password_hash,
+                'nickname': f'读者{n}', 'bio': '', 'is_active': True, 'is_admin_user': False,
+                'created_at': self.anchor - timedelta(days=rng.randint(30, 2000)),
+                'updated_at': self.anchor
+            } for n, user_id in enumerate(user_ids)), 'users')
+
+            first = self._next_id(conn, category_table)
+            category_ids = list(range(first, first + categories))
+            self._insert(conn, category_table, ({
+                'id': category_id, 'name': f'{self.prefix}{TOPICS[n % len(TOPICS)]}-{n}',
+                'slug': f'{self.prefix}category-{n}', 'created_at': self.anchor, 'updated_at': self.anchor
+            } for n, category_id in enumerate(category_ids)), 'categories')
+
+            first = self._next_id(conn, tag_table)
+            tag_ids = list(range(first, first + tags))
+            self._insert(conn, tag_table, ({
+                'id': tag_id, 'name': f'{self.prefix}{WORDS[n % len(WORDS)]}-{n}',
+                'slug': f'{self.prefix}tag-{n}', 'created_at': self.anchor, 'updated_at': self.anchor
+            } for n, tag_id in enumerate(tag_ids)), 'tags')
+
+            # 文章：时间从新到旧均匀分布在约五年内
+            first = self._next_id(conn, post_table)
+            post_ids = list(range(first, first + posts))
+            span = timedelta(days=5 * 365)
+            created = [self.anchor - span * n / max(posts, 1) - timedelta(minutes=rng.randint(0, 600))
+                       for n in range(posts)]
+            views = [int(rng.lognormvariate(5, 1.2)) for _ in range(posts)]
+            statuses = rng.choices([PostStatus.PUBLISHED, PostStatus.DRAFT, PostStatus.ARCHIVED],
+                                   weights=[90, 7, 3], k=posts)
+            author_weights = zipf_cum_weights(len(user_ids)) if user_ids else []
+
+            # 评论按浏览量加权分配到已发布文章
+            published = [n for n in range(posts) if statuses[n] != PostStatus.DRAFT]
+            comment_posts = rng.choices(published, weights=[views[n] + 1 for n in published],
+                                        k=comments) if published else []
+            per_post = {}
+            for n in comment_posts:
+                per_post[n] = per_post.get(n, 0) + 1
+
+            def post_rows():
+                for n, post_id in enumerate(post_ids):
+                    intro = self._paragraph(2)
+                    parts = rng.sample(fragments, rng.randint(2, 4))
+                    toc = [entry for part in parts for entry in (part[2] or [])]
+                    yield {
+                        'id': post_id, 'title': f'{self.prefix}{n:06d} {rng.choice(WORDS)}{rng.choice(TOPICS)}',
+                        'content': intro + '\n\n' + '\n'.join(part[0] for part in parts),
+                        'html_content': f'<p>{escape(intro)}</p>\n' + '\n'.join(part[1] for part in parts),
+                        'toc': json.dumps(toc, ensure_ascii=False), 'summary': intro[:200],
+                        'category_id': rng.choice(category_ids) if category_ids else None,
+                        'author_id': (rng.choices(user_ids, cum_weights=author_weights)[0]
+                                      if user_ids else None),
+                        'status': statuses[n], 'is_sticky': n < 3, 'view_count': views[n],
+                        'comments_count': per_post.get(n, 0), 'created_at': created[n],
+                        'updated_at': created[n] + timedelta(days=rng.randint(0, 30)),
+                        'is_private': False, 'published': statuses[n] != PostStatus.DRAFT,
+                        'can_comment': True
+                    }
+
+            self._insert(conn, post_table, post_rows(), 'posts')
+
+            # 文章标签：每篇 1~5 个，标签使用频率服从 Zipf 分布
+            tag_weights = zipf_cum_weights(len(tag_ids)) if tag_ids else []
+            self._insert(conn, post_tags, (
+                {'post_id': post_id, 'tag_id': tag_id}
+                for post_id in post_ids
+                for tag_id in (self._zipf_sample(tag_ids, tag_weights, rng.randint(1, 5)) if tag_ids else [])
+            ), 'post_tags')
+
+            # 评论：同一文章内约三分之一回复之前的评论，形成多级讨论
+            first = self._next_id(conn, comment_table)
+            comment_ids = list(range(first, first + comments))
+            statuses_comment = (int(CommentStatus.APPROVED), int(CommentStatus.PENDING),
+                                int(CommentStatus.REJECTED))
+
+            def comment_rows():
+                next_id = first
+                for n in sorted(per_post):
+                    thread = []
+                    for position in range(per_post[n]):
+                        text = self._sentence(rng.randint(6, 20))
+                        registered = bool(user_ids) and rng.random() < 0.6
+                        yield {
+                            'id': next_id, 'post_id': post_ids[n], 'content': text,
+                            'html_content': f'<p>{escape(text)}</p>',
+                            'parent_id': rng.choice(thread) if thread and rng.random() < 0.35 else None,
+                            'author_id': (rng.choices(user_ids, cum_weights=author_weights)[0]
+                                          if registered else None),
+                            'nickname': None if registered else f'访客{rng.randint(1, 9999)}',
+                            'email': None if registered else f'guest{rng.randint(1, 9999)}@example.com',
+                            'status': rng.choices(statuses_comment, weights=[92, 5, 3])[0],
+                            'created_at': created[n] + timedelta(minutes=30 * (position + 1)),
+                            'updated_at': created[n] + timedelta(minutes=30 * (position + 1))
+                        }
+                        thread.append(next_id)
+                        next_id += 1
+
+            self._insert(conn, comment_table, comment_rows(), 'comments')
+
+        return {'users': user_ids, 'categories': category_ids, 'tags': tag_ids,
+                'posts': post_ids, 'comments': comment_ids}
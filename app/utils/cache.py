@@ -1,63 +1,276 @@
 """
 文件名：cache.py
-描述：缓存工具模块
+描述：缓存工具模块（有界、线程安全的进程内缓存）
 作者：denny
 """
 
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
-from flask import current_app
-from datetime import datetime, timedelta
+from flask_caching.backends.base import BaseCache
+
+# 区分“未命中”和“缓存值为 None”
+_MISSING = object()
+
+
+def _stable_repr(value):
+    """生成与进程无关的参数表示，用于构造缓存键
+
+    基本类型和容器递归展开（字典和集合排序），带 id 属性的对象（如模型）
+    使用“类名:id”，避免默认 repr 中的内存地址导致同一参数生成不同的键。
+    """
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        items = ','.join(_stable_repr(item) for item in value)
+        return f'[{items}]' if isinstance(value, list) else f'({items})'
+    if isinstance(value, dict):
+        items = ','.join(f'{_stable_repr(k)}:{_stable_repr(v)}'
+                         for k, v in sorted(value.items(), key=lambda item: repr(item[0])))
+        return '{' + items + '}'
+    if isinstance(value, (set, frozenset)):
+        return '{' + ','.join(sorted(_stable_repr(item) for item in value)) + '}'
+    if hasattr(value, 'id'):
+        return f'{type(value).__name__}:{value.id}'
+    return repr(value)
+
+
+def make_key(func, args, kwargs):
+    """根据函数和参数生成稳定的缓存键"""
+    payload = f'{_stable_repr(args)}|{_stable_repr(kwargs)}'
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+    return f'{func.__module__}.{func.__qualname__}:{digest}'
+
 
 class Cache:
-    def __init__(self):
-        self._cache = {}
-        self._expires = {}
+    """有界、线程安全的进程内缓存
 
-    def get(self, key):
+    - 按 LRU 淘汰，条目数不超过 max_entries
+    - 过期条目在读取时删除，并按 sweep_interval 定期整体清理（摊还到写操作中）
+    - get_or_set 使用按键加锁，避免缓存失效瞬间的并发重复计算
+    - 记录命中、未命中、淘汰和过期次数
+    """
+
+    def __init__(self, max_entries=1024, default_timeout=None, sweep_interval=60):
+        self.max_entries = max_entries
+        self.default_timeout = default_timeout
+        self.sweep_interval = sweep_interval
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.RLock()
+        self._key_locks = {}  # key -> [lock, 引用计数]
+        self._last_sweep = time.monotonic()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _expires_at(self, timeout):
+        """计算过期时间，None 使用默认超时，0 或负数表示永不过期"""
+        if timeout is None:
+            timeout = self.default_timeout
+        if not timeout or timeout <= 0:
+            return None
+        return time.monotonic() + timeout
+
+    def _lookup(self, key):
+        """查找缓存值（调用方需持有锁），未命中返回 _MISSING"""
+        entry = self._data.get(key)
+        if entry is None:
+            self._misses += 1
+            return _MISSING
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self._expirations += 1
+            self._misses += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def _sweep(self, now):
+        """清理所有过期条目（调用方需持有锁）"""
+        expired = [key for key, (_, expires_at) in self._data.items()
+                   if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        self._expirations += len(expired)
+        self._last_sweep = now
+
+    def get(self, key, default=None):
         """获取缓存值"""
-        if key in self._cache:
-            # 检查是否过期
-            if key in self._expires and datetime.now() > self._expires[key]:
-                self.delete(key)
-                return None
-            return self._cache[key]
-        return None
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def has(self, key):
+        """判断缓存是否存在且未过期（不计入命中统计）"""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.monotonic())
 
     def set(self, key, value, timeout=None):
         """设置缓存值"""
-        self._cache[key] = value
-        if timeout:
-            self._expires[key] = datetime.now() + timedelta(seconds=timeout)
+        expires_at = self._expires_at(timeout)
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def add(self, key, value, timeout=None):
+        """仅当键不存在时设置缓存值"""
+        with self._lock:
+            if self.has(key):
+                return False
+            self.set(key, value, timeout)
+            return True
 
     def delete(self, key):
         """删除缓存值"""
-        self._cache.pop(key, None)
-        self._expires.pop(key, None)
+        with self._lock:
+            return self._data.pop(key, None) is not None
 
     def clear(self):
         """清空缓存"""
-        self._cache.clear()
-        self._expires.clear()
+        with self._lock:
+            self._data.clear()
+
+    def inc(self, key, delta=1):
+        """原子地增加整数缓存值"""
+        with self._lock:
+            value = self._lookup(key)
+            value = (0 if value is _MISSING else value) + delta
+            expires_at = self._data[key][1] if key in self._data else self._expires_at(None)
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            return value
+
+    def _acquire_key_lock(self, key):
+        with self._lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        entry[0].acquire()
+
+    def _release_key_lock(self, key):
+        with self._lock:
+            entry = self._key_locks[key]
+            entry[0].release()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._key_locks[key]
+
+    def get_or_set(self, key, func, timeout=None):
+        """获取缓存值，未命中时调用 func 计算并写入
+
+        同一个键同时只有一个线程执行 func，其余线程等待后直接读取结果。
+        """
+        with self._lock:
+            value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        self._acquire_key_lock(key)
+        try:
+            with self._lock:
+                entry = self._data.get(key)
+                if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                    return entry[0]
+            value = func()
+            self.set(key, value, timeout)
+            return value
+        finally:
+            self._release_key_lock(key)
+
+    def stats(self):
+        """缓存统计信息"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._data),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0
+            }
 
     def cached(self, timeout=300):
         """缓存装饰器"""
         def decorator(f):
             @wraps(f)
             def decorated_function(*args, **kwargs):
-                # 生成缓存键
-                cache_key = f"{f.__name__}:{str(args)}:{str(kwargs)}"
-                
-                # 尝试从缓存获取
-                result = self.get(cache_key)
-                if result is not None:
-                    return result
-                
-                # 执行函数并缓存结果
-                result = f(*args, **kwargs)
-                self.set(cache_key, result, timeout)
-                return result
+                # 生成稳定的缓存键，未命中时按键加锁计算
+                cache_key = make_key(f, args, kwargs)
+                return self.get_or_set(cache_key, lambda: f(*args, **kwargs), timeout)
             return decorated_function
         return decorator
 
+
+class BoundedCache(BaseCache):
+    """Flask-Caching 后端：基于有界 Cache 实现
+
+    在配置中设置 CACHE_TYPE = 'app.utils.cache.BoundedCache' 启用，
+    与 SimpleCache 一样存储值的序列化副本，调用方修改返回值不会影响缓存。
+    """
+
+    def __init__(self, default_timeout=300, threshold=1024, sweep_interval=60):
+        super().__init__(default_timeout)
+        self._store = Cache(max_entries=threshold, default_timeout=default_timeout,
+                            sweep_interval=sweep_interval)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(dict(
+            threshold=config.get('CACHE_THRESHOLD', 1024),
+            sweep_interval=config.get('CACHE_SWEEP_INTERVAL', 60)
+        ))
+        return cls(*args, **kwargs)
+
+    def _timeout(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return timeout if timeout > 0 else 0
+
+    def get(self, key):
+        value = self._store.get(key, _MISSING)
+        if value is _MISSING:
+            return None
+        try:
+            return pickle.loads(value)
+        except Exception:
+            return None
+
+    def set(self, key, value, timeout=None):
+        self._store.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._timeout(timeout))
+        return True
+
+    def add(self, key, value, timeout=None):
+        return self._store.add(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._timeout(timeout))
+
+    def delete(self, key):
+        return self._store.delete(key)
+
+    def has(self, key):
+        return self._store.has(key)
+
+    def clear(self):
+        self._store.clear()
+        return True
+
+    def stats(self):
+        """缓存统计信息（供管理后台展示）"""
+        return self._store.stats()
+
+
 # 创建全局缓存实例
-cache = Cache() 
\ No newline at end of file
+cache = Cache()
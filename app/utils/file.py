@@ -4,12 +4,9 @@
 作者：denny
 """
 
+import hashlib
 import os
-import datetime
-import random
-import string
-from werkzeug.utils import secure_filename
-from flask import current_app
+import tempfile
 
 # 允许的文件扩展名
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
@@ -19,34 +16,51 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def save_file(file):
-    """保存上传的文件并返回保存后的文件名"""
-    # 确保文件名安全
-    filename = secure_filename(file.filename)
-    
-    # 创建带时间戳的唯一文件名
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    random_string = ''.join(random.choices(string.hexdigits, k=16))
-    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-    new_filename = f"{timestamp}_{random_string}.{ext}"
-    
-    # 确保目标目录存在
-    upload_dir = os.path.join(current_app.root_path, 'static', 'uploads', 'images')
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # 设置文件路径并保存
-    file_path = os.path.join(upload_dir, new_filename)
-    
-    # 记录保存路径
-    current_app.logger.info(f"保存文件到: {file_path}")
-    
-    # 保存文件
-    file.save(file_path)
-    
-    # 设置文件权限
+def store_stream(stream, folder, ext, chunk_size=64 * 1024, known_path=None):
+    """边读边计算 SHA-256，把上传内容保存到按哈希分片的路径
+
+    内容先流式写入同目录下的临时文件，不整体读入内存。哈希确定后，内容已登记
+    （known_path 返回已有路径，扩展名可能不同）时沿用该路径；否则原子地移动到
+    ab/cd/<哈希>.<扩展名>。目标文件已存在时丢弃临时文件，同一内容只保存一份。
+
+    Args:
+        stream: 可读的二进制流
+        folder: 上传根目录
+        ext: 扩展名（不含点）
+        chunk_size: 每次读取的字节数
+        known_path: 可选，按哈希返回已登记文件的相对路径（未登记时返回 None）
+
+    Returns:
+        tuple: (SHA-256 十六进制摘要, 相对路径, 字节数)
+    """
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.part')
     try:
-        os.chmod(file_path, 0o666)  # rw-rw-rw-
-    except Exception as e:
-        current_app.logger.warning(f"无法设置文件权限: {str(e)}")
-    
-    return new_filename 
\ No newline at end of file
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        relative_path = known_path(sha256) if known_path else None
+        if relative_path is None:
+            relative_path = f"{sha256[:2]}/{sha256[2:4]}/{sha256}{'.' + ext if ext else ''}"
+        final_path = os.path.join(folder, *relative_path.split('/'))
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+        return sha256, relative_path, size
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def save_file(file):
+    """保存上传的文件（按内容哈希去重）并返回相对上传目录的路径"""
+    from app.services.upload import upload_service
+    upload, _ = upload_service.store(file)
+    return upload.path
@@ -103,4 +103,10 @@ def init_filters(app):
     @app.template_filter('time')
     def time_filter(value, format='%H:%M:%S'):
         """时间过滤器"""
-        return format_time(value, format) 
\ No newline at end of file
+        return format_time(value, format) 
+        
+    @app.template_filter('responsive_images')
+    def responsive_images_filter(html):
+        """为文章 HTML 中的上传图片补充响应式变体（srcset/width/height）"""
+        from app.services.image_processing import image_processing_service
+        return image_processing_service.responsive_html(html)
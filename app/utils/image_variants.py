@@ -0,0 +1,92 @@
+"""
+文件名：image_variants.py
+描述：响应式图片变体生成（在后台进程池中执行，不依赖应用上下文）
+作者：denny
+"""
+
+import os
+import re
+from typing import Iterable, Tuple
+from PIL import Image, ImageOps
+
+# EXIF 方向值为这些值时图片需要旋转 90 度，宽高互换
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+_EXIF_ORIENTATION = 274
+
+# 生成的变体和缩略图文件名
+_VARIANT_NAME_RE = re.compile(r'-(?:\d+w\.(?:webp|jpg)|thumb\.jpg)$')
+
+
+def is_variant(filename: str) -> bool:
+    """是否为生成的变体或缩略图文件"""
+    return _VARIANT_NAME_RE.search(filename) is not None
+
+
+def _has_alpha(img) -> bool:
+    return img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+
+
+def _flatten(img):
+    """JPEG 不支持透明通道，合成到白色背景上"""
+    if img.mode == 'RGB':
+        return img
+    rgba = img.convert('RGBA')
+    background = Image.new('RGB', rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel('A'))
+    return background
+
+
+def generate_variants(source_path: str, output_dir: str, widths: Iterable[int],
+                      quality: int = 85, thumbnail_size: Tuple[int, int] = (300, 300)) -> dict:
+    """生成各宽度的 WebP/JPEG 变体和缩略图
+
+    从最大宽度开始逐级缩小，每一级都基于上一级结果缩放，
+    JPEG 原图解码时直接按目标尺寸降采样（draft），大图不必完整解码。
+
+    Args:
+        source_path: 原图路径
+        output_dir: 变体输出目录
+        widths: 目标宽度（超过原图宽度的会被忽略，至少生成一个不放大的变体）
+        quality: 压缩质量
+        thumbnail_size: 缩略图尺寸
+
+    Returns:
+        dict: {'width', 'height', 'variants': [{'width', 'height', 'format', 'filename'}], 'thumbnail'}
+    """
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    with Image.open(source_path) as img:
+        width, height = img.size
+        if img.getexif().get(_EXIF_ORIENTATION) in _TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        result = {'width': width, 'height': height, 'variants': [], 'thumbnail': None}
+        if getattr(img, 'is_animated', False):
+            # 动图保持原样
+            return result
+
+        largest = min(width, max(widths))
+        targets = sorted({w for w in widths if w < width} | {largest}, reverse=True)
+        scale = largest / width
+        img.draft('RGB', (max(1, round(img.size[0] * scale)), max(1, round(img.size[1] * scale))))
+        current = ImageOps.exif_transpose(img)
+        alpha = _has_alpha(current)
+        current = current.convert('RGBA' if alpha else 'RGB')
+
+        for target in targets:
+            size = (target, max(1, round(height * target / width)))
+            if current.size != size:
+                current = current.resize(size, Image.Resampling.LANCZOS)
+            for fmt, ext in (('WEBP', 'webp'), ('JPEG', 'jpg')):
+                filename = f'{stem}-{target}w.{ext}'
+                output = current if fmt == 'WEBP' else _flatten(current)
+                options = {'method': 4} if fmt == 'WEBP' else {'optimize': True, 'progressive': True}
+                output.save(os.path.join(output_dir, filename), format=fmt, quality=quality, **options)
+                result['variants'].append({
+                    'width': size[0], 'height': size[1], 'format': ext, 'filename': filename
+                })
+
+        # 最小的变体已足够生成缩略图
+        thumbnail = ImageOps.fit(_flatten(current), thumbnail_size, Image.Resampling.LANCZOS)
+        result['thumbnail'] = f'{stem}-thumb.jpg'
+        thumbnail.save(os.path.join(output_dir, result['thumbnail']), format='JPEG',
+                       quality=quality, optimize=True)
+    return result
@@ -4,7 +4,16 @@
 作者：denny
 """
 
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime
 from math import ceil
+from flask import current_app
+from sqlalchemy import Select, and_, func, or_, select
+from app.extensions import db
+from app.utils.tagged_cache import tagged_cache
 
 class Pagination:
     def __init__(self, query, page, per_page):
@@ -41,4 +50,228 @@ class Pagination:
                 if last + 1 != num:
                     yield None
                 yield num
-                last = num 
\ No newline at end of file
+                last = num 
+
+class InvalidCursor(ValueError):
+    """续页令牌无效（格式错误或签名不匹配）"""
+
+
+def _cursor_signature(payload: bytes) -> bytes:
+    secret = str(current_app.config.get('SECRET_KEY') or '').encode('utf-8')
+    return hmac.new(secret, payload, hashlib.sha256).digest()[:8]
+
+
+def encode_cursor(values) -> str:
+    """将排序键编码为不透明的续页令牌（带签名，防止伪造）"""
+    packed = []
+    for value in values:
+        if isinstance(value, datetime):
+            packed.append({'dt': value.isoformat()})
+        elif isinstance(value, bool):
+            packed.append(int(value))
+        else:
+            packed.append(value)
+    payload = json.dumps(packed, separators=(',', ':')).encode('utf-8')
+    token = payload + _cursor_signature(payload)
+    return base64.urlsafe_b64encode(token).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> list:
+    """解析续页令牌
+
+    Raises:
+        InvalidCursor: 令牌格式错误或签名不匹配
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload, signature = raw[:-8], raw[-8:]
+        if not hmac.compare_digest(signature, _cursor_signature(payload)):
+            raise InvalidCursor('续页令牌签名无效')
+        values = json.loads(payload.decode('utf-8'))
+    except InvalidCursor:
+        raise
+    except Exception:
+        raise InvalidCursor('续页令牌格式错误')
+    if not isinstance(values, list):
+        raise InvalidCursor('续页令牌格式错误')
+    return [datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+            for value in values]
+
+
+def _keyset_condition(columns, values, descending=True):
+    """排序键位于 values 之后（倒序）或之前（descending=False）的条件"""
+    clauses = []
+    for index, column in enumerate(columns):
+        prefix = [columns[i] == values[i] for i in range(index)]
+        compare = column < values[index] if descending else column > values[index]
+        clauses.append(and_(*prefix, compare))
+    return or_(*clauses)
+
+
+class KeysetPagination:
+    """基于排序键（游标）的分页
+
+    按 columns 全部倒序排列，下一页使用“排序键小于上一页最后一行”的条件查询，
+    不使用 OFFSET，深翻页的代价与第一页相同。接口与模板中使用的页码分页对象兼容：
+
+    - 游标模式：传入 cursor（向后翻）或 before（向前翻）令牌
+    - 页码模式：传入 page，页码到游标的映射缓存在 cache_key 下，
+      顺序翻页时每页的游标都来自上一页；跳页时从最近的已知页码起偏移
+    - 总数单独查询并缓存，只在访问 total/pages 时计算
+    """
+
+    CURSOR_MAP_KEY = 'keyset_cursors:{}:{}'
+    COUNT_KEY = 'keyset_count:{}'
+
+    def __init__(self, query, per_page, columns, key_attrs, page=None, cursor=None,
+                 before=None, cache_key=None, cache_tags=(), cache_timeout=300):
+        """
+        Args:
+            query: ORM Query 或 select() 语句（不含排序和分页）
+            per_page: 每页数量
+            columns: 排序列（全部倒序，最后一列须唯一，如主键）
+            key_attrs: 结果行上与排序列对应的属性名
+            page: 页码（页码模式）
+            cursor: 向后翻页令牌
+            before: 向前翻页令牌
+            cache_key: 缓存总数和页码游标映射使用的键，None 表示不缓存
+            cache_tags: 缓存依赖标签
+            cache_timeout: 缓存过期时间（秒）
+        """
+        self.query = query
+        self.per_page = per_page
+        self.columns = list(columns)
+        self.key_attrs = list(key_attrs)
+        self.cache_key = cache_key
+        self.cache_tags = list(cache_tags)
+        self.cache_timeout = cache_timeout
+        self._total = None
+
+        if before:
+            self.page = None
+            self._fetch_before(decode_cursor(before))
+        elif cursor:
+            self.page = None
+            self._fetch_after(decode_cursor(cursor))
+            self.has_prev = True
+        else:
+            self.page = max(page or 1, 1)
+            self._fetch_page()
+
+    # ---------- 查询 ----------
+
+    def _execute(self, condition, descending, limit, offset=0):
+        stmt = self.query
+        if condition is not None:
+            stmt = stmt.filter(condition)
+        order = [column.desc() if descending else column.asc() for column in self.columns]
+        stmt = stmt.order_by(*order).limit(limit)
+        if offset:
+            stmt = stmt.offset(offset)
+        if isinstance(stmt, Select):
+            return db.session.execute(stmt).all()
+        return stmt.all()
+
+    def _row_key(self, row):
+        return [getattr(row, attr) for attr in self.key_attrs]
+
+    def _fetch_after(self, values, offset=0):
+        condition = _keyset_condition(self.columns, values) if values else None
+        rows = self._execute(condition, True, self.per_page + 1, offset)
+        self.items = rows[:self.per_page]
+        self.has_next = len(rows) > self.per_page
+
+    def _fetch_before(self, values):
+        rows = self._execute(_keyset_condition(self.columns, values, descending=False),
+                             False, self.per_page + 1)
+        self.has_prev = len(rows) > self.per_page
+        self.items = list(reversed(rows[:self.per_page]))
+        self.has_next = True
+
+    def _cursor_map_key(self):
+        return self.CURSOR_MAP_KEY.format(self.cache_key, self.per_page)
+
+    def _fetch_page(self):
+        cursors = tagged_cache.get(self._cursor_map_key(), {}) if self.cache_key else {}
+        cursors = cursors or {}
+        generations = tagged_cache.snapshot(self.cache_tags) if self.cache_key else None
+
+        # 从不超过目标页的最近已知页码开始（第 1 页的游标恒为空）
+        start = max((known for known in cursors if known <= self.page), default=1)
+        token = cursors.get(start)
+        self._fetch_after(decode_cursor(token) if token else None,
+                          offset=(self.page - start) * self.per_page)
+        self.has_prev = self.page > 1
+
+        if self.cache_key and self.has_next and self.items and self.page + 1 not in cursors:
+            cursors = dict(cursors)
+            cursors[self.page + 1] = encode_cursor(self._row_key(self.items[-1]))
+            tagged_cache.set(self._cursor_map_key(), cursors, tags=self.cache_tags,
+                             timeout=self.cache_timeout, generations=generations)
+
+    # ---------- 游标 ----------
+
+    @property
+    def next_cursor(self):
+        """下一页令牌"""
+        if not self.has_next or not self.items:
+            return None
+        return encode_cursor(self._row_key(self.items[-1]))
+
+    @property
+    def prev_cursor(self):
+        """上一页令牌"""
+        if not self.has_prev or not self.items:
+            return None
+        return encode_cursor(self._row_key(self.items[0]))
+
+    # ---------- 总数与页码 ----------
+
+    def _count(self):
+        if isinstance(self.query, Select):
+            stmt = select(func.count()).select_from(self.query.order_by(None).subquery())
+            return db.session.execute(stmt).scalar() or 0
+        return self.query.order_by(None).count()
+
+    @property
+    def total(self):
+        """总数（单独缓存）"""
+        if self._total is None:
+            if self.cache_key:
+                self._total = tagged_cache.get_or_set(
+                    self.COUNT_KEY.format(self.cache_key), self._count,
+                    tags=self.cache_tags, timeout=self.cache_timeout
+                )
+            else:
+                self._total = self._count()
+        return self._total
+
+    @property
+    def pages(self):
+        """总页数"""
+        if self.per_page == 0 or self.total == 0:
+            return 0
+        return int(ceil(self.total / float(self.per_page)))
+
+    @property
+    def prev_num(self):
+        """上一页页码"""
+        return self.page - 1 if self.page and self.has_prev else None
+
+    @property
+    def next_num(self):
+        """下一页页码"""
+        return self.page + 1 if self.page and self.has_next else None
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=5, right_edge=2):
+        """生成分页序号"""
+        current = self.page or 1
+        last = 0
+        for num in range(1, self.pages + 1):
+            if num <= left_edge or \
+               (num > current - left_current - 1 and num < current + right_current) or \
+               num > self.pages - right_edge:
+                if last + 1 != num:
+                    yield None
+                yield num
+                last = num
@@ -0,0 +1,189 @@
+"""
+文件名：tagged_cache.py
+描述：带依赖标签的缓存（按标签代数失效）
+作者：denny
+"""
+
+import time
+from flask import current_app
+from app.extensions import cache
+
+# 区分“未命中”和“缓存值为 None”
+_MISSING = object()
+
+
+class CacheTags:
+    """缓存依赖标签"""
+
+    # 首页等全站文章列表（含置顶文章、侧边栏统计）
+    LISTING = 'listing'
+    # 文章归档
+    ARCHIVE = 'archive'
+    # 最新评论（侧边栏）
+    COMMENTS = 'comments'
+
+    @staticmethod
+    def post(post_id) -> str:
+        """单篇文章（详情、评论等）"""
+        return f'post:{post_id}'
+
+    @staticmethod
+    def tag(tag_id) -> str:
+        """标签下的文章列表"""
+        return f'tag:{tag_id}'
+
+    @staticmethod
+    def category(category_id) -> str:
+        """分类下的文章列表"""
+        return f'category:{category_id}'
+
+    @staticmethod
+    def user(user_id) -> str:
+        """单个用户（角色分配等）"""
+        return f'user:{user_id}'
+
+    @staticmethod
+    def role(role_id) -> str:
+        """单个角色（权限位等）"""
+        return f'role:{role_id}'
+
+
+class TaggedCache:
+    """带依赖标签的缓存
+
+    每个标签对应一个代数（generation）计数器。写入缓存时记录所依赖标签的
+    当前代数，读取时代数不一致即视为失效。失效一个标签只需递增其计数器，
+    所有依赖它的缓存键随即不可达，复杂度 O(1)，无需枚举或猜测缓存键。
+    """
+
+    GENERATION_KEY = 'cache_tag_gen:{}'
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        """底层缓存（默认使用 Flask-Caching 扩展）"""
+        return self._backend if self._backend is not None else cache
+
+    def _generations(self, tags, create=True) -> dict:
+        """批量读取标签代数
+
+        计数器不存在（从未失效或已被淘汰）时以当前纳秒时间初始化，
+        保证重建后的代数不会与旧缓存中记录的代数相同。
+        """
+        if not tags:
+            return {}
+        keys = [self.GENERATION_KEY.format(tag) for tag in tags]
+        values = self.backend.get_many(*keys)
+
+        generations = {}
+        missing = {}
+        for tag, key, value in zip(tags, keys, values):
+            if value is None and create:
+                value = time.time_ns()
+                missing[key] = value
+            generations[tag] = value
+        if missing:
+            self.backend.set_many(missing, timeout=0)
+        return generations
+
+    def _lookup(self, key):
+        """读取缓存值，未命中或依赖已失效时返回 _MISSING"""
+        entry = self.backend.get(key)
+        if not isinstance(entry, dict) or 'value' not in entry:
+            return _MISSING
+        tags = entry.get('tags') or {}
+        if tags and self._generations(list(tags), create=False) != tags:
+            return _MISSING
+        return entry['value']
+
+    def get(self, key, default=None):
+        """获取缓存值"""
+        try:
+            value = self._lookup(key)
+        except Exception as e:
+            current_app.logger.warning(f"读取缓存 {key} 失败: {str(e)}")
+            return default
+        return default if value is _MISSING else value
+
+    def snapshot(self, tags) -> dict:
+        """读取标签当前代数，供先计算、后写入的调用方使用
+
+        必须在读取数据、计算缓存值之前调用，并把结果传给 set(generations=...)；
+        计算期间发生的失效会使写入的缓存立即不可达，而不是以新代数保存旧值。
+        """
+        try:
+            return self._generations(list(tags))
+        except Exception as e:
+            current_app.logger.warning(f"读取缓存标签代数失败: {str(e)}")
+            return {}
+
+    def set(self, key, value, tags=(), timeout=None, generations=None) -> bool:
+        """写入缓存值并记录依赖标签
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            tags: 依赖标签列表
+            timeout: 过期时间（秒）
+            generations: 计算缓存值之前通过 snapshot() 读取的标签代数，
+                不传时使用写入时的代数
+
+        Returns:
+            bool: 是否写入成功（写入失败只记录日志，不影响业务）
+        """
+        tags = list(tags)
+        try:
+            if generations is None:
+                generations = self._generations(tags)
+            elif any(tag not in generations for tag in tags):
+                # 快照读取失败或不完整时不写入，避免记录错误的代数
+                return False
+            entry = {'value': value, 'tags': {tag: generations[tag] for tag in tags}}
+            self.backend.set(key, entry, timeout=timeout)
+            return True
+        except Exception as e:
+            current_app.logger.warning(f"写入缓存 {key} 失败: {str(e)}")
+            return False
+
+    def get_or_set(self, key, func, tags=(), timeout=None):
+        """获取缓存值，未命中时调用 func 计算并写入
+
+        标签代数在调用 func 之前读取，计算期间发生的失效不会被新值掩盖。
+        """
+        try:
+            value = self._lookup(key)
+        except Exception as e:
+            current_app.logger.warning(f"读取缓存 {key} 失败: {str(e)}")
+            value = _MISSING
+        if value is _MISSING:
+            generations = self.snapshot(tags)
+            value = func()
+            self.set(key, value, tags, timeout, generations=generations)
+        return value
+
+    def delete(self, key):
+        """删除单个缓存键"""
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            current_app.logger.warning(f"删除缓存 {key} 失败: {str(e)}")
+
+    def invalidate(self, *tags):
+        """使依赖这些标签的全部缓存失效"""
+        tags = [tag for tag in dict.fromkeys(tags) if tag]
+        if not tags:
+            return
+        try:
+            current = self._generations(tags, create=False)
+            self.backend.set_many({
+                self.GENERATION_KEY.format(tag): max((current.get(tag) or 0) + 1, time.time_ns())
+                for tag in tags
+            }, timeout=0)
+            current_app.logger.info(f"缓存标签已失效: {', '.join(tags)}")
+        except Exception as e:
+            current_app.logger.error(f"失效缓存标签失败: {str(e)}")
+
+
+tagged_cache = TaggedCache()
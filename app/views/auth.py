@@ -22,10 +22,12 @@ from sqlalchemy import text
 from app.utils.security import verify_token
 from urllib.parse import urlparse
 from app.models.permission import Permission
+from app.services.rate_limit import rate_limiter_service
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 @bp.route('/login', methods=['GET', 'POST'])
+@rate_limiter_service.limit('login', methods=('POST',))
 def login():
     """用户登录
 
@@ -0,0 +1,28 @@
+"""添加文章列表排序索引
+
+Revision ID: 5b7e2c9d4a31
+Revises: 1a3591485131
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c9d4a31'
+down_revision = '1a3591485131'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.create_index('ix_posts_listing', ['is_sticky', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_posts_status_created_at', ['status', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_status_created_at')
+        batch_op.drop_index('ix_posts_listing')
@@ -0,0 +1,37 @@
+"""添加相关文章表
+
+Revision ID: 7c1d3e5f9a20
+Revises: 5b7e2c9d4a31
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1d3e5f9a20'
+down_revision = '5b7e2c9d4a31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('related_posts',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('related_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['related_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id', 'rank')
+    )
+    with op.batch_alter_table('related_posts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_related_posts_related_id'), ['related_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('related_posts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_related_posts_related_id'))
+
+    op.drop_table('related_posts')
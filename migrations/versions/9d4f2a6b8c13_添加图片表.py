@@ -0,0 +1,45 @@
+"""添加图片表
+
+Revision ID: 9d4f2a6b8c13
+Revises: 7c1d3e5f9a20
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f2a6b8c13'
+down_revision = '7c1d3e5f9a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('images',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('original_name', sa.String(length=255), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('status', sa.Enum('PENDING', 'READY', 'FAILED', name='imagestatus'), nullable=False),
+        sa.Column('variants', sa.Text(), nullable=True),
+        sa.Column('thumbnail', sa.String(length=255), nullable=True),
+        sa.Column('error', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('images', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_images_filename'), ['filename'], unique=True)
+        batch_op.create_index(batch_op.f('ix_images_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('images', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_images_status'))
+        batch_op.drop_index(batch_op.f('ix_images_filename'))
+
+    op.drop_table('images')
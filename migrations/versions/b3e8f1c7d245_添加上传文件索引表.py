@@ -0,0 +1,43 @@
+"""添加上传文件索引表
+
+Revision ID: b3e8f1c7d245
+Revises: 9d4f2a6b8c13
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8f1c7d245'
+down_revision = '9d4f2a6b8c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('uploads',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('mime_type', sa.String(length=100), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('original_name', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('path')
+    )
+    with op.batch_alter_table('uploads', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_uploads_sha256'), ['sha256'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('uploads', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_uploads_sha256'))
+
+    op.drop_table('uploads')
@@ -0,0 +1,26 @@
+"""操作日志添加时间索引
+
+Revision ID: e4a7c9b2d816
+Revises: b3e8f1c7d245
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c9b2d816'
+down_revision = 'b3e8f1c7d245'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('operation_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_operation_logs_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('operation_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_operation_logs_created_at_id')
@@ -748,6 +748,16 @@ def test_data(app, init_test_users):
             db.session.rollback()
             raise
 
+@pytest.fixture
+def upload_folder(app, tmp_path, monkeypatch):
+    """上传目录指向临时目录，测试文件不写入仓库"""
+    images = tmp_path / 'images'
+    images.mkdir()
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setitem(app.config, 'IMAGE_UPLOAD_FOLDER', str(images))
+    monkeypatch.setitem(app.config, 'UPLOADED_IMAGES_DEST', str(images))
+    return images
+
 @pytest.fixture
 def test_post(app):
     """获取测试文章"""
@@ -0,0 +1,108 @@
+"""
+文件名：test_api_posts.py
+描述：文章列表 API 访问控制功能测试
+作者：denny
+"""
+
+import uuid
+import pytest
+from flask import g
+from app.extensions import db, cache
+from app.models.post import Post, PostStatus
+from app.models.user import User
+
+
+@pytest.fixture
+def api_posts(app):
+    """创建已发布、草稿和私密文章各一篇，返回 {名称: 标题}"""
+    suffix = uuid.uuid4().hex[:8]
+    titles = {name: f'api-{name}-{suffix}' for name in ('published', 'draft', 'private')}
+    with app.app_context():
+        author = User.query.filter_by(username='admin').first()
+        db.session.add_all([
+            Post(title=titles['published'], content='内容', author=author, status=PostStatus.PUBLISHED),
+            Post(title=titles['draft'], content='内容', author=author, status=PostStatus.DRAFT),
+            Post(title=titles['private'], content='内容', author=author, status=PostStatus.PUBLISHED,
+                 is_private=True),
+        ])
+        db.session.commit()
+        cache.clear()
+    yield titles
+    with app.app_context():
+        Post.query.filter(Post.title.in_(titles.values())).delete(synchronize_session=False)
+        db.session.commit()
+        cache.clear()
+
+
+def _titles(response):
+    return {post['title'] for post in response.get_json()['data']['posts']}
+
+
+def _login_admin(app, client):
+    """写入管理员登录会话"""
+    with app.app_context():
+        admin = User(username=f'api-admin-{uuid.uuid4().hex[:8]}',
+                     email=f'api-admin-{uuid.uuid4().hex[:8]}@example.com', is_admin_user=True)
+        admin.set_password('password123')
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+        session['_fresh'] = True
+    # app 夹具在整个会话中保持同一个应用上下文，丢弃之前请求缓存在 g 中的用户，
+    # 并让共享会话重新查询（其他夹具批量删除用户后 SQLite 会复用 ID）
+    g.pop('_login_user', None)
+    db.session.expire_all()
+    return admin_id
+
+
+def test_anonymous_sees_only_public_posts(client, api_posts):
+    """匿名访问只返回已发布的公开文章"""
+    response = client.get('/api/posts?per_page=100')
+    assert response.status_code == 200
+    titles = _titles(response)
+    assert api_posts['published'] in titles
+    assert api_posts['draft'] not in titles
+    assert api_posts['private'] not in titles
+
+
+@pytest.mark.parametrize('status', ['DRAFT', 'ARCHIVED', 'all'])
+def test_anonymous_cannot_request_other_status(client, api_posts, status):
+    g.pop('_login_user', None)
+    assert client.get(f'/api/posts?status={status}').status_code == 403
+
+
+def test_unknown_status_is_rejected(client):
+    assert client.get('/api/posts?status=BOGUS').status_code == 400
+
+
+def test_admin_can_list_drafts_and_private_posts(app, client, api_posts):
+    admin_id = _login_admin(app, client)
+    try:
+        drafts = client.get('/api/posts?status=DRAFT&per_page=100')
+        assert drafts.status_code == 200
+        assert api_posts['draft'] in _titles(drafts)
+
+        published = _titles(client.get('/api/posts?per_page=100'))
+        assert api_posts['private'] in published
+    finally:
+        with client.session_transaction() as session:
+            session.clear()
+        g.pop('_login_user', None)
+        with app.app_context():
+            User.query.filter_by(id=admin_id).delete()
+            db.session.commit()
+
+
+def test_comments_hidden_for_unpublished_posts(app, client, api_posts):
+    """草稿和私密文章的评论接口对匿名访客返回 404"""
+    g.pop('_login_user', None)
+    with app.app_context():
+        ids = {name: Post.query.filter_by(title=title).first().id for name, title in api_posts.items()}
+    assert client.get(f"/api/posts/{ids['published']}/comments").status_code == 200
+    assert client.get(f"/api/posts/{ids['draft']}/comments").status_code == 404
+    assert client.get(f"/api/posts/{ids['private']}/comments").status_code == 404
+    response = client.post(f"/api/posts/{ids['draft']}/comments",
+                           json={'content': '评论', 'nickname': '访客', 'email': 'guest@example.com'})
+    assert response.status_code == 404
@@ -0,0 +1,105 @@
+"""
+文件名：test_page_cache.py
+描述：匿名访客整页响应缓存功能测试
+作者：denny
+"""
+
+import gzip
+import uuid
+import pytest
+from app.models.comment import Comment, CommentStatus
+from app.models.post import Post, PostStatus
+from app.models.tag import Tag
+from app.models.user import User
+from app.extensions import db
+
+
+@pytest.fixture
+def page_cache_enabled(app, monkeypatch):
+    """临时开启整页缓存"""
+    monkeypatch.setitem(app.config, 'PAGE_CACHE_ENABLED', True)
+    yield
+
+
+@pytest.fixture
+def published_post(app):
+    """创建一篇已发布文章，返回其ID"""
+    with app.app_context():
+        post = Post(
+            title=f'缓存测试文章-{uuid.uuid4().hex[:8]}',
+            content='缓存测试内容 ' * 200,
+            author=User.query.filter_by(username='admin').first(),
+            status=PostStatus.PUBLISHED
+        )
+        db.session.add(post)
+        db.session.commit()
+        return post.id
+
+
+def test_anonymous_page_is_cached_with_etag(client, page_cache_enabled, published_post):
+    """匿名访问第二次命中缓存，If-None-Match 返回 304"""
+    url = f'/blog/post/{published_post}'
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers['X-Page-Cache'] == 'MISS'
+    assert first.headers['ETag']
+    assert first.headers['Last-Modified']
+
+    second = client.get(url)
+    assert second.headers['X-Page-Cache'] == 'HIT'
+    assert second.data == first.data
+
+    not_modified = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert not not_modified.data
+
+
+def test_cached_page_is_served_precompressed(client, page_cache_enabled, published_post):
+    """客户端接受 gzip 时返回预压缩的响应体"""
+    url = f'/blog/post/{published_post}'
+    plain = client.get(url)
+    compressed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert compressed.headers['ETag'] != plain.headers['ETag']
+
+
+def test_post_update_invalidates_cached_page(app, client, page_cache_enabled, published_post):
+    """文章修改提交后缓存失效"""
+    url = f'/blog/post/{published_post}'
+    client.get(url)
+
+    with app.app_context():
+        post = db.session.get(Post, published_post)
+        post.title = f'修改后的标题-{uuid.uuid4().hex[:8]}'
+        new_title = post.title
+        db.session.commit()
+
+    response = client.get(url)
+    assert response.headers['X-Page-Cache'] == 'MISS'
+    assert new_title in response.get_data(as_text=True)
+
+
+def test_comment_invalidates_listing_pages(app, client, page_cache_enabled, published_post):
+    """新评论提交后显示评论数的分类、标签和归档页面缓存失效"""
+    with app.app_context():
+        post = db.session.get(Post, published_post)
+        tag = Tag(name=f'缓存标签-{uuid.uuid4().hex[:8]}')
+        post.tags.append(tag)
+        db.session.commit()
+        urls = ['/blog/archive', f'/blog/tag/{tag.id}']
+        if post.category_id:
+            urls.append(f'/blog/category/{post.category_id}')
+
+    for url in urls:
+        client.get(url)
+        assert client.get(url).headers['X-Page-Cache'] == 'HIT'
+
+    with app.app_context():
+        db.session.add(Comment(post_id=published_post, content='新评论', nickname='访客',
+                               email='guest@example.com', status=CommentStatus.APPROVED))
+        db.session.commit()
+
+    for url in urls:
+        assert client.get(url).headers['X-Page-Cache'] == 'MISS', url
@@ -12,6 +12,9 @@ import threading
 import time
 from flask import current_app
 
+# 上传文件写入临时目录
+pytestmark = pytest.mark.usefixtures('upload_folder')
+
 def create_test_image(width=100, height=100, color='rgb(255,0,0)'):
     """创建测试图片"""
     image = Image.new('RGB', (width, height), color=color)
@@ -20,6 +23,19 @@ def create_test_image(width=100, height=100, color='rgb(255,0,0)'):
     img_io.seek(0)
     return img_io
 
+def _assert_variants_within_limit(app, filename):
+    """检查后台生成的变体都不超过最大尺寸"""
+    from app.models.image import UploadedImage, ImageStatus
+    with app.app_context():
+        image = UploadedImage.query.filter_by(filename=filename).first()
+        assert image is not None and image.status == ImageStatus.READY
+        assert image.variants
+        for variant in image.variants:
+            path = os.path.join(app.config['IMAGE_UPLOAD_FOLDER'], variant['filename'])
+            with Image.open(path) as img:
+                assert img.width <= app.config['MAX_IMAGE_WIDTH']
+                assert img.height <= app.config['MAX_IMAGE_HEIGHT']
+
 def test_image_upload(authenticated_client, app):
     """测试图片上传"""
     data = {
@@ -57,18 +73,17 @@ def test_large_file_upload(authenticated_client, app):
     assert 'filename' in response.json
     assert 'url' in response.json
     
-    # 检查文件是否被正确调整大小
+    # 原图原样保存，缩小后的变体不超过最大尺寸
     uploaded_path = os.path.join(app.config['IMAGE_UPLOAD_FOLDER'], response.json['filename'])
     assert os.path.exists(uploaded_path)
-    with Image.open(uploaded_path) as img:
-        assert img.width <= app.config['MAX_IMAGE_WIDTH']
-        assert img.height <= app.config['MAX_IMAGE_HEIGHT']
+    _assert_variants_within_limit(app, response.json['filename'])
 
 def test_image_delete(authenticated_client, app):
     """测试图片删除"""
     # 先上传一个图片
     data = {
-        'file': (create_test_image(), 'test_delete.jpg')
+        # 内容与其他用例不同，删除后没有其他引用
+        'file': (create_test_image(color='rgb(1,2,3)'), 'test_delete.jpg')
     }
     upload_response = authenticated_client.post('/admin/upload/', data=data, follow_redirects=True)
     assert upload_response.status_code == 200
@@ -162,11 +177,8 @@ def test_image_resize(authenticated_client, app):
     assert response.status_code == 200
     filename = response.json['filename']
     
-    # 检查图片是否被调整大小
-    uploaded_path = os.path.join(app.config['IMAGE_UPLOAD_FOLDER'], filename)
-    with Image.open(uploaded_path) as img:
-        assert img.width <= app.config['MAX_IMAGE_WIDTH']
-        assert img.height <= app.config['MAX_IMAGE_HEIGHT']
+    # 检查生成的变体是否被调整大小
+    _assert_variants_within_limit(app, filename)
 
 def test_image_format_conversion(authenticated_client, app):
     """测试图片格式转换"""
@@ -0,0 +1,109 @@
+"""
+文件名：conftest.py
+描述：性能测试公共夹具（SQL 查询预算与大数据量测试数据）
+作者：denny
+"""
+
+from collections import Counter
+import pytest
+from sqlalchemy import event
+from app.extensions import db, cache
+from app.models import Post, Tag, Category, Comment, User
+from app.models.associations import post_tags
+from app.models.post import PostStatus
+from app.utils.bench_seed import BenchSeeder
+
+BENCH_PREFIX = 'bench-'
+BENCH_POSTS = 2000
+BENCH_TAGS = 100
+BENCH_CATEGORIES = 20
+BENCH_COMMENTS = 6000
+BENCH_USERS = 50
+
+
+class QueryBudget:
+    """统计代码块内执行的 SQL 语句，超过预算时使测试失败"""
+
+    def __init__(self, engine, limit, label):
+        self.engine = engine
+        self.limit = limit
+        self.label = label
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        if exc_type is None and self.count > self.limit:
+            repeated = Counter(' '.join(statement.split())[:160] for statement in self.statements)
+            detail = '\n'.join(f'  {count} x {statement}' for statement, count in repeated.most_common(5))
+            pytest.fail(f'{self.label}: 执行了 {self.count} 条 SQL，超出预算 {self.limit} 条\n'
+                        f'重复最多的语句:\n{detail}')
+        return False
+
+
+@pytest.fixture
+def query_budget(app):
+    """SQL 查询预算
+
+    用法::
+
+        with query_budget(10, 'blog.index'):
+            client.get('/blog/')
+    """
+    with app.app_context():
+        engine = db.engine
+
+    def budget(limit, label='代码块'):
+        return QueryBudget(engine, limit, label)
+
+    return budget
+
+
+def _cleanup():
+    """按名称前缀删除测试数据（子查询，不受绑定参数个数限制）"""
+    posts = db.select(Post.id).where(Post.title.like(f'{BENCH_PREFIX}%'))
+    users = db.select(User.id).where(User.username.like(f'{BENCH_PREFIX}%'))
+    with db.engine.begin() as conn:
+        conn.execute(Comment.__table__.delete().where(
+            Comment.post_id.in_(posts) | Comment.author_id.in_(users)))
+        conn.execute(post_tags.delete().where(post_tags.c.post_id.in_(posts)))
+        conn.execute(Post.__table__.delete().where(Post.title.like(f'{BENCH_PREFIX}%')))
+        conn.execute(Tag.__table__.delete().where(Tag.name.like(f'{BENCH_PREFIX}%')))
+        conn.execute(Category.__table__.delete().where(Category.name.like(f'{BENCH_PREFIX}%')))
+        conn.execute(User.__table__.delete().where(User.username.like(f'{BENCH_PREFIX}%')))
+
+
+@pytest.fixture(scope='module')
+def bench_dataset(app):
+    """数千篇文章、标签和评论的固定测试数据（模块结束时删除）
+
+    使用 flask seed-bench 的生成器批量插入，不触发模型事件；插入前后清空缓存，
+    避免其他测试读到过期的计数。额外返回评论最多和最少的已发布文章。
+    """
+    with app.app_context():
+        ids = BenchSeeder(seed=20261018, prefix=BENCH_PREFIX, fragment_count=40).seed_all(
+            posts=BENCH_POSTS, comments=BENCH_COMMENTS, tags=BENCH_TAGS, users=BENCH_USERS,
+            categories=BENCH_CATEGORIES)
+        published = db.select(Post.id).where(
+            Post.title.like(f'{BENCH_PREFIX}%'), Post.status == PostStatus.PUBLISHED)
+        ids['hot_post'] = db.session.execute(
+            published.order_by(Post._comments_count.desc(), Post.id)).scalars().first()
+        ids['quiet_post'] = db.session.execute(
+            published.order_by(Post._comments_count, Post.id)).scalars().first()
+        cache.clear()
+    try:
+        yield ids
+    finally:
+        with app.app_context():
+            _cleanup()
+            cache.clear()
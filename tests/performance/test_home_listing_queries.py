@@ -0,0 +1,79 @@
+"""
+文件名：test_home_listing_queries.py
+描述：首页文章列表查询次数回归测试
+作者：denny
+"""
+
+from app.models import Post, PostStatus, User
+from app.extensions import db
+from app.services.post_listing import PostListingService
+
+POST_COUNT = 30
+# 列表本身的查询预算（文章 + 分类/标签批量加载，实测 2）
+LISTING_BUDGET = 2
+# 预热侧边栏后首页请求的查询预算（实测 6，加 2 条余量）
+HOME_PAGE_BUDGET = 8
+
+
+def _seed_posts(test_data):
+    """创建足够多的带分类和标签的已发布文章"""
+    author = User.query.filter_by(username='admin').first()
+    category = db.session.merge(test_data['category'])
+    tag = db.session.merge(test_data['tag'])
+    for i in range(POST_COUNT):
+        title = f'列表查询测试文章 {i}'
+        if Post.query.filter_by(title=title).first():
+            continue
+        post = Post(
+            title=title,
+            content=f'列表查询测试内容 {i}',
+            category=category,
+            author=author,
+            status=PostStatus.PUBLISHED
+        )
+        post.tags.append(tag)
+        db.session.add(post)
+    db.session.commit()
+
+
+def test_home_listing_query_count_is_constant(app, query_budget, test_data):
+    """首页列表查询次数不随每页数量增长"""
+    with app.app_context():
+        _seed_posts(test_data)
+        service = PostListingService()
+        # 总数单独缓存，预热后只统计列表本身的查询
+        service.get_home_posts(1, 1)
+
+        counts = []
+        for per_page in (1, 5, POST_COUNT):
+            db.session.expunge_all()
+            with query_budget(LISTING_BUDGET, f'首页列表 per_page={per_page}') as budget:
+                items, total = service.get_home_posts(1, per_page)
+            assert len(items) == per_page
+            assert total >= POST_COUNT
+            assert all(item.category is not None and item.tags for item in items)
+            counts.append(budget.count)
+
+        assert len(set(counts)) == 1
+
+
+def test_home_page_query_count_is_constant(app, client, query_budget, test_data):
+    """首页请求的查询次数不随 POSTS_PER_PAGE 增长"""
+    with app.app_context():
+        _seed_posts(test_data)
+
+    original = app.config['POSTS_PER_PAGE']
+    counts = []
+    try:
+        for per_page in (2, 10, POST_COUNT):
+            app.config['POSTS_PER_PAGE'] = per_page
+            # 预热侧边栏缓存，只比较列表部分的差异
+            client.get('/blog/')
+            with query_budget(HOME_PAGE_BUDGET, f'首页 POSTS_PER_PAGE={per_page}') as budget:
+                response = client.get('/blog/')
+            assert response.status_code == 200
+            counts.append(budget.count)
+    finally:
+        app.config['POSTS_PER_PAGE'] = original
+
+    assert len(set(counts)) == 1
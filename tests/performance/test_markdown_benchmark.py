@@ -0,0 +1,107 @@
+"""
+文件名：test_markdown_benchmark.py
+描述：Markdown 渲染微基准测试（复用转换器与高亮实例前后的吞吐量对比）
+作者：denny
+"""
+
+import time
+import markdown
+from markdown.extensions.codehilite import CodeHilite
+from app.utils.markdown import (
+    MARKDOWN_EXTENSIONS, _get_hilite_formatter, _normalize_markdown, _sanitize_html,
+    render_markdown, shared_hilite_formatter
+)
+
+ROUNDS = 5
+
+CODE_SAMPLE = '''def fibonacci(n):
+    """计算斐波那契数列"""
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+'''
+
+
+def _build_post(target_size=50 * 1024):
+    """生成约 50KB、以代码块为主的文章"""
+    sections = []
+    size = 0
+    index = 0
+    languages = ['python', 'javascript', 'sql', 'bash']
+    while size < target_size:
+        lang = languages[index % len(languages)]
+        section = (
+            f'## 第 {index} 节\n\n'
+            f'这一节演示 {lang} 代码，包含 **加粗**、`行内代码` 和 [链接](https://example.com)。\n\n'
+            f'```{lang}\n{CODE_SAMPLE * 3}```\n\n'
+            f'- 要点一\n- 要点二\n\n'
+        )
+        sections.append(section)
+        size += len(section.encode('utf-8'))
+        index += 1
+    return ''.join(sections)
+
+
+def _render_without_reuse(text):
+    """旧实现：每次调用都构造新的 Markdown 转换器"""
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, output_format='html5')
+    return _sanitize_html(md.convert(_normalize_markdown(text)))
+
+
+def _hilite(code, lang, **options):
+    """按 codehilite 的方式高亮一个代码块"""
+    return CodeHilite(code, lang=lang, **options).hilite()
+
+
+def _throughput(func, *args, rounds=ROUNDS):
+    """返回每秒执行次数"""
+    func(*args)  # 预热
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(*args)
+    return rounds / (time.perf_counter() - start)
+
+
+def test_markdown_render_throughput(monkeypatch):
+    """复用转换器渲染 50KB 代码密集文章：结果一致，重复渲染不再构造转换器"""
+    post = _build_post()
+    assert len(post.encode('utf-8')) >= 50 * 1024
+
+    assert render_markdown(post)[0] == _render_without_reuse(post)
+
+    before = _throughput(_render_without_reuse, post)
+    after = _throughput(lambda text: render_markdown(text)[0], post)
+    # 计时受机器负载影响，只输出结果，断言构造次数
+    print(f'\nMarkdown 渲染 50KB 文章：复用前 {before:.2f} 次/秒，复用后 {after:.2f} 次/秒')
+
+    constructed = []
+    original = markdown.Markdown
+
+    class CountingMarkdown(original):
+        def __init__(self, *args, **kwargs):
+            constructed.append(1)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(markdown, 'Markdown', CountingMarkdown)
+    for _ in range(ROUNDS):
+        render_markdown(post)
+    assert constructed == []
+
+
+def test_code_block_highlight_throughput():
+    """codehilite 复用格式化器：结果一致，重复高亮只命中缓存"""
+    rounds = 200
+    assert _hilite(CODE_SAMPLE, 'python') == _hilite(
+        CODE_SAMPLE, 'python', pygments_formatter=shared_hilite_formatter)
+
+    before = _throughput(_hilite, CODE_SAMPLE, 'python', rounds=rounds)
+    misses = _get_hilite_formatter.cache_info().misses
+    after = _throughput(lambda code, lang: _hilite(code, lang, pygments_formatter=shared_hilite_formatter),
+                        CODE_SAMPLE, 'python', rounds=rounds)
+    print(f'\n代码块高亮：复用前 {before:.2f} 次/秒，复用后 {after:.2f} 次/秒')
+
+    # 预热之后的每个代码块都复用已构造的格式化器
+    assert _get_hilite_formatter.cache_info().misses == misses
+    assert shared_hilite_formatter(lang_str='language-python', hl_lines=[1]) is \
+        shared_hilite_formatter(lang_str='language-python', hl_lines=[1])
@@ -0,0 +1,83 @@
+"""
+文件名：test_query_budgets.py
+描述：热点页面 SQL 查询预算回归测试（基于数千条文章、标签、评论的数据集）
+作者：denny
+"""
+
+import pytest
+from flask import g
+from sqlalchemy import text
+from app.extensions import db, cache
+from app.models import User
+
+# 各端点冷缓存下允许的最多 SQL 语句数（实测值加 2 条余量）；与数据量无关，
+# 新增一条查询或出现 N+1 时都会超出
+BUDGETS = {
+    'blog.index': 12,  # 实测 10
+    'blog.post_detail': 14,  # 实测 12
+    'blog.archive': 9,  # 实测 7
+    'blog.tag_posts': 10,  # 实测 8
+    'admin_dashboard.dashboard': 11,  # 实测 9
+    'api.get_posts': 4,  # 实测 2
+}
+
+
+def _get(client, query_budget, endpoint, url):
+    """清空缓存和会话的标识映射后在预算内请求页面"""
+    cache.clear()
+    db.session.remove()
+    with query_budget(BUDGETS[endpoint], endpoint) as budget:
+        response = client.get(url)
+    assert response.status_code == 200, f'{url} 返回 {response.status_code}'
+    return budget
+
+
+def test_query_budget_fails_when_exceeded(app, query_budget):
+    """超过预算时测试失败并列出重复最多的语句"""
+    with app.app_context():
+        with pytest.raises(pytest.fail.Exception, match='超出预算 2 条'):
+            with query_budget(2, '示例'):
+                for _ in range(3):
+                    db.session.execute(text('SELECT 1'))
+
+
+def test_blog_index_budget(client, query_budget, bench_dataset):
+    _get(client, query_budget, 'blog.index', '/blog/')
+    _get(client, query_budget, 'blog.index', '/blog/?page=50')
+
+
+def test_post_detail_budget(client, query_budget, bench_dataset):
+    """评论最多的文章与普通文章的查询数相同"""
+    hot = _get(client, query_budget, 'blog.post_detail', f"/blog/post/{bench_dataset['hot_post']}")
+    plain = _get(client, query_budget, 'blog.post_detail', f"/blog/post/{bench_dataset['quiet_post']}")
+    assert hot.count == plain.count
+
+
+def test_archive_budget(client, query_budget, bench_dataset):
+    _get(client, query_budget, 'blog.archive', '/blog/archive')
+
+
+def test_tag_posts_budget(client, query_budget, bench_dataset):
+    _get(client, query_budget, 'blog.tag_posts', f"/blog/tag/{bench_dataset['tags'][0]}")
+    _get(client, query_budget, 'blog.tag_posts', f"/blog/tag/{bench_dataset['tags'][0]}?page=3")
+
+
+def test_admin_dashboard_budget(app, client, query_budget, bench_dataset):
+    # 使用独立的管理员账号并直接写入登录会话，预算只统计仪表板本身的查询
+    with app.app_context():
+        admin = User(username='bench-admin', email='bench-admin@example.com', is_admin_user=True)
+        admin.set_password('password123')
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+        session['_fresh'] = True
+    # app 夹具在整个会话中保持同一个应用上下文，丢弃之前请求缓存在 g 中的匿名用户
+    g.pop('_login_user', None)
+    _get(client, query_budget, 'admin_dashboard.dashboard', '/admin/')
+
+
+def test_api_posts_budget(client, query_budget, bench_dataset):
+    _get(client, query_budget, 'api.get_posts', '/api/posts')
+    _get(client, query_budget, 'api.get_posts', '/api/posts?page=20')
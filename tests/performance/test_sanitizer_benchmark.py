@@ -0,0 +1,98 @@
+"""
+文件名：test_sanitizer_benchmark.py
+描述：评论清理微基准测试（预编译清理与逐条正则清理的单条延迟对比）
+作者：denny
+"""
+
+import re
+import time
+import bleach
+from app.utils.sanitizer import sanitizer, SQL_INJECTION_PATTERNS
+
+ROUNDS = 200
+
+# 旧实现中的危险模式（每次调用重新构造集合并逐条替换）
+_OLD_DANGEROUS_PATTERNS = (
+    r'(?i)javascript\s*:', r'(?i)\bon\w+\s*=',
+    r'(?i)<\s*script\b[^>]*>', r'(?i)</\s*script\s*>',
+    r'(?i)\bdata-[\w\-]*\s*=',
+    r'(?i)\b(?:javascript|vbscript|expression|data)\s*:',
+    r'(?i)\b(?:eval|setTimeout|setInterval|Function)\s*\(',
+    r'(?i)\b(?:document\.cookie|window\.location)\b',
+    r'(?i)<\s*iframe\b[^>]*>', r'(?i)</\s*iframe\s*>'
+)
+
+
+def _build_comment(index, target_size=1024):
+    """生成约 1KB、夹杂标签与可疑片段的评论"""
+    parts = []
+    size = 0
+    while size < target_size:
+        part = (
+            f'第 {index} 条评论，写得很好！<b>加粗</b> 和 <a href="https://example.com" onclick="x()">链接</a>，'
+            f'顺便提一下 data-id= 和 javascript: 以及 5 < 6 & 7 > 3。  '
+        )
+        parts.append(part)
+        size += len(part.encode('utf-8'))
+    return ''.join(parts)
+
+
+def _old_clean(content):
+    """旧实现：bleach 去标签 + 10 次 re.sub + 合并空白 + 20 次 re.search"""
+    content = content[:1000]
+    clean_text = bleach.clean(content, tags=[], strip=True)
+    for pattern in set(_OLD_DANGEROUS_PATTERNS):
+        clean_text = re.sub(pattern, '', clean_text)
+    clean_text = ' '.join(clean_text.split())
+    for pattern in SQL_INJECTION_PATTERNS:
+        if re.search(pattern, clean_text, re.IGNORECASE):
+            return ''
+    return clean_text
+
+
+def _new_clean(content):
+    clean_text = sanitizer.clean_comment(content)
+    return '' if sanitizer.has_sql_injection(clean_text) else clean_text
+
+
+def _latency(func, comments, rounds=ROUNDS):
+    """返回每条评论的平均耗时（微秒）"""
+    for comment in comments:
+        func(comment)  # 预热
+    start = time.perf_counter()
+    for index in range(rounds):
+        func(comments[index % len(comments)])
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def test_comment_sanitize_latency():
+    """预编译清理 1KB 评论，与旧实现一样去除标签和危险片段，并输出两者的单条耗时"""
+    comments = [_build_comment(index) for index in range(20)]
+
+    for comment in comments[:3]:
+        cleaned = _new_clean(comment)
+        assert '<b>' not in cleaned and 'onclick' not in cleaned
+        assert 'javascript:' not in cleaned and 'data-id=' not in cleaned
+
+    before = _latency(_old_clean, comments)
+    after = _latency(_new_clean, comments)
+    # 计时受机器负载影响，只输出结果，不作为断言
+    print(f'\n评论清理 1KB：旧实现 {before:.1f} 微秒/条，预编译实现 {after:.1f} 微秒/条')
+
+
+def test_sql_injection_check_latency():
+    """合并后的 SQL 注入检测与逐条搜索结果一致，并输出两者的单条耗时"""
+    samples = [_build_comment(index) for index in range(10)] + [
+        "1' OR 1=1", 'x; DROP TABLE users', 'UNION SELECT password FROM users',
+        'SLEEP(5)', '普通的评论内容'
+    ]
+
+    def old_check(text):
+        return any(re.search(pattern, text, re.IGNORECASE) for pattern in SQL_INJECTION_PATTERNS)
+
+    for sample in samples:
+        assert sanitizer.has_sql_injection(sample) == old_check(sample)
+
+    before = _latency(old_check, samples)
+    after = _latency(sanitizer.has_sql_injection, samples)
+    print(f'\nSQL 注入检测：逐条搜索 {before:.1f} 微秒/条，合并正则 {after:.1f} 微秒/条')
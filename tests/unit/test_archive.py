@@ -0,0 +1,136 @@
+"""
+文件名：test_archive.py
+描述：文章归档服务单元测试
+作者：denny
+"""
+
+import threading
+import uuid
+from datetime import datetime
+from app.extensions import db
+from app.models.post import Post, PostStatus
+from app.models.user import User
+from app.services.archive import ArchiveService, archive_service
+
+
+def _create_post(created_at, status=PostStatus.PUBLISHED):
+    post = Post(
+        title=f'归档测试文章-{uuid.uuid4().hex[:8]}',
+        content='归档测试内容',
+        author=User.query.filter_by(username='admin').first(),
+        status=status,
+        created_at=created_at
+    )
+    db.session.add(post)
+    db.session.commit()
+    return post
+
+
+def _count(year, month):
+    for item in archive_service.get_months():
+        if (item.year, item.month) == (year, month):
+            return item.count
+    return 0
+
+
+def test_archive_groups_posts_by_month(app):
+    """按月份统计并只加载该月的文章投影"""
+    with app.app_context():
+        archive_service.rebuild()
+        first = _create_post(datetime(2001, 2, 3))
+        second = _create_post(datetime(2001, 2, 20))
+        _create_post(datetime(2001, 2, 25), status=PostStatus.DRAFT)
+
+        month = archive_service.get_month(2001, 2)
+        assert month.count == 2
+        assert [entry.id for entry in month.posts] == [second.id, first.id]
+        assert archive_service.get_month(2001, 1) is None
+
+
+def test_archive_updates_incrementally(app, monkeypatch):
+    """发布、归档和删除文章后增量调整月份计数，不重新分组统计"""
+    with app.app_context():
+        archive_service.rebuild()
+        draft = _create_post(datetime(2002, 5, 1), status=PostStatus.DRAFT)
+        before = _count(2002, 5)
+
+        calls = []
+        original = ArchiveService._load_months
+        monkeypatch.setattr(ArchiveService, '_load_months',
+                            lambda self: calls.append(1) or original(self))
+
+        draft.status = PostStatus.PUBLISHED
+        db.session.commit()
+        assert _count(2002, 5) == before + 1
+
+        draft.created_at = datetime(2002, 6, 1)
+        db.session.commit()
+        assert _count(2002, 5) == before
+        assert _count(2002, 6) >= 1
+        assert draft.id in [entry.id for entry in archive_service.get_month(2002, 6).posts]
+
+        june = _count(2002, 6)
+        post_id = draft.id
+        db.session.delete(draft)
+        db.session.commit()
+        assert _count(2002, 6) == june - 1
+        month = archive_service.get_month(2002, 6)
+        assert month is None or post_id not in [entry.id for entry in month.posts]
+        assert calls == []
+
+
+def test_rebuild_reloads_neighbour_index(app):
+    """批量写入（不触发模型事件）后重建归档，月份计数来自重新载入的邻接索引"""
+    with app.app_context():
+        post = _create_post(datetime(2003, 7, 1))
+        assert _count(2003, 7) == 1
+
+        with db.engine.begin() as conn:
+            conn.execute(Post.__table__.update().where(Post.__table__.c.id == post.id)
+                         .values(created_at=datetime(2003, 8, 1)))
+        archive_service.rebuild()
+        assert _count(2003, 7) == 0
+        assert _count(2003, 8) == 1
+
+
+def test_get_archives_loads_months_once(app, monkeypatch):
+    """全部归档只取一次月份列表"""
+    with app.app_context():
+        _create_post(datetime(2004, 3, 1))
+        calls = []
+        original = ArchiveService.get_months
+        monkeypatch.setattr(ArchiveService, 'get_months',
+                            lambda self: calls.append(1) or original(self))
+
+        archives = archive_service.get_archives()
+        assert archives['2004-03']
+        assert calls == [1]
+
+
+def test_incremental_change_waits_for_reload(app, monkeypatch):
+    """重新加载月份计数时，并发的增量更新等待加载完成后再应用，不会被覆盖"""
+    with app.app_context():
+        archive_service.rebuild()
+        blocked = []
+        workers = []
+        original = ArchiveService._load_months
+
+        def apply_in_app():
+            with app.app_context():
+                archive_service.apply_changes([(None, (1999, 1))])
+
+        def load_with_concurrent_change(self):
+            tree = original(self)
+            worker = threading.Thread(target=apply_in_app)
+            worker.start()
+            worker.join(timeout=0.2)
+            blocked.append(worker.is_alive())
+            workers.append(worker)
+            return tree
+
+        monkeypatch.setattr(ArchiveService, '_load_months', load_with_concurrent_change)
+        archive_service.get_months()
+        workers[0].join()
+
+        assert blocked == [True]
+        assert _count(1999, 1) == 1
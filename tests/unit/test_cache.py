@@ -0,0 +1,98 @@
+"""
+文件名：test_cache.py
+描述：有界进程内缓存单元测试
+作者：denny
+"""
+
+import threading
+import time
+from app.utils import cache as cache_module
+from app.utils.cache import Cache, BoundedCache, make_key
+
+
+def test_lru_eviction_is_bounded():
+    """超过容量时淘汰最久未使用的条目"""
+    cache = Cache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['size'] == 2
+
+
+def test_expired_entries_are_swept(monkeypatch):
+    """过期条目在读取或定期清理时删除"""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    cache = Cache(sweep_interval=10)
+    cache.set('short', 1, timeout=5)
+    cache.set('other', 2, timeout=5)
+    cache.set('forever', 3, timeout=0)
+
+    now[0] += 6
+    assert cache.get('short') is None
+
+    now[0] += 10
+    cache.set('new', 4)
+    stats = cache.stats()
+    assert stats['expirations'] == 2
+    assert stats['size'] == 2
+    assert cache.get('forever') == 3
+
+
+def test_get_or_set_prevents_stampede():
+    """同一个键并发未命中时只计算一次"""
+    cache = Cache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('key', compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ['value'] * 8
+
+
+def test_cached_decorator_uses_stable_keys():
+    """缓存键与字典参数顺序无关"""
+    cache = Cache()
+    calls = []
+
+    @cache.cached(timeout=60)
+    def load(options):
+        calls.append(options)
+        return len(options)
+
+    assert load({'a': 1, 'b': 2}) == 2
+    assert load({'b': 2, 'a': 1}) == 2
+    assert len(calls) == 1
+    assert make_key(load, ({'a': 1, 'b': 2},), {}) == make_key(load, ({'b': 2, 'a': 1},), {})
+
+
+def test_flask_caching_backend_returns_copies():
+    """Flask-Caching 后端返回值的副本并提供统计"""
+    backend = BoundedCache(default_timeout=60, threshold=10)
+    value = {'count': 1}
+    backend.set('k', value)
+    value['count'] = 2
+
+    loaded = backend.get('k')
+    assert loaded == {'count': 1}
+    loaded['count'] = 3
+    assert backend.get('k') == {'count': 1}
+    assert backend.add('k', 'other') is False
+    assert backend.stats()['hits'] == 2
@@ -0,0 +1,69 @@
+"""
+文件名：test_comment_tree.py
+描述：评论树加载与缓存单元测试
+作者：denny
+"""
+
+from datetime import datetime, timedelta
+from app.models import Post, User
+from app.models.comment import Comment, CommentStatus
+from app.extensions import db
+from app.services.comment import CommentService, invalidate_comment_tree
+
+
+def _row(id, parent_id, status=CommentStatus.APPROVED, minutes=0, email=None):
+    """构造评论行元组"""
+    return (id, 1, parent_id, f'评论{id}', f'<p>评论{id}</p>', None, None,
+            f'访客{id}', email, status, datetime(2024, 1, 1) + timedelta(minutes=minutes))
+
+
+def test_build_tree_supports_arbitrary_depth():
+    """评论树支持任意层级，回复按时间升序"""
+    rows = [_row(1, None, minutes=0), _row(2, 1, minutes=1), _row(3, 2, minutes=2),
+            _row(4, 3, minutes=3), _row(5, None, minutes=4), _row(6, 1, minutes=5)]
+
+    roots = CommentService._build_tree(rows, CommentService._visibility(), newest_first=True)
+
+    assert [node.id for node in roots] == [5, 1]
+    first = roots[1]
+    assert [reply.id for reply in first.replies] == [2, 6]
+    assert first.replies[0].replies[0].replies[0].id == 4
+    assert first.to_dict()['children'][0]['children'][0]['id'] == 3
+
+
+def test_build_tree_hides_replies_of_invisible_parent():
+    """父评论不可见时回复一并隐藏，用户可看到自己的待审核评论"""
+    rows = [_row(1, None, status=CommentStatus.PENDING, email='me@example.com'),
+            _row(2, 1), _row(3, None, status=CommentStatus.PENDING)]
+
+    assert CommentService._build_tree(rows, CommentService._visibility()) == []
+
+    visible = CommentService._visibility(include_pending=True, user_email='me@example.com')
+    roots = CommentService._build_tree(rows, visible)
+    assert [node.id for node in roots] == [1]
+    assert [reply.id for reply in roots[0].replies] == [2]
+
+
+def test_comment_tree_cache_invalidated_on_commit(app, test_data):
+    """新增评论提交后评论树缓存失效"""
+    with app.app_context():
+        post = Post.query.filter_by(title='测试文章').first()
+        invalidate_comment_tree(post.id)
+        before = len(CommentService.get_post_comments(post.id))
+
+        comment = Comment(
+            post_id=post.id,
+            content='评论树缓存测试',
+            author_id=User.query.filter_by(username='user').first().id,
+            status=CommentStatus.APPROVED
+        )
+        db.session.add(comment)
+        db.session.commit()
+
+        comments = CommentService.get_post_comments(post.id)
+        assert len(comments) == before + 1
+        assert comments[0].author is not None
+
+        db.session.delete(comment)
+        db.session.commit()
+        assert len(CommentService.get_post_comments(post.id)) == before
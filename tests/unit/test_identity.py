@@ -0,0 +1,97 @@
+"""
+文件名：test_identity.py
+描述：登录用户身份快照缓存单元测试
+作者：denny
+"""
+
+import time
+import uuid
+from types import SimpleNamespace
+from app.extensions import db
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.user import User
+from app.services.identity import CurrentUser, IdentityService, identity_service
+from app.utils import cache as cache_module
+from app.utils.cache import BoundedCache
+from app.utils.tagged_cache import TaggedCache
+
+
+def _create_user():
+    suffix = uuid.uuid4().hex[:8]
+    role = Role(name=f'identity_role_{suffix}', permissions=Permission.VIEW.value)
+    user = User(username=f'identity-{suffix}', email=f'identity-{suffix}@example.com')
+    user.set_password('password123')
+    user.roles = [role]
+    db.session.add_all([role, user])
+    db.session.commit()
+    return user, role
+
+
+def test_snapshot_is_cached(app, monkeypatch):
+    """第二次加载直接使用缓存的快照，身份判断不加载完整用户"""
+    with app.app_context():
+        user, role = _create_user()
+        first = identity_service.load_user(user.id)
+        assert isinstance(first, CurrentUser)
+        assert first.username == user.username
+        assert first.has_role(role.name)
+        assert first.has_permission(Permission.VIEW)
+        assert not first.has_permission(Permission.ADMIN)
+
+        calls = []
+        original = IdentityService.build_snapshot
+        monkeypatch.setattr(IdentityService, 'build_snapshot',
+                            staticmethod(lambda u: calls.append(1) or original(u)))
+        second = identity_service.load_user(user.id)
+        assert second.get_id() == str(user.id)
+        assert calls == []
+        assert second._user is None
+        assert second == user
+
+
+def test_deactivation_and_role_change_invalidate_snapshot(app):
+    """停用用户和角色权限变化提交后立即失效快照"""
+    with app.app_context():
+        user, role = _create_user()
+        assert identity_service.load_user(user.id).is_active
+
+        role.permissions = Permission.VIEW.value | Permission.COMMENT.value
+        db.session.commit()
+        assert identity_service.load_user(user.id).has_permission(Permission.COMMENT)
+
+        user.deactivate()
+        db.session.commit()
+        assert not identity_service.load_user(user.id).is_active
+
+
+def test_attribute_writes_go_to_orm_user(app):
+    """修改属性时按需加载完整用户并委托"""
+    with app.app_context():
+        user, _ = _create_user()
+        current = identity_service.load_user(user.id)
+        current.nickname = '新昵称'
+        db.session.commit()
+        assert current._user is not None
+        assert identity_service.load_user(user.id).nickname == '新昵称'
+
+
+def test_other_worker_reloads_snapshot_after_ttl(app, monkeypatch):
+    """其他 worker 提交的停用收不到失效，快照最迟在 IDENTITY_CACHE_TTL 后重新加载"""
+    with app.app_context():
+        user, _ = _create_user()
+        user_id = user.id
+        # 另一个 worker 的进程内缓存
+        monkeypatch.setattr('app.services.identity.tagged_cache',
+                            TaggedCache(backend=BoundedCache(default_timeout=3600)))
+        assert identity_service.get_snapshot(user_id).is_active
+
+        # 停用由其他进程提交：直接写库，不经过本进程的提交事件
+        with db.engine.begin() as conn:
+            conn.execute(User.__table__.update().where(User.id == user_id).values(is_active=False))
+        db.session.expire_all()
+        assert identity_service.get_snapshot(user_id).is_active
+
+        later = time.monotonic() + 61
+        monkeypatch.setattr(cache_module, 'time', SimpleNamespace(monotonic=lambda: later))
+        assert not identity_service.get_snapshot(user_id).is_active
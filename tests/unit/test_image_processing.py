@@ -0,0 +1,84 @@
+"""
+文件名：test_image_processing.py
+描述：异步图片处理与响应式变体单元测试
+作者：denny
+"""
+
+from io import BytesIO
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from app.models.image import UploadedImage, ImageStatus
+from app.services.image_processing import image_processing_service
+from app.utils.image_variants import generate_variants, is_variant
+
+
+def _image_file(width, height, name='photo.jpg', fmt='JPEG'):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color='red').save(buffer, fmt)
+    buffer.seek(0)
+    return FileStorage(stream=buffer, filename=name)
+
+
+def test_generate_variants_widths(tmp_path):
+    """按配置宽度生成 WebP/JPEG 变体，不放大原图"""
+    source = tmp_path / 'large.jpg'
+    Image.new('RGB', (2000, 1000), color='blue').save(source, 'JPEG')
+
+    result = generate_variants(str(source), str(tmp_path), (480, 960, 1600))
+    assert (result['width'], result['height']) == (2000, 1000)
+    sizes = sorted({(variant['width'], variant['height']) for variant in result['variants']})
+    assert sizes == [(480, 240), (960, 480), (1600, 800)]
+    assert {variant['format'] for variant in result['variants']} == {'webp', 'jpg'}
+    for variant in result['variants']:
+        assert is_variant(variant['filename'])
+        with Image.open(tmp_path / variant['filename']) as img:
+            assert img.size == (variant['width'], variant['height'])
+    with Image.open(tmp_path / result['thumbnail']) as img:
+        assert img.size == (300, 300)
+
+    small = tmp_path / 'small.png'
+    Image.new('RGBA', (300, 200), color=(0, 0, 255, 128)).save(small, 'PNG')
+    result = generate_variants(str(small), str(tmp_path), (480, 960, 1600))
+    assert {variant['width'] for variant in result['variants']} == {300}
+
+
+def test_upload_stores_original_and_records_variants(app, upload_folder):
+    """原图原样保存，处理完成后记录变体"""
+    with app.app_context():
+        image = image_processing_service.store_upload(_image_file(1200, 800))
+        refreshed = UploadedImage.query.filter_by(filename=image.filename).first()
+        assert refreshed.status == ImageStatus.READY
+        assert (refreshed.width, refreshed.height) == (1200, 800)
+        assert sorted({variant['width'] for variant in refreshed.variants}) == [480, 960, 1200]
+
+        assert image_processing_service.delete(image.filename)
+        assert UploadedImage.query.filter_by(filename=image.filename).first() is None
+
+
+def test_invalid_image_marked_failed(app, upload_folder):
+    """无法解码的图片标记为失败，原图保留"""
+    with app.app_context():
+        image = image_processing_service.store_upload(
+            FileStorage(stream=BytesIO(b'not an image'), filename='broken.jpg')
+        )
+        refreshed = UploadedImage.query.filter_by(filename=image.filename).first()
+        assert refreshed.status == ImageStatus.FAILED
+
+        html = f'<p><img alt="broken" src="/uploads/images/{image.filename}"></p>'
+        assert image_processing_service.responsive_html(html) == html
+
+
+def test_responsive_html_rewrites_uploaded_images(app, upload_folder):
+    """文章 HTML 中的上传图片补充 srcset/width/height，外部图片保持不变"""
+    with app.app_context():
+        image = image_processing_service.store_upload(_image_file(1000, 500))
+        external = '<img src="https://example.com/a.png" alt="外部">'
+        html = f'<p><img alt="示例" src="/uploads/images/{image.filename}"></p>{external}'
+
+        result = image_processing_service.responsive_html(html)
+        assert '<picture><source type="image/webp"' in result
+        assert 'srcset="/uploads/images/' in result
+        assert 'width="1000" height="500"' in result
+        assert 'alt="示例"' in result
+        assert external in result
+        assert f'src="/uploads/images/{image.filename}"' not in result
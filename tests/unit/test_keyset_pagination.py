@@ -0,0 +1,95 @@
+"""
+文件名：test_keyset_pagination.py
+描述：游标分页单元测试
+作者：denny
+"""
+
+from datetime import datetime
+import pytest
+from sqlalchemy import event
+from app.extensions import db
+from app.models.post import Post, PostStatus
+from app.models.user import User
+from app.utils.pagination import KeysetPagination, InvalidCursor, encode_cursor, decode_cursor
+
+TITLE_PREFIX = '游标分页测试文章'
+
+
+def _seed(count=7):
+    """创建创建时间相同的文章，验证以 id 作为决胜列"""
+    author = User.query.filter_by(username='admin').first()
+    for i in range(count):
+        title = f'{TITLE_PREFIX} {i}'
+        if not Post.query.filter_by(title=title).first():
+            db.session.add(Post(title=title, content='内容', author=author,
+                                status=PostStatus.PUBLISHED, created_at=datetime(2003, 1, 1)))
+    db.session.commit()
+
+
+def _query():
+    return Post.query.filter(Post.title.like(f'{TITLE_PREFIX}%'))
+
+
+def _paginate(**kwargs):
+    return KeysetPagination(_query(), 3, columns=(Post.created_at, Post.id),
+                            key_attrs=('created_at', 'id'), **kwargs)
+
+
+def test_cursor_round_trip_and_tamper_detection(app):
+    """令牌可还原排序键，篡改后拒绝"""
+    with app.app_context():
+        values = [True, datetime(2024, 3, 1, 12, 30), 42]
+        token = encode_cursor(values)
+        assert decode_cursor(token) == [1, datetime(2024, 3, 1, 12, 30), 42]
+
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB'))
+        with pytest.raises(InvalidCursor):
+            decode_cursor('not-a-cursor')
+
+
+def test_cursor_walk_matches_offset_order(app):
+    """沿游标逐页遍历与 OFFSET 排序结果一致，可向前翻页"""
+    with app.app_context():
+        _seed()
+        expected = [post.id for post in _query().order_by(Post.created_at.desc(), Post.id.desc())]
+
+        seen, pages, cursor = [], [], None
+        while True:
+            page = _paginate(cursor=cursor) if cursor else _paginate(page=1)
+            pages.append(page)
+            seen.extend(post.id for post in page.items)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        assert seen == expected
+
+        previous = _paginate(before=pages[-1].prev_cursor)
+        assert [post.id for post in previous.items] == [post.id for post in pages[-2].items]
+
+
+def test_page_numbers_use_cached_cursors(app):
+    """顺序翻页时第 2 页直接使用缓存的游标，不再跳过行"""
+    with app.app_context():
+        _seed()
+        expected = [post.id for post in _query().order_by(Post.created_at.desc(), Post.id.desc())]
+        first = _paginate(page=1, cache_key='keyset_test')
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((' '.join(statement.split()), parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            second = _paginate(page=2, cache_key='keyset_test')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+        assert [post.id for post in first.items + second.items] == expected[:6]
+        # Post.tags 为 joined 加载，查询包在子查询中，SQLite 总会渲染 LIMIT ? OFFSET ?；
+        # 游标路径按排序键条件定位，绑定的偏移量为 0
+        listing = [(statement, parameters) for statement, parameters in statements
+                   if 'posts.id < ?' in statement]
+        assert listing
+        assert all(parameters[-1] == 0 for statement, parameters in listing if 'OFFSET ?' in statement)
+        assert second.total == first.total
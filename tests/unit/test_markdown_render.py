@@ -0,0 +1,105 @@
+"""
+文件名：test_markdown_render.py
+描述：Markdown 渲染缓存服务单元测试
+作者：denny
+"""
+
+import os
+from app.services import markdown_render
+from app.services.markdown_render import MarkdownRenderService, RENDERER_VERSION
+
+SOURCE = '# 标题\n\n## 小节\n\n正文 **加粗**\n\n```python\nprint("hi")\n```\n'
+
+
+def _counting_renderer(monkeypatch):
+    """替换底层渲染函数并统计调用次数"""
+    calls = []
+    original = markdown_render.render_markdown
+
+    def render(text):
+        calls.append(text)
+        return original(text)
+
+    monkeypatch.setattr(markdown_render, 'render_markdown', render)
+    return calls
+
+
+def test_render_once_per_content(app, monkeypatch):
+    """相同内容只渲染一次，并同时返回目录"""
+    with app.app_context():
+        calls = _counting_renderer(monkeypatch)
+        service = MarkdownRenderService(max_entries=8)
+
+        first = service.render(SOURCE)
+        second = service.render(SOURCE)
+
+        assert len(calls) == 1
+        assert first is second
+        assert '<h1' in first.html
+        assert [item['level'] for item in first.toc] == [1, 2]
+        assert [item['text'] for item in first.toc] == ['标题', '小节']
+
+
+def test_lru_is_bounded(app, monkeypatch):
+    """超出容量时淘汰最久未使用的条目"""
+    with app.app_context():
+        calls = _counting_renderer(monkeypatch)
+        service = MarkdownRenderService(max_entries=2)
+
+        service.render('# a')
+        service.render('# b')
+        service.render('# a')
+        service.render('# c')
+        service.render('# b')
+
+        assert calls == ['# a', '# b', '# c', '# b']
+
+
+def test_disk_cache_survives_restart(app, monkeypatch, tmp_path):
+    """磁盘缓存在新实例（模拟 worker 重启）中仍然有效"""
+    with app.app_context():
+        calls = _counting_renderer(monkeypatch)
+        MarkdownRenderService(cache_dir=str(tmp_path)).render(SOURCE)
+        result = MarkdownRenderService(cache_dir=str(tmp_path)).render(SOURCE)
+
+        assert len(calls) == 1
+        assert '<h1' in result.html
+        key = MarkdownRenderService.cache_key(SOURCE)
+        assert (tmp_path / key[:2] / f'{key}.json').exists()
+
+
+def test_cache_key_includes_renderer_version(monkeypatch):
+    """渲染器版本变化时缓存键随之变化"""
+    key = MarkdownRenderService.cache_key(SOURCE)
+    monkeypatch.setattr(markdown_render, 'RENDERER_VERSION', RENDERER_VERSION + '-next')
+    assert MarkdownRenderService.cache_key(SOURCE) != key
+
+
+def test_disk_cache_is_pruned_to_limit(app, tmp_path):
+    """磁盘缓存超出上限时删除最旧的文件"""
+    with app.app_context():
+        service = MarkdownRenderService(cache_dir=str(tmp_path), disk_max_files=100)
+        paths = []
+        for i in range(12):
+            service.render(f'# 标题 {i}')
+            key = MarkdownRenderService.cache_key(f'# 标题 {i}')
+            paths.append(tmp_path / key[:2] / f'{key}.json')
+        assert len(list(tmp_path.rglob('*.json'))) == 12
+
+        # 显式设置修改时间，保证清理顺序确定
+        for i, path in enumerate(paths):
+            if path.exists():
+                os.utime(path, (1000 + i, 1000 + i))
+        service.disk_max_files = 5
+        service.prune_disk()
+
+        assert len(list(tmp_path.rglob('*.json'))) == 5
+        assert paths[-1].exists()
+
+
+def test_preview_render_skips_disk(app, tmp_path):
+    """persist=False 的渲染只进入内存缓存"""
+    with app.app_context():
+        service = MarkdownRenderService(cache_dir=str(tmp_path))
+        assert '<h1' in service.render_html(SOURCE, persist=False)
+        assert list(tmp_path.rglob('*.json')) == []
@@ -0,0 +1,70 @@
+"""
+文件名：test_neighbours.py
+描述：文章邻接索引单元测试
+作者：denny
+"""
+
+import uuid
+from datetime import datetime
+from app.extensions import db
+from app.models.post import Post, PostStatus
+from app.models.user import User
+from app.services.neighbours import NeighbourIndexService, neighbour_index_service
+
+
+def _create_post(created_at, status=PostStatus.PUBLISHED, is_private=False):
+    post = Post(
+        title=f'导航测试文章-{uuid.uuid4().hex[:8]}',
+        content='导航测试内容',
+        author=User.query.filter_by(username='admin').first(),
+        status=status,
+        is_private=is_private,
+        created_at=created_at
+    )
+    db.session.add(post)
+    db.session.commit()
+    return post
+
+
+def test_prev_next_follow_publish_time(app):
+    """按发布时间定位上一篇和下一篇，跳过草稿和私密文章"""
+    with app.app_context():
+        neighbour_index_service.rebuild()
+        older = _create_post(datetime(1990, 1, 1))
+        _create_post(datetime(1990, 1, 2), status=PostStatus.DRAFT)
+        _create_post(datetime(1990, 1, 3), is_private=True)
+        current = _create_post(datetime(1990, 1, 4))
+        newer = _create_post(datetime(1990, 1, 5))
+
+        assert neighbour_index_service.get_prev(current).id == older.id
+        assert neighbour_index_service.get_next(current).id == newer.id
+        assert neighbour_index_service.get_next(older).id == current.id
+
+
+def test_index_updates_incrementally(app, monkeypatch):
+    """发布、撤回和删除文章后增量调整索引，不重新查询数据库"""
+    with app.app_context():
+        neighbour_index_service.rebuild()
+        first = _create_post(datetime(1991, 3, 1))
+        draft = _create_post(datetime(1991, 3, 2), status=PostStatus.DRAFT)
+        last = _create_post(datetime(1991, 3, 3))
+        assert neighbour_index_service.get_next(first).id == last.id
+
+        calls = []
+        original = NeighbourIndexService._load
+        monkeypatch.setattr(NeighbourIndexService, '_load',
+                            lambda self: calls.append(1) or original(self))
+
+        draft.status = PostStatus.PUBLISHED
+        db.session.commit()
+        assert neighbour_index_service.get_next(first).id == draft.id
+
+        draft.status = PostStatus.DRAFT
+        db.session.commit()
+        assert neighbour_index_service.get_next(first).id == last.id
+
+        db.session.delete(last)
+        db.session.commit()
+        following = neighbour_index_service.get_next(first)
+        assert following is None or following.created_at > datetime(1991, 3, 3)
+        assert calls == []
@@ -0,0 +1,116 @@
+"""
+文件名：test_operation_log.py
+描述：操作日志批量写入与游标分页单元测试
+作者：denny
+"""
+
+import queue
+import uuid
+from datetime import datetime, timedelta, UTC
+from flask import g
+from app.extensions import db
+from app.models.operation_log import OperationLog
+from app.services.operation_log import OperationLogWriter, operation_log_service
+
+
+def _writer(app, queue_size=100):
+    writer = OperationLogWriter()
+    writer.app = app
+    writer.asynchronous = True
+    writer._queue = queue.Queue(maxsize=queue_size)
+    return writer
+
+
+def _row(user_id, action, created_at=None):
+    return {'user_id': user_id, 'action': action, 'target_type': 'user', 'target_id': user_id,
+            'details': None, 'result': 'success', 'ip_address': '127.0.0.1',
+            'created_at': created_at or datetime.now(UTC)}
+
+
+def test_background_writer_batches_rows(app, admin_user):
+    """后台线程批量写入，flush 后全部可见"""
+    action = f'batch-{uuid.uuid4().hex[:8]}'
+    with app.app_context():
+        writer = _writer(app)
+        for _ in range(25):
+            writer.submit(_row(admin_user.id, action))
+        writer.flush()
+
+        assert OperationLog.query.filter_by(action=action).count() == 25
+        stats = writer.stats()
+        assert stats['enqueued'] == 25 and stats['written'] == 25
+        assert stats['batches'] <= 25 and stats['depth'] == 0
+
+        writer.shutdown()
+        assert writer._thread is None
+
+
+def test_full_queue_falls_back_to_sync_write(app, admin_user):
+    """队列已满时由调用方同步写入，不丢日志"""
+    action = f'overflow-{uuid.uuid4().hex[:8]}'
+    with app.app_context():
+        writer = _writer(app, queue_size=1)
+        writer.put_timeout = 0
+        writer._ensure_worker = lambda: None  # 不启动后台线程，让队列保持已满
+
+        for _ in range(3):
+            writer.submit(_row(admin_user.id, action))
+        assert writer.stats()['overflow_sync'] == 2
+        assert OperationLog.query.filter_by(action=action).count() == 2
+
+        writer.flush()
+        assert OperationLog.query.filter_by(action=action).count() == 3
+
+
+def test_operation_logs_keyset_pagination(app, admin_user):
+    """后台日志列表按 (created_at, id) 倒序游标翻页"""
+    action = f'page-{uuid.uuid4().hex[:8]}'
+    with app.app_context():
+        now = datetime.now(UTC)
+        rows = [_row(admin_user.id, action, now - timedelta(minutes=i)) for i in range(5)]
+        # 两条日志时间相同，按 id 区分
+        rows.append(_row(admin_user.id, action, rows[2]['created_at']))
+        with db.engine.begin() as conn:
+            conn.execute(OperationLog.__table__.insert(), rows)
+
+        expected = [log.id for log in OperationLog.query.filter_by(action=action).order_by(
+            OperationLog.created_at.desc(), OperationLog.id.desc())]
+
+        seen, cursor = [], None
+        while True:
+            logs = operation_log_service.get_operation_logs(operation=action, per_page=2,
+                                                             cursor=cursor)
+            seen += [log.id for log in logs.items]
+            cursor = logs.next_cursor
+            if not cursor:
+                break
+        assert seen == expected
+
+        previous = operation_log_service.get_operation_logs(operation=action, per_page=2,
+                                                            before=logs.prev_cursor)
+        assert [log.id for log in previous.items] == expected[2:4]
+
+
+def test_admin_list_page_renders(app, client, admin_user, monkeypatch):
+    """后台日志列表渲染游标翻页链接和写入队列统计"""
+    action = f'render-{uuid.uuid4().hex[:8]}'
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(OperationLog.__table__.insert(),
+                         [_row(admin_user.id, action) for _ in range(3)])
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_user.id)
+        session['_fresh'] = True
+    # app 夹具在整个会话中保持同一个应用上下文，丢弃之前请求缓存在 g 中的用户
+    g.pop('_login_user', None)
+    monkeypatch.setitem(app.config, 'ITEMS_PER_PAGE', 2)
+    try:
+        response = client.get(f'/admin/operation_log/?operation={action}')
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        assert html.count(action) >= 2
+        assert '队列深度' in html and 'cursor=' in html
+    finally:
+        with client.session_transaction() as session:
+            session.clear()
+        g.pop('_login_user', None)
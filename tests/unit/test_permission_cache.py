@@ -0,0 +1,81 @@
+"""
+文件名：test_permission_cache.py
+描述：用户有效权限缓存单元测试
+作者：denny
+"""
+
+import time
+import uuid
+from types import SimpleNamespace
+from app.extensions import db
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.user import User
+from app.services.permission_cache import permission_cache_service
+from app.utils import cache as cache_module
+from app.utils.cache import BoundedCache
+from app.utils.tagged_cache import TaggedCache
+
+
+def _create_user_with_role(permissions):
+    suffix = uuid.uuid4().hex[:8]
+    role = Role(name=f'perm_role_{suffix}', permissions=permissions)
+    user = User(username=f'perm-{suffix}', email=f'perm-{suffix}@example.com')
+    user.set_password('password123')
+    user.roles = [role]
+    db.session.add_all([role, user])
+    db.session.commit()
+    return user, role
+
+
+def test_mask_is_or_of_roles(app):
+    """有效权限为各角色权限位的按位或，角色自身检查不再逐次计算"""
+    with app.app_context():
+        user, _ = _create_user_with_role(Permission.VIEW.value)
+        extra = Role(name=f'perm_extra_{uuid.uuid4().hex[:8]}', permissions=Permission.POST.value)
+        db.session.add(extra)
+        user.add_role(extra)
+        db.session.commit()
+
+        assert permission_cache_service.get_mask(user) == Permission.VIEW.value | Permission.POST.value
+        assert user.has_permission(Permission.POST)
+        assert not user.has_permission(Permission.ADMIN)
+
+
+def test_role_changes_invalidate_cached_mask(app):
+    """角色权限修改和角色移除提交后缓存失效"""
+    with app.app_context():
+        user, role = _create_user_with_role(Permission.VIEW.value)
+        assert not user.has_permission(Permission.MODERATE)
+
+        role.permissions = Permission.VIEW.value | Permission.MODERATE.value
+        db.session.commit()
+        assert user.has_permission(Permission.MODERATE)
+
+        user.remove_role(role)
+        assert not user.has_permission(Permission.VIEW)
+        db.session.commit()
+        assert not user.has_permission(Permission.VIEW)
+
+
+def test_other_worker_drops_revoked_permission_after_ttl(app, monkeypatch):
+    """其他 worker 撤销的权限收不到失效，缓存最迟在 PERMISSION_CACHE_TTL 后重新计算"""
+    with app.app_context():
+        user, role = _create_user_with_role(Permission.VIEW.value | Permission.POST.value)
+        # 另一个 worker 的进程内缓存
+        monkeypatch.setattr('app.services.permission_cache.tagged_cache',
+                            TaggedCache(backend=BoundedCache(default_timeout=3600)))
+        assert user.has_permission(Permission.POST)
+
+        # 撤销由其他进程提交：直接写库，不经过本进程的提交事件
+        with db.engine.begin() as conn:
+            conn.execute(Role.__table__.update().where(Role.id == role.id)
+                         .values(permissions=Permission.VIEW.value))
+        db.session.expire_all()
+        permission_cache_service.forget()
+        assert user.has_permission(Permission.POST)
+
+        later = time.monotonic() + 61
+        monkeypatch.setattr(cache_module, 'time', SimpleNamespace(monotonic=lambda: later))
+        permission_cache_service.forget()
+        assert not user.has_permission(Permission.POST)
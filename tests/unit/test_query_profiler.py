@@ -0,0 +1,71 @@
+"""
+文件名：test_query_profiler.py
+描述：请求级 SQL 统计与慢查询日志单元测试
+作者：denny
+"""
+
+import json
+import logging
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.extensions import db
+from app.services.query_profiler import QueryProfiler, query_profiler
+
+
+def test_server_timing_header(client, monkeypatch):
+    """开启时响应带有 db、render、total 三项 Server-Timing，关闭时不输出"""
+    monkeypatch.setattr(query_profiler, 'server_timing', False)
+    assert 'Server-Timing' not in client.get('/').headers
+
+    monkeypatch.setattr(query_profiler, 'server_timing', True)
+    response = client.get('/')
+    timing = response.headers.get('Server-Timing', '')
+    assert 'db;dur=' in timing and 'queries"' in timing
+    assert 'render;dur=' in timing
+    assert 'total;dur=' in timing
+
+
+def test_repeated_statements_flagged(app):
+    """同一语句重复执行达到阈值时记为疑似 N+1，并汇总到端点统计"""
+    # 数据库事件由已注册的全局实例写入请求统计，这里用独立实例汇总，避免影响全局统计
+    profiler = QueryProfiler()
+    profiler.repeat_threshold = 3
+    profiler.server_timing = True
+    with app.test_request_context('/profiler-test'):
+        profiler.start_request()
+        for value in range(4):
+            db.session.execute(text('SELECT :value'), {'value': value})
+        response = profiler.finish_request(app.response_class())
+
+    assert 'db;dur=' in response.headers['Server-Timing']
+    stats = profiler.endpoint_stats()
+    assert stats[0]['endpoint'] == '<unmatched>'
+    assert stats[0]['max_queries'] == 4
+    assert stats[0]['n_plus_one'] == 1
+
+
+def test_slow_query_logged_with_plan(app, caplog):
+    """超过阈值的查询以 JSON 记录语句和查询计划"""
+    threshold = query_profiler.slow_threshold
+    query_profiler.slow_threshold = 0
+    try:
+        with app.app_context(), caplog.at_level(logging.WARNING, logger='myblog.slow_query'):
+            db.session.execute(text('SELECT id FROM users WHERE username = :name'), {'name': 'admin'})
+    finally:
+        query_profiler.slow_threshold = threshold
+
+    records = [json.loads(record.getMessage()) for record in caplog.records
+               if record.name == 'myblog.slow_query']
+    record = next(item for item in records if 'FROM users' in item['statement'])
+    assert record['event'] == 'slow_query'
+    assert record['duration_ms'] >= 0
+    assert record['plan']
+
+
+def test_failed_statement_pops_timer(app):
+    """语句执行失败后连接上不残留开始时间"""
+    with app.app_context(), db.engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text('SELECT * FROM missing_table'))
+        assert conn.info.get('query_started') == []
@@ -0,0 +1,71 @@
+"""
+文件名：test_rate_limit.py
+描述：滑动窗口限流服务单元测试
+作者：denny
+"""
+
+import pytest
+from app.services.rate_limit import (
+    RateLimiterService, MemoryRateLimitStore, SQLiteRateLimitStore, rate_limiter_service
+)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def limiter(request, tmp_path):
+    """分别使用进程内和 SQLite 计数存储的限流服务"""
+    service = RateLimiterService()
+    service.policies = service._build_policies({'test': (3, 60)})
+    if request.param == 'sqlite':
+        service.store = SQLiteRateLimitStore(str(tmp_path / 'rate_limits.db'))
+    else:
+        service.store = MemoryRateLimitStore()
+    return service
+
+
+def test_limit_within_window(app, limiter):
+    """窗口内超过上限后拒绝，并给出 Retry-After"""
+    with app.test_request_context():
+        results = [limiter.check('test', key='1.2.3.4', now=600) for _ in range(4)]
+        assert [result.allowed for result in results] == [True, True, True, False]
+        assert results[2].remaining == 0
+        assert results[3].headers()['Retry-After'] == '60'
+        assert limiter.check('test', key='5.6.7.8', now=600).allowed
+
+
+def test_previous_window_is_weighted(app, limiter):
+    """上一窗口的计数按剩余比例计入，窗口过去后完全释放"""
+    with app.test_request_context():
+        for _ in range(3):
+            limiter.check('test', key='ip', now=600)
+        # 新窗口刚开始时上一窗口几乎全部计入
+        assert not limiter.check('test', key='ip', now=661).allowed
+        # 新窗口过半时上一窗口只计入一半
+        assert limiter.check('test', key='ip', now=690).allowed
+        assert limiter.check('test', key='ip', now=900).allowed
+
+
+def test_sqlite_store_is_shared(app, tmp_path):
+    """两个 SQLite 存储实例（模拟两个 worker）共用同一份计数"""
+    path = str(tmp_path / 'shared.db')
+    first, second = RateLimiterService(), RateLimiterService()
+    for service in (first, second):
+        service.policies = service._build_policies({'test': (2, 60)})
+        service.store = SQLiteRateLimitStore(path)
+    with app.test_request_context():
+        assert first.check('test', key='ip', now=600).allowed
+        assert second.check('test', key='ip', now=600).allowed
+        assert not first.check('test', key='ip', now=600).allowed
+
+
+@pytest.mark.parametrize('url', ['/blog/login', '/auth/login', '/admin/login'])
+def test_login_endpoints_are_limited(app, client, monkeypatch, url):
+    """所有登录入口的 POST 共用 login 策略，GET 不计数"""
+    monkeypatch.setitem(app.config, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(rate_limiter_service, 'store', MemoryRateLimitStore())
+    monkeypatch.setattr(rate_limiter_service, 'policies',
+                        rate_limiter_service._build_policies({'login': (2, 60)}))
+    form = {'username': 'nobody', 'password': 'wrong-password'}
+    assert client.get(url).status_code != 429
+    statuses = [client.post(url, data=form).status_code for _ in range(3)]
+    assert 429 not in statuses[:2]
+    assert statuses[2] == 429
@@ -0,0 +1,106 @@
+"""
+文件名：test_related_posts.py
+描述：相关文章预计算服务单元测试
+作者：denny
+"""
+
+import uuid
+from app.extensions import db
+from app.models.post import Post, PostStatus
+from app.models.related_post import RelatedPost
+from app.models.tag import Tag
+from app.models.user import User
+from app.services.related import related_posts_service
+
+
+def _create_tag():
+    tag = Tag(name=f'相关-{uuid.uuid4().hex[:8]}')
+    db.session.add(tag)
+    db.session.commit()
+    return tag
+
+
+def _create_post(tags, title=None):
+    # 标题互不相同，相似度只来自标签
+    post = Post(
+        title=title or uuid.uuid4().hex,
+        content='相关测试内容',
+        author=User.query.filter_by(username='admin').first(),
+        status=PostStatus.PUBLISHED,
+        tags=tags
+    )
+    db.session.add(post)
+    db.session.commit()
+    return post
+
+
+def _related_ids(post_id):
+    return [post.id for post in related_posts_service.get_related(post_id)]
+
+
+def _scores(post_id):
+    return {row.related_id: row.score for row in RelatedPost.query.filter_by(post_id=post_id)}
+
+
+def test_posts_sharing_tags_rank_first(app):
+    """共享标签越多的文章排名越靠前，无共同特征的文章不出现"""
+    with app.app_context():
+        python, flask, misc = _create_tag(), _create_tag(), _create_tag()
+        source = _create_post([python, flask])
+        close = _create_post([python, flask])
+        partial = _create_post([python])
+        unrelated = _create_post([misc])
+        _create_post([misc])
+
+        related_posts_service.rebuild()
+        related = _related_ids(source.id)
+        scores = _scores(source.id)
+        assert related.index(close.id) < related.index(partial.id)
+        assert scores[close.id] > scores[partial.id] > 0
+        assert unrelated.id not in related
+        assert source.id not in related
+
+
+def test_edit_recomputes_only_affected_posts(app):
+    """修改标签后只重算与之共享特征的文章"""
+    with app.app_context():
+        first_tag, second_tag = _create_tag(), _create_tag()
+        source = _create_post([first_tag])
+        neighbour = _create_post([first_tag])
+        other = _create_post([second_tag])
+        other_peer = _create_post([second_tag])
+        related_posts_service.rebuild()
+        assert _related_ids(source.id) == [neighbour.id]
+
+        source.tags = [second_tag]
+        db.session.commit()
+        # 提交后只记录待更新的文章
+        assert _related_ids(source.id) == [neighbour.id]
+        related_posts_service.process_pending()
+
+        assert other.id in _related_ids(source.id)
+        assert source.id not in _related_ids(neighbour.id)
+        assert other_peer.id in _related_ids(other.id)
+
+        # Post.tags 级联删除标签，先解除关联，避免删掉其他文章仍在使用的标签
+        other.tags = []
+        db.session.delete(other)
+        db.session.commit()
+        related_posts_service.process_pending()
+        assert RelatedPost.query.filter_by(related_id=other.id).count() == 0
+
+
+def test_new_post_joins_existing_results(app):
+    """新文章的相似度超过已有文章的第 K 名时并入其结果，不重算整个语料"""
+    with app.app_context():
+        tag = _create_tag()
+        first = _create_post([tag])
+        related_posts_service.rebuild()
+        assert _related_ids(first.id) == []
+        index = related_posts_service._index
+
+        second = _create_post([tag])
+        related_posts_service.process_pending()
+        assert related_posts_service._index is index
+        assert _related_ids(first.id) == [second.id]
+        assert _related_ids(second.id) == [first.id]
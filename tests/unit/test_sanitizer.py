@@ -0,0 +1,34 @@
+"""
+文件名：test_sanitizer.py
+描述：输入清理引擎单元测试
+作者：denny
+"""
+
+import pytest
+from app.utils.sanitizer import sanitizer
+
+
+@pytest.mark.parametrize('payload, fragment', [
+    # 标签拆开的危险片段，去标签后才拼出
+    ('java<b></b>script:alert(1)', 'javascript:'),
+    ('on<i></i>click=x', 'onclick='),
+    ('<a href="#" on<b></b>mouseover=x>链接</a>', 'onmouseover='),
+    # 危险协议前没有单词边界
+    ('xjavascript:alert(1)', 'javascript:'),
+    # 移除后再次拼出的片段
+    ('javajavascript:script:alert(1)', 'javascript:'),
+    ('ononclick=click=x', 'onclick='),
+])
+def test_split_dangerous_fragments_are_removed(payload, fragment):
+    assert fragment not in sanitizer.clean_comment(payload).lower()
+
+
+def test_clean_comment_strips_tags_and_escapes():
+    cleaned = sanitizer.clean_comment('<b>加粗</b>  5 < 6 &  <script>alert(1)</script>')
+    assert cleaned == '加粗 5 &lt; 6 &amp; alert(1)'
+
+
+def test_nested_angle_brackets_stay_escaped():
+    """去标签后残留的尖括号全部转义，不会拼出新标签"""
+    cleaned = sanitizer.clean_comment('<<b></b>script>alert(1)<</b>/script>')
+    assert '<' not in cleaned and '>' not in cleaned
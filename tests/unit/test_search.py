@@ -0,0 +1,65 @@
+"""
+文件名：test_search.py
+描述：全文检索服务单元测试
+作者：denny
+"""
+
+from app.models import Post, PostStatus, User
+from app.extensions import db
+from app.services.search import search_service, tokenize, build_match_query
+
+
+def test_tokenize_splits_cjk_into_bigrams():
+    """中文按二元切分，英文按单词切分并转小写"""
+    assert tokenize('Flask全文检索') == ['flask', '全文', '文检', '检索', '索']
+    assert tokenize('') == []
+
+
+def test_build_match_query():
+    """英文使用前缀匹配，中文片段转换为短语"""
+    assert build_match_query('Fla 全文检索') == '"fla"* "全文 文检 检索"'
+    assert build_match_query('"; DROP') == '"drop"*'
+    assert build_match_query('   ') == ''
+
+
+def _create_post(title, content, status=PostStatus.PUBLISHED):
+    """创建测试文章"""
+    author = User.query.filter_by(username='admin').first()
+    post = Post(title=title, content=content, author=author, status=status)
+    db.session.add(post)
+    db.session.commit()
+    return post
+
+
+def test_search_ranks_and_syncs_index(app, test_data):
+    """检索结果按相关度排序，文章修改和删除后索引同步"""
+    with app.app_context():
+        search_service.ensure_index()
+        in_title = _create_post('检索引擎原理', '倒排索引的基本结构')
+        in_body = _create_post('随笔一则', '今天研究了检索引擎的实现')
+        draft = _create_post('检索引擎草稿', '草稿内容', status=PostStatus.DRAFT)
+
+        ids, total = search_service.search_ids('检索引擎')
+        assert ids[:2] == [in_title.id, in_body.id]
+        assert draft.id not in ids
+        assert total >= 2
+
+        # 前缀匹配
+        ids, _ = search_service.search_ids('倒排')
+        assert in_title.id in ids
+
+        in_body.content = '与搜索无关的内容'
+        db.session.commit()
+        ids, _ = search_service.search_ids('检索引擎')
+        assert in_body.id not in ids
+
+        db.session.delete(in_title)
+        db.session.commit()
+        ids, _ = search_service.search_ids('检索引擎')
+        assert in_title.id not in ids
+
+        assert search_service.rebuild() == Post.query.count()
+
+        db.session.delete(in_body)
+        db.session.delete(db.session.merge(draft))
+        db.session.commit()
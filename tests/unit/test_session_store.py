@@ -0,0 +1,198 @@
+"""
+文件名：test_session_store.py
+描述：数据库会话接口单元测试
+作者：denny
+"""
+
+import uuid
+from datetime import datetime, timedelta, UTC
+from app.extensions import db
+from app.models.session import UserSession
+from app.models.user import User
+from app.services.session_store import DatabaseSessionInterface, session_store
+
+UA = 'pytest-agent'
+
+
+def _store():
+    store = DatabaseSessionInterface()
+    store.purge_every = 0
+    return store
+
+
+def _open(app, store, cookie=None, user_agent=UA):
+    headers = {'User-Agent': user_agent}
+    if cookie:
+        headers['Cookie'] = f"{app.config['SESSION_COOKIE_NAME']}={cookie}"
+    with app.test_request_context('/', headers=headers) as ctx:
+        return store.open_session(app, ctx.request)
+
+
+def _save(app, store, session, user_agent=UA):
+    """保存会话，返回新的 cookie 值（未设置 cookie 时为 None）"""
+    with app.test_request_context('/', headers={'User-Agent': user_agent}):
+        response = app.response_class()
+        store.save_session(app, session, response)
+    name = app.config['SESSION_COOKIE_NAME']
+    for header in response.headers.getlist('Set-Cookie'):
+        if header.startswith(f'{name}='):
+            value = header.split(';', 1)[0].split('=', 1)[1]
+            return value or None
+    return None
+
+
+def _row(sid):
+    return db.session.query(UserSession).filter_by(session_id=sid).first()
+
+
+def test_anonymous_session_not_persisted(app):
+    """未写入内容的会话不产生记录和 cookie"""
+    with app.app_context():
+        store = _store()
+        session = _open(app, store)
+        assert not session
+        before = UserSession.query.count()
+        assert _save(app, store, session) is None
+        assert UserSession.query.count() == before
+
+
+def test_write_only_when_changed(app):
+    """内容变化时写入；未变化的会话不写库也不重设 cookie"""
+    with app.app_context():
+        store = _store()
+        session = _open(app, store)
+        session['_user_id'] = '1'
+        session['cart'] = []
+        cookie = _save(app, store, session)
+        assert cookie
+
+        loaded = _open(app, store, cookie)
+        assert loaded['cart'] == [] and not loaded.new
+        assert _row(loaded.sid).user_id == 1
+        assert _save(app, store, loaded) is None
+
+        # 嵌套修改也能识别
+        loaded = _open(app, store, cookie)
+        loaded['cart'].append('book')
+        new_cookie = _save(app, store, loaded)
+        assert new_cookie and new_cookie != cookie
+        assert _open(app, store, new_cookie)['cart'] == ['book']
+
+
+def test_expiry_refreshed_with_coarse_granularity(app):
+    """过期时间只在超过续期粒度后刷新"""
+    with app.app_context():
+        store = _store()
+        session = _open(app, store)
+        session['value'] = 1
+        cookie = _save(app, store, session)
+        loaded = _open(app, store, cookie)
+
+        # 上次写入时间在粒度以内：不写
+        assert _save(app, store, loaded) is None
+
+        # 模拟上次写入已超过粒度
+        stale = loaded.record._replace(expiry=loaded.record.expiry - store.refresh_interval)
+        loaded.record = stale
+        assert _save(app, store, loaded)
+        db.session.expire_all()
+        assert _row(loaded.sid).expiry > stale.expiry
+
+
+def test_cached_snapshot_avoids_queries(app):
+    """缓存有效期内直接使用快照（含 UA 校验），过期后重新查库"""
+    with app.app_context():
+        store = _store()
+        session = _open(app, store)
+        session['value'] = 'cached'
+        cookie = _save(app, store, session)
+        sid = _open(app, store, cookie).sid
+
+        # 删除记录后，缓存命中仍可读取，说明没有查库
+        table = UserSession.__table__
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.session_id == sid))
+        assert _open(app, store, cookie)['value'] == 'cached'
+        assert not _open(app, store, cookie, user_agent='other-agent')
+
+        store.cache_ttl = 0
+        assert not _open(app, store, cookie)
+
+
+def test_revoked_session_not_resurrected(app):
+    """注销后的会话不可再用，也不会被写回"""
+    with app.app_context():
+        store = _store()
+        session = _open(app, store)
+        session['_user_id'] = '2'
+        cookie = _save(app, store, session)
+        loaded = _open(app, store, cookie)
+
+        assert store.revoke_user(2) >= 1
+        assert not _open(app, store, cookie)
+
+        loaded['value'] = 'late write'
+        assert _save(app, store, loaded) is None
+        db.session.expire_all()
+        assert not _row(loaded.sid).is_active
+
+
+def _user_with_sessions(app, count=2):
+    """创建用户并为其保存若干会话，返回 (用户, cookie 列表)"""
+    suffix = uuid.uuid4().hex[:8]
+    user = User(username=f'session-{suffix}', email=f'session-{suffix}@example.com')
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.commit()
+    cookies = []
+    for _ in range(count):
+        session = _open(app, session_store)
+        session['_user_id'] = str(user.id)
+        cookies.append(_save(app, session_store, session))
+    return user, cookies
+
+
+def test_password_change_and_deactivation_revoke_sessions(app):
+    """修改密码或停用账号提交后，该用户的已有会话全部失效"""
+    with app.app_context():
+        user, cookies = _user_with_sessions(app)
+        assert all(_open(app, session_store, cookie) for cookie in cookies)
+
+        user.set_password('new-password-456')
+        db.session.commit()
+        assert not any(_open(app, session_store, cookie) for cookie in cookies)
+
+        user, cookies = _user_with_sessions(app)
+        user.deactivate()
+        db.session.commit()
+        assert not any(_open(app, session_store, cookie) for cookie in cookies)
+
+
+def test_own_password_change_keeps_current_session(app):
+    """用户在当前会话中修改自己的密码时只注销其他会话"""
+    with app.app_context():
+        user, (current, other) = _user_with_sessions(app)
+        headers = {'User-Agent': UA, 'Cookie': f"{app.config['SESSION_COOKIE_NAME']}={current}"}
+        ctx = app.test_request_context('/', headers=headers)
+        ctx.session = session_store.open_session(app, ctx.request)
+        with ctx:
+            user.set_password('new-password-456')
+            db.session.commit()
+
+        assert _open(app, session_store, current)
+        assert not _open(app, session_store, other)
+
+
+def test_cleanup_expired_in_batches(app):
+    """过期会话分批删除"""
+    with app.app_context():
+        past = datetime.now(UTC) - timedelta(days=1)
+        for i in range(7):
+            db.session.add(UserSession(session_id=f'expired-{i}', data='{}', expiry=past))
+        db.session.add(UserSession(session_id='alive', data='{}',
+                                   expiry=datetime.now(UTC) + timedelta(days=1)))
+        db.session.commit()
+
+        assert UserSession.cleanup_expired(batch_size=3) >= 7
+        assert UserSession.query.filter(UserSession.session_id.like('expired-%')).count() == 0
+        assert UserSession.query.filter_by(session_id='alive').count() == 1
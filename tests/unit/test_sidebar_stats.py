@@ -0,0 +1,74 @@
+"""
+文件名：test_sidebar_stats.py
+描述：侧边栏统计服务单元测试
+作者：denny
+"""
+
+from app.models import Post, PostStatus, Category, Tag
+from app.extensions import db
+from app.services.sidebar import SidebarStatsService
+
+
+def test_counts_match_per_item_queries(app, test_data):
+    """分组统计结果应与逐个COUNT查询一致"""
+    with app.app_context():
+        service = SidebarStatsService()
+        service.invalidate()
+        categories = Category.query.all()
+        tags = Tag.query.all()
+
+        category_counts, tag_counts = service.get_post_counts(categories, tags)
+
+        for category in categories:
+            expected = Post.query.filter(
+                Post.category_id == category.id,
+                Post.status.in_([PostStatus.PUBLISHED, PostStatus.ARCHIVED])
+            ).count()
+            assert category_counts[category.id] == expected
+
+        for tag in tags:
+            expected = Post.query.filter(
+                Post.tags.any(id=tag.id),
+                Post.status.in_([PostStatus.PUBLISHED, PostStatus.ARCHIVED])
+            ).count()
+            assert tag_counts[tag.id] == expected
+
+
+def test_post_commit_refreshes_counts(app, test_data):
+    """文章状态变化提交后（整页缓存钩子失效 listing 标签）返回新的统计"""
+    with app.app_context():
+        service = SidebarStatsService()
+        service.invalidate()
+        post = Post.query.filter_by(title='测试文章').first()
+        category_id = post.category_id
+
+        post.status = PostStatus.DRAFT
+        db.session.commit()
+        before = service.get_category_counts().get(category_id, 0)
+
+        post.status = PostStatus.PUBLISHED
+        db.session.commit()
+
+        assert service.get_category_counts().get(category_id, 0) == before + 1
+        assert service.get_category_counts(include_archived=False).get(category_id, 0) == before + 1
+
+
+def test_invalidate_refreshes_counts(app, test_data):
+    """绕过 ORM 的修改不触发提交钩子，失效缓存前读取的是缓存数据"""
+    with app.app_context():
+        service = SidebarStatsService()
+        post = Post.query.filter_by(title='测试文章').first()
+        post.status = PostStatus.DRAFT
+        db.session.commit()
+        before = service.get_category_counts().get(post.category_id, 0)
+
+        with db.engine.begin() as conn:
+            conn.execute(Post.__table__.update().where(Post.id == post.id)
+                         .values(status=PostStatus.PUBLISHED))
+        db.session.expire_all()
+
+        # 未失效前读取的是缓存数据
+        assert service.get_category_counts().get(post.category_id, 0) == before
+
+        service.invalidate()
+        assert service.get_category_counts().get(post.category_id, 0) == before + 1
@@ -0,0 +1,76 @@
+"""
+文件名：test_tagged_cache.py
+描述：带依赖标签的缓存单元测试
+作者：denny
+"""
+
+from app.utils.cache import BoundedCache
+from app.utils.tagged_cache import TaggedCache, CacheTags
+
+
+def _make_cache():
+    return TaggedCache(backend=BoundedCache(default_timeout=60, threshold=100))
+
+
+def test_invalidate_tag_hides_dependent_entries(app):
+    """失效标签后，依赖该标签的缓存全部不可达"""
+    with app.app_context():
+        cache = _make_cache()
+        cache.set('post_detail', 'detail', tags=[CacheTags.post(42)])
+        cache.set('tag_list', 'list', tags=[CacheTags.tag(7), CacheTags.post(42)])
+        cache.set('home', 'home', tags=[CacheTags.LISTING])
+
+        cache.invalidate(CacheTags.post(42))
+
+        assert cache.get('post_detail') is None
+        assert cache.get('tag_list') is None
+        assert cache.get('home') == 'home'
+
+
+def test_get_or_set_recomputes_after_invalidation(app):
+    """失效后重新计算，未失效时直接命中"""
+    with app.app_context():
+        cache = _make_cache()
+        calls = []
+
+        def load():
+            calls.append(1)
+            return len(calls)
+
+        tags = [CacheTags.category(3)]
+        assert cache.get_or_set('category_posts', load, tags=tags) == 1
+        assert cache.get_or_set('category_posts', load, tags=tags) == 1
+
+        cache.invalidate(CacheTags.category(3))
+        assert cache.get_or_set('category_posts', load, tags=tags) == 2
+        assert len(calls) == 2
+
+
+def test_evicted_generation_does_not_revive_entries(app):
+    """标签计数器被淘汰后，旧缓存不会因计数器重建而重新生效"""
+    with app.app_context():
+        backend = BoundedCache(default_timeout=60, threshold=100)
+        cache = TaggedCache(backend=backend)
+        cache.set('archive', 'old', tags=[CacheTags.ARCHIVE])
+
+        backend.delete(TaggedCache.GENERATION_KEY.format(CacheTags.ARCHIVE))
+        cache.set('other', 'new', tags=[CacheTags.ARCHIVE])
+
+        assert cache.get('archive') is None
+        assert cache.get('other') == 'new'
+
+
+def test_invalidation_during_compute_is_not_masked(app):
+    """计算期间发生失效时，写入的旧值不可达，下次读取重新计算"""
+    with app.app_context():
+        cache = _make_cache()
+        tags = [CacheTags.post(9)]
+
+        def load_stale():
+            cache.invalidate(CacheTags.post(9))
+            return 'stale'
+
+        assert cache.get_or_set('post_detail', load_stale, tags=tags) == 'stale'
+        assert cache.get('post_detail') is None
+        assert cache.get_or_set('post_detail', lambda: 'fresh', tags=tags) == 'fresh'
+        assert cache.get('post_detail') == 'fresh'
@@ -0,0 +1,91 @@
+"""
+文件名：test_upload_storage.py
+描述：内容寻址上传存储单元测试
+作者：denny
+"""
+
+import hashlib
+import os
+import uuid
+from io import BytesIO
+from werkzeug.datastructures import FileStorage
+from app.models.upload import Upload
+from app.services.upload import upload_service
+from app.utils.file import store_stream
+
+
+class _ChunkCountingStream(BytesIO):
+    """记录最大单次读取长度的流"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.max_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.max_read = max(self.max_read, len(chunk))
+        return chunk
+
+
+def _file(content, name='shot.png'):
+    return FileStorage(stream=BytesIO(content), filename=name)
+
+
+def test_store_stream_hashes_while_streaming(tmp_path):
+    """边读边哈希，按哈希分片保存，相同内容只保存一份"""
+    content = os.urandom(300 * 1024)
+    stream = _ChunkCountingStream(content)
+    sha256, path, size = store_stream(stream, str(tmp_path), 'bin', chunk_size=64 * 1024)
+
+    assert sha256 == hashlib.sha256(content).hexdigest()
+    assert path == f'{sha256[:2]}/{sha256[2:4]}/{sha256}.bin'
+    assert size == len(content)
+    assert stream.max_read <= 64 * 1024
+    assert (tmp_path / path).read_bytes() == content
+
+    store_stream(BytesIO(content), str(tmp_path), 'bin')
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.part')]
+
+
+def test_duplicate_uploads_share_one_file(app, upload_folder):
+    """重复上传只增加引用计数，引用归零时删除文件"""
+    with app.app_context():
+        content = f'截图-{uuid.uuid4().hex}'.encode('utf-8')
+        first, created = upload_service.store(_file(content))
+        second, created_again = upload_service.store(_file(content, 'copy.png'))
+
+        assert created and not created_again
+        assert first.path == second.path
+        assert Upload.query.filter_by(sha256=first.sha256).one().ref_count == 2
+
+        full_path = upload_service.full_path(first.path)
+        assert upload_service.release(first.path) == 1
+        assert os.path.exists(full_path)
+        assert upload_service.release(first.path) == 0
+        assert not os.path.exists(full_path)
+        assert Upload.query.filter_by(sha256=first.sha256).first() is None
+
+
+def test_same_content_with_other_extension_reuses_path(app, upload_folder):
+    """相同内容换扩展名上传时沿用已有文件，不留下多余副本"""
+    with app.app_context():
+        content = f'扩展名-{uuid.uuid4().hex}'.encode('utf-8')
+        first, _ = upload_service.store(_file(content, 'shot.png'))
+        second, created = upload_service.store(_file(content, 'shot.jpeg'))
+
+        assert not created
+        assert second.path == first.path
+        directory = os.path.dirname(upload_service.full_path(first.path))
+        assert os.listdir(directory) == [os.path.basename(first.path)]
+
+
+def test_paginate_from_index_table(app, upload_folder):
+    """文件列表按索引表游标分页"""
+    with app.app_context():
+        for _ in range(3):
+            upload_service.store(_file(f'分页-{uuid.uuid4().hex}'.encode('utf-8'), 'page.txt'))
+
+        first_page = upload_service.paginate(per_page=2, mime_prefix=None)
+        assert len(first_page.items) == 2 and first_page.has_next
+        second_page = upload_service.paginate(per_page=2, cursor=first_page.next_cursor, mime_prefix=None)
+        assert second_page.items[0].id < first_page.items[-1].id
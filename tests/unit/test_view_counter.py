@@ -0,0 +1,121 @@
+"""
+文件名：test_view_counter.py
+描述：浏览量缓冲计数单元测试
+作者：denny
+"""
+
+import threading
+from app.models import Post
+from app.extensions import db
+from app.services import view_counter
+from app.services.view_counter import (
+    MemoryViewBuffer, SQLiteViewBuffer, ViewCounterService, view_counter_service
+)
+
+
+def test_memory_buffer_accumulates_and_drains():
+    """进程内缓冲区累加并清空"""
+    buffer = MemoryViewBuffer()
+    assert buffer.add(1) == 1
+    assert buffer.add(1) == 2
+    buffer.add(2, 3)
+    assert buffer.pending_total() == 5
+
+    assert buffer.drain() == {1: 2, 2: 3}
+    assert buffer.pending(1) == 0
+    assert buffer.pending_total() == 0
+
+
+def test_sqlite_buffer_is_shared(tmp_path):
+    """SQLite 缓冲区可被多个实例共享"""
+    path = str(tmp_path / 'view_buffer.db')
+    first = SQLiteViewBuffer(path)
+    second = SQLiteViewBuffer(path)
+
+    first.add(7)
+    second.add(7)
+    assert first.pending(7) == 2
+
+    assert second.drain() == {7: 2}
+    assert first.pending_total() == 0
+
+
+def test_flush_applies_pending_views(app, test_data):
+    """落库后浏览量写入数据库，缓冲区清空"""
+    with app.app_context():
+        post = Post.query.filter_by(title='测试文章').first()
+        before = post.view_count or 0
+
+        view_counter_service.flush()
+        view_counter_service.buffer.add(post.id, 3)
+        assert view_counter_service.get_pending(post.id) == 3
+
+        assert view_counter_service.flush() == 1
+        assert view_counter_service.get_pending(post.id) == 0
+
+        db.session.expire_all()
+        assert db.session.get(Post, post.id).view_count == before + 3
+
+
+def _new_service(app, monkeypatch, **config):
+    """创建独立的计数服务（不注册真实的退出钩子）"""
+    registered = []
+    monkeypatch.setattr(view_counter.atexit, 'register', registered.append)
+    monkeypatch.setitem(app.extensions, 'view_counter', view_counter_service)
+    for key, value in config.items():
+        monkeypatch.setitem(app.config, key, value)
+    service = ViewCounterService()
+    service.init_app(app)
+    return service, registered
+
+
+def test_exit_hook_registered_once(app, monkeypatch):
+    """多次 init_app 只注册一次退出钩子"""
+    service, registered = _new_service(app, monkeypatch)
+    service.init_app(app)
+    assert registered == [service._flush_on_exit]
+
+
+def test_threshold_flush_runs_off_request_thread(app, monkeypatch):
+    """达到阈值时由后台线程落库，请求线程不执行 flush"""
+    service, _ = _new_service(app, monkeypatch, VIEW_COUNTER_FLUSH_THRESHOLD=3,
+                              VIEW_COUNTER_FLUSH_INTERVAL=60)
+    flushed = threading.Event()
+    threads = []
+
+    def fake_flush():
+        threads.append(threading.current_thread().name)
+        flushed.set()
+        return 0
+
+    monkeypatch.setattr(service, 'flush', fake_flush)
+    try:
+        for _ in range(3):
+            service.record(1)
+        assert flushed.wait(5)
+        assert threads == ['view-counter-flusher']
+    finally:
+        service._flush_on_exit()
+    assert service.buffer.pending(1) == 3
+
+
+def test_concurrent_hits_are_counted(app, monkeypatch):
+    """并发访问时命中计数不丢失"""
+    service, _ = _new_service(app, monkeypatch, VIEW_COUNTER_FLUSH_THRESHOLD=10 ** 6,
+                              VIEW_COUNTER_FLUSH_INTERVAL=60)
+    monkeypatch.setattr(service, 'flush', lambda: 0)
+
+    def hit():
+        for _ in range(500):
+            service.record(1)
+
+    workers = [threading.Thread(target=hit) for _ in range(8)]
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert service._hits == 4000
+        assert service.buffer.pending(1) == 4000
+    finally:
+        service._flush_on_exit()